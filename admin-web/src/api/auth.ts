@@ -1,4 +1,4 @@
-import client from './client'
+import client, { refreshToken, revokeSession } from './client'
 import type { LoginRequest, LoginResponse } from '../types/api'
 
 export const authApi = {
@@ -7,12 +7,10 @@ export const authApi = {
     return response.data
   },
 
-  refresh: async (): Promise<{ access_token: string; expires_in: number }> => {
-    const response = await client.post('/api/auth/refresh')
-    return response.data
+  refresh: async (): Promise<string | null> => {
+    return refreshToken()
   },
 
   logout: async (): Promise<void> => {
-    // 无需后端接口，清空本地 token 即可
+    revokeSession()
   },
-}
@@ -5,6 +5,7 @@ const BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000'
 
 // Token 存储键
 const TOKEN_KEY = 'access_token'
+const REFRESH_TOKEN_KEY = 'refresh_token'
 
 export const getToken = (): string | null => {
   return localStorage.getItem(TOKEN_KEY)
@@ -14,8 +15,17 @@ export const setToken = (token: string): void => {
   localStorage.setItem(TOKEN_KEY, token)
 }
 
+export const getRefreshToken = (): string | null => {
+  return localStorage.getItem(REFRESH_TOKEN_KEY)
+}
+
+export const setRefreshToken = (token: string): void => {
+  localStorage.setItem(REFRESH_TOKEN_KEY, token)
+}
+
 export const removeToken = (): void => {
   localStorage.removeItem(TOKEN_KEY)
+  localStorage.removeItem(REFRESH_TOKEN_KEY)
 }
 
 // 创建 axios 实例
@@ -55,14 +65,7 @@ client.interceptors.request.use(
 
 // 响应拦截器：统一错误处理
 client.interceptors.response.use(
-  (response) => {
-    // 检查 token 剩余天数，不足 1 天时自动刷新
-    const remainingDays = response.headers['x-token-remaining-days']
-    if (remainingDays && parseInt(remainingDays) < 1) {
-      refreshToken()
-    }
-    return response
-  },
+  (response) => response,
   async (error: AxiosError) => {
     const originalRequest = error.config as InternalAxiosRequestConfig & { _retry?: boolean }
 
@@ -113,25 +116,56 @@ client.interceptors.response.use(
   }
 )
 
-// 刷新 token
+// 刷新 token（刷新 token 每次使用后轮换，旧的随即失效）
+// 多个标签页共享 localStorage 中的刷新 token：用 Web Locks 串行化刷新，避免同一个 token 被并发使用
+const REFRESH_LOCK = 'admin-token-refresh'
+
+const withRefreshLock = <T>(task: () => Promise<T>): Promise<T> => {
+  if (typeof navigator !== 'undefined' && navigator.locks) {
+    return navigator.locks.request(REFRESH_LOCK, task)
+  }
+  return task()
+}
+
 export const refreshToken = async (): Promise<string | null> => {
-  try {
-    const response = await axios.post(
-      `${BASE_URL}/api/auth/refresh`,
-      {},
-      {
-        headers: {
-          Authorization: `Bearer ${getToken()}`,
-        },
-      }
-    )
-    const newToken = response.data.access_token
-    setToken(newToken)
-    return newToken
-  } catch {
-    removeToken()
+  const seenRefreshToken = getRefreshToken()
+  if (!seenRefreshToken) {
     return null
   }
+  return withRefreshLock(async () => {
+    const storedRefreshToken = getRefreshToken()
+    if (!storedRefreshToken) {
+      return null
+    }
+    if (storedRefreshToken !== seenRefreshToken) {
+      // 等锁期间其他标签页已完成刷新，直接使用新 token
+      return getToken()
+    }
+    try {
+      const response = await axios.post(`${BASE_URL}/api/auth/refresh`, {
+        refresh_token: storedRefreshToken,
+      })
+      const newToken = response.data.access_token
+      setToken(newToken)
+      setRefreshToken(response.data.refresh_token)
+      return newToken
+    } catch {
+      // 不支持 Web Locks 时可能与其他标签页并发刷新：对方已写入新 token 则沿用，不清除登录状态
+      if (getRefreshToken() !== storedRefreshToken) {
+        return getToken()
+      }
+      removeToken()
+      return null
+    }
+  })
+}
+
+// 退出登录：吊销服务端会话（失败不影响本地退出）
+export const revokeSession = (): void => {
+  const storedRefreshToken = getRefreshToken()
+  if (storedRefreshToken) {
+    axios.post(`${BASE_URL}/api/auth/logout`, { refresh_token: storedRefreshToken }).catch(() => {})
+  }
 }
 
 export default client
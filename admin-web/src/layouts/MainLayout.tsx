@@ -19,6 +19,7 @@ import {
 } from '@ant-design/icons'
 import { useAuthStore } from '../store/authStore'
 import { useAppStore } from '../store/appStore'
+import { subscribeEvents } from '../api/events'
 
 const { Header, Sider, Content } = Layout
 const { Text } = Typography
@@ -75,10 +76,21 @@ const MainLayout: React.FC = () => {
   const navigate = useNavigate()
   const location = useLocation()
   const { user, logout } = useAuthStore()
-  const { sidebarCollapsed, unreadNotifications, toggleSidebar } = useAppStore()
+  const { sidebarCollapsed, unreadNotifications, toggleSidebar, setUnreadNotifications } = useAppStore()
 
   const [selectedKeys, setSelectedKeys] = useState<string[]>([])
 
+  // 未读数由实时事件维护：连接（含重连）时下发当前值，之后每条新通知加一
+  useEffect(() => {
+    return subscribeEvents((type, data) => {
+      if (type === 'ready') {
+        setUnreadNotifications(Number(data.unread_count) || 0)
+      } else if (type === 'notification_created') {
+        setUnreadNotifications(useAppStore.getState().unreadNotifications + 1)
+      }
+    })
+  }, [setUnreadNotifications])
+
   useEffect(() => {
     const pathname = location.pathname
     const matched = menuItems.find((item) => pathname.startsWith(item.key))
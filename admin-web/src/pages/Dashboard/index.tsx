@@ -13,6 +13,7 @@ import {
 import { useNavigate } from 'react-router-dom'
 import dayjs from 'dayjs'
 
+import { subscribeEvents } from '../../api/events'
 import { workbenchApi } from '../../api/workbench'
 import type {
   WorkbenchAssignmentItem,
@@ -27,6 +28,8 @@ import './style.css'
 
 const { Title, Text } = Typography
 
+const WORKBENCH_REFRESH_DEBOUNCE_MS = 500
+
 const weekdayLabels = ['周日', '周一', '周二', '周三', '周四', '周五', '周六']
 
 const DashboardPage: React.FC = () => {
@@ -35,8 +38,10 @@ const DashboardPage: React.FC = () => {
   const [data, setData] = useState<WorkbenchResponse | null>(null)
   const [courseFormOpen, setCourseFormOpen] = useState(false)
 
-  const fetchData = async () => {
-    setLoading(true)
+  const fetchData = async (showLoading = true) => {
+    if (showLoading) {
+      setLoading(true)
+    }
     try {
       const response = await workbenchApi.get()
       setData(response)
@@ -49,6 +54,21 @@ const DashboardPage: React.FC = () => {
     fetchData()
   }, [])
 
+  // 课程状态变化、缴费预警或需要 resync 时后台刷新工作台（同一批事件合并为一次请求）
+  useEffect(() => {
+    let timer: ReturnType<typeof setTimeout> | undefined
+    const unsubscribe = subscribeEvents((type) => {
+      if (type === 'course_status_changed' || type === 'payment_alert' || type === 'resync') {
+        clearTimeout(timer)
+        timer = setTimeout(() => fetchData(false), WORKBENCH_REFRESH_DEBOUNCE_MS)
+      }
+    })
+    return () => {
+      clearTimeout(timer)
+      unsubscribe()
+    }
+  }, [])
+
   const today = dayjs(data?.today || undefined)
   const todayText = `${today.format('M月D日')} ${weekdayLabels[today.day()]}`
 
@@ -112,7 +132,7 @@ const DashboardPage: React.FC = () => {
           <Text type="secondary">今天是 {todayText}，优先处理待补记录、收费提醒和待批改作业。</Text>
         </div>
         <Space wrap>
-          <Button icon={<ReloadOutlined />} onClick={fetchData}>
+          <Button icon={<ReloadOutlined />} onClick={() => fetchData()}>
             今天
           </Button>
           <Button type="primary" icon={<PlusOutlined />} onClick={() => setCourseFormOpen(true)}>
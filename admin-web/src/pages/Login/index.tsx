@@ -24,7 +24,7 @@ const LoginPage: React.FC = () => {
     setError(null)
     try {
       const response = await authApi.login(values)
-      login(response.access_token, response.user)
+      login(response.access_token, response.refresh_token, response.user)
       navigate('/dashboard', { replace: true })
     } catch (err: unknown) {
       const axiosError = err as { response?: { data?: { message?: string }; status?: number } }
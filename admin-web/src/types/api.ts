@@ -22,6 +22,7 @@ export interface LoginRequest {
 
 export interface LoginResponse {
   access_token: string
+  refresh_token: string
   token_type: string
   expires_in: number
   user: {
@@ -34,6 +35,7 @@ export interface LoginResponse {
 
 export interface RefreshTokenResponse {
   access_token: string
+  refresh_token: string
   expires_in: number
 }
 
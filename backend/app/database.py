@@ -1,24 +1,37 @@
+import asyncio
+
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy import text
 from loguru import logger
 from app.config import settings
+from app.utils.db_pool import InstrumentedQueuePool
 
 
-# 创建异步引擎
-_engine_kwargs: dict = {
-    "echo": settings.DEBUG,
-}
+def engine_options(database_url: str, pool_name: str) -> dict:
+    """按配置生成 create_async_engine 参数，pool_name 用于区分各连接池的监控数据"""
+    options: dict = {"echo": settings.DB_ECHO}
+    # 连接池参数仅适用于 PostgreSQL，SQLite 使用 SQLAlchemy 默认池
+    if "sqlite" not in database_url:
+        options.update({
+            "poolclass": InstrumentedQueuePool,
+            "pool_logging_name": pool_name,
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+            "pool_pre_ping": True,
+            "connect_args": {
+                # SQLAlchemy 层与 asyncpg 层的预编译语句缓存；经 PgBouncer 事务池连接时均需设为 0
+                "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+                "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            },
+        })
+    return options
 
-# pool_size/max_overflow 仅适用于 PostgreSQL，SQLite 不支持
-if "sqlite" not in settings.DATABASE_URL:
-    _engine_kwargs.update({
-        "pool_size": 5,
-        "max_overflow": 5,
-        "pool_pre_ping": True,
-    })
 
-engine = create_async_engine(settings.DATABASE_URL, **_engine_kwargs)
+# 创建异步引擎
+engine = create_async_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL, "primary"))
 
 # 创建异步 Session 工厂
 AsyncSessionLocal = async_sessionmaker(
@@ -29,11 +42,35 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+# 只读副本（可选）：报表、列表等只读接口经 get_read_db 路由到副本，未配置时为 None
+replica_engine = None
+ReplicaSessionLocal = None
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = create_async_engine(
+        settings.DATABASE_REPLICA_URL, **engine_options(settings.DATABASE_REPLICA_URL, "replica")
+    )
+    ReplicaSessionLocal = async_sessionmaker(
+        bind=replica_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+    )
+
 
 class Base(DeclarativeBase):
     pass
 
 
+def dialect_insert(db: AsyncSession, model):
+    """按当前数据库方言返回支持 ON CONFLICT 的 insert 构造（PostgreSQL / 测试用 SQLite）"""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
+
 async def get_db():
     """依赖注入：获取数据库 Session"""
     async with AsyncSessionLocal() as session:
@@ -59,6 +96,29 @@ async def check_db_connection():
         return False
 
 
+async def warm_up_pool(count: int) -> int:
+    """启动时预先建立 count 个连接放回池中，避免首批请求承担建连耗时；返回成功建立的连接数"""
+    async def ping() -> bool:
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            return True
+        except Exception as e:
+            logger.warning(f"连接池预热失败: {e}")
+            return False
+
+    # 并发持有连接，才能让连接池建立 count 个不同的连接
+    results = await asyncio.gather(*(ping() for _ in range(count)))
+    return sum(results)
+
+
+async def dispose_engine() -> None:
+    """关闭连接池中的所有连接"""
+    await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+
+
 async def create_tables():
     """创建所有数据表（开发用，生产使用 Alembic）"""
     from app.models import (  # noqa
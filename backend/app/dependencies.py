@@ -1,14 +1,17 @@
-from typing import Optional
+from typing import AsyncIterator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from jose import JWTError
 
+from app import database
 from app.database import get_db
 from app.models.user import User
 from app.models.student import Student
 from app.utils.auth import decode_token
+from app.utils.read_replica import SESSION_USER_KEY, use_replica
+from app.utils.token_store import TOKEN_TYPE_REFRESH, is_access_token_revoked
+from app.utils.user_cache import get_active_user, get_linked_student
 
 security = HTTPBearer(auto_error=False)
 
@@ -25,11 +28,15 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    token = credentials.credentials
+    return await authenticate_token(credentials.credentials, db)
+
+
+async def authenticate_token(token: str, db: AsyncSession) -> User:
+    """校验访问 Token 并返回用户（也用于无法设置请求头的 SSE / WebSocket 连接）"""
     try:
         payload = decode_token(token)
         user_id: str = payload.get("sub")
-        if user_id is None:
+        if user_id is None or payload.get("typ") == TOKEN_TYPE_REFRESH:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail={"code": "TOKEN_INVALID", "message": "Token 格式无效"},
@@ -40,16 +47,39 @@ async def get_current_user(
             detail={"code": "TOKEN_EXPIRED", "message": "Token 已过期或无效"},
         )
 
-    result = await db.execute(select(User).where(User.id == int(user_id)))
-    user = result.scalar_one_or_none()
+    # 已退出登录或检测到刷新 Token 重放的会话（只查进程内吊销集合，不访问数据库）
+    if is_access_token_revoked(payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail={"code": "TOKEN_REVOKED", "message": "登录已失效，请重新登录"},
+        )
+
+    user = await get_active_user(db, int(user_id))
     if user is None or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail={"code": "USER_NOT_FOUND", "message": "用户不存在或已被禁用"},
         )
+    # 该 Session 提交写入后，此用户的只读请求在短时间内固定走主库（读己之写）
+    db.info[SESSION_USER_KEY] = user.id
     return user
 
 
+async def get_read_db(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> AsyncIterator[AsyncSession]:
+    """
+    只读接口的数据库 Session：只读副本可用、延迟在阈值内且当前用户近期没有写入时走副本，否则使用主库 Session
+    取得的 Session 只能用于查询
+    """
+    if not use_replica(current_user.id):
+        yield db
+        return
+    async with database.ReplicaSessionLocal() as session:
+        yield session
+
+
 async def get_admin_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
@@ -88,22 +118,7 @@ async def get_current_student(
             detail={"code": "PERMISSION_DENIED", "message": "此接口仅供学生/家长使用"},
         )
 
-    if current_user.role == "student":
-        result = await db.execute(
-            select(Student).where(
-                Student.user_id == current_user.id,
-                Student.is_active == True
-            )
-        )
-    else:  # parent
-        result = await db.execute(
-            select(Student).where(
-                Student.parent_user_id == current_user.id,
-                Student.is_active == True
-            )
-        )
-
-    student = result.scalar_one_or_none()
+    student = await get_linked_student(db, current_user)
     if not student:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
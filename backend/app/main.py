@@ -1,5 +1,3 @@
-import time
-import uuid
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
@@ -7,15 +5,19 @@ from fastapi.responses import JSONResponse
 from loguru import logger
 
 from app.config import settings
-from app.database import check_db_connection, create_tables
+from app.database import check_db_connection, create_tables, dispose_engine, warm_up_pool
 from app.routers import auth, students, courses, assignments
 from app.routers import feedback, resources, progress, billing
-from app.routers import notifications, exam, dashboard
+from app.routers import notifications, exam, dashboard, events, system, metrics
+from app.utils.metrics import MetricsMiddleware
+from app.utils.rate_limit import RateLimitMiddleware, rate_limiter
+from app.utils.request_log import RequestLogMiddleware, flush_logs, setup_logging
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期管理"""
+    setup_logging()
     logger.info("启动家教辅助系统后端...")
 
     # 确保上传目录存在
@@ -23,10 +25,23 @@ async def lifespan(app: FastAPI):
     os.makedirs(settings.upload_dir_abs, exist_ok=True)
     logger.info(f"上传目录: {settings.upload_dir_abs}")
 
+    # 启动学习报告 PDF 渲染进程池
+    from app.utils.report_pdf import report_pdf_renderer
+    report_pdf_renderer.start(settings.REPORT_PDF_WORKERS)
+
     # 检查数据库连接
     db_ok = await check_db_connection()
     if not db_ok:
         logger.warning("数据库连接失败，请检查 PostgreSQL 是否运行")
+    elif settings.DB_POOL_WARMUP:
+        warmed = await warm_up_pool(settings.DB_POOL_SIZE)
+        logger.info(f"数据库连接池已预热: {warmed}/{settings.DB_POOL_SIZE}")
+
+    # 只读副本延迟监控（未配置 DATABASE_REPLICA_URL 时只读接口全部走主库）
+    from app.utils.read_replica import replica_monitor
+    if settings.DATABASE_REPLICA_URL:
+        await replica_monitor.start()
+        logger.info(f"只读副本: {'可用' if replica_monitor.healthy else '不可用，回退主库'}")
 
     # 自动建表（开发环境）
     if settings.DEBUG:
@@ -36,9 +51,51 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f"数据表初始化失败: {e}")
 
+    # 共享的微信 API 客户端（连接池 + keep-alive）
+    from app.utils.wechat import start_http_client, close_http_client
+    start_http_client()
+
+    # 启动消息发件箱投递器
+    from app.utils.outbox import outbox_dispatcher
+    if settings.OUTBOX_DISPATCHER_ENABLED:
+        outbox_dispatcher.start()
+
+    # 接口限流后端（多 worker 时可切换为 Redis 共享配额）
+    await rate_limiter.start(settings.RATE_LIMIT_BACKEND)
+
+    # 实时事件推送（多 worker 时经 PostgreSQL LISTEN/NOTIFY 分发）
+    from app.utils.events import event_hub
+    await event_hub.start(settings.EVENTS_BACKEND)
+
+    # 已吊销登录会话的进程内副本（访问 Token 校验不查库），定期从数据库同步
+    from app.utils.token_store import revocation_store
+    revocation_store.start()
+
+    # 启动定时任务（课前 / 作业截止提醒、通知归档、过期刷新 Token 清理）
+    from app.utils.scheduler import scheduler
+    if settings.REMINDER_SCHEDULER_ENABLED:
+        from app.utils.reminders import generate_reminders
+        scheduler.add_job("reminders", settings.REMINDER_INTERVAL_SECONDS, generate_reminders)
+    if settings.NOTIFICATION_ARCHIVE_ENABLED:
+        from app.utils.notification_archive import ARCHIVE_JOB_NAME, archive_notifications
+        scheduler.add_job(ARCHIVE_JOB_NAME, settings.NOTIFICATION_ARCHIVE_INTERVAL_SECONDS, archive_notifications)
+    from app.utils.token_store import PURGE_JOB_NAME, purge_refresh_tokens
+    scheduler.add_job(PURGE_JOB_NAME, settings.REFRESH_TOKEN_PURGE_INTERVAL_SECONDS, purge_refresh_tokens)
+    scheduler.start()
+
     logger.info(f"服务启动成功，API 文档: http://localhost:8000{settings.API_PREFIX}/docs")
     yield
+    await scheduler.stop()
+    await revocation_store.stop()
+    await rate_limiter.stop()
+    await replica_monitor.stop()
+    await event_hub.stop()
+    await outbox_dispatcher.stop()
+    await close_http_client()
+    report_pdf_renderer.shutdown()
+    await dispose_engine()
     logger.info("服务已关闭")
+    await flush_logs()
 
 
 async def _init_default_data():
@@ -46,7 +103,7 @@ async def _init_default_data():
     from app.database import AsyncSessionLocal
     from app.models.user import User
     from app.models.billing import SubjectPrice
-    from app.utils.auth import get_password_hash
+    from app.utils.auth import hash_password
     from sqlalchemy import select
 
     async with AsyncSessionLocal() as session:
@@ -57,7 +114,7 @@ async def _init_default_data():
         if not result.scalar_one_or_none():
             admin = User(
                 username="admin",
-                hashed_password=get_password_hash("admin123"),
+                hashed_password=await hash_password("admin123"),
                 role="admin",
                 display_name="管理员",
                 is_active=True,
@@ -96,6 +153,9 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# 接口限流（先于 CORS 注册，429 响应同样带 CORS 头）
+app.add_middleware(RateLimitMiddleware)
+
 # CORS 中间件
 app.add_middleware(
     CORSMiddleware,
@@ -106,21 +166,12 @@ app.add_middleware(
 )
 
 
-# 请求日志中间件
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    request_id = str(uuid.uuid4())[:8]
-    start_time = time.time()
-
-    logger.info(f"[{request_id}] {request.method} {request.url.path}")
-
-    response = await call_next(request)
+# 结构化请求日志（在指标中间件内层，可读取请求内 SQL 统计）
+app.add_middleware(RequestLogMiddleware)
 
-    duration = round((time.time() - start_time) * 1000, 2)
-    logger.info(f"[{request_id}] {response.status_code} ({duration}ms)")
 
-    response.headers["X-Request-Id"] = request_id
-    return response
+# 请求指标（最外层注册，耗时包含其余中间件）
+app.add_middleware(MetricsMiddleware)
 
 
 # 全局异常处理
@@ -149,6 +200,10 @@ app.include_router(billing.router, prefix=prefix)
 app.include_router(notifications.router, prefix=prefix)
 app.include_router(exam.router, prefix=prefix)
 app.include_router(dashboard.router, prefix=prefix)
+app.include_router(events.router, prefix=prefix)
+app.include_router(system.router, prefix=prefix)
+# Prometheus 抓取地址不带 API 前缀
+app.include_router(metrics.router)
 
 
 # 健康检查（无需认证）
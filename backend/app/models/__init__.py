@@ -1,16 +1,23 @@
-from app.models.user import User
+from app.models.user import User, RefreshToken
 from app.models.student import Student
 from app.models.course import Course
 from app.models.assignment import Assignment, AssignmentStudent
 from app.models.feedback import Feedback, FeedbackTemplate
 from app.models.resource import Resource, ResourceShare
-from app.models.progress import Grade, KnowledgePoint
+from app.models.progress import (
+    Grade, KnowledgePoint, LearningReportSnapshot, CurriculumNode, StudentKnowledgeMastery,
+)
 from app.models.billing import SubjectPrice, BillingRecord
-from app.models.notification import Notification
-from app.models.exam import ExamQuestion, Vocabulary, MockExam
+from app.models.notification import Notification, NotificationArchive, NotificationCounter
+from app.models.outbox import OutboxMessage
+from app.models.exam import (
+    ExamQuestion, Vocabulary, MockExam, MockExamAnswer, VocabularyReview,
+    StudentAbility,
+)
 
 __all__ = [
     "User",
+    "RefreshToken",
     "Student",
     "Course",
     "Assignment",
@@ -21,10 +28,19 @@ __all__ = [
     "ResourceShare",
     "Grade",
     "KnowledgePoint",
+    "LearningReportSnapshot",
+    "CurriculumNode",
+    "StudentKnowledgeMastery",
     "SubjectPrice",
     "BillingRecord",
     "Notification",
+    "NotificationArchive",
+    "NotificationCounter",
+    "OutboxMessage",
     "ExamQuestion",
     "Vocabulary",
     "MockExam",
+    "MockExamAnswer",
+    "VocabularyReview",
+    "StudentAbility",
 ]
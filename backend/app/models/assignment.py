@@ -1,6 +1,6 @@
 from datetime import datetime, date
 from typing import Optional
-from sqlalchemy import String, DateTime, Text, Integer, ForeignKey, Date, SmallInteger
+from sqlalchemy import String, DateTime, Text, Integer, ForeignKey, Date, SmallInteger, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import func
 from app.database import Base
@@ -8,6 +8,10 @@ from app.database import Base
 
 class Assignment(Base):
     __tablename__ = "assignments"
+    __table_args__ = (
+        # 作业截止提醒按截止日期窗口扫描
+        Index("ix_assignments_due_date", "due_date"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     title: Mapped[str] = mapped_column(String(200), nullable=False)
@@ -1,7 +1,7 @@
 from datetime import datetime
 from decimal import Decimal
 from typing import Optional
-from sqlalchemy import String, DateTime, Text, Integer, ForeignKey, Numeric, SmallInteger
+from sqlalchemy import String, DateTime, Text, Integer, ForeignKey, Numeric, SmallInteger, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import func
 from app.database import Base
@@ -9,6 +9,10 @@ from app.database import Base
 
 class Course(Base):
     __tablename__ = "courses"
+    __table_args__ = (
+        # 课前提醒按上课时间窗口扫描
+        Index("ix_courses_status_start_time", "status", "start_time"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     student_id: Mapped[int] = mapped_column(
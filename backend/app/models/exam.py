@@ -1,7 +1,10 @@
-from datetime import datetime
+from datetime import datetime, date
 from decimal import Decimal
 from typing import Optional
-from sqlalchemy import String, DateTime, Text, Integer, ForeignKey, SmallInteger, Numeric
+from sqlalchemy import (
+    String, DateTime, Text, Integer, ForeignKey, SmallInteger, Numeric, Boolean, Date,
+    UniqueConstraint, Index,
+)
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import JSONB, ARRAY
@@ -27,6 +30,9 @@ class ExamQuestion(Base):
 
 class Vocabulary(Base):
     __tablename__ = "vocabulary"
+    __table_args__ = (
+        UniqueConstraint("subject", "word", name="uq_vocabulary_subject_word"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     subject: Mapped[str] = mapped_column(String(20), nullable=False, default="english")
@@ -38,6 +44,16 @@ class Vocabulary(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
 
 
+# 前缀补全按 lower(word) 匹配（与内存前缀树一致，不区分大小写）；
+# text_pattern_ops 使 lower(word) LIKE 'prefix%' 可走 B-tree 索引（不受数据库排序规则影响）
+Index(
+    "ix_vocabulary_subject_word_prefix",
+    Vocabulary.subject,
+    func.lower(Vocabulary.word).label("word_lower"),
+    postgresql_ops={"word_lower": "text_pattern_ops"},
+)
+
+
 class MockExam(Base):
     __tablename__ = "mock_exams"
 
@@ -49,8 +65,93 @@ class MockExam(Base):
     subject: Mapped[str] = mapped_column(String(50), nullable=False)
     question_ids: Mapped[list] = mapped_column(ARRAY(Integer), nullable=False)
     status: Mapped[str] = mapped_column(String(20), nullable=False, default="draft")
-    # draft | active | completed
+    # draft | active | grading | completed
     started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     score: Mapped[Optional[Decimal]] = mapped_column(Numeric(5, 2), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+
+
+class MockExamAnswer(Base):
+    __tablename__ = "mock_exam_answers"
+    __table_args__ = (
+        UniqueConstraint("mock_exam_id", "question_id", name="uq_mock_exam_answers_exam_question"),
+        Index("ix_mock_exam_answers_question_id", "question_id"),
+        Index("ix_mock_exam_answers_status", "status"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    mock_exam_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("mock_exams.id", ondelete="CASCADE"), nullable=False
+    )
+    question_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("exam_questions.id", ondelete="CASCADE"), nullable=False
+    )
+    student_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("students.id", ondelete="CASCADE"), nullable=False
+    )
+    answer: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    is_correct: Mapped[Optional[bool]] = mapped_column(Boolean, nullable=True)
+    score: Mapped[Optional[Decimal]] = mapped_column(Numeric(5, 2), nullable=True)  # 单题得分率 0-100
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")
+    # pending（待人工批改） | graded
+    comment: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    graded_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    # 本次作答是否已计入能力估计（重判可能把已自动批改的作答改回 pending，不能凭 status 判断）
+    ability_counted: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+
+
+class VocabularyReview(Base):
+    """学生单词复习状态（SM-2 间隔重复）"""
+    __tablename__ = "vocabulary_reviews"
+    __table_args__ = (
+        UniqueConstraint("student_id", "vocabulary_id", name="uq_vocabulary_reviews_student_word"),
+        Index("ix_vocabulary_reviews_student_due", "student_id", "due_date"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    student_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("students.id", ondelete="CASCADE"), nullable=False
+    )
+    vocabulary_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("vocabulary.id", ondelete="CASCADE"), nullable=False
+    )
+    ease_factor: Mapped[Decimal] = mapped_column(Numeric(4, 2), nullable=False, default=2.5)
+    interval_days: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    repetitions: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    lapses: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    due_date: Mapped[date] = mapped_column(Date, nullable=False)
+    last_quality: Mapped[Optional[int]] = mapped_column(SmallInteger, nullable=True)  # 0-5
+    last_reviewed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, server_default=func.now(), onupdate=func.now()
+    )
+
+
+class StudentAbility(Base):
+    """学生能力估计（Elo 评分），每次批改后按科目、标签、难度增量更新"""
+    __tablename__ = "student_abilities"
+    __table_args__ = (
+        UniqueConstraint(
+            "student_id", "subject", "dimension", "dimension_key",
+            name="uq_student_abilities_student_dimension",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    student_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("students.id", ondelete="CASCADE"), nullable=False
+    )
+    subject: Mapped[str] = mapped_column(String(50), nullable=False)
+    dimension: Mapped[str] = mapped_column(String(20), nullable=False)
+    # overall | tag | difficulty
+    dimension_key: Mapped[str] = mapped_column(String(100), nullable=False, default="")
+    # overall 为空串；tag 为标签名；difficulty 为难度值（1-5）
+    rating: Mapped[Decimal] = mapped_column(Numeric(7, 2), nullable=False, default=1000)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    correct: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, server_default=func.now(), onupdate=func.now()
+    )
@@ -1,13 +1,30 @@
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import String, DateTime, Text, Integer, ForeignKey, Boolean
+from sqlalchemy import String, DateTime, Text, Integer, ForeignKey, Boolean, Index, text
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import func
 from app.database import Base
 
+# 由定时任务生成、需要按 (type, related_id, user_id) 去重的通知类型
+REMINDER_TYPES = ("course_reminder", "assignment_reminder")
+REMINDER_DEDUP_WHERE = text("type IN ('course_reminder', 'assignment_reminder')")
+
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        # 提醒类通知的去重键（部分唯一索引，不影响手动通知）
+        Index(
+            "uq_notifications_reminder_dedup", "type", "related_id", "user_id",
+            unique=True,
+            postgresql_where=REMINDER_DEDUP_WHERE,
+            sqlite_where=REMINDER_DEDUP_WHERE,
+        ),
+        # 用户通知列表的键集分页：WHERE user_id = ? AND (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC
+        Index("ix_notifications_user_created", "user_id", "created_at", "id"),
+        # 归档任务按创建时间扫描过期通知
+        Index("ix_notifications_created_at", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(
@@ -24,3 +41,39 @@ class Notification(Base):
     # pending | sent | failed | skipped
     wx_push_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+
+
+class NotificationArchive(Base):
+    """超过保留期的通知（由归档任务从 notifications 分批迁入，保留原 id）"""
+    __tablename__ = "notification_archive"
+    __table_args__ = (
+        Index("ix_notification_archive_user_created", "user_id", "created_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    title: Mapped[str] = mapped_column(String(200), nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    type: Mapped[str] = mapped_column(String(50), nullable=False)
+    is_read: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    related_type: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    related_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    wx_push_status: Mapped[str] = mapped_column(String(20), nullable=False)
+    wx_push_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+
+
+class NotificationCounter(Base):
+    """每个用户的未读通知数（随通知创建 / 已读维护，角标接口直接读取，不扫描 notifications）"""
+    __tablename__ = "notification_counters"
+
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    unread_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, server_default=func.now(), onupdate=func.now()
+    )
@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import String, DateTime, Text, Integer, ForeignKey, SmallInteger, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import JSONB
+from app.database import Base
+
+
+class OutboxMessage(Base):
+    """
+    消息发件箱：业务写入时在同一事务中插入，后台投递器异步发送
+    投递器领取后设置 locked_until 租约，进程崩溃时租约到期自动重新投递
+    """
+    __tablename__ = "outbox_messages"
+    __table_args__ = (
+        Index("ix_outbox_messages_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    topic: Mapped[str] = mapped_column(String(50), nullable=False)
+    # wechat_subscribe
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    notification_id: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey("notifications.id", ondelete="SET NULL"), nullable=True
+    )
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")
+    # pending | sent | skipped | failed
+    attempts: Mapped[int] = mapped_column(SmallInteger, nullable=False, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+    locked_until: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
@@ -1,9 +1,13 @@
 from datetime import datetime, date
 from decimal import Decimal
 from typing import Optional
-from sqlalchemy import String, DateTime, Text, Integer, ForeignKey, Date, Numeric
+from sqlalchemy import (
+    String, DateTime, Text, Integer, ForeignKey, Date, Numeric, SmallInteger,
+    UniqueConstraint, Index,
+)
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import JSONB
 from app.database import Base
 
 
@@ -42,3 +46,75 @@ class KnowledgePoint(Base):
         DateTime, nullable=False, server_default=func.now(), onupdate=func.now()
     )
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+
+
+class LearningReportSnapshot(Base):
+    """学习报告快照：已结束周期的报告生成后按学生 + 周期直接读取（周期结束后补录数据时由管理员重新生成）"""
+    __tablename__ = "learning_report_snapshots"
+    __table_args__ = (
+        UniqueConstraint(
+            "student_id", "period_start", "period_end",
+            name="uq_learning_report_snapshots_student_period",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    student_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("students.id", ondelete="CASCADE"), nullable=False
+    )
+    period_start: Mapped[date] = mapped_column(Date, nullable=False)
+    period_end: Mapped[date] = mapped_column(Date, nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)  # payload 的 SHA-256
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+
+
+class CurriculumNode(Base):
+    """
+    共享课程知识树：科目 -> 章节 -> 知识点
+    path 为物化路径（如 /1/5/23/），子树查询与章节汇总只需 path 前缀匹配
+    """
+    __tablename__ = "curriculum_nodes"
+    __table_args__ = (
+        UniqueConstraint("path", name="uq_curriculum_nodes_path"),
+        # text_pattern_ops 使 path LIKE '/1/5/%' 可走 B-tree 索引
+        Index("ix_curriculum_nodes_path_prefix", "path", postgresql_ops={"path": "text_pattern_ops"}),
+        Index("ix_curriculum_nodes_parent_id", "parent_id"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    parent_id: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey("curriculum_nodes.id", ondelete="CASCADE"), nullable=True
+    )
+    subject: Mapped[str] = mapped_column(String(50), nullable=False)
+    node_type: Mapped[str] = mapped_column(String(20), nullable=False)
+    # subject | chapter | point
+    name: Mapped[str] = mapped_column(String(200), nullable=False)
+    path: Mapped[str] = mapped_column(String(255), nullable=False)
+    depth: Mapped[int] = mapped_column(SmallInteger, nullable=False, default=0)
+    sort_order: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+
+
+class StudentKnowledgeMastery(Base):
+    """学生对课程知识点的掌握状态（每个学生 + 知识点一行）"""
+    __tablename__ = "student_knowledge_mastery"
+    __table_args__ = (
+        UniqueConstraint("student_id", "node_id", name="uq_student_knowledge_mastery_student_node"),
+        Index("ix_student_knowledge_mastery_node_id", "node_id"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    student_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("students.id", ondelete="CASCADE"), nullable=False
+    )
+    node_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("curriculum_nodes.id", ondelete="CASCADE"), nullable=False
+    )
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="todo")
+    # todo | learning | mastered
+    notes: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, server_default=func.now(), onupdate=func.now()
+    )
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
@@ -12,7 +12,7 @@ from app.schemas.assignment import (
     AssignmentResponse, AssignmentDetailResponse, AssignmentListResponse,
     StudentSubmission, MyAssignmentResponse
 )
-from app.dependencies import get_admin_user, get_current_student
+from app.dependencies import get_admin_user, get_current_student, get_read_db
 from app.models.user import User
 
 router = APIRouter(prefix="/assignments", tags=["作业管理"])
@@ -117,7 +117,7 @@ async def list_assignments(
     page_size: int = Query(20, ge=1, le=100),
     subject: Optional[str] = Query(None),
     current_user: User = Depends(get_admin_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """作业列表"""
     query = select(Assignment)
@@ -1,4 +1,3 @@
-from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -8,12 +7,10 @@ from app.models.user import User
 from app.models.student import Student
 from app.schemas.auth import (
     LoginRequest, WechatLoginRequest, LoginResponse,
-    RefreshResponse, UserInfo, TokenResponse
-)
-from app.utils.auth import (
-    verify_password, create_access_token,
-    get_token_remaining_days, get_password_hash
+    RefreshRequest, RefreshResponse, UserInfo
 )
+from app.utils.auth import verify_and_update_password
+from app.utils.token_store import issue_token_pair, revoke_refresh_token, rotate_refresh_token
 from app.utils.wechat import get_wechat_openid
 from app.dependencies import get_current_user
 from app.config import settings
@@ -35,11 +32,16 @@ async def login(request: LoginRequest, db: AsyncSession = Depends(get_db)):
             detail={"code": "INVALID_CREDENTIALS", "message": "用户名或密码错误"},
         )
 
-    if not verify_password(request.password, user.hashed_password):
+    verified, new_hash = await verify_and_update_password(request.password, user.hashed_password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail={"code": "INVALID_CREDENTIALS", "message": "用户名或密码错误"},
         )
+    if new_hash:
+        # 调高 BCRYPT_ROUNDS 后，旧哈希在登录成功时升级
+        user.hashed_password = new_hash
+        await db.commit()
 
     if not user.is_active:
         raise HTTPException(
@@ -47,16 +49,11 @@ async def login(request: LoginRequest, db: AsyncSession = Depends(get_db)):
             detail={"code": "USER_DISABLED", "message": "账号已被禁用"},
         )
 
-    expires_delta = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": str(user.id), "role": user.role},
-        expires_delta=expires_delta,
-    )
+    tokens = issue_token_pair(db, user)
+    await db.commit()
 
     return LoginResponse(
-        access_token=access_token,
-        token_type="bearer",
-        expires_in=int(expires_delta.total_seconds()),
+        **tokens,
         user={
             "id": user.id,
             "username": user.username,
@@ -130,11 +127,8 @@ async def wechat_login(request: WechatLoginRequest, db: AsyncSession = Depends(g
     )
     student = student_result.scalar_one_or_none()
 
-    expires_delta = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    access_token = create_access_token(
-        data={"sub": str(user.id), "role": user.role, "openid": openid},
-        expires_delta=expires_delta,
-    )
+    tokens = issue_token_pair(db, user)
+    await db.commit()
 
     user_info = {
         "id": user.id,
@@ -144,26 +138,20 @@ async def wechat_login(request: WechatLoginRequest, db: AsyncSession = Depends(g
     if student:
         user_info["student_id"] = student.id
 
-    return LoginResponse(
-        access_token=access_token,
-        token_type="bearer",
-        expires_in=int(expires_delta.total_seconds()),
-        user=user_info,
-    )
+    return LoginResponse(**tokens, user=user_info)
 
 
 @router.post("/refresh", response_model=RefreshResponse)
-async def refresh_token(current_user: User = Depends(get_current_user)):
-    """刷新 Token"""
-    expires_delta = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    new_token = create_access_token(
-        data={"sub": str(current_user.id), "role": current_user.role},
-        expires_delta=expires_delta,
-    )
-    return RefreshResponse(
-        access_token=new_token,
-        expires_in=int(expires_delta.total_seconds()),
-    )
+async def refresh_token(request: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    """用刷新 Token 换取新的访问 Token 和刷新 Token（旧刷新 Token 随即失效，重复使用将吊销整个登录会话）"""
+    _, tokens = await rotate_refresh_token(db, request.refresh_token)
+    return RefreshResponse(**tokens)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(request: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    """退出登录：吊销该刷新 Token 所属会话，已签发的访问 Token 同时失效"""
+    await revoke_refresh_token(db, request.refresh_token)
 
 
 @router.get("/me", response_model=UserInfo)
@@ -19,7 +19,7 @@ from app.schemas.account import (
     AccountPaymentRecord,
     StudentAccountResponse,
 )
-from app.dependencies import get_admin_user, get_current_student
+from app.dependencies import get_admin_user, get_current_student, get_read_db
 from app.models.user import User
 
 router = APIRouter(prefix="/billing", tags=["收费管理"])
@@ -180,7 +180,7 @@ async def list_billing_records(
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
     current_user: User = Depends(get_admin_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """收费记录列表"""
     query = select(BillingRecord)
@@ -372,7 +372,7 @@ async def get_billing_summary(
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
     current_user: User = Depends(get_admin_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """收费汇总报表"""
     query = select(BillingRecord)
@@ -454,7 +454,7 @@ async def get_billing_summary(
 @router.get("/outstanding", response_model=list[OutstandingStudent])
 async def get_outstanding_students(
     current_user: User = Depends(get_admin_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """欠费学生列表"""
     # 查询所有学生及其欠费情况
@@ -19,7 +19,8 @@ from app.schemas.course import (
     CourseLeaveRequest, CourseMakeupRequest, MakeupPoolResponse,
 )
 from app.models.feedback import Feedback
-from app.dependencies import get_admin_user, get_current_student
+from app.dependencies import get_admin_user, get_current_student, get_read_db
+from app.utils.events import EVENT_PAYMENT_ALERT, emit
 from app.models.user import User
 
 router = APIRouter(prefix="/courses", tags=["课程管理"])
@@ -106,6 +107,18 @@ async def _get_student_balance(db: AsyncSession, student_id: int) -> float:
     )
 
 
+async def _check_payment_alert(db: AsyncSession, course: Course) -> float:
+    """课程扣费后（已 flush）计算余额，欠费时登记缴费提醒事件，随事务提交推送"""
+    balance = await _get_student_balance(db, course.student_id)
+    if balance < 0:
+        emit(
+            db, EVENT_PAYMENT_ALERT,
+            {"student_id": course.student_id, "course_id": course.id, "balance": balance},
+            student_ids=[course.student_id], admins=True,
+        )
+    return balance
+
+
 def _copy_course_time(course: Course, source_week_start: date, target_week_start: date) -> tuple[datetime, datetime]:
     source_week_start_dt = datetime.combine(source_week_start, datetime.min.time())
     target_week_start_dt = datetime.combine(target_week_start, datetime.min.time())
@@ -485,7 +498,7 @@ async def list_courses(
     student_id: Optional[int] = Query(None),
     status_filter: Optional[str] = Query(None, alias="status"),
     current_user: User = Depends(get_admin_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """课程列表"""
     query = select(Course)
@@ -773,11 +786,11 @@ async def complete_course_v2(
     course.status = "completed"
     await _ensure_course_auto_charge(db, course)
     charge_amount = _project_charge(course)
+    await db.flush()
+    balance_after = await _check_payment_alert(db, course)
     await db.commit()
     await db.refresh(course)
 
-    balance_after = await _get_student_balance(db, course.student_id)
-
     return CourseCompleteResponse(
         course_status=course.status,
         charge_amount=charge_amount,
@@ -1023,6 +1036,8 @@ async def update_course_status(
 
     if data.status == "completed":
         await _ensure_course_auto_charge(db, course)
+        await db.flush()
+        await _check_payment_alert(db, course)
     elif data.status == "cancelled" and old_status == "completed":
         await _rollback_course_auto_charge(db, course)
 
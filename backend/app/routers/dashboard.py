@@ -3,14 +3,13 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_
 
-from app.database import get_db
 from app.models.course import Course
 from app.models.student import Student
 from app.models.assignment import Assignment, AssignmentStudent
 from app.models.billing import BillingRecord
-from app.models.notification import Notification
 from app.models.feedback import Feedback
-from app.dependencies import get_admin_user
+from app.dependencies import get_admin_user, get_read_db
+from app.utils.notification_counter import get_unread_count
 from app.models.user import User
 from app.schemas.workbench import (
     WorkbenchAssignmentItem,
@@ -55,7 +54,7 @@ def _resolve_projected_charge(course: Course) -> float:
 @router.get("/overview")
 async def get_overview(
     current_user: User = Depends(get_admin_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """仪表盘总览数据"""
     today = date.today()
@@ -152,13 +151,7 @@ async def get_overview(
     outstanding_fee = float(outstanding_result.scalar_one())
 
     # 未读通知数
-    unread_notifications_result = await db.execute(
-        select(func.count()).where(
-            Notification.user_id == current_user.id,
-            Notification.is_read == False,
-        )
-    )
-    unread_notifications = unread_notifications_result.scalar_one()
+    unread_notifications = await get_unread_count(db, current_user.id)
 
     # 最近 5 条反馈
     recent_feedback_result = await db.execute(
@@ -196,7 +189,7 @@ async def get_overview(
 @router.get("/workbench", response_model=WorkbenchResponse)
 async def get_workbench(
     current_user: User = Depends(get_admin_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """老师工作台聚合数据"""
     del current_user
@@ -0,0 +1,130 @@
+"""
+实时事件：SSE 推送（WebSocket 兜底），替代各端对未读数、通知列表和工作台的轮询
+
+连接建立时先发送 ready（携带当前未读数），之后只在有事件时推送；
+空闲时按心跳间隔发送注释行 / ping 保活。浏览器 EventSource 和小程序无法设置请求头，
+Token 可通过 ?token= 传递。
+"""
+import asyncio
+import json
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.background import BackgroundTask
+
+from app.config import settings
+from app.database import get_db
+from app.dependencies import authenticate_token, security
+from app.models.student import Student
+from app.models.user import User
+from app.utils.events import Subscription, event_hub
+from app.utils.notification_counter import get_unread_count
+
+router = APIRouter(prefix="/events", tags=["实时事件"])
+
+SSE_RETRY_MS = 3000
+
+
+async def _subscription_student_ids(db: AsyncSession, user: User) -> list[int]:
+    """学生 / 家长账号关联的学生档案，用于接收课程、缴费类事件"""
+    if user.role == "admin":
+        return []
+    result = await db.execute(
+        select(Student.id).where(
+            or_(Student.user_id == user.id, Student.parent_user_id == user.id),
+            Student.is_active == True,
+        )
+    )
+    return list(result.scalars().all())
+
+
+async def _subscribe(db: AsyncSession, user: User) -> tuple[Subscription, dict]:
+    student_ids = await _subscription_student_ids(db, user)
+    subscription = event_hub.subscribe(user.id, user.role == "admin", student_ids)
+    # 先订阅再读取未读数，期间产生的事件不会丢失（最多重复提示一次）
+    ready = {"user_id": user.id, "unread_count": await get_unread_count(db, user.id)}
+    return subscription, ready
+
+
+async def next_event(subscription: Subscription, heartbeat: float) -> Optional[dict]:
+    """等待下一个事件；超过心跳间隔返回 None；积压溢出时返回 resync"""
+    if subscription.overflowed:
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.overflowed = False
+        return {"type": "resync", "data": {}}
+    try:
+        return await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+    except asyncio.TimeoutError:
+        return None
+
+
+def format_sse(event_type: str, data: dict) -> str:
+    return f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+async def sse_events(subscription: Subscription, ready: dict, heartbeat: float) -> AsyncIterator[str]:
+    try:
+        yield f"retry: {SSE_RETRY_MS}\n" + format_sse("ready", ready)
+        while True:
+            item = await next_event(subscription, heartbeat)
+            if item is None:
+                yield ": ping\n\n"
+            else:
+                yield format_sse(item["type"], item["data"])
+    finally:
+        event_hub.unsubscribe(subscription)
+
+
+@router.get("/stream")
+async def stream_events(
+    token: Optional[str] = Query(None, description="访问 Token（无法设置 Authorization 头时使用）"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    db: AsyncSession = Depends(get_db),
+):
+    """SSE 事件流：notification_created / course_status_changed / payment_alert"""
+    token = credentials.credentials if credentials else token
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail={"code": "TOKEN_MISSING", "message": "缺少认证 Token"},
+        )
+    user = await authenticate_token(token, db)
+    subscription, ready = await _subscribe(db, user)
+    return StreamingResponse(
+        sse_events(subscription, ready, settings.EVENTS_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # 客户端在首个字节前断开时生成器不会启动，这里兜底取消订阅
+        background=BackgroundTask(event_hub.unsubscribe, subscription),
+    )
+
+
+@router.websocket("/ws")
+async def websocket_events(websocket: WebSocket, token: Optional[str] = Query(None)):
+    """WebSocket 兜底（不支持 SSE 的客户端），消息格式 {"type": ..., "data": {...}}"""
+    from app.database import AsyncSessionLocal
+
+    # 只在握手时使用数据库连接，不在长连接期间占用连接池
+    async with AsyncSessionLocal() as db:
+        try:
+            user = await authenticate_token(token or "", db)
+        except HTTPException:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+        subscription, ready = await _subscribe(db, user)
+
+    try:
+        await websocket.accept()
+        await websocket.send_json({"type": "ready", "data": ready})
+        while True:
+            item = await next_event(subscription, settings.EVENTS_HEARTBEAT_SECONDS)
+            await websocket.send_json(item or {"type": "ping", "data": {}})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        event_hub.unsubscribe(subscription)
@@ -1,22 +1,401 @@
 import random
+from datetime import datetime, date
 from typing import Optional, List
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, func, and_, insert, update, case, literal, true, Date, Integer, Numeric
+from sqlalchemy.exc import IntegrityError
 
-from app.database import get_db
-from app.models.exam import ExamQuestion, Vocabulary, MockExam
+from app.database import get_db, dialect_insert
+from app.models.exam import (
+    ExamQuestion, Vocabulary, MockExam, MockExamAnswer, VocabularyReview, StudentAbility,
+)
 from app.models.student import Student
 from app.schemas.exam import (
     ExamQuestionCreate, ExamQuestionUpdate, ExamQuestionResponse, ExamQuestionListResponse,
     VocabularyCreate, VocabularyResponse, VocabularyListResponse,
+    VocabularyBulkImportRequest, VocabularyBulkImportResponse, VocabularySuggestion,
+    VocabularyAssignRequest, VocabularyAssignResponse, VocabularyDueCard, VocabularyDueResponse,
+    VocabularyReviewItem, VocabularyReviewBatchRequest, VocabularyReviewBatchResponse,
+    VocabularyScheduleItem,
     MockExamCreate, MockExamResponse,
+    MockExamSubmitRequest, MockExamAnswerResponse, MockExamResultResponse,
+    ManualGradeRequest, ManualGradingItem, ManualGradingListResponse,
+    QuestionRegradeResponse, StudentAbilityItem, StudentAbilityResponse,
 )
-from app.dependencies import get_admin_user
+from app.config import settings
+from app.dependencies import get_admin_user, get_current_student, get_student_user
 from app.models.user import User
+from app.utils.exam_grading import AUTO_GRADED_TYPES, FULL_SCORE, grade_answers, exam_score
+from app.utils.ability import BASE_RATING, update_rating, target_difficulty
+from app.utils.srs import DEFAULT_EASE_FACTOR, schedule_review
+from app.utils.vocab_trie import VocabularyTrie, vocab_trie_cache
 
 router = APIRouter(prefix="/exam", tags=["考试辅导"])
 
+# 批量导入每条 INSERT 的行数（asyncpg 单条语句参数上限 32767）
+VOCAB_IMPORT_CHUNK_SIZE = 1000
+
+
+async def _refresh_exam_scores(db: AsyncSession, exam_ids: set[int]) -> None:
+    """按作答记录聚合重算试卷得分和状态（一次聚合查询 + 一次批量更新）"""
+    if not exam_ids:
+        return
+    result = await db.execute(
+        select(
+            MockExamAnswer.mock_exam_id,
+            func.coalesce(func.sum(MockExamAnswer.score), 0).label("score_sum"),
+            func.count(MockExamAnswer.id).label("answer_count"),
+            func.sum(case((MockExamAnswer.status == "pending", 1), else_=0)).label("pending_count"),
+        )
+        .where(MockExamAnswer.mock_exam_id.in_(exam_ids))
+        .group_by(MockExamAnswer.mock_exam_id)
+    )
+    rows = [
+        {
+            "id": row.mock_exam_id,
+            "score": round(float(row.score_sum) / row.answer_count, 2),
+            "status": "grading" if row.pending_count else "completed",
+        }
+        for row in result.all()
+        if row.answer_count
+    ]
+    if rows:
+        await db.execute(update(MockExam), rows)
+
+
+async def _regrade_question(
+    db: AsyncSession, question: ExamQuestion, previous_type: Optional[str] = None
+) -> tuple[int, int]:
+    """
+    答案键修正后批量重判该题的所有作答，返回 (重判条数, 受影响试卷数)
+    题型由自动批改改为主观题（previous_type 为自动批改题型）时，已有作答重置为待人工批改；
+    主观题的人工批改结果不受重判影响
+    """
+    if question.question_type not in AUTO_GRADED_TYPES and previous_type not in AUTO_GRADED_TYPES:
+        return 0, 0
+
+    result = await db.execute(
+        select(MockExamAnswer.id, MockExamAnswer.mock_exam_id, MockExamAnswer.answer)
+        .where(MockExamAnswer.question_id == question.id)
+    )
+    attempts = result.all()
+    if not attempts:
+        return 0, 0
+
+    now = datetime.utcnow()
+    rows = []
+    for attempt in attempts:
+        graded = grade_answers(
+            {question.id: (question.question_type, question.answer)},
+            {question.id: attempt.answer},
+        )[question.id]
+        graded_at = now if graded["status"] == "graded" else None
+        rows.append({"id": attempt.id, **graded, "graded_at": graded_at})
+    await db.execute(update(MockExamAnswer), rows)
+
+    exam_ids = {attempt.mock_exam_id for attempt in attempts}
+    await _refresh_exam_scores(db, exam_ids)
+    return len(rows), len(exam_ids)
+
+
+def _word_prefix_condition(prefix: str):
+    """单词前缀匹配，不区分大小写（lower(word) LIKE 'prefix%' 可使用前缀索引，与内存前缀树结果一致）"""
+    return func.lower(Vocabulary.word).startswith(prefix.strip().lower(), autoescape=True)
+
+
+async def _load_due_cards(
+    db: AsyncSession, student_id: int, limit: int, subject: Optional[str]
+) -> VocabularyDueResponse:
+    """按 (student_id, due_date) 索引一次取出到期的复习卡片"""
+    today = date.today()
+    query = (
+        select(VocabularyReview, Vocabulary)
+        .join(Vocabulary, VocabularyReview.vocabulary_id == Vocabulary.id)
+        .where(
+            VocabularyReview.student_id == student_id,
+            VocabularyReview.due_date <= today,
+        )
+    )
+    if subject:
+        query = query.where(Vocabulary.subject == subject)
+
+    result = await db.execute(
+        query.order_by(VocabularyReview.due_date.asc(), VocabularyReview.id.asc()).limit(limit)
+    )
+    items = [
+        VocabularyDueCard(
+            vocabulary_id=vocab.id,
+            word=vocab.word,
+            phonetic=vocab.phonetic,
+            meaning=vocab.meaning,
+            example=vocab.example,
+            level=vocab.level,
+            due_date=review.due_date,
+            interval_days=review.interval_days,
+            ease_factor=float(review.ease_factor),
+            repetitions=review.repetitions,
+        )
+        for review, vocab in result.all()
+    ]
+    return VocabularyDueResponse(server_date=today, items=items)
+
+
+def _to_local_naive(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+
+async def _load_review_states(
+    db: AsyncSession, student_id: int, vocab_ids: set[int]
+) -> dict[int, dict]:
+    """
+    一次查询取回相关卡片状态（行锁，串行化同一学生的并发同步）；
+    尚未加入复习计划的单词返回初始状态（id 为 None），不存在的单词报 404
+    """
+    state_result = await db.execute(
+        select(
+            VocabularyReview.id,
+            VocabularyReview.vocabulary_id,
+            VocabularyReview.ease_factor,
+            VocabularyReview.interval_days,
+            VocabularyReview.repetitions,
+            VocabularyReview.lapses,
+            VocabularyReview.due_date,
+            VocabularyReview.last_quality,
+            VocabularyReview.last_reviewed_at,
+        ).where(
+            VocabularyReview.student_id == student_id,
+            VocabularyReview.vocabulary_id.in_(vocab_ids),
+        ).with_for_update()
+    )
+    states: dict[int, dict] = {}
+    for row in state_result.all():
+        state = dict(row._mapping)
+        state["ease_factor"] = float(state["ease_factor"])
+        states[row.vocabulary_id] = state
+
+    new_ids = vocab_ids - states.keys()
+    if new_ids:
+        exist_result = await db.execute(
+            select(Vocabulary.id).where(Vocabulary.id.in_(new_ids))
+        )
+        unknown_ids = new_ids - set(exist_result.scalars().all())
+        if unknown_ids:
+            raise HTTPException(
+                status_code=404,
+                detail={
+                    "code": "VOCABULARY_NOT_FOUND",
+                    "message": f"词汇不存在: {sorted(unknown_ids)}",
+                },
+            )
+        for vocab_id in new_ids:
+            states[vocab_id] = {
+                "id": None,
+                "vocabulary_id": vocab_id,
+                "ease_factor": DEFAULT_EASE_FACTOR,
+                "interval_days": 0,
+                "repetitions": 0,
+                "lapses": 0,
+                "due_date": date.today(),
+                "last_quality": None,
+                "last_reviewed_at": None,
+            }
+    return states
+
+
+async def _save_review_states(
+    db: AsyncSession, student_id: int, states: dict[int, dict], touched: set[int]
+) -> None:
+    """已有卡片一次批量更新，新卡片一次批量 upsert"""
+    updates, inserts = [], []
+    for vocab_id in touched:
+        state = states[vocab_id]
+        if state["id"] is None:
+            inserts.append({
+                key: value for key, value in state.items() if key != "id"
+            } | {"student_id": student_id})
+        else:
+            updates.append({
+                key: value for key, value in state.items() if key != "vocabulary_id"
+            })
+    if updates:
+        await db.execute(update(VocabularyReview), updates)
+    if inserts:
+        # 并发同步可能同时把同一张新卡片判定为新增：冲突时保留复习时间更晚的一方
+        stmt = dialect_insert(db, VocabularyReview).values(inserts)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["student_id", "vocabulary_id"],
+            set_={
+                key: stmt.excluded[key]
+                for key in inserts[0] if key not in ("student_id", "vocabulary_id")
+            },
+            where=VocabularyReview.last_reviewed_at < stmt.excluded.last_reviewed_at,
+        )
+        await db.execute(stmt)
+
+
+async def _apply_vocabulary_reviews(
+    db: AsyncSession, student_id: int, reviews: List[VocabularyReviewItem]
+) -> VocabularyReviewBatchResponse:
+    """
+    批量应用一次复习会话的结果：一次查询取回相关卡片状态，
+    按复习时间顺序推演 SM-2，再一次批量更新 + 一次批量 upsert 写回。
+    早于已记录复习时间的结果视为重复同步，直接跳过，保证离线重传幂等。
+    """
+    for review in reviews:
+        if not (0 <= review.quality <= 5):
+            raise HTTPException(
+                status_code=400,
+                detail={"code": "INVALID_QUALITY", "message": "复习评分必须在 0-5 之间"},
+            )
+
+    vocab_ids = {review.vocabulary_id for review in reviews}
+    if not vocab_ids:
+        return VocabularyReviewBatchResponse(applied=0, skipped=0, items=[])
+
+    states = await _load_review_states(db, student_id, vocab_ids)
+
+    applied = skipped = 0
+    touched: set[int] = set()
+    for review in sorted(reviews, key=lambda r: _to_local_naive(r.reviewed_at)):
+        state = states[review.vocabulary_id]
+        reviewed_at = _to_local_naive(review.reviewed_at)
+        if state["last_reviewed_at"] and reviewed_at <= state["last_reviewed_at"]:
+            skipped += 1
+            continue
+        state.update(schedule_review(
+            state["ease_factor"],
+            state["interval_days"],
+            state["repetitions"],
+            state["lapses"],
+            review.quality,
+            reviewed_at.date(),
+        ))
+        state["last_quality"] = review.quality
+        state["last_reviewed_at"] = reviewed_at
+        touched.add(review.vocabulary_id)
+        applied += 1
+
+    await _save_review_states(db, student_id, states, touched)
+    await db.commit()
+
+    return VocabularyReviewBatchResponse(
+        applied=applied,
+        skipped=skipped,
+        items=[
+            VocabularyScheduleItem(
+                vocabulary_id=vocab_id,
+                due_date=states[vocab_id]["due_date"],
+                interval_days=states[vocab_id]["interval_days"],
+                ease_factor=states[vocab_id]["ease_factor"],
+                repetitions=states[vocab_id]["repetitions"],
+                lapses=states[vocab_id]["lapses"],
+            )
+            for vocab_id in sorted(touched)
+        ],
+    )
+
+
+async def _load_student_abilities(
+    db: AsyncSession, student_id: int, subject: str
+) -> dict[tuple[str, str], dict]:
+    """按 (student_id, subject) 一次取出该学生的全部能力估计"""
+    result = await db.execute(
+        select(
+            StudentAbility.dimension,
+            StudentAbility.dimension_key,
+            StudentAbility.rating,
+            StudentAbility.attempts,
+            StudentAbility.correct,
+        ).where(
+            StudentAbility.student_id == student_id,
+            StudentAbility.subject == subject,
+        )
+    )
+    return {
+        (row.dimension, row.dimension_key): {
+            "rating": float(row.rating),
+            "attempts": row.attempts,
+            "correct": row.correct,
+        }
+        for row in result.all()
+    }
+
+
+def _target_difficulty(abilities: dict[tuple[str, str], dict], target_success: float) -> int:
+    overall = abilities.get(("overall", ""), {}).get("rating", BASE_RATING)
+    difficulty_ratings = {
+        int(key): value["rating"]
+        for (dimension, key), value in abilities.items()
+        if dimension == "difficulty"
+    }
+    return target_difficulty(overall, difficulty_ratings, target_success)
+
+
+async def _update_student_abilities(
+    db: AsyncSession,
+    student_id: int,
+    subject: str,
+    outcomes: list[tuple[int, list, float]],
+) -> None:
+    """
+    按批改结果增量更新能力估计：一次查询取回现有评分，
+    逐题更新总评分、难度评分和标签评分，再一条 upsert 写回。
+    outcomes: [(difficulty, tags, 得分率 0-1)]
+    """
+    if not outcomes:
+        return
+
+    abilities = await _load_student_abilities(db, student_id, subject)
+    touched: set[tuple[str, str]] = set()
+    for difficulty, tags, outcome in outcomes:
+        keys = [("overall", ""), ("difficulty", str(difficulty))]
+        keys += [("tag", tag) for tag in (tags or [])]
+        for key in keys:
+            state = abilities.setdefault(key, {"rating": BASE_RATING, "attempts": 0, "correct": 0})
+            state["rating"] = update_rating(state["rating"], state["attempts"], difficulty, outcome)
+            state["attempts"] += 1
+            state["correct"] += 1 if outcome >= 1 else 0
+            touched.add(key)
+
+    rows = [
+        {
+            "student_id": student_id,
+            "subject": subject,
+            "dimension": dimension,
+            "dimension_key": key,
+            **abilities[(dimension, key)],
+        }
+        for dimension, key in touched
+    ]
+    stmt = dialect_insert(db, StudentAbility).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["student_id", "subject", "dimension", "dimension_key"],
+        set_={
+            "rating": stmt.excluded.rating,
+            "attempts": stmt.excluded.attempts,
+            "correct": stmt.excluded.correct,
+            "updated_at": func.now(),
+        },
+    )
+    await db.execute(stmt)
+
+
+def _build_exam_result(exam: MockExam, answers: list[MockExamAnswer]) -> MockExamResultResponse:
+    order = {qid: index for index, qid in enumerate(exam.question_ids or [])}
+    answers = sorted(answers, key=lambda a: order.get(a.question_id, len(order)))
+    return MockExamResultResponse(
+        exam_id=exam.id,
+        status=exam.status,
+        score=float(exam.score) if exam.score is not None else None,
+        total=len(answers),
+        correct_count=sum(1 for a in answers if a.is_correct),
+        pending_count=sum(1 for a in answers if a.status == "pending"),
+        answers=[MockExamAnswerResponse.model_validate(a) for a in answers],
+    )
+
 
 @router.get("/questions", response_model=ExamQuestionListResponse)
 async def list_questions(
@@ -111,14 +490,49 @@ async def update_question(
         )
 
     update_data = data.model_dump(exclude_unset=True)
+    previous_type = question.question_type
+    key_changed = any(
+        key in update_data and update_data[key] != getattr(question, key)
+        for key in ("answer", "question_type")
+    )
     for key, value in update_data.items():
         setattr(question, key, value)
 
+    # 答案键被修正时，批量重判已有作答
+    if key_changed:
+        await _regrade_question(db, question, previous_type)
+
     await db.commit()
     await db.refresh(question)
     return ExamQuestionResponse.model_validate(question)
 
 
+@router.post("/questions/{question_id}/regrade", response_model=QuestionRegradeResponse)
+async def regrade_question(
+    question_id: int,
+    current_user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """按当前答案键重判该题的全部作答"""
+    result = await db.execute(
+        select(ExamQuestion).where(ExamQuestion.id == question_id)
+    )
+    question = result.scalar_one_or_none()
+    if not question:
+        raise HTTPException(
+            status_code=404,
+            detail={"code": "QUESTION_NOT_FOUND", "message": "题目不存在"},
+        )
+
+    regraded, affected_exams = await _regrade_question(db, question)
+    await db.commit()
+    return QuestionRegradeResponse(
+        question_id=question_id,
+        regraded=regraded,
+        affected_exams=affected_exams,
+    )
+
+
 @router.delete("/questions/{question_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_question(
     question_id: int,
@@ -157,6 +571,7 @@ async def list_vocabulary(
     if level:
         conditions.append(Vocabulary.level == level)
     if search:
+        # 列表搜索保持不区分大小写的子串匹配；前缀索引只服务于自动补全
         conditions.append(Vocabulary.word.ilike(f"%{search}%"))
     if conditions:
         query = query.where(and_(*conditions))
@@ -188,34 +603,206 @@ async def create_vocabulary(
     current_user: User = Depends(get_admin_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """添加词汇"""
-    # 检查是否已存在
-    existing = await db.execute(
-        select(Vocabulary).where(
-            Vocabulary.subject == data.subject,
-            Vocabulary.word == data.word,
-        )
-    )
-    if existing.scalar_one_or_none():
-        raise HTTPException(
-            status_code=409,
-            detail={"code": "DUPLICATE_WORD", "message": "该词汇已存在"},
-        )
-
+    """添加词汇（重复由 (subject, word) 唯一约束判定）"""
     vocab = Vocabulary(
         subject=data.subject,
-        word=data.word,
+        word=data.word.strip(),
         phonetic=data.phonetic,
         meaning=data.meaning,
         example=data.example,
         level=data.level,
     )
     db.add(vocab)
-    await db.commit()
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail={"code": "DUPLICATE_WORD", "message": "该词汇已存在"},
+        )
+    vocab_trie_cache.invalidate(data.subject)
     await db.refresh(vocab)
     return VocabularyResponse.model_validate(vocab)
 
 
+@router.post("/vocabulary/bulk", response_model=VocabularyBulkImportResponse)
+async def bulk_import_vocabulary(
+    data: VocabularyBulkImportRequest,
+    current_user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """批量导入词表（INSERT ... ON CONFLICT 整批写入，已存在的词条按 overwrite 覆盖或跳过）"""
+    rows: dict[str, dict] = {}
+    for item in data.words:
+        word = item.word.strip()
+        if not word:
+            continue
+        # 同一批次内重复的单词以最后一条为准
+        rows[word] = {
+            "subject": data.subject,
+            "word": word,
+            "phonetic": item.phonetic,
+            "meaning": item.meaning,
+            "example": item.example,
+            "level": item.level or data.level,
+        }
+    duplicates = len(data.words) - len(rows)
+
+    inserted = updated = skipped = 0
+    batch = list(rows.values())
+    for start in range(0, len(batch), VOCAB_IMPORT_CHUNK_SIZE):
+        chunk = batch[start:start + VOCAB_IMPORT_CHUNK_SIZE]
+        existing_result = await db.execute(
+            select(func.count()).select_from(Vocabulary).where(
+                Vocabulary.subject == data.subject,
+                Vocabulary.word.in_([row["word"] for row in chunk]),
+            )
+        )
+        existing = existing_result.scalar_one()
+
+        stmt = dialect_insert(db, Vocabulary).values(chunk)
+        if data.overwrite:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["subject", "word"],
+                set_={
+                    "meaning": stmt.excluded.meaning,
+                    "phonetic": func.coalesce(stmt.excluded.phonetic, Vocabulary.phonetic),
+                    "example": func.coalesce(stmt.excluded.example, Vocabulary.example),
+                    "level": func.coalesce(stmt.excluded.level, Vocabulary.level),
+                },
+            )
+            updated += existing
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=["subject", "word"])
+            skipped += existing
+        await db.execute(stmt)
+        inserted += len(chunk) - existing
+
+    await db.commit()
+    vocab_trie_cache.invalidate(data.subject)
+    return VocabularyBulkImportResponse(
+        total=len(data.words),
+        inserted=inserted,
+        updated=updated,
+        skipped=skipped,
+        duplicates_in_payload=duplicates,
+    )
+
+
+@router.get("/vocabulary/autocomplete", response_model=list[VocabularySuggestion])
+async def autocomplete_vocabulary(
+    prefix: str = Query(..., min_length=1),
+    subject: str = Query("english"),
+    level: Optional[str] = Query(None),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_student_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """单词前缀自动补全（热门等级走内存前缀树，其余走前缀索引）"""
+    prefix = prefix.strip()
+    if level and level in settings.vocab_trie_hot_levels:
+        trie = vocab_trie_cache.get(subject, level)
+        if trie is None:
+            result = await db.execute(
+                select(
+                    Vocabulary.id, Vocabulary.word, Vocabulary.phonetic,
+                    Vocabulary.meaning, Vocabulary.level,
+                ).where(Vocabulary.subject == subject, Vocabulary.level == level)
+            )
+            trie = VocabularyTrie([dict(row._mapping) for row in result.all()])
+            vocab_trie_cache.set(subject, level, trie)
+        return [VocabularySuggestion(**entry) for entry in trie.search(prefix, limit)]
+
+    query = select(
+        Vocabulary.id, Vocabulary.word, Vocabulary.phonetic,
+        Vocabulary.meaning, Vocabulary.level,
+    ).where(Vocabulary.subject == subject, _word_prefix_condition(prefix))
+    if level:
+        query = query.where(Vocabulary.level == level)
+    result = await db.execute(query.order_by(func.lower(Vocabulary.word), Vocabulary.word).limit(limit))
+    return [VocabularySuggestion(**row._mapping) for row in result.all()]
+
+
+@router.post("/vocabulary/assign", response_model=VocabularyAssignResponse)
+async def assign_vocabulary(
+    data: VocabularyAssignRequest,
+    current_user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """为学生批量加入单词复习计划（一条 INSERT ... SELECT，已在计划中的单词保留原进度）"""
+    if not data.student_ids:
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "NO_STUDENTS", "message": "请选择学生"},
+        )
+
+    source = (
+        select(
+            Student.id,
+            Vocabulary.id,
+            literal(date.today(), Date),
+            literal(DEFAULT_EASE_FACTOR, Numeric(4, 2)),
+            literal(0, Integer),
+            literal(0, Integer),
+            literal(0, Integer),
+        )
+        .select_from(Student)
+        .join(Vocabulary, true())
+        .where(
+            Student.id.in_(data.student_ids),
+            Student.is_active == True,
+            Vocabulary.subject == data.subject,
+        )
+    )
+    if data.level:
+        source = source.where(Vocabulary.level == data.level)
+    if data.vocabulary_ids:
+        source = source.where(Vocabulary.id.in_(data.vocabulary_ids))
+
+    stmt = dialect_insert(db, VocabularyReview).from_select(
+        ["student_id", "vocabulary_id", "due_date", "ease_factor",
+         "interval_days", "repetitions", "lapses"],
+        source,
+    ).on_conflict_do_nothing(index_elements=["student_id", "vocabulary_id"])
+    result = await db.execute(stmt)
+    await db.commit()
+    return VocabularyAssignResponse(assigned=max(result.rowcount or 0, 0))
+
+
+@router.get("/vocabulary/due", response_model=VocabularyDueResponse)
+async def get_student_due_vocabulary(
+    student_id: int = Query(...),
+    limit: int = Query(20, ge=1, le=200),
+    subject: Optional[str] = Query(None),
+    current_user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """查看指定学生今日待复习单词"""
+    return await _load_due_cards(db, student_id, limit, subject)
+
+
+@router.get("/vocabulary/my/due", response_model=VocabularyDueResponse)
+async def get_my_due_vocabulary(
+    limit: int = Query(20, ge=1, le=200),
+    subject: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_db),
+    current_student=Depends(get_current_student),
+):
+    """小程序端：今日待复习单词（按到期时间排序的前 N 张卡片）"""
+    return await _load_due_cards(db, current_student.id, limit, subject)
+
+
+@router.post("/vocabulary/my/reviews", response_model=VocabularyReviewBatchResponse)
+async def submit_my_vocabulary_reviews(
+    data: VocabularyReviewBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    current_student=Depends(get_current_student),
+):
+    """小程序端：批量同步一次复习会话的结果（支持离线复习后整批上传）"""
+    return await _apply_vocabulary_reviews(db, current_student.id, data.reviews)
+
+
 @router.post("/mock-exams", response_model=MockExamResponse, status_code=status.HTTP_201_CREATED)
 async def create_mock_exam(
     data: MockExamCreate,
@@ -246,18 +833,32 @@ async def create_mock_exam(
     if conditions:
         query = query.where(and_(*conditions))
 
-    result = await db.execute(query)
-    all_questions = result.scalars().all()
+    if data.adaptive:
+        # 自适应组卷：按能力估计算出目标难度，优先未做过、难度最接近的题目
+        abilities = await _load_student_abilities(db, data.student_id, data.subject)
+        target = _target_difficulty(abilities, data.target_success_rate)
+        answered = select(MockExamAnswer.question_id).where(
+            MockExamAnswer.student_id == data.student_id
+        )
+        result = await db.execute(
+            query.order_by(
+                case((ExamQuestion.id.in_(answered), 1), else_=0),
+                func.abs(ExamQuestion.difficulty - target),
+                func.random(),
+            ).limit(data.question_count)
+        )
+        selected = list(result.scalars().all())
+    else:
+        result = await db.execute(query)
+        all_questions = result.scalars().all()
+        # 随机抽取
+        selected = random.sample(all_questions, min(data.question_count, len(all_questions)))
 
-    if not all_questions:
+    if not selected:
         raise HTTPException(
             status_code=400,
             detail={"code": "NO_QUESTIONS", "message": "没有符合条件的题目"},
         )
-
-    # 随机抽取
-    count = min(data.question_count, len(all_questions))
-    selected = random.sample(all_questions, count)
     question_ids = [q.id for q in selected]
 
     mock_exam = MockExam(
@@ -310,3 +911,256 @@ async def get_mock_exam(
     response = MockExamResponse.model_validate(mock_exam)
     response.questions = questions
     return response
+
+
+@router.post("/mock-exams/{exam_id}/submit", response_model=MockExamResultResponse)
+async def submit_mock_exam(
+    exam_id: int,
+    data: MockExamSubmitRequest,
+    current_user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """提交模拟考试作答并自动批改（选择/填空自动判分，主观题进入人工批改队列）"""
+    result = await db.execute(
+        select(MockExam).where(MockExam.id == exam_id)
+    )
+    mock_exam = result.scalar_one_or_none()
+    if not mock_exam:
+        raise HTTPException(
+            status_code=404,
+            detail={"code": "EXAM_NOT_FOUND", "message": "模拟考试不存在"},
+        )
+    if mock_exam.status != "active":
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "EXAM_NOT_ACTIVE", "message": "该模拟考试不在作答中，无法提交"},
+        )
+
+    question_ids = list(mock_exam.question_ids or [])
+    responses = {item.question_id: item.answer for item in data.answers}
+    unknown_ids = set(responses) - set(question_ids)
+    if unknown_ids:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "code": "QUESTION_NOT_IN_EXAM",
+                "message": f"题目不属于该模拟考试: {sorted(unknown_ids)}",
+            },
+        )
+
+    # 一次查询取回整卷答案键
+    key_result = await db.execute(
+        select(
+            ExamQuestion.id, ExamQuestion.question_type, ExamQuestion.answer,
+            ExamQuestion.difficulty, ExamQuestion.tags,
+        ).where(ExamQuestion.id.in_(question_ids))
+    )
+    key_rows = {row.id: row for row in key_result.all()}
+    answer_keys = {qid: (row.question_type, row.answer) for qid, row in key_rows.items()}
+    graded = grade_answers(answer_keys, responses)
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "mock_exam_id": mock_exam.id,
+            "question_id": question_id,
+            "student_id": mock_exam.student_id,
+            "answer": responses.get(question_id),
+            **graded[question_id],
+            "graded_at": now if graded[question_id]["status"] == "graded" else None,
+            "ability_counted": graded[question_id]["status"] == "graded",
+        }
+        for question_id in question_ids
+        if question_id in graded
+    ]
+    answers = []
+    if rows:
+        insert_result = await db.execute(
+            insert(MockExamAnswer).returning(MockExamAnswer), rows
+        )
+        answers = list(insert_result.scalars().all())
+
+    has_pending = any(a.status == "pending" for a in answers)
+    mock_exam.status = "grading" if has_pending else "completed"
+    mock_exam.completed_at = now
+    mock_exam.score = exam_score([float(a.score) if a.score is not None else None for a in answers])
+
+    await _update_student_abilities(
+        db,
+        mock_exam.student_id,
+        mock_exam.subject,
+        [
+            (key_rows[a.question_id].difficulty, key_rows[a.question_id].tags, float(a.score) / FULL_SCORE)
+            for a in answers
+            if a.status == "graded"
+        ],
+    )
+    await db.commit()
+    return _build_exam_result(mock_exam, answers)
+
+
+@router.get("/mock-exams/{exam_id}/result", response_model=MockExamResultResponse)
+async def get_mock_exam_result(
+    exam_id: int,
+    current_user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """模拟考试批改结果"""
+    result = await db.execute(
+        select(MockExam).where(MockExam.id == exam_id)
+    )
+    mock_exam = result.scalar_one_or_none()
+    if not mock_exam:
+        raise HTTPException(
+            status_code=404,
+            detail={"code": "EXAM_NOT_FOUND", "message": "模拟考试不存在"},
+        )
+
+    answer_result = await db.execute(
+        select(MockExamAnswer).where(MockExamAnswer.mock_exam_id == exam_id)
+    )
+    return _build_exam_result(mock_exam, list(answer_result.scalars().all()))
+
+
+@router.get("/grading-queue", response_model=ManualGradingListResponse)
+async def list_manual_grading_queue(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    subject: Optional[str] = Query(None),
+    current_user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """人工批改队列（主观题待批改作答）"""
+    query = (
+        select(
+            MockExamAnswer,
+            MockExam.title.label("exam_title"),
+            Student.name.label("student_name"),
+            ExamQuestion.question_type,
+            ExamQuestion.content,
+            ExamQuestion.answer.label("reference_answer"),
+        )
+        .join(MockExam, MockExamAnswer.mock_exam_id == MockExam.id)
+        .join(Student, MockExamAnswer.student_id == Student.id)
+        .join(ExamQuestion, MockExamAnswer.question_id == ExamQuestion.id)
+        .where(MockExamAnswer.status == "pending")
+    )
+    if subject:
+        query = query.where(MockExam.subject == subject)
+
+    count_result = await db.execute(
+        select(func.count()).select_from(query.subquery())
+    )
+    total = count_result.scalar_one()
+
+    offset = (page - 1) * page_size
+    result = await db.execute(
+        query.order_by(MockExamAnswer.created_at.asc(), MockExamAnswer.id.asc())
+        .offset(offset).limit(page_size)
+    )
+
+    items = [
+        ManualGradingItem(
+            answer_id=row.MockExamAnswer.id,
+            mock_exam_id=row.MockExamAnswer.mock_exam_id,
+            exam_title=row.exam_title,
+            student_id=row.MockExamAnswer.student_id,
+            student_name=row.student_name,
+            question_id=row.MockExamAnswer.question_id,
+            question_type=row.question_type,
+            question_content=row.content,
+            reference_answer=row.reference_answer,
+            answer=row.MockExamAnswer.answer,
+            submitted_at=row.MockExamAnswer.created_at,
+        )
+        for row in result.all()
+    ]
+    return ManualGradingListResponse(
+        items=items,
+        total=total,
+        page=page,
+        page_size=page_size,
+        pages=(total + page_size - 1) // page_size,
+    )
+
+
+@router.patch("/answers/{answer_id}/grade", response_model=MockExamAnswerResponse)
+async def grade_exam_answer(
+    answer_id: int,
+    data: ManualGradeRequest,
+    current_user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """人工批改单道主观题作答"""
+    if not (0 <= data.score <= 100):
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "INVALID_SCORE", "message": "评分必须在 0-100 之间"},
+        )
+
+    result = await db.execute(
+        select(MockExamAnswer).where(MockExamAnswer.id == answer_id)
+    )
+    answer = result.scalar_one_or_none()
+    if not answer:
+        raise HTTPException(
+            status_code=404,
+            detail={"code": "ANSWER_NOT_FOUND", "message": "作答记录不存在"},
+        )
+
+    count_ability = not answer.ability_counted
+    answer.score = data.score
+    answer.is_correct = data.is_correct
+    answer.comment = data.comment
+    answer.status = "graded"
+    answer.graded_at = datetime.utcnow()
+    answer.ability_counted = True
+    await db.flush()
+
+    await _refresh_exam_scores(db, {answer.mock_exam_id})
+    if count_ability:
+        question_result = await db.execute(
+            select(ExamQuestion.difficulty, ExamQuestion.tags, MockExam.subject)
+            .join(MockExam, MockExam.id == answer.mock_exam_id)
+            .where(ExamQuestion.id == answer.question_id)
+        )
+        question = question_result.first()
+        if question:
+            await _update_student_abilities(
+                db,
+                answer.student_id,
+                question.subject,
+                [(question.difficulty, question.tags, data.score / FULL_SCORE)],
+            )
+    await db.commit()
+    await db.refresh(answer)
+    return MockExamAnswerResponse.model_validate(answer)
+
+
+@router.get("/students/{student_id}/abilities", response_model=StudentAbilityResponse)
+async def get_student_abilities(
+    student_id: int,
+    subject: str = Query(...),
+    target_success_rate: float = Query(0.7, gt=0, lt=1),
+    current_user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """学生能力估计（总评分、按难度、按标签）及自适应组卷的目标难度"""
+    result = await db.execute(
+        select(StudentAbility).where(
+            StudentAbility.student_id == student_id,
+            StudentAbility.subject == subject,
+        ).order_by(StudentAbility.dimension, StudentAbility.dimension_key)
+    )
+    rows = result.scalars().all()
+    abilities = {
+        (row.dimension, row.dimension_key): {"rating": float(row.rating)}
+        for row in rows
+    }
+    return StudentAbilityResponse(
+        student_id=student_id,
+        subject=subject,
+        overall_rating=abilities.get(("overall", ""), {}).get("rating", BASE_RATING),
+        target_difficulty=_target_difficulty(abilities, target_success_rate),
+        items=[StudentAbilityItem.model_validate(row) for row in rows],
+    )
@@ -2,17 +2,21 @@ from typing import Optional
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, func, and_, update
 
 from app.database import get_db
 from app.models.feedback import Feedback, FeedbackTemplate
 from app.models.student import Student
+from app.models.notification import Notification
 from app.models.user import User
 from app.schemas.feedback import (
     FeedbackCreate, FeedbackUpdate, FeedbackResponse, FeedbackListResponse,
     FeedbackPushResponse, FeedbackTemplateCreate, FeedbackTemplateResponse
 )
-from app.dependencies import get_admin_user, get_current_student
+from app.dependencies import get_admin_user, get_current_student, get_read_db
+from app.utils.events import emit_notifications_created
+from app.utils.notification_counter import increment_unread
+from app.utils.outbox import enqueue_wechat_notifications, outbox_dispatcher
 
 router = APIRouter(prefix="/feedback", tags=["课堂反馈"])
 
@@ -142,7 +146,7 @@ async def list_feedback(
     student_id: Optional[int] = Query(None),
     is_pushed: Optional[bool] = Query(None),
     current_user: User = Depends(get_admin_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """反馈列表"""
     query = select(Feedback)
@@ -295,20 +299,42 @@ async def push_feedback(
         )
     feedback, student = row
 
+    # 条件更新抢占推送：重复点击或客户端重试时不再重复发送通知和微信消息
     push_time = datetime.utcnow()
-    feedback.is_pushed = True
-    feedback.pushed_at = push_time
-
-    # 实际微信推送（若有 openid 则尝试推送）
-    # 这里标记为已推送，实际推送通过微信 API 实现
-    # TODO: 集成微信订阅消息模板时取消注释
-    # from app.utils.wechat import send_wechat_subscribe_message
-    # if student.user_id:
-    #     user_result = await db.execute(select(User).where(User.id == student.user_id))
-    #     user = user_result.scalar_one_or_none()
-    #     if user and user.openid:
-    #         await send_wechat_subscribe_message(user.openid, TEMPLATE_ID, {...})
+    claimed = await db.execute(
+        update(Feedback)
+        .where(Feedback.id == feedback.id, Feedback.is_pushed == False)
+        .values(is_pushed=True, pushed_at=push_time)
+    )
+    if claimed.rowcount != 1:
+        await db.refresh(feedback)
+        return FeedbackPushResponse(pushed=True, pushed_at=feedback.pushed_at)
+
+    # 给学生和家长账号各发一条站内通知，微信推送写入发件箱，由后台投递器异步发送
+    recipients = [uid for uid in dict.fromkeys([student.user_id, student.parent_user_id]) if uid]
+    notifications = [
+        Notification(
+            user_id=user_id,
+            title=f"{student.name}的课堂反馈",
+            content=feedback.performance,
+            type="feedback_push",
+            related_type="feedback",
+            related_id=feedback.id,
+            wx_push_status="pending",
+        )
+        for user_id in recipients
+    ]
+    if notifications:
+        db.add_all(notifications)
+        await db.flush()
+        await increment_unread(db, recipients)
+        emit_notifications_created(db, notifications)
+        enqueue_wechat_notifications(
+            db, notifications, page=f"pages/feedback-detail/feedback-detail?id={feedback.id}"
+        )
 
     await db.commit()
+    if notifications:
+        outbox_dispatcher.wake()
 
     return FeedbackPushResponse(pushed=True, pushed_at=push_time)
@@ -0,0 +1,147 @@
+import hmac
+import time
+from datetime import timezone
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import Response
+from sqlalchemy.pool import QueuePool
+
+from app import database
+from app.config import settings
+from app.utils.db_pool import metrics_for
+from app.utils.events import event_hub
+from app.utils.grade_analytics import grade_analytics_cache
+from app.utils.metrics import CONTENT_TYPE, Counter, Gauge, HistogramMetric, Metric, registry
+from app.utils.outbox import outbox_dispatcher
+from app.utils.read_replica import replica_monitor
+from app.utils.report_pdf import report_pdf_renderer
+from app.utils.scheduler import scheduler
+from app.utils.token_store import revocation_store
+from app.utils.user_cache import user_cache
+from app.utils.vocab_trie import vocab_trie_cache
+
+router = APIRouter(tags=["监控"])
+
+
+def _check_token(request: Request) -> None:
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"code": "NOT_FOUND", "message": "指标接口未启用"},
+        )
+    if not settings.METRICS_TOKEN:
+        return
+    expected = f"Bearer {settings.METRICS_TOKEN}"
+    if not hmac.compare_digest(request.headers.get("Authorization", ""), expected):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail={"code": "TOKEN_INVALID", "message": "指标抓取 Token 无效"},
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+def _pool_metrics() -> list[Metric]:
+    size = Gauge("db_pool_size", "连接池常驻连接数", ("pool",))
+    checked_out = Gauge("db_pool_checked_out", "已借出的连接数", ("pool",))
+    overflow = Gauge("db_pool_overflow", "超出常驻数的溢出连接数", ("pool",))
+    timeouts = Counter("db_pool_timeouts_total", "取连接超时次数", ("pool",))
+    wait = HistogramMetric("db_pool_checkout_wait_seconds", "取连接等待时间（秒）", ("pool",))
+
+    engines = [database.engine, database.replica_engine]
+    for pool in (engine.pool for engine in engines if engine is not None):
+        labels = (pool.logging_name or "default",)
+        if isinstance(pool, QueuePool):
+            size.set(labels, pool.size())
+            checked_out.set(labels, pool.checkedout())
+            overflow.set(labels, max(0, pool.overflow()))
+        pool_metrics = metrics_for(pool)
+        timeouts.inc(labels, pool_metrics.timeouts)
+        wait.add(labels, pool_metrics.wait_seconds)
+    return [size, checked_out, overflow, timeouts, wait]
+
+
+def _cache_metrics() -> list[Metric]:
+    hits = Counter("cache_hits_total", "进程内缓存命中次数", ("cache",))
+    misses = Counter("cache_misses_total", "进程内缓存未命中次数", ("cache",))
+    ratio = Gauge("cache_hit_ratio", "进程内缓存命中率（启动以来）", ("cache",))
+
+    caches = {
+        "user": (user_cache.users.hits, user_cache.users.misses),
+        "user_student": (user_cache.students.hits, user_cache.students.misses),
+        "grade_analytics": (grade_analytics_cache.hits, grade_analytics_cache.misses),
+        "vocab_trie": (vocab_trie_cache.hits, vocab_trie_cache.misses),
+        "report_pdf": (report_pdf_renderer.cache_hits, report_pdf_renderer.cache_misses),
+    }
+    for name, (hit_count, miss_count) in caches.items():
+        lookups = hit_count + miss_count
+        hits.inc((name,), hit_count)
+        misses.inc((name,), miss_count)
+        ratio.set((name,), hit_count / lookups if lookups else 0.0)
+    return [hits, misses, ratio]
+
+
+def _lag(last_run_at: Optional[float], started_at: Optional[float], interval: float, now: float) -> float:
+    """距应完成下一轮的超期秒数：上次成功（从未成功则为启动时刻）+ 间隔之后仍未再次成功的时长"""
+    since = last_run_at or started_at
+    return max(0.0, now - since - interval) if since else 0.0
+
+
+def _job_metrics() -> list[Metric]:
+    now = time.time()
+    lag = Gauge("background_job_lag_seconds", "后台任务超出预定间隔未完成的秒数", ("job",))
+    last_success = Gauge(
+        "background_job_last_success_timestamp_seconds", "后台任务最近一次成功的时间戳", ("job",),
+    )
+    runs = Counter("background_job_runs_total", "定时任务执行次数", ("job", "result"))
+    duration = Gauge("background_job_last_duration_seconds", "定时任务最近一次成功执行的耗时", ("job",))
+
+    for job in scheduler.jobs:
+        labels = (job.name,)
+        lag.set(labels, _lag(job.last_success_at, scheduler.started_at, job.interval, now))
+        if job.last_success_at:
+            last_success.set(labels, job.last_success_at)
+        runs.inc((job.name, "success"), job.runs)
+        runs.inc((job.name, "failure"), job.failures)
+        runs.inc((job.name, "skipped"), job.skipped)
+        duration.set(labels, job.last_duration)
+
+    if outbox_dispatcher.last_run_at:
+        labels = ("outbox_dispatcher",)
+        lag.set(labels, _lag(outbox_dispatcher.last_run_at, None, settings.OUTBOX_POLL_INTERVAL, now))
+        last_success.set(labels, outbox_dispatcher.last_run_at)
+    if revocation_store.synced_at:
+        labels = ("token_revocation_sync",)
+        synced_at = revocation_store.synced_at.replace(tzinfo=timezone.utc).timestamp()
+        lag.set(labels, _lag(synced_at, None, settings.TOKEN_REVOCATION_SYNC_SECONDS, now))
+        last_success.set(labels, synced_at)
+    return [lag, last_success, runs, duration]
+
+
+def _runtime_metrics() -> list[Metric]:
+    metrics: list[Metric] = []
+    if database.replica_engine is not None:
+        healthy = Gauge("db_replica_healthy", "只读副本是否可用（1 可用）")
+        healthy.set((), int(replica_monitor.healthy))
+        fallbacks = Counter("db_replica_fallbacks_total", "副本不可用回退主库的只读请求数")
+        fallbacks.inc((), replica_monitor.fallbacks)
+        metrics += [healthy, fallbacks]
+        if replica_monitor.lag_seconds is not None:
+            lag = Gauge("db_replica_lag_seconds", "只读副本复制延迟（秒）")
+            lag.set((), replica_monitor.lag_seconds)
+            metrics.append(lag)
+    connections = Gauge("realtime_connections", "实时事件推送连接数")
+    connections.set((), event_hub.connection_count)
+    metrics.append(connections)
+    return metrics
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request):
+    """
+    Prometheus 文本格式指标（当前 worker）：按路由模板的请求数 / 耗时 / 进行中请求、请求内 SQL 条数与耗时、
+    连接池状态与取连接等待、缓存命中率、后台任务滞后
+    """
+    _check_token(request)
+    extra = [*_pool_metrics(), *_cache_metrics(), *_job_metrics(), *_runtime_metrics()]
+    return Response(content=registry.render(extra), media_type=CONTENT_TYPE)
@@ -1,37 +1,145 @@
-from typing import Optional
+import base64
+import binascii
 from datetime import datetime
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, update
+from sqlalchemy import select, func, update, insert, literal, union, tuple_, Boolean, Integer, String, Text
 
 from app.database import get_db
 from app.models.notification import Notification
+from app.models.student import Student
 from app.models.user import User
 from app.schemas.notification import (
     NotificationCreate, NotificationResponse,
     NotificationListResponse, UnreadCountResponse
 )
-from app.dependencies import get_admin_user, get_current_user
+from app.dependencies import get_admin_user, get_current_user, get_read_db
+from app.utils.events import emit_notifications_created
+from app.utils.notification_counter import (
+    increment_unread, decrement_unread, reset_unread, get_unread_count as read_unread_count,
+    rebuild_unread_counters,
+)
+from app.utils.outbox import enqueue_wechat_notifications, outbox_dispatcher
 
 router = APIRouter(prefix="/notifications", tags=["通知管理"])
 
+AUDIENCE_TARGETS = ("students", "parents", "all")
+
+
+def _encode_cursor(notification: Notification) -> str:
+    raw = f"{notification.created_at.isoformat()}|{notification.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        created_at, notification_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(notification_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "INVALID_CURSOR", "message": "分页游标无效"},
+        )
+
+
+def _recipient_query(data: NotificationCreate):
+    """
+    接收人 user_id 查询：显式 user_ids 与受众条件取并集（去重）
+    显式 ID 只保留存在的用户；受众条件只选在读学生及其已启用的学生 / 家长账号
+    """
+    selects = []
+    if data.user_ids:
+        selects.append(select(User.id.label("user_id")).where(User.id.in_(data.user_ids)))
+
+    audience = data.audience
+    if audience:
+        if audience.target not in AUDIENCE_TARGETS:
+            raise HTTPException(
+                status_code=400,
+                detail={"code": "INVALID_AUDIENCE", "message": f"受众只能是 {' / '.join(AUDIENCE_TARGETS)}"},
+            )
+        conditions = [Student.is_active == True]
+        if audience.grade:
+            conditions.append(Student.grade == audience.grade)
+        if audience.subject:
+            conditions.append(Student.subjects.any(audience.subject))
+        columns = {
+            "students": [Student.user_id],
+            "parents": [Student.parent_user_id],
+            "all": [Student.user_id, Student.parent_user_id],
+        }[audience.target]
+        for column in columns:
+            selects.append(
+                select(User.id.label("user_id"))
+                .select_from(Student)
+                .join(User, User.id == column)
+                .where(*conditions, User.is_active == True)
+            )
+
+    if not selects:
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "NO_RECIPIENTS", "message": "请指定接收用户或受众"},
+        )
+    return union(*selects).subquery() if len(selects) > 1 else selects[0].distinct().subquery()
+
+
+async def _insert_notifications(db: AsyncSession, data: NotificationCreate) -> list[Notification]:
+    """
+    一条 INSERT ... SELECT ... RETURNING 写入全部通知，接收人在同一语句中解析，
+    无论人数多少都只有一次往返；随后累加未读计数、登记实时事件，并按需写入微信推送发件箱
+    """
+    recipients = _recipient_query(data)
+    source = select(
+        recipients.c.user_id,
+        literal(data.title, String),
+        literal(data.content, Text),
+        literal(data.type, String),
+        literal(data.related_type, String),
+        literal(data.related_id, Integer),
+        literal(False, Boolean),
+        literal("pending" if data.send_wechat else "skipped", String),
+    )
+    stmt = (
+        insert(Notification)
+        .from_select(
+            ["user_id", "title", "content", "type", "related_type", "related_id", "is_read", "wx_push_status"],
+            source,
+        )
+        .returning(Notification)
+    )
+    notifications = sorted((await db.execute(stmt)).scalars().all(), key=lambda n: n.id)
+
+    await increment_unread(db, [n.user_id for n in notifications])
+    emit_notifications_created(db, notifications)
+    if data.send_wechat and notifications:
+        enqueue_wechat_notifications(db, notifications)
+    return notifications
+
 
 @router.get("/unread-count", response_model=UnreadCountResponse)
 async def get_unread_count(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """未读通知数量"""
-    result = await db.execute(
-        select(func.count()).where(
-            Notification.user_id == current_user.id,
-            Notification.is_read == False,
-        )
-    )
-    count = result.scalar_one()
+    """未读通知数量（读取计数表，不扫描通知）"""
+    count = await read_unread_count(db, current_user.id)
     return UnreadCountResponse(count=count)
 
 
+@router.post("/unread-count/rebuild")
+async def rebuild_unread_count(
+    user_id: Optional[int] = Query(None, description="只重算指定用户，不传则重算全部"),
+    current_user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """按通知表重算未读计数（修复计数漂移）"""
+    users = await rebuild_unread_counters(db, [user_id] if user_id is not None else None)
+    await db.commit()
+    return {"success": True, "users": users}
+
+
 @router.patch("/read-all")
 async def mark_all_read(
     current_user: User = Depends(get_current_user),
@@ -44,6 +152,7 @@ async def mark_all_read(
             Notification.is_read == False,
         ).values(is_read=True)
     )
+    await reset_unread(db, current_user.id)
     await db.commit()
     return {"success": True}
 
@@ -53,24 +162,38 @@ async def list_notifications(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     is_read: Optional[bool] = Query(None),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """通知列表（当前用户的通知）"""
+    """
+    通知列表（当前用户的通知）
+    按 (created_at, id) 倒序键集分页：传 cursor（上一页返回的 next_cursor）时不做 OFFSET 和总数统计；
+    不传 cursor 时兼容按 page 翻页
+    """
     query = select(Notification).where(Notification.user_id == current_user.id)
     if is_read is not None:
         query = query.where(Notification.is_read == is_read)
 
-    count_result = await db.execute(
-        select(func.count()).select_from(query.subquery())
-    )
-    total = count_result.scalar_one()
+    total = pages = None
+    if cursor:
+        created_at, last_id = _decode_cursor(cursor)
+        query = query.where(tuple_(Notification.created_at, Notification.id) < tuple_(created_at, last_id))
+    else:
+        count_result = await db.execute(
+            select(func.count()).select_from(query.subquery())
+        )
+        total = count_result.scalar_one()
+        pages = (total + page_size - 1) // page_size
+        query = query.offset((page - 1) * page_size)
 
-    offset = (page - 1) * page_size
+    # 多取一条判断是否还有下一页
     result = await db.execute(
-        query.order_by(Notification.created_at.desc()).offset(offset).limit(page_size)
+        query.order_by(Notification.created_at.desc(), Notification.id.desc()).limit(page_size + 1)
     )
-    notifications = result.scalars().all()
+    notifications = list(result.scalars().all())
+    has_more = len(notifications) > page_size
+    notifications = notifications[:page_size]
 
     items = [NotificationResponse.model_validate(n) for n in notifications]
     return NotificationListResponse(
@@ -78,7 +201,8 @@ async def list_notifications(
         total=total,
         page=page,
         page_size=page_size,
-        pages=(total + page_size - 1) // page_size,
+        pages=pages,
+        next_cursor=_encode_cursor(notifications[-1]) if has_more else None,
     )
 
 
@@ -88,30 +212,13 @@ async def create_notifications(
     current_user: User = Depends(get_admin_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """批量创建通知"""
-    notifications = []
-    for user_id in data.user_ids:
-        n = Notification(
-            user_id=user_id,
-            title=data.title,
-            content=data.content,
-            type=data.type,
-            related_type=data.related_type,
-            related_id=data.related_id,
-            wx_push_status="pending" if data.send_wechat else "skipped",
-        )
-        db.add(n)
-        notifications.append(n)
-
-    await db.flush()
+    """批量创建通知（指定用户和 / 或按受众广播）"""
+    notifications = await _insert_notifications(db, data)
     await db.commit()
+    if data.send_wechat and notifications:
+        outbox_dispatcher.wake()
 
-    result = []
-    for n in notifications:
-        await db.refresh(n)
-        result.append(NotificationResponse.model_validate(n))
-
-    return result
+    return [NotificationResponse.model_validate(n) for n in notifications]
 
 
 @router.patch("/{notification_id}/read")
@@ -134,7 +241,14 @@ async def mark_notification_read(
             detail={"code": "NOTIFICATION_NOT_FOUND", "message": "通知不存在"},
         )
 
-    notification.is_read = True
+    # 条件更新：并发重复标记时只有一次生效，计数只减一次
+    if not notification.is_read:
+        result = await db.execute(
+            update(Notification)
+            .where(Notification.id == notification_id, Notification.is_read == False)
+            .values(is_read=True)
+        )
+        await decrement_unread(db, current_user.id, result.rowcount)
     await db.commit()
     return {"success": True}
 
@@ -145,26 +259,14 @@ async def send_notification(
     current_user: User = Depends(get_admin_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """手动发送通知（批量创建并标记发送）"""
-    notifications = []
-    for user_id in data.user_ids:
-        n = Notification(
-            user_id=user_id,
-            title=data.title,
-            content=data.content,
-            type=data.type,
-            related_type=data.related_type,
-            related_id=data.related_id,
-            wx_push_status="sent" if data.send_wechat else "skipped",
-            wx_push_at=datetime.utcnow() if data.send_wechat else None,
-        )
-        db.add(n)
-        notifications.append(n)
-
-    await db.flush()
+    """手动发送通知（指定用户和 / 或按受众广播，微信推送写入发件箱后由后台投递器异步发送）"""
+    notifications = await _insert_notifications(db, data)
     await db.commit()
+    if data.send_wechat and notifications:
+        outbox_dispatcher.wake()
 
     return {
         "success": True,
         "sent_count": len(notifications),
+        "wechat_queued": len(notifications) if data.send_wechat else 0,
     }
@@ -1,22 +1,40 @@
+import hashlib
+import json
+import uuid
 from typing import Optional
-from datetime import date, datetime
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from datetime import date, datetime, timedelta
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, Query, UploadFile, status
+from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, insert, func, and_, or_, case, delete, literal, true, String
+from sqlalchemy.orm import aliased
+from loguru import logger
 
-from app.database import get_db
-from app.models.progress import Grade, KnowledgePoint
+from app import database
+from app.config import settings
+from app.database import get_db, dialect_insert
+from app.models.progress import (
+    Grade, KnowledgePoint, LearningReportSnapshot, CurriculumNode, StudentKnowledgeMastery,
+)
 from app.models.student import Student
 from app.models.course import Course
-from app.models.assignment import AssignmentStudent
+from app.models.assignment import Assignment, AssignmentStudent
+from app.utils.grade_import import GradeSheetError, parse_grade_rows, read_sheet
+from app.utils.grade_analytics import cohort_grade_analytics, grade_analytics_cache
+from app.utils.mastery_heatmap import build_mastery_matrix, encode_matrix, mastery_rates
+from app.utils.report_pdf import report_pdf_renderer
 from app.schemas.progress import (
     GradeCreate, GradeResponse, GradeListResponse,
-    GradeTrendItem, GradeTrendResponse,
+    GradeTrendItem, GradeTrendResponse, GradeAnalyticsResponse, GradeImportResponse,
     KnowledgePointCreate, KnowledgePointUpdate,
     KnowledgePointResponse, KnowledgePointListResponse,
-    LearningReportResponse,
+    LearningReportResponse, ReportSnapshotBatchRequest, ReportSnapshotBatchResponse,
+    CurriculumNodeCreate, CurriculumNodeResponse, CurriculumTreeResponse,
+    CurriculumAssignRequest, CurriculumAssignResponse,
+    MasteryBulkUpdateRequest, MasteryBulkUpdateResponse,
+    ChapterRollupItem, CurriculumRollupResponse, MasteryHeatmapResponse,
 )
-from app.dependencies import get_admin_user, get_current_student
+from app.dependencies import get_admin_user, get_current_student, get_read_db
 from app.models.user import User
 
 router = APIRouter(prefix="/progress", tags=["学习进度"])
@@ -138,7 +156,7 @@ async def list_grades(
     student_id: Optional[int] = Query(None),
     subject: Optional[str] = Query(None),
     current_user: User = Depends(get_admin_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """成绩列表"""
     query = select(Grade)
@@ -216,12 +234,125 @@ async def create_grade(
     db.add(grade)
     await db.commit()
     await db.refresh(grade)
+    grade_analytics_cache.invalidate()
 
     response = GradeResponse.model_validate(grade)
     response.student_name = student.name
     return response
 
 
+GRADE_IMPORT_MAX_ROWS = 3000
+GRADE_IMPORT_CHUNK_SIZE = 1000
+
+
+@router.post("/grades/import", response_model=GradeImportResponse)
+async def import_grades(
+    file: UploadFile = File(...),
+    dry_run: bool = Form(False),
+    subject: Optional[str] = Form(None),
+    exam_type: Optional[str] = Form(None),
+    exam_name: Optional[str] = Form(None),
+    exam_date: Optional[date] = Form(None),
+    full_score: Optional[float] = Form(None),
+    current_user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    从 CSV / XLSX 批量导入成绩
+    学生可用姓名或 ID 匹配（一次批量查询）；所有行校验通过才写入，多行 INSERT 在同一事务中完成。
+    dry_run 只校验不写入。表格中缺少的科目、考试类型等列可通过表单参数统一指定。
+    """
+    content = await file.read()
+    if len(content) > settings.MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "FILE_TOO_LARGE", "message": "文件过大"},
+        )
+
+    defaults = {
+        "subject": subject,
+        "exam_type": exam_type,
+        "exam_name": exam_name,
+        "exam_date": exam_date,
+        "full_score": full_score,
+    }
+    try:
+        table = read_sheet(file.filename, content)
+        rows, errors = parse_grade_rows(table, defaults)
+    except GradeSheetError as e:
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "INVALID_SHEET", "message": str(e)},
+        )
+
+    total_rows = len(rows) + len(errors)
+    if total_rows > GRADE_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "TOO_MANY_ROWS", "message": f"单次最多导入 {GRADE_IMPORT_MAX_ROWS} 行"},
+        )
+
+    # 一次查询匹配全部学生：ID 直接匹配，姓名只匹配在读学生
+    student_ids = {r["student_id"] for r in rows if r["student_id"] is not None}
+    student_names = {r["student_name"] for r in rows if r["student_name"] is not None}
+    known_ids: set[int] = set()
+    ids_by_name: dict[str, list[int]] = {}
+    if student_ids or student_names:
+        student_result = await db.execute(
+            select(Student.id, Student.name, Student.is_active).where(
+                or_(Student.id.in_(student_ids), Student.name.in_(student_names))
+            )
+        )
+        for sid, name, is_active in student_result.all():
+            known_ids.add(sid)
+            if is_active:
+                ids_by_name.setdefault(name, []).append(sid)
+
+    values = []
+    for r in rows:
+        if r["student_id"] is not None:
+            if r["student_id"] not in known_ids:
+                errors.append({"row": r["row"], "message": f"学生ID不存在: {r['student_id']}"})
+                continue
+            sid = r["student_id"]
+        else:
+            matches = ids_by_name.get(r["student_name"], [])
+            if not matches:
+                errors.append({"row": r["row"], "message": f"未找到学生: {r['student_name']}"})
+                continue
+            if len(matches) > 1:
+                errors.append({"row": r["row"], "message": f"学生姓名重复，请改用学生ID: {r['student_name']}"})
+                continue
+            sid = matches[0]
+        values.append({
+            "student_id": sid,
+            "subject": r["subject"],
+            "exam_type": r["exam_type"],
+            "exam_name": r["exam_name"],
+            "score": r["score"],
+            "full_score": r["full_score"],
+            "exam_date": r["exam_date"],
+            "notes": r["notes"],
+        })
+    errors.sort(key=lambda e: e["row"])
+
+    imported = 0
+    if not dry_run and not errors and values:
+        for start in range(0, len(values), GRADE_IMPORT_CHUNK_SIZE):
+            await db.execute(insert(Grade).values(values[start:start + GRADE_IMPORT_CHUNK_SIZE]))
+        await db.commit()
+        grade_analytics_cache.invalidate()
+        imported = len(values)
+
+    return GradeImportResponse(
+        dry_run=dry_run,
+        total_rows=total_rows,
+        valid_rows=len(values),
+        imported=imported,
+        errors=errors,
+    )
+
+
 @router.get("/grades/trend", response_model=GradeTrendResponse)
 async def get_grade_trend(
     student_id: int = Query(...),
@@ -267,6 +398,58 @@ async def get_grade_trend(
     )
 
 
+@router.get("/grades/analytics", response_model=GradeAnalyticsResponse)
+async def get_grade_analytics(
+    subject: Optional[str] = Query(None),
+    grade_level: Optional[str] = Query(None, description="年级，如 初二"),
+    window: int = Query(3, ge=1, le=20, description="滑动平均窗口（次考试）"),
+    drop_threshold: float = Query(15.0, gt=0, le=100, description="骤降阈值（百分点）"),
+    include_points: bool = Query(False, description="是否返回每次考试的明细"),
+    current_user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    学生群体成绩分析：一次查询取出所有成绩列数据，按学生 × 科目计算得分率、滑动平均、
+    进步斜率、同年级百分位和骤降标记；结果缓存至下一次成绩写入
+    """
+    # 阈值按 0.1 个百分点取整后再参与计算和缓存键，避免任意浮点参数撑大缓存
+    drop_threshold = round(drop_threshold, 1)
+    cache_key = (subject, grade_level, window, drop_threshold, include_points)
+    items = grade_analytics_cache.get(cache_key)
+    if items is None:
+        conditions = [Student.is_active == True]
+        if subject:
+            conditions.append(Grade.subject == subject)
+        if grade_level:
+            conditions.append(Student.grade == grade_level)
+        result = await db.execute(
+            select(
+                Grade.student_id,
+                Student.name.label("student_name"),
+                Student.grade.label("grade_level"),
+                Grade.subject,
+                Grade.exam_date,
+                Grade.score,
+                Grade.full_score,
+            )
+            .join(Student, Grade.student_id == Student.id)
+            .where(*conditions)
+            .order_by(Grade.student_id, Grade.subject, Grade.exam_date, Grade.id)
+        )
+        rows = result.all()
+        keys = ("student_id", "student_name", "grade_level", "subject", "exam_date", "score", "full_score")
+        columns = {key: list(values) for key, values in zip(keys, zip(*rows))} if rows else {k: [] for k in keys}
+        items = cohort_grade_analytics(columns, window, drop_threshold, include_points)
+        grade_analytics_cache.set(cache_key, items)
+
+    return GradeAnalyticsResponse(
+        items=items,
+        total=len(items),
+        window=window,
+        drop_threshold=drop_threshold,
+    )
+
+
 @router.get("/grades/{grade_id}", response_model=GradeResponse)
 async def get_grade(
     grade_id: int,
@@ -307,6 +490,7 @@ async def delete_grade(
         )
     await db.delete(grade)
     await db.commit()
+    grade_analytics_cache.invalidate()
 
 
 @router.get("/knowledge-points", response_model=KnowledgePointListResponse)
@@ -442,41 +626,391 @@ async def delete_knowledge_point(
     await db.commit()
 
 
-@router.get("/report/{student_id}", response_model=LearningReportResponse)
-async def get_learning_report(
-    student_id: int,
-    start_date: Optional[date] = Query(None),
-    end_date: Optional[date] = Query(None),
+# -----------------------------------------------
+# 课程知识树
+# -----------------------------------------------
+
+KNOWLEDGE_STATUSES = {"todo", "learning", "mastered"}
+
+_NODE_TYPES_BY_DEPTH = {0: "subject", 1: "chapter", 2: "point"}
+
+
+async def _get_curriculum_node(db: AsyncSession, node_id: int) -> CurriculumNode:
+    result = await db.execute(select(CurriculumNode).where(CurriculumNode.id == node_id))
+    node = result.scalar_one_or_none()
+    if not node:
+        raise HTTPException(
+            status_code=404,
+            detail={"code": "NODE_NOT_FOUND", "message": "知识树节点不存在"},
+        )
+    return node
+
+
+@router.post("/curriculum/nodes", response_model=CurriculumNodeResponse, status_code=status.HTTP_201_CREATED)
+async def create_curriculum_node(
+    data: CurriculumNodeCreate,
     current_user: User = Depends(get_admin_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """生成学习报告（JSON 格式，供前端 jsPDF 渲染）"""
-    student_result = await db.execute(
-        select(Student).where(Student.id == student_id)
+    """创建知识树节点（科目 -> 章节 -> 知识点）"""
+    if data.parent_id:
+        parent = await _get_curriculum_node(db, data.parent_id)
+        if parent.node_type == "point":
+            raise HTTPException(
+                status_code=400,
+                detail={"code": "PARENT_IS_POINT", "message": "知识点下不能再添加子节点"},
+            )
+        subject, depth, parent_path = parent.subject, parent.depth + 1, parent.path
+    elif data.subject:
+        subject, depth, parent_path = data.subject, 0, "/"
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "SUBJECT_REQUIRED", "message": "科目根节点需要指定科目"},
+        )
+
+    # 物化路径包含自身 id，先用临时路径插入拿到 id
+    node = CurriculumNode(
+        parent_id=data.parent_id,
+        subject=subject,
+        node_type=_NODE_TYPES_BY_DEPTH[depth],
+        name=data.name,
+        path=f"{parent_path}new-{uuid.uuid4().hex}",
+        depth=depth,
+        sort_order=data.sort_order,
     )
-    student = student_result.scalar_one_or_none()
-    if not student:
+    db.add(node)
+    await db.flush()
+    node.path = f"{parent_path}{node.id}/"
+    await db.commit()
+    await db.refresh(node)
+    return CurriculumNodeResponse.model_validate(node)
+
+
+@router.get("/curriculum/tree", response_model=CurriculumTreeResponse)
+async def get_curriculum_tree(
+    subject: Optional[str] = Query(None),
+    current_user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """获取知识树（一次查询全部节点，在内存中按 parent_id 组装）"""
+    query = select(CurriculumNode)
+    if subject:
+        query = query.where(CurriculumNode.subject == subject)
+    result = await db.execute(
+        query.order_by(CurriculumNode.depth, CurriculumNode.sort_order, CurriculumNode.id)
+    )
+
+    nodes: dict[int, CurriculumNodeResponse] = {}
+    roots = []
+    for row in result.scalars().all():
+        node = CurriculumNodeResponse.model_validate(row)
+        nodes[node.id] = node
+        parent = nodes.get(node.parent_id) if node.parent_id else None
+        if parent:
+            parent.children.append(node)
+        else:
+            roots.append(node)
+    return CurriculumTreeResponse(items=roots)
+
+
+@router.delete("/curriculum/nodes/{node_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_curriculum_node(
+    node_id: int,
+    current_user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """删除知识树节点及其子树（学生掌握记录级联删除）"""
+    node = await _get_curriculum_node(db, node_id)
+    await db.execute(
+        delete(CurriculumNode).where(CurriculumNode.path.startswith(node.path))
+    )
+    await db.commit()
+
+
+@router.post("/curriculum/assign", response_model=CurriculumAssignResponse)
+async def assign_curriculum(
+    data: CurriculumAssignRequest,
+    current_user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    将整套大纲、某一章节或单个知识点批量分配给多名学生
+    一条 INSERT ... SELECT，已分配的知识点保留原掌握状态
+    """
+    if not data.student_ids:
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "NO_STUDENTS", "message": "请选择学生"},
+        )
+    node = await _get_curriculum_node(db, data.node_id)
+
+    source = (
+        select(Student.id, CurriculumNode.id, literal("todo", String))
+        .select_from(Student)
+        .join(CurriculumNode, true())
+        .where(
+            Student.id.in_(data.student_ids),
+            Student.is_active == True,
+            CurriculumNode.node_type == "point",
+            CurriculumNode.path.startswith(node.path),
+        )
+    )
+    stmt = dialect_insert(db, StudentKnowledgeMastery).from_select(
+        ["student_id", "node_id", "status"], source,
+    ).on_conflict_do_nothing(index_elements=["student_id", "node_id"])
+    result = await db.execute(stmt)
+    await db.commit()
+    return CurriculumAssignResponse(assigned=max(result.rowcount or 0, 0))
+
+
+@router.post("/curriculum/mastery", response_model=MasteryBulkUpdateResponse)
+async def bulk_update_mastery(
+    data: MasteryBulkUpdateRequest,
+    current_user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """批量更新学生知识点掌握状态（一条 upsert，未分配的知识点自动分配）"""
+    if not data.items:
+        return MasteryBulkUpdateResponse(updated=0)
+
+    invalid = {item.status for item in data.items} - KNOWLEDGE_STATUSES
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "INVALID_STATUS", "message": f"无效的掌握状态: {', '.join(sorted(invalid))}"},
+        )
+
+    node_ids = {item.node_id for item in data.items}
+    point_result = await db.execute(
+        select(CurriculumNode.id).where(
+            CurriculumNode.id.in_(node_ids), CurriculumNode.node_type == "point"
+        )
+    )
+    missing_nodes = node_ids - set(point_result.scalars().all())
+    if missing_nodes:
         raise HTTPException(
             status_code=404,
-            detail={"code": "STUDENT_NOT_FOUND", "message": "学生不存在"},
+            detail={"code": "NODE_NOT_FOUND", "message": f"知识点不存在: {sorted(missing_nodes)}"},
+        )
+
+    student_ids = {item.student_id for item in data.items}
+    student_result = await db.execute(select(Student.id).where(Student.id.in_(student_ids)))
+    missing_students = student_ids - set(student_result.scalars().all())
+    if missing_students:
+        raise HTTPException(
+            status_code=404,
+            detail={"code": "STUDENT_NOT_FOUND", "message": f"学生不存在: {sorted(missing_students)}"},
+        )
+
+    # 同一 (学生, 知识点) 重复出现时以最后一条为准
+    rows = {
+        (item.student_id, item.node_id): {
+            "student_id": item.student_id,
+            "node_id": item.node_id,
+            "status": item.status,
+            "notes": item.notes,
+        }
+        for item in data.items
+    }
+    stmt = dialect_insert(db, StudentKnowledgeMastery).values(list(rows.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["student_id", "node_id"],
+        set_={
+            "status": stmt.excluded.status,
+            "notes": func.coalesce(stmt.excluded.notes, StudentKnowledgeMastery.notes),
+            "updated_at": func.now(),
+        },
+    )
+    await db.execute(stmt)
+    await db.commit()
+    return MasteryBulkUpdateResponse(updated=len(rows))
+
+
+@router.get("/curriculum/rollup", response_model=CurriculumRollupResponse)
+async def get_curriculum_rollup(
+    student_id: int = Query(...),
+    subject: Optional[str] = Query(None),
+    node_id: Optional[int] = Query(None, description="只统计该节点子树内的章节"),
+    current_user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    按章节汇总学生的知识点掌握进度（一条聚合查询）
+    知识树固定为 科目 -> 章节 -> 知识点 三层，知识点的 parent_id 即所属章节：从该学生的掌握记录
+    （student_id, node_id 唯一索引）出发，按主键关联知识点与章节，不做列对列的路径前缀匹配
+    """
+    chapter = aliased(CurriculumNode)
+    point = aliased(CurriculumNode)
+    mastery = StudentKnowledgeMastery
+
+    conditions = [chapter.node_type == "chapter"]
+    if subject:
+        conditions.append(chapter.subject == subject)
+    if node_id:
+        root = await _get_curriculum_node(db, node_id)
+        conditions.append(chapter.path.startswith(root.path))
+
+    result = await db.execute(
+        select(
+            chapter.id,
+            chapter.name,
+            chapter.path,
+            func.count(mastery.id).label("total"),
+            func.sum(case((mastery.status == "mastered", 1), else_=0)).label("mastered"),
+            func.sum(case((mastery.status == "learning", 1), else_=0)).label("learning"),
+            func.sum(case((mastery.status == "todo", 1), else_=0)).label("todo"),
+        )
+        .select_from(mastery)
+        .join(point, and_(point.id == mastery.node_id, point.node_type == "point"))
+        .join(chapter, chapter.id == point.parent_id)
+        .where(mastery.student_id == student_id, *conditions)
+        .group_by(chapter.id, chapter.name, chapter.path, chapter.sort_order)
+        .order_by(chapter.path)
+    )
+
+    items = [
+        ChapterRollupItem(
+            node_id=row.id,
+            name=row.name,
+            path=row.path,
+            total=row.total,
+            mastered=int(row.mastered or 0),
+            learning=int(row.learning or 0),
+            todo=int(row.todo or 0),
+            mastery_rate=round(int(row.mastered or 0) * 100.0 / row.total, 1) if row.total else 0.0,
+        )
+        for row in result.all()
+    ]
+    return CurriculumRollupResponse(student_id=student_id, items=items)
+
+
+@router.get("/curriculum/heatmap", response_model=MasteryHeatmapResponse)
+async def get_mastery_heatmap(
+    subject: str = Query(...),
+    node_id: Optional[int] = Query(None, description="只包含该节点子树内的知识点"),
+    encoding: str = Query("list", description="矩阵编码：list | base64（int8 行优先）"),
+    current_user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """全体在读学生的知识点掌握热力图（一次查询装配为 int8 矩阵，按稠密数组返回）"""
+    if encoding not in ("list", "base64"):
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "INVALID_ENCODING", "message": "encoding 仅支持 list 或 base64"},
         )
 
+    conditions = [
+        CurriculumNode.subject == subject,
+        CurriculumNode.node_type == "point",
+        Student.is_active == True,
+    ]
+    if node_id:
+        root = await _get_curriculum_node(db, node_id)
+        conditions.append(CurriculumNode.path.startswith(root.path))
+
+    result = await db.execute(
+        select(
+            StudentKnowledgeMastery.student_id,
+            Student.name,
+            StudentKnowledgeMastery.node_id,
+            CurriculumNode.name,
+            CurriculumNode.path,
+            StudentKnowledgeMastery.status,
+        )
+        .join(Student, StudentKnowledgeMastery.student_id == Student.id)
+        .join(CurriculumNode, StudentKnowledgeMastery.node_id == CurriculumNode.id)
+        .where(*conditions)
+    )
+    rows = result.all()
+
+    students = dict(sorted({row[0]: row[1] for row in rows}.items()))
+    points = sorted({row[2]: (row[3], row[4]) for row in rows}.items(), key=lambda item: item[1][1])
+    student_ids = list(students)
+    point_ids = [point_id for point_id, _ in points]
+
+    matrix = build_mastery_matrix(
+        student_ids, point_ids, [(row[0], row[2], row[5]) for row in rows]
+    )
+    point_assigned, point_rates = mastery_rates(matrix, axis=0)
+    _, student_rates = mastery_rates(matrix, axis=1)
+
+    return MasteryHeatmapResponse(
+        subject=subject,
+        student_ids=student_ids,
+        student_names=list(students.values()),
+        point_ids=point_ids,
+        point_names=[name for _, (name, _) in points],
+        point_paths=[path for _, (_, path) in points],
+        shape=list(matrix.shape),
+        encoding=encoding,
+        matrix=encode_matrix(matrix, encoding),
+        point_assigned=point_assigned,
+        point_mastery_rate=point_rates,
+        student_mastery_rate=student_rates,
+    )
+
+
+def _previous_month(today: date) -> tuple[date, date]:
+    period_end = today.replace(day=1) - timedelta(days=1)
+    return period_end.replace(day=1), period_end
+
+
+def _report_hash(payload: dict) -> str:
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+async def _build_learning_reports(
+    db: AsyncSession,
+    students: list[Student],
+    start_date: Optional[date],
+    end_date: Optional[date],
+) -> dict[int, LearningReportResponse]:
+    """
+    为一批学生生成学习报告：课程、成绩、知识点、作业各用一条按 student_id 分组的
+    聚合查询，学生数量不影响查询次数。课程按上课时间、成绩按考试日期、
+    作业按截止日期落在报告周期内统计；知识点反映当前掌握状态。
+    """
+    student_ids = [s.id for s in students]
+
+    course_range, grade_range, assignment_range = [], [], []
+    if start_date:
+        course_range.append(Course.start_time >= datetime.combine(start_date, datetime.min.time()))
+        grade_range.append(Grade.exam_date >= start_date)
+        assignment_range.append(Assignment.due_date >= start_date)
+    if end_date:
+        course_range.append(Course.start_time < datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
+        grade_range.append(Grade.exam_date <= end_date)
+        assignment_range.append(Assignment.due_date <= end_date)
+
     # 课程汇总
-    course_query = select(Course).where(Course.student_id == student_id)
-    course_result = await db.execute(course_query)
-    all_courses = course_result.scalars().all()
-    completed_courses = [c for c in all_courses if c.status == "completed"]
-    total_hours = sum(c.duration for c in completed_courses) / 60.0
+    completed = Course.status == "completed"
+    course_result = await db.execute(
+        select(
+            Course.student_id,
+            func.count(Course.id).label("total"),
+            func.sum(case((completed, 1), else_=0)).label("completed"),
+            func.sum(case((completed, Course.duration), else_=0)).label("minutes"),
+            func.min(Course.start_time).label("first_start"),
+        )
+        .where(Course.student_id.in_(student_ids), *course_range)
+        .group_by(Course.student_id)
+    )
+    course_stats = {row.student_id: row for row in course_result.all()}
 
     # 成绩趋势（所有科目）
     grade_result = await db.execute(
-        select(Grade).where(Grade.student_id == student_id)
-        .order_by(Grade.exam_date.asc())
+        select(
+            Grade.student_id, Grade.subject, Grade.exam_date, Grade.score,
+            Grade.full_score, Grade.exam_type, Grade.exam_name,
+        )
+        .where(Grade.student_id.in_(student_ids), *grade_range)
+        .order_by(Grade.student_id, Grade.exam_date.asc(), Grade.id.asc())
     )
-    grades = grade_result.scalars().all()
-
-    grade_trend = [
-        {
+    grade_trends: dict[int, list[dict]] = {}
+    for g in grade_result.all():
+        grade_trends.setdefault(g.student_id, []).append({
             "subject": g.subject,
             "exam_date": str(g.exam_date),
             "score": float(g.score),
@@ -484,65 +1018,359 @@ async def get_learning_report(
             "percentage": round(float(g.score) / float(g.full_score) * 100, 1),
             "exam_type": g.exam_type,
             "exam_name": g.exam_name,
-        }
-        for g in grades
-    ]
+        })
 
-    # 知识点汇总
-    kp_result = await db.execute(
-        select(KnowledgePoint).where(KnowledgePoint.student_id == student_id)
+    # 成绩汇总（按科目）
+    percentage = Grade.score * 100.0 / Grade.full_score
+    summary_result = await db.execute(
+        select(
+            Grade.student_id,
+            Grade.subject,
+            func.count(Grade.id).label("count"),
+            func.avg(percentage).label("avg_percentage"),
+            func.max(percentage).label("max_percentage"),
+            func.min(percentage).label("min_percentage"),
+        )
+        .where(Grade.student_id.in_(student_ids), *grade_range)
+        .group_by(Grade.student_id, Grade.subject)
+        .order_by(Grade.student_id, Grade.subject)
     )
-    all_kps = kp_result.scalars().all()
-    mastered_count = sum(1 for kp in all_kps if kp.status == "mastered")
-    learning_count = sum(1 for kp in all_kps if kp.status == "learning")
-    todo_count = sum(1 for kp in all_kps if kp.status == "todo")
+    grade_summaries: dict[int, list[dict]] = {}
+    for row in summary_result.all():
+        grade_summaries.setdefault(row.student_id, []).append({
+            "subject": row.subject,
+            "count": row.count,
+            "avg_percentage": round(float(row.avg_percentage), 1),
+            "max_percentage": round(float(row.max_percentage), 1),
+            "min_percentage": round(float(row.min_percentage), 1),
+        })
 
-    kp_details = [
-        {
+    # 知识点（当前掌握状态）
+    kp_result = await db.execute(
+        select(
+            KnowledgePoint.student_id, KnowledgePoint.id, KnowledgePoint.subject,
+            KnowledgePoint.chapter, KnowledgePoint.point_name, KnowledgePoint.status,
+        )
+        .where(KnowledgePoint.student_id.in_(student_ids))
+        .order_by(KnowledgePoint.student_id, KnowledgePoint.id)
+    )
+    kp_details: dict[int, list[dict]] = {}
+    for kp in kp_result.all():
+        kp_details.setdefault(kp.student_id, []).append({
             "id": kp.id,
             "subject": kp.subject,
             "chapter": kp.chapter,
             "point_name": kp.point_name,
             "status": kp.status,
-        }
-        for kp in all_kps
-    ]
+        })
 
     # 作业统计
     asgn_result = await db.execute(
-        select(AssignmentStudent).where(AssignmentStudent.student_id == student_id)
-    )
-    all_submissions = asgn_result.scalars().all()
-    submitted_count = sum(1 for a in all_submissions if a.status in ("submitted", "graded"))
-    graded_with_score = [a for a in all_submissions if a.score is not None]
-    avg_score = (
-        sum(a.score for a in graded_with_score) / len(graded_with_score)
-        if graded_with_score else 0
+        select(
+            AssignmentStudent.student_id,
+            func.count(AssignmentStudent.id).label("total"),
+            func.sum(
+                case((AssignmentStudent.status.in_(("submitted", "graded")), 1), else_=0)
+            ).label("submitted"),
+            func.avg(AssignmentStudent.score).label("avg_score"),
+        )
+        .join(Assignment, AssignmentStudent.assignment_id == Assignment.id)
+        .where(AssignmentStudent.student_id.in_(student_ids), *assignment_range)
+        .group_by(AssignmentStudent.student_id)
     )
+    asgn_stats = {row.student_id: row for row in asgn_result.all()}
 
-    report_start = str(start_date) if start_date else str(
-        all_courses[0].start_time.date() if all_courses else datetime.today().date()
+    today = datetime.today().date()
+    reports = {}
+    for student in students:
+        courses = course_stats.get(student.id)
+        details = kp_details.get(student.id, [])
+        assignments = asgn_stats.get(student.id)
+
+        report_start = start_date or (
+            courses.first_start.date() if courses and courses.first_start else today
+        )
+        reports[student.id] = LearningReportResponse(
+            student={"name": student.name, "grade": student.grade},
+            report_period={"start": str(report_start), "end": str(end_date or today)},
+            course_summary={
+                "total": courses.total if courses else 0,
+                "completed": int(courses.completed or 0) if courses else 0,
+                "total_hours": round(float(courses.minutes or 0) / 60.0, 1) if courses else 0.0,
+            },
+            grade_trend=grade_trends.get(student.id, []),
+            grade_summary=grade_summaries.get(student.id, []),
+            knowledge_points={
+                "mastered": sum(1 for kp in details if kp["status"] == "mastered"),
+                "learning": sum(1 for kp in details if kp["status"] == "learning"),
+                "todo": sum(1 for kp in details if kp["status"] == "todo"),
+                "details": details,
+            },
+            assignment_stats={
+                "total": assignments.total if assignments else 0,
+                "submitted": int(assignments.submitted or 0) if assignments else 0,
+                "avg_score": round(float(assignments.avg_score or 0), 1) if assignments else 0,
+            },
+        )
+    return reports
+
+
+async def _store_report_snapshots(
+    db: AsyncSession,
+    reports: dict[int, LearningReportResponse],
+    period_start: date,
+    period_end: date,
+    replace: bool = False,
+) -> int:
+    """写入报告快照，返回写入条数；已存在的快照默认保持不变，replace 时内容有变化的覆盖并更新生成时间"""
+    if not reports:
+        return 0
+    rows = []
+    for student_id, report in reports.items():
+        payload = report.model_dump(mode="json", exclude={"snapshot_id", "generated_at"})
+        rows.append({
+            "student_id": student_id,
+            "period_start": period_start,
+            "period_end": period_end,
+            "payload": payload,
+            "content_hash": _report_hash(payload),
+        })
+    stmt = dialect_insert(db, LearningReportSnapshot).values(rows)
+    index_elements = ["student_id", "period_start", "period_end"]
+    if replace:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={
+                "payload": stmt.excluded.payload,
+                "content_hash": stmt.excluded.content_hash,
+                "created_at": func.now(),
+            },
+            where=LearningReportSnapshot.content_hash != stmt.excluded.content_hash,
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+    result = await db.execute(stmt)
+    return max(result.rowcount or 0, 0)
+
+
+async def _get_report_snapshot(
+    db: AsyncSession, student_id: int, period_start: date, period_end: date
+) -> Optional[LearningReportSnapshot]:
+    result = await db.execute(
+        select(LearningReportSnapshot).where(
+            LearningReportSnapshot.student_id == student_id,
+            LearningReportSnapshot.period_start == period_start,
+            LearningReportSnapshot.period_end == period_end,
+        )
     )
-    report_end = str(end_date) if end_date else str(datetime.today().date())
+    return result.scalar_one_or_none()
+
 
+def _snapshot_response(snapshot: LearningReportSnapshot) -> LearningReportResponse:
     return LearningReportResponse(
-        student={"name": student.name, "grade": student.grade},
-        report_period={"start": report_start, "end": report_end},
-        course_summary={
-            "total": len(all_courses),
-            "completed": len(completed_courses),
-            "total_hours": round(total_hours, 1),
-        },
-        grade_trend=grade_trend,
-        knowledge_points={
-            "mastered": mastered_count,
-            "learning": learning_count,
-            "todo": todo_count,
-            "details": kp_details,
-        },
-        assignment_stats={
-            "total": len(all_submissions),
-            "submitted": submitted_count,
-            "avg_score": round(avg_score, 1),
-        },
+        **snapshot.payload,
+        snapshot_id=snapshot.id,
+        generated_at=snapshot.created_at,
+    )
+
+
+async def _generate_report_snapshots(
+    db: AsyncSession, period_start: date, period_end: date, render_pdf: bool = False, force: bool = False
+) -> tuple[int, int, int]:
+    """
+    为所有在读学生生成周期报告快照，已有快照的学生跳过（force 时全部重新生成，内容有变化的覆盖）；
+    render_pdf 时并行渲染本周期全部快照的 PDF。返回 (学生数, 新生成数, 新渲染数)
+    """
+    student_result = await db.execute(
+        select(Student).where(Student.is_active == True).order_by(Student.id)
+    )
+    students = list(student_result.scalars().all())
+
+    existing_result = await db.execute(
+        select(LearningReportSnapshot.student_id).where(
+            LearningReportSnapshot.period_start == period_start,
+            LearningReportSnapshot.period_end == period_end,
+        )
+    )
+    existing = set(existing_result.scalars().all())
+    pending = students if force else [s for s in students if s.id not in existing]
+
+    reports = await _build_learning_reports(db, pending, period_start, period_end) if pending else {}
+    created = await _store_report_snapshots(db, reports, period_start, period_end, replace=force)
+    await db.commit()
+
+    rendered = 0
+    if render_pdf and students:
+        snapshot_result = await db.execute(
+            select(LearningReportSnapshot.payload, LearningReportSnapshot.content_hash).where(
+                LearningReportSnapshot.student_id.in_([s.id for s in students]),
+                LearningReportSnapshot.period_start == period_start,
+                LearningReportSnapshot.period_end == period_end,
+            )
+        )
+        rendered = await report_pdf_renderer.render_many(
+            [(row.payload, row.content_hash) for row in snapshot_result.all()]
+        )
+    return len(students), created, rendered
+
+
+async def _generate_report_snapshots_job(
+    period_start: date, period_end: date, render_pdf: bool = False, force: bool = False
+) -> None:
+    """后台任务：使用独立 Session 批量生成报告快照"""
+    async with database.AsyncSessionLocal() as session:
+        try:
+            students, created, rendered = await _generate_report_snapshots(
+                session, period_start, period_end, render_pdf, force
+            )
+            logger.info(
+                f"学习报告快照生成完成 {period_start}~{period_end}: "
+                f"学生 {students}，新生成 {created}，PDF 渲染 {rendered}"
+            )
+        except Exception as e:
+            await session.rollback()
+            logger.error(f"学习报告快照生成失败 {period_start}~{period_end}: {e}")
+
+
+async def _get_report_student(db: AsyncSession, student_id: int) -> Student:
+    result = await db.execute(select(Student).where(Student.id == student_id))
+    student = result.scalar_one_or_none()
+    if not student:
+        raise HTTPException(
+            status_code=404,
+            detail={"code": "STUDENT_NOT_FOUND", "message": "学生不存在"},
+        )
+    return student
+
+
+async def _resolve_learning_report(
+    db: AsyncSession,
+    student_id: int,
+    start_date: Optional[date],
+    end_date: Optional[date],
+) -> tuple[LearningReportResponse, str]:
+    """
+    获取学习报告及其内容哈希
+    周期已结束（end_date 早于今天）的报告首次生成后保存为快照，之后直接返回快照。
+    db 可以是只读副本；快照从独立的主库 Session 生成、写入和回读，该 Session 不关联当前用户，
+    查看报告不会让管理员被当作刚写入过而固定读主库。
+    """
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "INVALID_DATE_RANGE", "message": "开始日期不能晚于结束日期"},
+        )
+
+    closed_period = bool(start_date and end_date and end_date < datetime.today().date())
+    if not closed_period:
+        student = await _get_report_student(db, student_id)
+        report = (await _build_learning_reports(db, [student], start_date, end_date))[student.id]
+        payload = report.model_dump(mode="json", exclude={"snapshot_id", "generated_at"})
+        return report, _report_hash(payload)
+
+    snapshot = await _get_report_snapshot(db, student_id, start_date, end_date)
+    if not snapshot:
+        # 快照一经保存即为该周期的正式报告，必须从主库生成，不能用可能滞后的副本数据
+        async with database.AsyncSessionLocal() as primary_db:
+            student = await _get_report_student(primary_db, student_id)
+            reports = await _build_learning_reports(primary_db, [student], start_date, end_date)
+            await _store_report_snapshots(primary_db, reports, start_date, end_date)
+            await primary_db.commit()
+            snapshot = await _get_report_snapshot(primary_db, student_id, start_date, end_date)
+    return _snapshot_response(snapshot), snapshot.content_hash
+
+
+@router.get("/report/{student_id}", response_model=LearningReportResponse)
+async def get_learning_report(
+    student_id: int,
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    current_user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """生成学习报告（JSON 格式），已结束周期的报告直接返回快照"""
+    report, _ = await _resolve_learning_report(db, student_id, start_date, end_date)
+    return report
+
+
+@router.get("/report/{student_id}/pdf")
+async def get_learning_report_pdf(
+    student_id: int,
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    current_user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """下载学习报告 PDF（服务端渲染，按报告内容哈希缓存）"""
+    report, content_hash = await _resolve_learning_report(db, student_id, start_date, end_date)
+    payload = report.model_dump(mode="json", exclude={"snapshot_id", "generated_at"})
+    try:
+        path = await report_pdf_renderer.render_cached(payload, content_hash)
+    except ImportError:
+        raise HTTPException(
+            status_code=503,
+            detail={"code": "PDF_RENDERER_UNAVAILABLE", "message": "服务器未安装 PDF 渲染组件"},
+        )
+
+    period = report.report_period
+    return FileResponse(
+        path,
+        media_type="application/pdf",
+        filename=f"learning_report_{student_id}_{period['start']}_{period['end']}.pdf",
+    )
+
+
+@router.post("/reports/snapshots", response_model=ReportSnapshotBatchResponse)
+async def generate_report_snapshots(
+    data: ReportSnapshotBatchRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    批量预生成全部在读学生的周期报告快照（默认上个自然月，默认后台执行），可同时渲染 PDF；
+    周期结束后补录了数据时用 force 重新生成
+    """
+    if data.period_start and data.period_end:
+        period_start, period_end = data.period_start, data.period_end
+    elif not data.period_start and not data.period_end:
+        period_start, period_end = _previous_month(datetime.today().date())
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "INVALID_DATE_RANGE", "message": "请同时提供开始和结束日期"},
+        )
+    if period_start > period_end:
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "INVALID_DATE_RANGE", "message": "开始日期不能晚于结束日期"},
+        )
+    if period_end >= datetime.today().date():
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "PERIOD_NOT_CLOSED", "message": "报告周期尚未结束，无法生成快照"},
+        )
+
+    if data.background:
+        background_tasks.add_task(
+            _generate_report_snapshots_job, period_start, period_end, data.render_pdf, data.force
+        )
+        return ReportSnapshotBatchResponse(
+            period_start=period_start,
+            period_end=period_end,
+            scheduled=True,
+            students=0,
+            created=0,
+        )
+
+    students, created, rendered = await _generate_report_snapshots(
+        db, period_start, period_end, data.render_pdf, data.force
+    )
+    return ReportSnapshotBatchResponse(
+        period_start=period_start,
+        period_end=period_end,
+        scheduled=False,
+        students=students,
+        created=created,
+        rendered=rendered,
     )
@@ -11,7 +11,7 @@ from app.models.student import Student
 from app.schemas.resource import (
     ResourceShareRequest, ResourceResponse, ResourceListResponse
 )
-from app.dependencies import get_admin_user, get_current_user, get_current_student
+from app.dependencies import get_admin_user, get_current_user, get_current_student, get_read_db
 from app.models.user import User
 from app.utils.file_handler import save_upload_file, delete_file, get_file_abs_path
 
@@ -76,7 +76,7 @@ async def list_resources(
     subject: Optional[str] = Query(None),
     grade: Optional[str] = Query(None),
     current_user: User = Depends(get_admin_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """资料列表"""
     query = select(Resource)
@@ -13,9 +13,10 @@ from app.schemas.student import (
     StudentDetailResponse, StudentListResponse, StudentStats
 )
 from app.schemas.course import CourseListResponse, CourseResponse
-from app.dependencies import get_admin_user, get_current_user
+from app.dependencies import get_admin_user, get_current_user, get_read_db
 from app.models.user import User
-from app.utils.auth import get_password_hash
+from app.utils.auth import hash_password
+from app.utils.grade_analytics import grade_analytics_cache
 
 router = APIRouter(prefix="/students", tags=["学生管理"])
 
@@ -29,7 +30,7 @@ async def list_students(
     grade: Optional[str] = Query(None),
     is_active: Optional[bool] = Query(None),
     current_user: User = Depends(get_admin_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """学生列表（管理端，支持搜索/过滤/分页）"""
     query = select(Student)
@@ -112,7 +113,7 @@ async def create_student(
             )
         user = User(
             username=data.username,
-            hashed_password=get_password_hash(data.password),
+            hashed_password=await hash_password(data.password),
             role="student",
             display_name=data.name,
             is_active=True,
@@ -261,7 +262,7 @@ async def update_student(
                         )
                     user.username = req_username
                 if req_password:
-                    user.hashed_password = get_password_hash(req_password)
+                    user.hashed_password = await hash_password(req_password)
         elif req_username and req_password:
             # 创建新 User
             existing = await db.execute(
@@ -274,7 +275,7 @@ async def update_student(
                 )
             user = User(
                 username=req_username,
-                hashed_password=get_password_hash(req_password),
+                hashed_password=await hash_password(req_password),
                 role="student",
                 display_name=student.name,
                 is_active=True,
@@ -285,6 +286,8 @@ async def update_student(
 
     await db.commit()
     await db.refresh(student)
+    # 姓名、年级、在读状态会影响群体成绩分析
+    grade_analytics_cache.invalidate()
 
     # 填充 username
     response = StudentResponse.model_validate(student)
@@ -317,6 +320,7 @@ async def delete_student(
 
     student.is_active = False
     await db.commit()
+    grade_analytics_cache.invalidate()
 
 
 @router.get("/{student_id}/courses", response_model=CourseListResponse)
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends
+
+from app import database
+from app.dependencies import get_admin_user
+from app.models.user import User
+from app.utils.db_pool import pool_stats
+from app.utils.events import event_hub
+from app.utils.rate_limit import rate_limiter
+from app.utils.read_replica import replica_stats
+from app.utils.token_store import revocation_store
+from app.utils.user_cache import user_cache
+
+router = APIRouter(prefix="/system", tags=["系统"])
+
+
+@router.get("/stats")
+async def get_system_stats(
+    current_user: User = Depends(get_admin_user),
+):
+    """
+    运行状态（均为当前 worker 的数据）：进程内缓存命中率、实时事件连接数、已吊销会话数、
+    限流拒绝次数、数据库连接池占用与取连接等待、只读副本状态
+    """
+    return {
+        "user_cache": user_cache.stats(),
+        "events": {
+            "backend": event_hub.backend,
+            "connections": event_hub.connection_count,
+        },
+        "token_revocation": revocation_store.stats(),
+        "rate_limit": rate_limiter.stats(),
+        "db_pool": pool_stats(database.engine.pool),
+        "read_replica": {
+            **replica_stats(),
+            "pool": pool_stats(database.replica_engine.pool) if database.replica_engine else None,
+        },
+    }
@@ -14,6 +14,7 @@ class WechatLoginRequest(BaseModel):
 
 class TokenResponse(BaseModel):
     access_token: str
+    refresh_token: str
     token_type: str = "bearer"
     expires_in: int
 
@@ -25,8 +26,14 @@ class LoginResponse(TokenResponse):
     user: dict
 
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
 class RefreshResponse(BaseModel):
     access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
     expires_in: int
 
 
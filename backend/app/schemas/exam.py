@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import datetime, date
 
 
 class ExamQuestionCreate(BaseModel):
@@ -83,6 +83,91 @@ class VocabularyListResponse(BaseModel):
     pages: int
 
 
+class VocabularyBulkItem(BaseModel):
+    word: str
+    phonetic: Optional[str] = None
+    meaning: str
+    example: Optional[str] = None
+    level: Optional[str] = None
+
+
+class VocabularyBulkImportRequest(BaseModel):
+    subject: str = "english"
+    level: Optional[str] = None  # 未单独指定等级的词条使用该等级
+    overwrite: bool = True  # 已存在的词条是否用导入内容覆盖
+    words: List[VocabularyBulkItem]
+
+
+class VocabularyBulkImportResponse(BaseModel):
+    total: int
+    inserted: int
+    updated: int
+    skipped: int
+    duplicates_in_payload: int
+
+
+class VocabularySuggestion(BaseModel):
+    id: int
+    word: str
+    phonetic: Optional[str] = None
+    meaning: str
+    level: Optional[str] = None
+
+
+class VocabularyAssignRequest(BaseModel):
+    student_ids: List[int]
+    subject: str = "english"
+    level: Optional[str] = None
+    vocabulary_ids: Optional[List[int]] = None
+
+
+class VocabularyAssignResponse(BaseModel):
+    assigned: int
+
+
+class VocabularyDueCard(BaseModel):
+    vocabulary_id: int
+    word: str
+    phonetic: Optional[str] = None
+    meaning: str
+    example: Optional[str] = None
+    level: Optional[str] = None
+    due_date: date
+    interval_days: int
+    ease_factor: float
+    repetitions: int
+
+
+class VocabularyDueResponse(BaseModel):
+    server_date: date
+    items: List[VocabularyDueCard]
+
+
+class VocabularyReviewItem(BaseModel):
+    vocabulary_id: int
+    quality: int  # 0-5
+    reviewed_at: datetime
+
+
+class VocabularyReviewBatchRequest(BaseModel):
+    reviews: List[VocabularyReviewItem]
+
+
+class VocabularyScheduleItem(BaseModel):
+    vocabulary_id: int
+    due_date: date
+    interval_days: int
+    ease_factor: float
+    repetitions: int
+    lapses: int
+
+
+class VocabularyReviewBatchResponse(BaseModel):
+    applied: int
+    skipped: int
+    items: List[VocabularyScheduleItem]
+
+
 class MockExamCreate(BaseModel):
     student_id: int
     title: str
@@ -91,6 +176,8 @@ class MockExamCreate(BaseModel):
     question_types: Optional[List[str]] = None
     difficulty_range: Optional[List[int]] = None
     tags: Optional[List[str]] = None
+    adaptive: bool = False  # 按学生能力估计选择接近目标难度的题目
+    target_success_rate: float = Field(0.7, gt=0, lt=1)  # 自适应组卷的目标预期得分率
 
 
 class MockExamResponse(BaseModel):
@@ -108,3 +195,91 @@ class MockExamResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class MockExamAnswerItem(BaseModel):
+    question_id: int
+    answer: Optional[str] = None
+
+
+class MockExamSubmitRequest(BaseModel):
+    answers: List[MockExamAnswerItem]
+
+
+class MockExamAnswerResponse(BaseModel):
+    id: int
+    mock_exam_id: int
+    question_id: int
+    student_id: int
+    answer: Optional[str] = None
+    is_correct: Optional[bool] = None
+    score: Optional[float] = None
+    status: str
+    comment: Optional[str] = None
+    graded_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class MockExamResultResponse(BaseModel):
+    exam_id: int
+    status: str
+    score: Optional[float] = None
+    total: int
+    correct_count: int
+    pending_count: int
+    answers: List[MockExamAnswerResponse]
+
+
+class ManualGradeRequest(BaseModel):
+    score: float
+    is_correct: Optional[bool] = None
+    comment: Optional[str] = None
+
+
+class ManualGradingItem(BaseModel):
+    answer_id: int
+    mock_exam_id: int
+    exam_title: str
+    student_id: int
+    student_name: str
+    question_id: int
+    question_type: str
+    question_content: str
+    reference_answer: str
+    answer: Optional[str] = None
+    submitted_at: datetime
+
+
+class ManualGradingListResponse(BaseModel):
+    items: List[ManualGradingItem]
+    total: int
+    page: int
+    page_size: int
+    pages: int
+
+
+class QuestionRegradeResponse(BaseModel):
+    question_id: int
+    regraded: int
+    affected_exams: int
+
+
+class StudentAbilityItem(BaseModel):
+    dimension: str
+    dimension_key: str
+    rating: float
+    attempts: int
+    correct: int
+
+    class Config:
+        from_attributes = True
+
+
+class StudentAbilityResponse(BaseModel):
+    student_id: int
+    subject: str
+    overall_rating: float
+    target_difficulty: int
+    items: List[StudentAbilityItem]
@@ -3,8 +3,16 @@ from typing import Optional, List
 from datetime import datetime
 
 
+class NotificationAudience(BaseModel):
+    """按条件选择接收人（在 INSERT ... SELECT 中由数据库解析）"""
+    target: str = "students"  # students | parents | all（学生及家长）
+    grade: Optional[str] = None
+    subject: Optional[str] = None
+
+
 class NotificationCreate(BaseModel):
-    user_ids: List[int]
+    user_ids: List[int] = []
+    audience: Optional[NotificationAudience] = None
     title: str
     content: str
     type: str = "manual"
@@ -32,10 +40,11 @@ class NotificationResponse(BaseModel):
 
 class NotificationListResponse(BaseModel):
     items: List[NotificationResponse]
-    total: int
+    total: Optional[int] = None  # 按游标翻页时不统计总数
     page: int
     page_size: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # 下一页游标，None 表示没有更多
 
 
 class UnreadCountResponse(BaseModel):
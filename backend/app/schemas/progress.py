@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Union
 from datetime import datetime, date
 
 
@@ -39,6 +39,19 @@ class GradeListResponse(BaseModel):
     pages: int
 
 
+class GradeImportError(BaseModel):
+    row: int  # 表格中的行号（表头为第 1 行）
+    message: str
+
+
+class GradeImportResponse(BaseModel):
+    dry_run: bool
+    total_rows: int
+    valid_rows: int
+    imported: int
+    errors: List[GradeImportError]
+
+
 class GradeTrendItem(BaseModel):
     exam_date: date
     score: float
@@ -54,6 +67,36 @@ class GradeTrendResponse(BaseModel):
     data: List[GradeTrendItem]
 
 
+class GradeAnalyticsPoint(BaseModel):
+    exam_date: date
+    percentage: float
+    moving_average: float
+    drop: bool
+
+
+class GradeAnalyticsItem(BaseModel):
+    student_id: int
+    student_name: str
+    grade_level: str
+    subject: str
+    exam_count: int
+    latest_percentage: float
+    average_percentage: float
+    moving_average: float  # 最近 window 次考试的滑动平均
+    slope: Optional[float] = None  # 进步斜率（百分点/次），不足两次考试时为空
+    percentile_rank: float  # 同年级同科目内的百分位
+    drop_alert: bool  # 最近一次考试是否骤降
+    drop_dates: List[date] = []
+    points: Optional[List[GradeAnalyticsPoint]] = None
+
+
+class GradeAnalyticsResponse(BaseModel):
+    items: List[GradeAnalyticsItem]
+    total: int
+    window: int
+    drop_threshold: float
+
+
 class KnowledgePointCreate(BaseModel):
     student_id: int
     subject: str
@@ -92,10 +135,113 @@ class KnowledgePointListResponse(BaseModel):
     pages: int
 
 
+class CurriculumNodeCreate(BaseModel):
+    parent_id: Optional[int] = None  # 为空时创建科目根节点
+    subject: Optional[str] = None  # 仅根节点需要，子节点继承父节点科目
+    name: str
+    sort_order: int = 0
+
+
+class CurriculumNodeResponse(BaseModel):
+    id: int
+    parent_id: Optional[int] = None
+    subject: str
+    node_type: str  # subject | chapter | point
+    name: str
+    path: str
+    depth: int
+    sort_order: int
+    created_at: datetime
+    children: List["CurriculumNodeResponse"] = []
+
+    class Config:
+        from_attributes = True
+
+
+class CurriculumTreeResponse(BaseModel):
+    items: List[CurriculumNodeResponse]
+
+
+class CurriculumAssignRequest(BaseModel):
+    node_id: int  # 科目（整套大纲）、章节或单个知识点
+    student_ids: List[int]
+
+
+class CurriculumAssignResponse(BaseModel):
+    assigned: int
+
+
+class MasteryStatusItem(BaseModel):
+    student_id: int
+    node_id: int
+    status: str  # todo | learning | mastered
+    notes: Optional[str] = None
+
+
+class MasteryBulkUpdateRequest(BaseModel):
+    items: List[MasteryStatusItem]
+
+
+class MasteryBulkUpdateResponse(BaseModel):
+    updated: int
+
+
+class ChapterRollupItem(BaseModel):
+    node_id: int
+    name: str
+    path: str
+    total: int
+    mastered: int
+    learning: int
+    todo: int
+    mastery_rate: float  # 已掌握占比（%）
+
+
+class CurriculumRollupResponse(BaseModel):
+    student_id: int
+    items: List[ChapterRollupItem]
+
+
+class MasteryHeatmapResponse(BaseModel):
+    """学生 × 知识点掌握矩阵，各维度均为与矩阵行/列对齐的平行数组"""
+    subject: str
+    student_ids: List[int]
+    student_names: List[str]
+    point_ids: List[int]
+    point_names: List[str]
+    point_paths: List[str]
+    shape: List[int]  # [学生数, 知识点数]
+    encoding: str  # list | base64
+    matrix: Union[List[int], str]  # 行优先展开；-1 未分配，0 todo，1 learning，2 mastered
+    point_assigned: List[int]
+    point_mastery_rate: List[Optional[float]]
+    student_mastery_rate: List[Optional[float]]
+
+
 class LearningReportResponse(BaseModel):
     student: dict
     report_period: dict
     course_summary: dict
     grade_trend: List[dict]
+    grade_summary: List[dict] = []
     knowledge_points: dict
     assignment_stats: dict
+    snapshot_id: Optional[int] = None
+    generated_at: Optional[datetime] = None
+
+
+class ReportSnapshotBatchRequest(BaseModel):
+    period_start: Optional[date] = None  # 缺省为上个自然月
+    period_end: Optional[date] = None
+    background: bool = True
+    render_pdf: bool = False  # 同时并行渲染快照对应的 PDF
+    force: bool = False  # 重新生成已有快照（周期结束后补录了成绩、作业等），内容有变化的才覆盖
+
+
+class ReportSnapshotBatchResponse(BaseModel):
+    period_start: date
+    period_end: date
+    scheduled: bool
+    students: int
+    created: int  # 新生成（force 时含内容有变化而覆盖）的快照数
+    rendered: int = 0
@@ -0,0 +1,51 @@
+"""
+学生能力估计（Elo 风格评分）
+
+把题目难度（1-5）映射为题目评分，学生每答一道题就按
+“实际得分率 - 预期得分率”增量调整评分，无需回放历史作答。
+"""
+import math
+
+BASE_RATING = 1000.0
+# 难度每相差 1 级，题目评分相差 100 分
+DIFFICULTY_STEP = 100.0
+MIN_DIFFICULTY = 1
+MAX_DIFFICULTY = 5
+DEFAULT_TARGET_SUCCESS = 0.7
+
+
+def question_rating(difficulty: int) -> float:
+    return BASE_RATING + (difficulty - 3) * DIFFICULTY_STEP
+
+
+def expected_success(rating: float, difficulty: int) -> float:
+    """评分为 rating 的学生答对该难度题目的预期概率"""
+    return 1.0 / (1.0 + math.pow(10.0, (question_rating(difficulty) - rating) / 400.0))
+
+
+def k_factor(attempts: int) -> float:
+    """作答越少调整越快，样本足够后趋于稳定"""
+    return 48.0 if attempts < 10 else 32.0 if attempts < 50 else 16.0
+
+
+def update_rating(rating: float, attempts: int, difficulty: int, outcome: float) -> float:
+    """outcome 为本题得分率（0-1）"""
+    return round(rating + k_factor(attempts) * (outcome - expected_success(rating, difficulty)), 2)
+
+
+def target_difficulty(
+    overall_rating: float,
+    difficulty_ratings: dict[int, float],
+    target_success: float = DEFAULT_TARGET_SUCCESS,
+) -> int:
+    """
+    选出预期得分率最接近目标的难度。
+    某难度有单独的评分时优先使用，否则退回总评分。
+    """
+    best, best_gap = MIN_DIFFICULTY, None
+    for difficulty in range(MIN_DIFFICULTY, MAX_DIFFICULTY + 1):
+        rating = difficulty_ratings.get(difficulty, overall_rating)
+        gap = abs(expected_success(rating, difficulty) - target_success)
+        if best_gap is None or gap <= best_gap:
+            best, best_gap = difficulty, gap
+    return best
@@ -1,11 +1,24 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.config import settings
 
-# 密码哈希上下文
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# 密码哈希上下文（cost 可配置；调高 cost 后，低于配置的旧哈希在登录成功时自动按新 cost 重新哈希）
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+)
+
+# bcrypt 计算期间释放 GIL，放到有界线程池中执行，不阻塞事件循环；
+# 线程数限制了同时占用的 CPU 核数，登录洪峰时多余的请求在池队列中等待
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -18,6 +31,25 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    """
+    在线程池中验证密码（供异步接口调用）
+    返回 (是否正确, 新哈希)；哈希 cost 低于当前配置时返回按新 cost 生成的哈希，否则为 None
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _hash_executor, pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
+async def hash_password(password: str) -> str:
+    """在线程池中生成密码哈希（供异步接口调用）"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, pwd_context.hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """创建 JWT access token"""
     to_encode = data.copy()
@@ -34,17 +66,3 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 def decode_token(token: str) -> dict:
     """解码 JWT token，失败抛出 JWTError"""
     return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-
-
-def get_token_remaining_days(token: str) -> int:
-    """获取 token 剩余有效天数"""
-    try:
-        payload = decode_token(token)
-        exp = payload.get("exp")
-        if not exp:
-            return 0
-        expire_dt = datetime.fromtimestamp(exp, tz=timezone.utc)
-        remaining = expire_dt - datetime.now(timezone.utc)
-        return max(0, remaining.days)
-    except Exception:
-        return 0
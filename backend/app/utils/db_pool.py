@@ -0,0 +1,78 @@
+"""
+数据库连接池监控
+
+InstrumentedQueuePool 记录每次取连接的等待时间（含池满排队、新建连接和 pre-ping）和超时次数，
+配合池的实时状态（占用数、溢出数）判断请求是否在连接池上排队。
+只统计当前进程；多 worker 时每个进程各有一个连接池。
+"""
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from app.utils.metrics import Histogram
+
+# 等待时间直方图的桶上界（秒）
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.wait_seconds = Histogram(WAIT_BUCKETS)
+        self.timeouts = 0
+
+
+# 按连接池名（create_async_engine 的 pool_logging_name，如 primary / replica）分别统计
+_pool_metrics: dict[str, PoolMetrics] = {}
+
+
+def metrics_for(pool: Pool) -> PoolMetrics:
+    name = pool.logging_name or "default"
+    metrics = _pool_metrics.get(name)
+    if metrics is None:
+        metrics = _pool_metrics[name] = PoolMetrics()
+    return metrics
+
+
+def reset_pool_metrics() -> None:
+    _pool_metrics.clear()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """记录取连接耗时的异步 QueuePool"""
+
+    def connect(self):
+        metrics = metrics_for(self)
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            metrics.timeouts += 1
+            raise
+        finally:
+            metrics.wait_seconds.observe(time.perf_counter() - start)
+
+
+def pool_stats(pool: Pool) -> dict:
+    """连接池实时状态与取连接等待统计"""
+    pool_metrics = metrics_for(pool)
+    stats = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(0, pool.overflow()),
+            "max_overflow": pool._max_overflow,
+            "timeout_seconds": pool.timeout(),
+        })
+    wait = pool_metrics.wait_seconds
+    stats.update({
+        "timeouts": pool_metrics.timeouts,
+        "wait_seconds": {
+            "count": wait.count,
+            "sum": round(wait.sum, 6),
+            "buckets": dict(wait.cumulative()),
+        },
+    })
+    return stats
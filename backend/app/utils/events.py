@@ -0,0 +1,222 @@
+"""
+实时事件推送
+
+业务代码在事务内调用 emit() 登记事件，事务提交后才会推送（回滚则丢弃）：
+- memory：单进程内存分发，提交后直接投递给本进程的 SSE / WebSocket 连接
+- postgres：提交前在同一事务中 pg_notify，每个 worker 通过 LISTEN 收到后投递给各自的连接，
+  多 worker 部署时任一进程产生的事件都能推到所有在线用户
+
+课程状态变化由 ORM flush 钩子自动登记，无需各接口单独调用。
+"""
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from loguru import logger
+from sqlalchemy import event, inspect, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.course import Course
+
+EVENT_NOTIFICATION_CREATED = "notification_created"
+EVENT_COURSE_STATUS_CHANGED = "course_status_changed"
+EVENT_PAYMENT_ALERT = "payment_alert"
+
+PG_CHANNEL = "app_events"
+LISTEN_RETRY_SECONDS = 5
+# pg_notify 负载上限 8000 字节，广播通知按接收人分块发送
+NOTIFY_USER_CHUNK = 500
+
+_PENDING_KEY = "pending_events"
+
+
+@dataclass(eq=False)
+class Subscription:
+    """一个在线连接；按 用户 / 关联学生 / 管理员 匹配事件"""
+    user_id: int
+    is_admin: bool
+    student_ids: frozenset[int]
+    queue: asyncio.Queue
+    overflowed: bool = False
+
+    def matches(self, payload: dict) -> bool:
+        if self.is_admin and payload.get("admins"):
+            return True
+        if self.user_id in payload.get("user_ids", ()):
+            return True
+        return not self.student_ids.isdisjoint(payload.get("student_ids", ()))
+
+    def push(self, payload: dict) -> None:
+        try:
+            self.queue.put_nowait({"type": payload["type"], "data": payload.get("data") or {}})
+        except asyncio.QueueFull:
+            # 客户端消费过慢：丢弃后续事件，连接上发送 resync 让客户端重新拉取
+            self.overflowed = True
+
+
+class EventHub:
+    """本进程在线连接的订阅表；postgres 后端时另有一个 LISTEN 任务接收其他进程的事件"""
+
+    def __init__(self):
+        self.backend = "memory"  # memory | postgres
+        self._subscriptions: set[Subscription] = set()
+        self._listener_task: Optional[asyncio.Task] = None
+
+    @property
+    def connection_count(self) -> int:
+        return len(self._subscriptions)
+
+    def subscribe(self, user_id: int, is_admin: bool, student_ids: Iterable[int] = ()) -> Subscription:
+        subscription = Subscription(
+            user_id=user_id,
+            is_admin=is_admin,
+            student_ids=frozenset(student_ids),
+            queue=asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE),
+        )
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions.discard(subscription)
+
+    def deliver(self, payloads: list[dict]) -> None:
+        """投递给本进程内匹配的连接"""
+        for payload in payloads:
+            for subscription in list(self._subscriptions):
+                if subscription.matches(payload):
+                    subscription.push(payload)
+
+    async def start(self, backend: str) -> None:
+        self.backend = backend
+        if backend == "postgres" and self._listener_task is None:
+            self._listener_task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+        self.backend = "memory"
+
+    async def _listen(self) -> None:
+        """独立的 asyncpg 连接 LISTEN，断线后重连"""
+        import asyncpg
+
+        dsn = settings.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://")
+
+        def on_notify(conn, pid, channel, payload: str) -> None:
+            try:
+                self.deliver([json.loads(payload)])
+            except Exception as e:
+                logger.error(f"事件解析失败: {e}")
+
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(dsn)
+                closed = asyncio.Event()
+                conn.add_termination_listener(lambda c: closed.set())
+                await conn.add_listener(PG_CHANNEL, on_notify)
+                logger.info(f"实时事件监听已启动: LISTEN {PG_CHANNEL}")
+                await closed.wait()
+                logger.warning("实时事件监听连接断开，准备重连")
+            except asyncio.CancelledError:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+                raise
+            except Exception as e:
+                logger.error(f"实时事件监听异常: {e}")
+            await asyncio.sleep(LISTEN_RETRY_SECONDS)
+
+
+event_hub = EventHub()
+
+
+def emit(
+    db: AsyncSession,
+    event_type: str,
+    data: dict,
+    *,
+    user_ids: Iterable[int] = (),
+    student_ids: Iterable[int] = (),
+    admins: bool = False,
+) -> None:
+    """登记事件，随当前事务提交后推送"""
+    db.info.setdefault(_PENDING_KEY, []).append({
+        "type": event_type,
+        "data": data,
+        "user_ids": list(user_ids),
+        "student_ids": list(student_ids),
+        "admins": admins,
+    })
+
+
+def emit_notifications_created(db: AsyncSession, notifications: list) -> None:
+    """新通知提醒接收人刷新未读数 / 列表（同一内容的通知合并，按接收人分块为少量事件）"""
+    groups: dict[tuple, set[int]] = {}
+    for n in notifications:
+        groups.setdefault((n.title, n.type, n.related_type, n.related_id), set()).add(n.user_id)
+    for (title, notification_type, related_type, related_id), user_ids in groups.items():
+        data = {"title": title, "type": notification_type, "related_type": related_type, "related_id": related_id}
+        ordered = sorted(user_ids)
+        for i in range(0, len(ordered), NOTIFY_USER_CHUNK):
+            emit(db, EVENT_NOTIFICATION_CREATED, data, user_ids=ordered[i:i + NOTIFY_USER_CHUNK])
+
+
+# -----------------------------------------------
+# Session 钩子：事务提交时推送登记的事件
+# -----------------------------------------------
+
+@event.listens_for(Session, "after_flush")
+def _collect_course_status_changes(session: Session, flush_context) -> None:
+    for obj in session.dirty:
+        if not isinstance(obj, Course):
+            continue
+        history = inspect(obj).attrs.status.history
+        if not history.deleted or not history.added:
+            continue
+        session.info.setdefault(_PENDING_KEY, []).append({
+            "type": EVENT_COURSE_STATUS_CHANGED,
+            "data": {
+                "course_id": obj.id,
+                "student_id": obj.student_id,
+                "status": history.added[0],
+                "previous_status": history.deleted[0],
+                "start_time": obj.start_time.isoformat() if obj.start_time else None,
+            },
+            "user_ids": [],
+            "student_ids": [obj.student_id],
+            "admins": True,
+        })
+
+
+@event.listens_for(Session, "before_commit")
+def _notify_in_transaction(session: Session) -> None:
+    if event_hub.backend != "postgres" or session.get_bind().dialect.name != "postgresql":
+        return
+    # 在提交前 flush，确保 after_flush 登记的事件也在本事务内发出
+    session.flush()
+    payloads = session.info.pop(_PENDING_KEY, None)
+    for payload in payloads or ():
+        session.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": PG_CHANNEL, "payload": json.dumps(payload, ensure_ascii=False, default=str)},
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver_committed(session: Session) -> None:
+    payloads = session.info.pop(_PENDING_KEY, None)
+    if payloads:
+        event_hub.deliver(payloads)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_rolled_back(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,85 @@
+"""
+模拟考试自动批改
+
+只负责纯计算：给定整张试卷的答案键和作答，一次性算出每道题的批改结果。
+数据库读写由路由层批量完成（一次查答案键、一次批量写入）。
+"""
+import re
+import unicodedata
+from typing import Optional
+
+# 可自动批改的题型；其余题型（essay | reading）进入人工批改队列
+AUTO_GRADED_TYPES = {"choice", "fill"}
+
+FULL_SCORE = 100.0
+
+_CHOICE_SEPARATORS = re.compile(r"[\s,，、;；/]+")
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = "。.．!！"
+
+
+def normalize_choice(value: Optional[str]) -> str:
+    """选择题答案归一化：全角转半角、去分隔符、大写并排序（多选 "C,A" 与 "AC" 等价）"""
+    if not value:
+        return ""
+    text = unicodedata.normalize("NFKC", value).upper()
+    return "".join(sorted(_CHOICE_SEPARATORS.sub("", text)))
+
+
+def normalize_fill(value: Optional[str]) -> str:
+    """填空题答案归一化：全角转半角、忽略大小写、合并空白、去掉句末标点"""
+    if not value:
+        return ""
+    text = unicodedata.normalize("NFKC", value).casefold()
+    text = _WHITESPACE.sub(" ", text).strip()
+    return text.rstrip(_TRAILING_PUNCTUATION).strip()
+
+
+def _accepted_fill_answers(key: str) -> set[str]:
+    """填空题答案键支持用 | 分隔多个可接受答案"""
+    return {
+        normalize_fill(part)
+        for part in unicodedata.normalize("NFKC", key).split("|")
+        if normalize_fill(part)
+    }
+
+
+def grade_answers(
+    answer_keys: dict[int, tuple[str, str]],
+    responses: dict[int, Optional[str]],
+) -> dict[int, dict]:
+    """
+    批改整张试卷
+
+    answer_keys: {question_id: (question_type, answer)}
+    responses:   {question_id: 学生作答}，未作答的题目可缺省
+    返回 {question_id: {"is_correct", "score", "status"}}，覆盖 answer_keys 中的全部题目；
+    主观题有作答时 status 为 pending，等待人工批改。
+    """
+    results: dict[int, dict] = {}
+    for question_id, (question_type, key) in answer_keys.items():
+        response = responses.get(question_id)
+        if question_type == "choice":
+            is_correct = bool(response) and normalize_choice(response) == normalize_choice(key)
+        elif question_type == "fill":
+            is_correct = normalize_fill(response) in _accepted_fill_answers(key)
+        elif response and response.strip():
+            results[question_id] = {"is_correct": None, "score": None, "status": "pending"}
+            continue
+        else:
+            # 主观题未作答，无需人工批改，直接记 0 分
+            is_correct = False
+
+        results[question_id] = {
+            "is_correct": is_correct,
+            "score": FULL_SCORE if is_correct else 0.0,
+            "status": "graded",
+        }
+    return results
+
+
+def exam_score(question_scores: list[Optional[float]]) -> float:
+    """整卷得分：所有题目得分率的平均值，待批改题目暂按 0 分计"""
+    if not question_scores:
+        return 0.0
+    return round(sum(score or 0.0 for score in question_scores) / len(question_scores), 2)
@@ -0,0 +1,154 @@
+"""
+学生群体成绩分析
+
+输入为按 (student_id, subject, exam_date) 排序的成绩列数据，用 NumPy 数组一次性计算
+所有学生、所有科目的得分率、滑动平均、进步斜率、同年级百分位与成绩骤降标记，
+不做逐行 Python 循环。结果按查询参数缓存（有界 + TTL），本进程内任何成绩写入后整体失效；
+其他 worker 的缓存在 TTL 到期后失效。
+"""
+from typing import Optional
+
+import numpy as np
+
+from app.config import settings
+from app.utils.user_cache import TTLCache
+
+
+def cohort_grade_analytics(
+    columns: dict[str, list],
+    window: int = 3,
+    drop_threshold: float = 15.0,
+    include_points: bool = False,
+) -> list[dict]:
+    """
+    columns: {"student_id", "student_name", "grade_level", "subject", "exam_date", "score", "full_score"}
+             各列等长，且已按 (student_id, subject, exam_date) 排序
+    window: 滑动平均窗口（次考试）
+    drop_threshold: 本次得分率比此前窗口均值低多少个百分点视为骤降
+    返回每个 (学生, 科目) 一条分析结果
+    """
+    n = len(columns["student_id"])
+    if n == 0:
+        return []
+
+    student_ids = np.asarray(columns["student_id"], dtype=np.int64)
+    _, subject_codes = np.unique(np.asarray(columns["subject"], dtype=str), return_inverse=True)
+    percentages = (
+        np.asarray(columns["score"], dtype=np.float64) * 100.0
+        / np.asarray(columns["full_score"], dtype=np.float64)
+    )
+    index = np.arange(n)
+
+    # 分组：学生或科目变化处开始新的一组
+    new_group = np.ones(n, dtype=bool)
+    new_group[1:] = (student_ids[1:] != student_ids[:-1]) | (subject_codes[1:] != subject_codes[:-1])
+    starts = np.flatnonzero(new_group)
+    counts = np.diff(np.append(starts, n))
+    group_of_row = np.cumsum(new_group) - 1
+    row_group_start = starts[group_of_row]
+    position = (index - row_group_start).astype(np.float64)
+
+    # 滑动平均：前缀和相减，窗口不跨组
+    prefix = np.concatenate(([0.0], np.cumsum(percentages)))
+    window_start = np.maximum(index - window + 1, row_group_start)
+    moving_avg = (prefix[index + 1] - prefix[window_start]) / (index + 1 - window_start)
+
+    # 骤降：与此前 window 次考试（不含本次）的均值比较
+    prior_start = np.maximum(index - window, row_group_start)
+    prior_len = index - prior_start
+    prior_avg = (prefix[index] - prefix[prior_start]) / np.maximum(prior_len, 1)
+    drops = np.where(prior_len > 0, prior_avg - percentages, 0.0)
+    is_drop = drops >= drop_threshold
+
+    # 进步斜率：组内最小二乘，横轴为考试序号，单位为百分点/次
+    sum_x = np.add.reduceat(position, starts)
+    sum_y = np.add.reduceat(percentages, starts)
+    sum_xy = np.add.reduceat(position * percentages, starts)
+    sum_xx = np.add.reduceat(position * position, starts)
+    denominator = counts * sum_xx - sum_x ** 2
+    slopes = np.divide(
+        counts * sum_xy - sum_x * sum_y, denominator,
+        out=np.full(len(starts), np.nan), where=denominator > 0,
+    )
+    mean_pct = sum_y / counts
+
+    # 同年级同科目内按平均得分率计算百分位（并列取中点）
+    _, level_codes = np.unique(np.asarray(columns["grade_level"], dtype=str)[starts], return_inverse=True)
+    cohorts = level_codes * (subject_codes.max() + 1) + subject_codes[starts]
+    order = np.lexsort((mean_pct, cohorts))
+    offset = mean_pct.min()
+    span = mean_pct.max() - offset + 1.0
+    sorted_keys = cohorts[order] * span + (mean_pct[order] - offset)
+    keys = cohorts * span + (mean_pct - offset)
+    below = np.searchsorted(sorted_keys, keys, side="left")
+    up_to = np.searchsorted(sorted_keys, keys, side="right")
+    cohort_start = np.searchsorted(cohorts[order], cohorts, side="left")
+    cohort_size = np.bincount(cohorts)[cohorts]
+    percentile = (below - cohort_start + 0.5 * (up_to - below)) / cohort_size * 100.0
+
+    last = starts + counts - 1
+    drop_rows = np.flatnonzero(is_drop)
+    drop_groups = np.split(drop_rows, np.searchsorted(drop_rows, starts[1:]))
+    exam_dates = columns["exam_date"]
+
+    results = []
+    for g, start in enumerate(starts.tolist()):
+        end = start + int(counts[g])
+        item = {
+            "student_id": int(student_ids[start]),
+            "student_name": columns["student_name"][start],
+            "grade_level": columns["grade_level"][start],
+            "subject": columns["subject"][start],
+            "exam_count": int(counts[g]),
+            "latest_percentage": round(float(percentages[last[g]]), 1),
+            "average_percentage": round(float(mean_pct[g]), 1),
+            "moving_average": round(float(moving_avg[last[g]]), 1),
+            "slope": None if np.isnan(slopes[g]) else round(float(slopes[g]), 2),
+            "percentile_rank": round(float(percentile[g]), 1),
+            "drop_alert": bool(is_drop[last[g]]),
+            "drop_dates": [exam_dates[i] for i in drop_groups[g].tolist()],
+        }
+        if include_points:
+            item["points"] = [
+                {
+                    "exam_date": exam_dates[i],
+                    "percentage": round(float(percentages[i]), 1),
+                    "moving_average": round(float(moving_avg[i]), 1),
+                    "drop": bool(is_drop[i]),
+                }
+                for i in range(start, end)
+            ]
+        results.append(item)
+    return results
+
+
+class GradeAnalyticsCache:
+    """
+    分析结果缓存：按查询参数存放，条目数与存活时间有界
+    本进程内任何成绩或学生年级变更后全部失效；多 worker 时其他进程最多在 TTL 内返回旧结果
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self._results = TTLCache(max_size, ttl)
+
+    @property
+    def hits(self) -> int:
+        return self._results.hits
+
+    @property
+    def misses(self) -> int:
+        return self._results.misses
+
+    def get(self, key: tuple) -> Optional[list[dict]]:
+        return self._results.get(key)
+
+    def set(self, key: tuple, results: list[dict]) -> None:
+        self._results.set(key, results)
+
+    def invalidate(self) -> None:
+        self._results.clear()
+
+
+grade_analytics_cache = GradeAnalyticsCache(
+    settings.GRADE_ANALYTICS_CACHE_MAX_SIZE, settings.GRADE_ANALYTICS_CACHE_TTL_SECONDS
+)
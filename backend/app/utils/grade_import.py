@@ -0,0 +1,218 @@
+"""
+成绩批量导入：解析 CSV / XLSX 表格并逐行校验
+
+只做纯解析与校验，学生匹配（一次批量查询）与写入（多行 INSERT）由路由层完成。
+openpyxl 在读取 XLSX 时延迟导入，未安装时仅 XLSX 导入不可用。
+"""
+import csv
+import io
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Optional
+
+from app.models.progress import Grade
+
+# 表头别名（不区分大小写，忽略首尾空白）
+HEADER_ALIASES = {
+    "student_id": {"学生id", "学生编号", "student_id"},
+    "student_name": {"学生", "姓名", "学生姓名", "student", "student_name", "name"},
+    "subject": {"科目", "subject"},
+    "exam_type": {"考试类型", "类型", "exam_type"},
+    "exam_name": {"考试名称", "exam_name"},
+    "score": {"分数", "成绩", "得分", "score"},
+    "full_score": {"满分", "full_score"},
+    "exam_date": {"考试日期", "日期", "exam_date"},
+    "notes": {"备注", "notes"},
+}
+
+# Numeric(5, 2) 上限
+MAX_SCORE = Decimal("999.99")
+
+# 文本列的长度上限（与 Grade 表定义一致），超长时按行报错，避免写入时整批失败
+MAX_LENGTHS = {
+    field: Grade.__table__.c[field].type.length for field in ("subject", "exam_type", "exam_name")
+}
+_FIELD_LABELS = {"subject": "科目", "exam_type": "考试类型", "exam_name": "考试名称"}
+
+_DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%Y.%m.%d", "%Y%m%d")
+
+
+class GradeSheetError(ValueError):
+    """表格整体无法解析（格式不支持、缺少必需列等）"""
+
+
+def read_sheet(filename: str, content: bytes) -> list[list[Any]]:
+    """按扩展名读取表格，返回包含表头的二维数组"""
+    name = (filename or "").lower()
+    if name.endswith(".xlsx"):
+        return _read_xlsx(content)
+    if name.endswith(".csv"):
+        return _read_csv(content)
+    raise GradeSheetError("仅支持 .csv 或 .xlsx 文件")
+
+
+def _read_csv(content: bytes) -> list[list[Any]]:
+    # Excel 另存的 CSV 常见 UTF-8 BOM 或 GBK 编码
+    for encoding in ("utf-8-sig", "gb18030"):
+        try:
+            text = content.decode(encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        raise GradeSheetError("无法识别 CSV 文件编码")
+    return [row for row in csv.reader(io.StringIO(text))]
+
+
+def _read_xlsx(content: bytes) -> list[list[Any]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise GradeSheetError("服务器未安装 openpyxl，暂不支持 XLSX 导入，请另存为 CSV")
+    try:
+        workbook = load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+    except Exception:
+        raise GradeSheetError("无法读取 XLSX 文件")
+    try:
+        sheet = workbook.worksheets[0]
+        return [list(row) for row in sheet.iter_rows(values_only=True)]
+    finally:
+        workbook.close()
+
+
+def map_columns(header: list[Any]) -> dict[str, int]:
+    """表头 -> {字段: 列序号}"""
+    columns: dict[str, int] = {}
+    for index, cell in enumerate(header):
+        label = str(cell).strip().lower() if cell is not None else ""
+        for field, aliases in HEADER_ALIASES.items():
+            if label in aliases and field not in columns:
+                columns[field] = index
+    return columns
+
+
+def _cell(row: list[Any], columns: dict[str, int], field: str) -> Any:
+    index = columns.get(field)
+    if index is None or index >= len(row):
+        return None
+    value = row[index]
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def _parse_decimal(value: Any) -> Optional[Decimal]:
+    """解析为有限小数；NaN / Infinity 等视为无效"""
+    try:
+        result = Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        return None
+    return result if result.is_finite() else None
+
+
+def _parse_int(value: Any) -> Optional[int]:
+    """解析整数；XLSX 中的 3.0 视为 3，1.5 等非整数视为无效"""
+    result = _parse_decimal(value)
+    if result is None or result != result.to_integral_value():
+        return None
+    return int(result)
+
+
+def _parse_date(value: Any) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(str(value), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_grade_rows(
+    table: list[list[Any]], defaults: dict[str, Any]
+) -> tuple[list[dict], list[dict]]:
+    """
+    逐行校验表格数据
+    defaults: 表格中缺少的列使用的统一取值（subject / exam_type / exam_name / exam_date / full_score）
+    返回 (有效行, 错误)；有效行中 student_id 或 student_name 二选一，row 为表格中的行号（表头为第 1 行）
+    """
+    if not table:
+        raise GradeSheetError("表格为空")
+    columns = map_columns(table[0])
+    if "student_id" not in columns and "student_name" not in columns:
+        raise GradeSheetError("缺少学生列（学生姓名或学生ID）")
+    if "score" not in columns:
+        raise GradeSheetError("缺少分数列")
+    for field, label in (("subject", "科目"), ("exam_type", "考试类型"), ("exam_date", "考试日期")):
+        if field not in columns and not defaults.get(field):
+            raise GradeSheetError(f"缺少{label}列，且未指定统一的{label}")
+
+    rows: list[dict] = []
+    errors: list[dict] = []
+    for row_number, raw in enumerate(table[1:], start=2):
+        if all(cell is None or str(cell).strip() == "" for cell in raw):
+            continue
+
+        row_errors = []
+        student_id = _cell(raw, columns, "student_id")
+        student_name = _cell(raw, columns, "student_name")
+        parsed_student_id = None
+        if student_id is not None:
+            parsed_student_id = _parse_int(student_id)
+            if parsed_student_id is None:
+                row_errors.append(f"学生ID无效: {student_id}")
+        elif student_name is None:
+            row_errors.append("缺少学生")
+
+        subject = _cell(raw, columns, "subject") or defaults.get("subject")
+        exam_type = _cell(raw, columns, "exam_type") or defaults.get("exam_type")
+        if not subject:
+            row_errors.append("缺少科目")
+        if not exam_type:
+            row_errors.append("缺少考试类型")
+        exam_name = _cell(raw, columns, "exam_name") or defaults.get("exam_name")
+        for field, value in (("subject", subject), ("exam_type", exam_type), ("exam_name", exam_name)):
+            if value is not None and len(str(value)) > MAX_LENGTHS[field]:
+                row_errors.append(f"{_FIELD_LABELS[field]}超过 {MAX_LENGTHS[field]} 个字符")
+
+        score_value = _cell(raw, columns, "score")
+        score = _parse_decimal(score_value) if score_value is not None else None
+        if score is None:
+            row_errors.append(f"分数无效: {score_value}" if score_value is not None else "缺少分数")
+
+        full_score_value = _cell(raw, columns, "full_score")
+        if full_score_value is None:
+            full_score_value = defaults.get("full_score") or 100
+        full_score = _parse_decimal(full_score_value)
+        if full_score is None or full_score <= 0 or full_score > MAX_SCORE:
+            row_errors.append(f"满分无效: {full_score_value}")
+        elif score is not None and not (0 <= score <= full_score):
+            row_errors.append(f"分数 {score} 超出 0 ~ {full_score} 范围")
+
+        date_value = _cell(raw, columns, "exam_date") or defaults.get("exam_date")
+        exam_date = _parse_date(date_value) if date_value is not None else None
+        if exam_date is None:
+            row_errors.append(f"考试日期无效: {date_value}" if date_value is not None else "缺少考试日期")
+
+        if row_errors:
+            errors.append({"row": row_number, "message": "；".join(row_errors)})
+            continue
+
+        notes = _cell(raw, columns, "notes")
+        rows.append({
+            "row": row_number,
+            "student_id": parsed_student_id,
+            "student_name": None if parsed_student_id is not None else str(student_name),
+            "subject": str(subject),
+            "exam_type": str(exam_type),
+            "exam_name": str(exam_name) if exam_name is not None else None,
+            "score": score,
+            "full_score": full_score,
+            "exam_date": exam_date,
+            "notes": str(notes) if notes is not None else None,
+        })
+    return rows, errors
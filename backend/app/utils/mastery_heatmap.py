@@ -0,0 +1,73 @@
+"""
+知识点掌握热力图
+
+把 (学生, 知识点, 状态) 行数据装配成 int8 的 学生 × 知识点 矩阵，
+并用向量运算得到每个知识点、每个学生的掌握率；序列化为紧凑的一维数组或 base64。
+"""
+import base64
+from typing import Optional
+
+import numpy as np
+
+# 矩阵取值：-1 表示未分配
+STATUS_CODES = {"todo": 0, "learning": 1, "mastered": 2}
+UNASSIGNED = -1
+
+
+def build_mastery_matrix(
+    student_ids: list[int],
+    point_ids: list[int],
+    rows: list[tuple[int, int, str]],
+) -> np.ndarray:
+    """
+    student_ids / point_ids: 矩阵行、列对应的 id（决定顺序）
+    rows: [(student_id, point_id, status)]，不在行列中的记录忽略
+    """
+    matrix = np.full((len(student_ids), len(point_ids)), UNASSIGNED, dtype=np.int8)
+    if not rows or not student_ids or not point_ids:
+        return matrix
+
+    row_students = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    row_points = np.fromiter((r[1] for r in rows), dtype=np.int64, count=len(rows))
+    row_codes = np.fromiter(
+        (STATUS_CODES.get(r[2], UNASSIGNED) for r in rows), dtype=np.int8, count=len(rows)
+    )
+
+    student_axis = np.asarray(student_ids, dtype=np.int64)
+    point_axis = np.asarray(point_ids, dtype=np.int64)
+    student_order = np.argsort(student_axis)
+    point_order = np.argsort(point_axis)
+    student_pos = np.searchsorted(student_axis, row_students, sorter=student_order)
+    point_pos = np.searchsorted(point_axis, row_points, sorter=point_order)
+    student_pos = np.minimum(student_pos, len(student_axis) - 1)
+    point_pos = np.minimum(point_pos, len(point_axis) - 1)
+    student_idx = student_order[student_pos]
+    point_idx = point_order[point_pos]
+
+    valid = (student_axis[student_idx] == row_students) & (point_axis[point_idx] == row_points)
+    matrix[student_idx[valid], point_idx[valid]] = row_codes[valid]
+    return matrix
+
+
+def mastery_rates(matrix: np.ndarray, axis: int) -> tuple[list[int], list[Optional[float]]]:
+    """
+    沿指定轴统计已分配数与掌握率（%）
+    axis=0 按知识点（列）统计，axis=1 按学生（行）统计；未分配时掌握率为 None
+    """
+    assigned = (matrix != UNASSIGNED).sum(axis=axis)
+    mastered = (matrix == STATUS_CODES["mastered"]).sum(axis=axis)
+    rates = np.divide(
+        mastered * 100.0, assigned,
+        out=np.full(assigned.shape, np.nan), where=assigned > 0,
+    )
+    return (
+        assigned.astype(int).tolist(),
+        [None if np.isnan(rate) else round(float(rate), 1) for rate in rates],
+    )
+
+
+def encode_matrix(matrix: np.ndarray, encoding: str) -> list | str:
+    """list: 按行展开的一维整数数组；base64: int8 原始字节（行优先）的 base64"""
+    if encoding == "base64":
+        return base64.b64encode(np.ascontiguousarray(matrix).tobytes()).decode("ascii")
+    return matrix.ravel().tolist()
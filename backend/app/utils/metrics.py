@@ -0,0 +1,274 @@
+"""
+Prometheus 指标
+
+进程内实现 Counter / Gauge / Histogram 与文本格式输出（text/plain; version=0.0.4），不依赖第三方客户端或 agent。
+MetricsMiddleware 按路由模板（如 /api/students/{student_id}）统计请求数、耗时、进行中请求数，
+以及每个请求内执行的 SQL 条数和耗时；路由模板取自路由匹配结果，标签基数以路由数为上限。
+只统计当前进程；多 worker 时由 Prometheus 分别抓取各进程或按实例聚合。
+"""
+import bisect
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# 请求耗时直方图的桶上界（秒）
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 未匹配任何路由（404）的请求统一归入该标签，避免原始路径进入标签
+UNMATCHED_ROUTE = "unmatched"
+# 请求之外（后台任务、定时任务）执行的 SQL
+BACKGROUND_ROUTE = "background"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """固定桶直方图（累计计数，与 Prometheus histogram 语义一致）"""
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)  # 最后一格为 +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        result, total = [], 0
+        for bound, count in zip((*map(str, self.buckets), "+Inf"), self._counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float):
+        return "+Inf" if value == float("inf") else repr(value)
+    return str(value)
+
+
+class Metric:
+    """带标签的指标族；标签值按 labelnames 顺序以元组传入"""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+
+    def samples(self) -> Iterable[tuple[str, tuple[str, ...], tuple, float]]:
+        """(样本名, 标签名, 标签值, 数值)"""
+        return ()
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for name, labelnames, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}")
+        return lines
+
+    def reset(self) -> None:
+        pass
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        for labels, value in self.values.items():
+            yield self.name, self.labelnames, labels, value
+
+    def reset(self) -> None:
+        self.values.clear()
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, labels: tuple, value: float) -> None:
+        self.values[labels] = value
+
+    def dec(self, labels: tuple = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+class HistogramMetric(Metric):
+    type = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DURATION_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        self.histograms: dict[tuple, Histogram] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        histogram = self.histograms.get(labels)
+        if histogram is None:
+            histogram = self.histograms[labels] = Histogram(self.buckets)
+        histogram.observe(value)
+
+    def add(self, labels: tuple, histogram: Histogram) -> None:
+        """直接登记已有直方图（如连接池取连接等待），抓取时读取其当前值"""
+        self.histograms[labels] = histogram
+
+    def samples(self):
+        bucket_labelnames = (*self.labelnames, "le")
+        for labels, histogram in self.histograms.items():
+            for bound, count in histogram.cumulative():
+                yield f"{self.name}_bucket", bucket_labelnames, (*labels, bound), count
+            yield f"{self.name}_sum", self.labelnames, labels, histogram.sum
+            yield f"{self.name}_count", self.labelnames, labels, histogram.count
+
+    def reset(self) -> None:
+        self.histograms.clear()
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: list[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self, extra: Iterable[Metric] = ()) -> str:
+        """输出全部已登记指标及抓取时临时生成的指标（extra）"""
+        lines = []
+        for metric in (*self._metrics, *extra):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        for metric in self._metrics:
+            metric.reset()
+
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "HTTP 请求数", ("method", "route", "status"),
+))
+http_request_duration = registry.register(HistogramMetric(
+    "http_request_duration_seconds", "HTTP 请求耗时（秒）", ("method", "route"),
+))
+http_requests_in_progress = registry.register(Gauge(
+    "http_requests_in_progress", "进行中的 HTTP 请求数", ("method",),
+))
+db_queries_total = registry.register(Counter(
+    "db_queries_total", "执行的 SQL 条数", ("route",),
+))
+db_query_seconds_total = registry.register(Counter(
+    "db_query_seconds_total", "SQL 执行总耗时（秒）", ("route",),
+))
+
+
+# -----------------------------------------------
+# 请求内 SQL 统计
+# -----------------------------------------------
+
+@dataclass
+class RequestDbStats:
+    queries: int = 0
+    seconds: float = 0.0
+
+
+_request_db: ContextVar[Optional[RequestDbStats]] = ContextVar("request_db_stats", default=None)
+
+
+def current_db_stats() -> Optional[RequestDbStats]:
+    """当前请求已执行的 SQL 条数和耗时；请求之外返回 None"""
+    return _request_db.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info["metrics_query_start"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    start = conn.info.pop("metrics_query_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    stats = _request_db.get()
+    if stats is None:
+        db_queries_total.inc((BACKGROUND_ROUTE,))
+        db_query_seconds_total.inc((BACKGROUND_ROUTE,), elapsed)
+    else:
+        stats.queries += 1
+        stats.seconds += elapsed
+
+
+# -----------------------------------------------
+# 请求指标中间件
+# -----------------------------------------------
+
+def route_template(scope: dict) -> str:
+    """路由匹配后 Starlette 把命中的路由写入 scope["route"]，取其路径模板"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """纯 ASGI 中间件：记录请求数、耗时、进行中请求数和请求内 SQL 统计"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500  # 未发出响应即抛出异常时按 500 统计
+        stats = RequestDbStats()
+        token = _request_db.set(stats)
+        http_requests_in_progress.inc((method,))
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_db.reset(token)
+            http_requests_in_progress.dec((method,))
+            route = route_template(scope)
+            http_requests_total.inc((method, route, str(status)))
+            http_request_duration.observe((method, route), elapsed)
+            if stats.queries:
+                db_queries_total.inc((route,), stats.queries)
+                db_query_seconds_total.inc((route,), stats.seconds)
@@ -0,0 +1,102 @@
+"""
+通知保留期归档
+
+超过 NOTIFICATION_RETENTION_DAYS 的通知（默认只处理已读通知）分批迁入 notification_archive：
+每批在独立事务中 INSERT ... SELECT + DELETE 固定行数，事务短、锁范围小，不阻塞用户读写；
+PostgreSQL 下用 SKIP LOCKED 跳过正被修改的行，并在每批前重新获取 advisory lock，
+保证多 worker 时同一时刻只有一个进程在归档。
+
+由定时任务周期执行，也可手动运行：
+
+    python -m app.utils.notification_archive
+"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+
+from loguru import logger
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import dialect_insert
+from app.models.notification import Notification, NotificationArchive
+from app.utils.notification_counter import rebuild_unread_counters
+from app.utils.scheduler import advisory_lock_id, try_advisory_xact_lock
+
+ARCHIVE_JOB_NAME = "notification_archive"
+ARCHIVE_COLUMNS = [
+    "id", "user_id", "title", "content", "type", "is_read",
+    "related_type", "related_id", "wx_push_status", "wx_push_at", "created_at",
+]
+# 批次之间让出事件循环和数据库，避免归档占满连接
+BATCH_PAUSE_SECONDS = 0.05
+
+
+def retention_cutoff(now: Optional[datetime] = None) -> datetime:
+    return (now or datetime.utcnow()) - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+
+
+async def archive_notifications_batch(
+    session: AsyncSession, cutoff: datetime, include_unread: bool, batch_size: int
+) -> int:
+    """迁移一批早于 cutoff 的通知（不提交事务），返回迁移行数"""
+    query = (
+        select(Notification.id, Notification.user_id, Notification.is_read)
+        .where(Notification.created_at < cutoff)
+        .order_by(Notification.created_at, Notification.id)
+        .limit(batch_size)
+    )
+    if not include_unread:
+        query = query.where(Notification.is_read == True)
+    if session.get_bind().dialect.name == "postgresql":
+        query = query.with_for_update(skip_locked=True)
+    rows = (await session.execute(query)).all()
+    if not rows:
+        return 0
+
+    ids = [row.id for row in rows]
+    source = select(*(getattr(Notification, column) for column in ARCHIVE_COLUMNS)).where(Notification.id.in_(ids))
+    stmt = dialect_insert(session, NotificationArchive).from_select(ARCHIVE_COLUMNS, source)
+    await session.execute(stmt.on_conflict_do_nothing(index_elements=["id"]))
+    await session.execute(delete(Notification).where(Notification.id.in_(ids)))
+
+    # 归档了未读通知的用户重算未读数
+    unread_users = sorted({row.user_id for row in rows if not row.is_read})
+    if unread_users:
+        await rebuild_unread_counters(session, unread_users)
+    return len(ids)
+
+
+async def archive_notifications(session: AsyncSession, now: Optional[datetime] = None) -> int:
+    """按保留策略分批归档直到没有过期通知，每批单独提交，返回迁移总行数"""
+    cutoff = retention_cutoff(now)
+    batch_size = settings.NOTIFICATION_ARCHIVE_BATCH_SIZE
+    lock_id = advisory_lock_id(ARCHIVE_JOB_NAME)
+    total = 0
+    while True:
+        # 事务级锁在每批提交时释放，下一批前重新获取；被其他进程接手时退出
+        if not await try_advisory_xact_lock(session, lock_id):
+            await session.rollback()
+            break
+        moved = await archive_notifications_batch(
+            session, cutoff, settings.NOTIFICATION_ARCHIVE_UNREAD, batch_size
+        )
+        await session.commit()
+        total += moved
+        if moved < batch_size:
+            break
+        await asyncio.sleep(BATCH_PAUSE_SECONDS)
+    return total
+
+
+async def _main() -> None:
+    from app.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as session:
+        total = await archive_notifications(session)
+    logger.info(f"通知归档完成，共迁移 {total} 条")
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
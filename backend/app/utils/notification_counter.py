@@ -0,0 +1,107 @@
+"""
+用户未读通知计数
+
+notification_counters 每个用户一行，在写通知的同一事务中维护：
+创建通知时按用户累加（多行 upsert），单条已读时减一，全部已读时清零。
+计数缺失或漂移（如上线前的历史数据、手工改库）时用 rebuild_unread_counters 按 notifications 重算：
+
+    python -m app.utils.notification_counter
+"""
+import asyncio
+from collections import Counter
+from typing import Iterable, Optional
+
+from loguru import logger
+from sqlalchemy import select, update, func, case
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import dialect_insert
+from app.models.notification import Notification, NotificationCounter
+
+
+async def increment_unread(db: AsyncSession, user_ids: Iterable[int]) -> None:
+    """新通知写入后调用，user_ids 中每出现一次计数加一"""
+    counts = Counter(user_ids)
+    if not counts:
+        return
+    # 按 user_id 排序写入，并发事务以相同顺序加行锁，避免死锁
+    stmt = dialect_insert(db, NotificationCounter).values(
+        [{"user_id": user_id, "unread_count": n} for user_id, n in sorted(counts.items())]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={
+            "unread_count": NotificationCounter.unread_count + stmt.excluded.unread_count,
+            "updated_at": func.now(),
+        },
+    )
+    await db.execute(stmt)
+
+
+async def decrement_unread(db: AsyncSession, user_id: int, n: int = 1) -> None:
+    """n 条通知被标记已读后调用（不会减到负数）"""
+    if n <= 0:
+        return
+    await db.execute(
+        update(NotificationCounter)
+        .where(NotificationCounter.user_id == user_id)
+        .values(unread_count=case(
+            (NotificationCounter.unread_count > n, NotificationCounter.unread_count - n),
+            else_=0,
+        ))
+    )
+
+
+async def reset_unread(db: AsyncSession, user_id: int) -> None:
+    """全部已读后清零"""
+    await db.execute(
+        update(NotificationCounter)
+        .where(NotificationCounter.user_id == user_id)
+        .values(unread_count=0)
+    )
+
+
+async def get_unread_count(db: AsyncSession, user_id: int) -> int:
+    """按主键读取未读数，没有计数行视为 0"""
+    result = await db.execute(
+        select(NotificationCounter.unread_count).where(NotificationCounter.user_id == user_id)
+    )
+    return result.scalar_one_or_none() or 0
+
+
+async def rebuild_unread_counters(db: AsyncSession, user_ids: Optional[list[int]] = None) -> int:
+    """
+    按 notifications 重算计数（不指定 user_ids 时重算全部用户，不提交事务）
+    返回有未读通知的用户数
+    """
+    reset = update(NotificationCounter).values(unread_count=0)
+    counts = (
+        select(Notification.user_id, func.count().label("unread_count"))
+        .where(Notification.is_read == False)
+        .group_by(Notification.user_id)
+    )
+    if user_ids is not None:
+        reset = reset.where(NotificationCounter.user_id.in_(user_ids))
+        counts = counts.where(Notification.user_id.in_(user_ids))
+    await db.execute(reset)
+
+    stmt = dialect_insert(db, NotificationCounter).from_select(["user_id", "unread_count"], counts)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={"unread_count": stmt.excluded.unread_count, "updated_at": func.now()},
+    )
+    result = await db.execute(stmt)
+    return max(result.rowcount, 0)
+
+
+async def _main() -> None:
+    from app.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as session:
+        users = await rebuild_unread_counters(session)
+        await session.commit()
+    logger.info(f"未读通知计数已重算，{users} 个用户有未读通知")
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
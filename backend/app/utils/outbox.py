@@ -0,0 +1,268 @@
+"""
+消息发件箱投递
+
+业务接口只在自身事务中写入 outbox_messages，从不等待外部 HTTP 调用；
+后台投递器按批领取到期消息（租约防止重复投递，进程重启后租约到期自动接管），
+按微信接口限流发送，失败按指数退避重试，并回写 Notification.wx_push_status / wx_push_at。
+"""
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from loguru import logger
+from sqlalchemy import select, update, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.notification import Notification
+from app.models.outbox import OutboxMessage
+from app.models.user import User
+from app.utils.wechat import get_wechat_access_token, push_subscribe_message
+
+TOPIC_WECHAT_SUBSCRIBE = "wechat_subscribe"
+
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 3600
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """第 attempts 次失败后的重试间隔：指数退避 + 抖动，上限 1 小时"""
+    delay = min(BACKOFF_BASE_SECONDS * (2 ** (attempts - 1)), BACKOFF_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def notification_message_data(notification: Notification) -> dict:
+    """通知 -> 订阅消息模板字段（thing 类字段微信限制 20 字）"""
+    created_at = notification.created_at or datetime.utcnow()
+    return {
+        "thing1": {"value": notification.title[:20]},
+        "thing2": {"value": notification.content[:20]},
+        "time3": {"value": created_at.strftime("%Y-%m-%d %H:%M")},
+    }
+
+
+def enqueue_wechat_notifications(
+    db: AsyncSession, notifications: list[Notification], page: Optional[str] = None
+) -> list[OutboxMessage]:
+    """
+    为已 flush（有 id）的通知写入微信推送发件箱，与通知在同一事务中提交
+    """
+    now = datetime.utcnow()
+    messages = [
+        OutboxMessage(
+            topic=TOPIC_WECHAT_SUBSCRIBE,
+            notification_id=n.id,
+            payload={
+                "user_id": n.user_id,
+                "data": notification_message_data(n),
+                "page": page or settings.WECHAT_NOTIFY_PAGE,
+            },
+            status="pending",
+            attempts=0,
+            next_attempt_at=now,
+        )
+        for n in notifications
+    ]
+    db.add_all(messages)
+    return messages
+
+
+class AsyncTokenBucket:
+    """令牌桶限流：rate 为每秒令牌数，capacity 为突发上限"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+async def _claim_batch(session: AsyncSession, limit: int) -> list[OutboxMessage]:
+    """领取一批到期消息并加租约（PostgreSQL 下用 SKIP LOCKED 支持多实例并行投递）"""
+    now = datetime.utcnow()
+    query = (
+        select(OutboxMessage)
+        .where(
+            OutboxMessage.status == "pending",
+            OutboxMessage.next_attempt_at <= now,
+            or_(OutboxMessage.locked_until.is_(None), OutboxMessage.locked_until < now),
+        )
+        .order_by(OutboxMessage.next_attempt_at, OutboxMessage.id)
+        .limit(limit)
+    )
+    if session.get_bind().dialect.name == "postgresql":
+        query = query.with_for_update(skip_locked=True)
+    messages = list((await session.execute(query)).scalars().all())
+    if messages:
+        await session.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_([m.id for m in messages]))
+            .values(locked_until=now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS))
+        )
+    await session.commit()
+    return messages
+
+
+async def _deliver_wechat(
+    messages: list[OutboxMessage], openids: dict[int, str], limiter: AsyncTokenBucket
+) -> dict[int, tuple[str, Optional[str]]]:
+    """发送一批微信订阅消息，返回 {message_id: (status, error)}，status 为 sent | retry | failed | skipped"""
+    outcomes: dict[int, tuple[str, Optional[str]]] = {}
+    sendable = []
+    for message in messages:
+        if not openids.get(message.payload.get("user_id")):
+            outcomes[message.id] = ("skipped", "用户未绑定微信")
+        else:
+            sendable.append(message)
+    if not sendable:
+        return outcomes
+
+    if not settings.WECHAT_APP_ID or not settings.WECHAT_APP_SECRET or not settings.WECHAT_NOTIFY_TEMPLATE_ID:
+        for message in sendable:
+            outcomes[message.id] = ("skipped", "微信推送未配置")
+        return outcomes
+
+    access_token = await get_wechat_access_token()
+    if not access_token:
+        for message in sendable:
+            outcomes[message.id] = ("retry", "获取 access_token 失败")
+        return outcomes
+
+    async def send(message: OutboxMessage) -> None:
+        await limiter.acquire()
+        result = await push_subscribe_message(
+            access_token,
+            openids[message.payload["user_id"]],
+            settings.WECHAT_NOTIFY_TEMPLATE_ID,
+            message.payload.get("data") or {},
+            message.payload.get("page"),
+        )
+        outcomes[message.id] = (result.status, result.message or None)
+
+    await asyncio.gather(*(send(m) for m in sendable))
+    return outcomes
+
+
+async def dispatch_outbox_batch(session: AsyncSession, limiter: Optional[AsyncTokenBucket] = None) -> int:
+    """领取并投递一批消息，返回本批处理的消息数"""
+    messages = await _claim_batch(session, settings.OUTBOX_BATCH_SIZE)
+    if not messages:
+        return 0
+    limiter = limiter or AsyncTokenBucket(settings.WECHAT_PUSH_RATE_PER_SECOND)
+
+    user_ids = {m.payload.get("user_id") for m in messages}
+    openid_result = await session.execute(
+        select(User.id, User.openid).where(User.id.in_(user_ids), User.is_active == True)
+    )
+    openids = {uid: openid for uid, openid in openid_result.all() if openid}
+
+    outcomes = await _deliver_wechat(
+        [m for m in messages if m.topic == TOPIC_WECHAT_SUBSCRIBE], openids, limiter
+    )
+    for m in messages:
+        outcomes.setdefault(m.id, ("failed", f"未知消息类型: {m.topic}"))
+
+    now = datetime.utcnow()
+    message_rows, notification_rows = [], []
+    for m in messages:
+        status, error = outcomes[m.id]
+        attempts = m.attempts + 1
+        row = {"id": m.id, "attempts": attempts, "locked_until": None, "last_error": error}
+        if status == "retry" and attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            status = "failed"
+        if status == "retry":
+            row.update(status="pending", next_attempt_at=now + retry_delay(attempts))
+        else:
+            row.update(status=status, sent_at=now if status == "sent" else None)
+            if m.notification_id:
+                notification_rows.append({
+                    "id": m.notification_id,
+                    "wx_push_status": status,
+                    "wx_push_at": now if status == "sent" else None,
+                })
+        message_rows.append(row)
+        if error and status != "skipped":
+            logger.warning(f"发件箱消息 {m.id} 投递{'失败' if status == 'failed' else '待重试'}: {error}")
+
+    # 按主键批量回写（同一批次中字段不同的行分组执行）
+    for keys in {tuple(sorted(r)) for r in message_rows}:
+        await session.execute(
+            update(OutboxMessage), [r for r in message_rows if tuple(sorted(r)) == keys]
+        )
+    if notification_rows:
+        await session.execute(update(Notification), notification_rows)
+    await session.commit()
+    return len(messages)
+
+
+class OutboxDispatcher:
+    """
+    后台投递循环
+    由应用生命周期启动和停止；写入发件箱后可调用 wake() 立即投递，否则按轮询间隔扫描
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._limiter: Optional[AsyncTokenBucket] = None
+        self.last_run_at: Optional[float] = None  # 最近一轮投递完成的 time.time()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._limiter = AsyncTokenBucket(settings.WECHAT_PUSH_RATE_PER_SECOND)
+            self._task = asyncio.create_task(self._run())
+            logger.info("消息发件箱投递器已启动")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def wake(self) -> None:
+        if self._task is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        from app.database import AsyncSessionLocal
+
+        while True:
+            try:
+                async with AsyncSessionLocal() as session:
+                    processed = await dispatch_outbox_batch(session, self._limiter)
+                self.last_run_at = time.time()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"发件箱投递异常: {e}")
+                processed = 0
+
+            # 满批说明还有积压，立即继续；否则等待唤醒或轮询
+            if processed >= settings.OUTBOX_BATCH_SIZE:
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.OUTBOX_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+
+outbox_dispatcher = OutboxDispatcher()
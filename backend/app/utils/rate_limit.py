@@ -0,0 +1,260 @@
+"""
+接口限流（令牌桶）
+
+登录（bcrypt）、收费汇总、学习报告和上传等重接口按路由单独配额，其余接口共用一个宽松的默认配额，
+防止单个客户端占满 worker 和数据库连接池。配额按用户计（从 Bearer Token 取 sub，只验签不查库），
+未登录的请求和登录类接口按客户端 IP 计；反向代理后部署时需用 uvicorn --proxy-headers 还原真实 IP。
+
+超出配额返回 429 和 Retry-After。默认 memory 后端在进程内计数，多 worker 时每个进程各自一份配额；
+RATE_LIMIT_BACKEND=redis 时各 worker 经 Redis 共享令牌桶（Lua 脚本原子扣减）。Redis 不可用时放行请求，
+限流故障不影响正常服务。
+"""
+import math
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional, Protocol
+
+from jose import JWTError
+from loguru import logger
+from starlette.responses import JSONResponse
+from starlette.routing import compile_path
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import settings
+from app.utils.auth import decode_token
+
+KEY_USER = "user"  # 按登录用户，未登录时退化为按 IP
+KEY_IP = "ip"
+
+
+@dataclass
+class RateLimitRule:
+    name: str
+    methods: tuple[str, ...]
+    path: str  # 路由模板（不含 API 前缀），如 /progress/report/{student_id}
+    per_minute: float  # 令牌补充速率
+    burst: int  # 桶容量，允许的瞬时突发
+    key: str = KEY_USER
+    pattern: re.Pattern = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.pattern = compile_path(settings.API_PREFIX + self.path)[0]
+
+    @property
+    def rate(self) -> float:
+        return self.per_minute / 60
+
+    def matches(self, method: str, path: str) -> bool:
+        return (not self.methods or method in self.methods) and self.pattern.match(path) is not None
+
+
+# 按顺序匹配，命中第一条即止；最后一条为默认配额
+RATE_LIMIT_RULES = [
+    # 登录类：每次校验一次 bcrypt，按 IP 限制，兼顾防暴力破解
+    RateLimitRule("auth_login", ("POST",), "/auth/login", per_minute=10, burst=10, key=KEY_IP),
+    RateLimitRule("auth_wechat", ("POST",), "/auth/wechat", per_minute=20, burst=10, key=KEY_IP),
+    RateLimitRule("auth_refresh", ("POST",), "/auth/refresh", per_minute=30, burst=10, key=KEY_IP),
+    # 聚合查询
+    RateLimitRule("billing_summary", ("GET",), "/billing/summary", per_minute=30, burst=10),
+    RateLimitRule("student_billing_summary", ("GET",), "/students/{student_id}/billing-summary", per_minute=60, burst=20),
+    # 学习报告
+    RateLimitRule("report_pdf", ("GET",), "/progress/report/{student_id}/pdf", per_minute=10, burst=5),
+    RateLimitRule("report", ("GET",), "/progress/report/{student_id}", per_minute=30, burst=10),
+    RateLimitRule("report_snapshots", ("POST",), "/progress/reports/snapshots", per_minute=6, burst=3),
+    # 上传 / 导入
+    RateLimitRule("resource_upload", ("POST",), "/resources/upload", per_minute=20, burst=10),
+    RateLimitRule("grade_import", ("POST",), "/progress/grades/import", per_minute=10, burst=5),
+    # 其余接口
+    RateLimitRule("default", (), "/{path:path}", per_minute=1200, burst=200),
+]
+
+
+class RateLimitBackend(Protocol):
+    async def take(self, key: str, rate: float, capacity: float) -> float:
+        """从令牌桶取 1 个令牌；成功返回 0，否则返回需要等待的秒数"""
+        ...
+
+    async def close(self) -> None:
+        ...
+
+
+class MemoryRateLimitBackend:
+    """进程内令牌桶；跟踪的键超过上限时淘汰最久未访问的（相当于重置其配额）"""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()  # key -> (tokens, updated_at)
+
+    async def take(self, key: str, rate: float, capacity: float) -> float:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * rate)
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+    async def close(self) -> None:
+        self.clear()
+
+
+# KEYS[1] 桶键；ARGV: 速率（令牌/秒）、容量。以 Redis 服务器时间计，不受各 worker 时钟偏差影响
+_REDIS_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local retry_after = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return tostring(retry_after)
+"""
+
+
+class RedisRateLimitBackend:
+    """多 worker 共享的令牌桶；client 可传入兼容 redis.asyncio 接口的对象"""
+
+    key_prefix = "ratelimit:"
+
+    def __init__(self, url: str, client=None):
+        if client is None:
+            import redis.asyncio as redis
+
+            client = redis.from_url(url)
+        self._client = client
+        self._script = client.register_script(_REDIS_TOKEN_BUCKET)
+
+    async def take(self, key: str, rate: float, capacity: float) -> float:
+        result = await self._script(keys=[self.key_prefix + key], args=[rate, capacity])
+        return float(result)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+def _bearer_subject(scope: Scope) -> Optional[str]:
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            try:
+                return decode_token(token).get("sub")
+            except JWTError:
+                return None
+    return None
+
+
+def _client_ip(scope: Scope) -> str:
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class RateLimiter:
+    def __init__(self, rules: list[RateLimitRule]):
+        self.rules = rules
+        self.backend_name = "memory"
+        self.backend: RateLimitBackend = MemoryRateLimitBackend(settings.RATE_LIMIT_MAX_KEYS)
+        self.rejected: dict[str, int] = {}
+        self.backend_errors = 0
+
+    async def start(self, backend: str) -> None:
+        if backend == "redis":
+            self.backend = RedisRateLimitBackend(settings.RATE_LIMIT_REDIS_URL)
+        self.backend_name = backend
+
+    async def stop(self) -> None:
+        await self.backend.close()
+        self.backend = MemoryRateLimitBackend(settings.RATE_LIMIT_MAX_KEYS)
+        self.backend_name = "memory"
+
+    def match(self, method: str, path: str) -> Optional[RateLimitRule]:
+        for rule in self.rules:
+            if rule.matches(method, path):
+                return rule
+        return None
+
+    def bucket_key(self, rule: RateLimitRule, scope: Scope) -> str:
+        if rule.key == KEY_USER:
+            user_id = _bearer_subject(scope)
+            if user_id is not None:
+                return f"{rule.name}:user:{user_id}"
+        return f"{rule.name}:ip:{_client_ip(scope)}"
+
+    async def check(self, scope: Scope) -> tuple[Optional[RateLimitRule], float]:
+        """返回 (命中的规则, 需等待秒数)；0 表示放行。后端故障时放行"""
+        rule = self.match(scope["method"], scope["path"])
+        if rule is None:
+            return None, 0.0
+        try:
+            retry_after = await self.backend.take(self.bucket_key(rule, scope), rule.rate, rule.burst)
+        except Exception as e:
+            self.backend_errors += 1
+            logger.warning(f"限流后端异常，放行请求: {e}")
+            return rule, 0.0
+        if retry_after > 0:
+            self.rejected[rule.name] = self.rejected.get(rule.name, 0) + 1
+        return rule, retry_after
+
+    def reset(self) -> None:
+        if isinstance(self.backend, MemoryRateLimitBackend):
+            self.backend.clear()
+        self.rejected.clear()
+        self.backend_errors = 0
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend_name,
+            "rejected": dict(self.rejected),
+            "backend_errors": self.backend_errors,
+        }
+
+
+rate_limiter = RateLimiter(RATE_LIMIT_RULES)
+
+
+class RateLimitMiddleware:
+    """ASGI 中间件：在路由和数据库依赖之前拒绝超额请求"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        rule, retry_after = await rate_limiter.check(scope)
+        if retry_after <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        response = JSONResponse(
+            status_code=429,
+            content={"detail": {"code": "RATE_LIMITED", "message": "请求过于频繁，请稍后再试"}},
+            headers={
+                "Retry-After": str(max(1, math.ceil(retry_after))),
+                "X-RateLimit-Limit": str(rule.burst),
+            },
+        )
+        await response(scope, receive, send)
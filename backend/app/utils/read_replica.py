@@ -0,0 +1,157 @@
+"""
+只读副本路由
+
+报表、列表等只读接口通过 get_read_db 获取 Session，满足以下条件时走只读副本，否则回退主库：
+- 配置了 DATABASE_REPLICA_URL；
+- 后台检查的复制延迟不超过 REPLICA_MAX_LAG_SECONDS（检查失败视为不可用）；
+- 当前用户在 READ_YOUR_WRITES_SECONDS 内没有提交过写入（保证用户能读到自己刚写的数据）。
+
+写入记录由 Session 钩子维护：认证时把 user_id 记在请求的主库 Session 上，该 Session 提交了写入即记录。
+记录在进程内，多 worker 时同一用户的后续请求落到其他进程可能读到延迟数据，最长为复制延迟上限。
+"""
+import asyncio
+from typing import Optional
+
+from loguru import logger
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.utils.user_cache import TTLCache
+
+SESSION_USER_KEY = "read_replica_user_id"
+_WROTE_KEY = "read_replica_wrote"
+
+# 备库上：WAL 已全部回放时延迟为 0，否则为距最后一次回放事务的秒数；无回放记录时为 NULL（视为不可用）
+_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """
+)
+
+
+async def replication_lag(session: AsyncSession) -> Optional[float]:
+    """副本的复制延迟（秒）；非 PostgreSQL（测试用 SQLite）视为无延迟"""
+    if session.get_bind().dialect.name != "postgresql":
+        return 0.0
+    lag = (await session.execute(_LAG_SQL)).scalar()
+    return None if lag is None else float(lag)
+
+
+class ReplicaMonitor:
+    """定期检查副本延迟，由应用生命周期启动和停止"""
+
+    def __init__(self):
+        self.lag_seconds: Optional[float] = None
+        self.healthy = False
+        self.fallbacks = 0  # 因副本不可用或延迟过大回退主库的请求数
+        self._task: Optional[asyncio.Task] = None
+
+    async def check(self) -> bool:
+        from app.database import ReplicaSessionLocal
+
+        if ReplicaSessionLocal is None:
+            self.healthy = False
+            return False
+        try:
+            async with ReplicaSessionLocal() as session:
+                self.lag_seconds = await replication_lag(session)
+        except Exception as e:
+            logger.warning(f"只读副本检查失败，只读请求回退主库: {e}")
+            self.lag_seconds = None
+        was_healthy = self.healthy
+        self.healthy = self.lag_seconds is not None and self.lag_seconds <= settings.REPLICA_MAX_LAG_SECONDS
+        if was_healthy and not self.healthy and self.lag_seconds is not None:
+            logger.warning(f"只读副本延迟 {self.lag_seconds:.1f}s，只读请求回退主库")
+        return self.healthy
+
+    async def start(self) -> None:
+        if self._task is None:
+            await self.check()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.REPLICA_LAG_CHECK_SECONDS)
+            await self.check()
+
+    def reset(self) -> None:
+        self.lag_seconds = None
+        self.healthy = False
+        self.fallbacks = 0
+        recent_writers.clear()
+
+
+replica_monitor = ReplicaMonitor()
+
+# user_id -> 最近写入过（TTL 即读己之写窗口）
+recent_writers = TTLCache(max_size=settings.USER_CACHE_MAX_SIZE, ttl=settings.READ_YOUR_WRITES_SECONDS)
+
+
+def use_replica(user_id: Optional[int]) -> bool:
+    """当前请求的只读查询是否可以走副本"""
+    from app.database import ReplicaSessionLocal
+
+    if ReplicaSessionLocal is None:
+        return False
+    if user_id is not None and recent_writers.get(user_id) is not None:
+        return False
+    if not replica_monitor.healthy:
+        replica_monitor.fallbacks += 1
+        return False
+    return True
+
+
+def replica_stats() -> dict:
+    from app.database import ReplicaSessionLocal
+
+    return {
+        "configured": ReplicaSessionLocal is not None,
+        "healthy": replica_monitor.healthy,
+        "lag_seconds": replica_monitor.lag_seconds,
+        "fallbacks": replica_monitor.fallbacks,
+        "sticky_users": recent_writers.stats()["size"],
+    }
+
+
+# -----------------------------------------------
+# Session 钩子：记录提交过写入的用户
+# -----------------------------------------------
+
+@event.listens_for(Session, "after_flush")
+def _flushed(session: Session, flush_context) -> None:
+    if SESSION_USER_KEY in session.info:
+        session.info[_WROTE_KEY] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _executed(orm_execute_state) -> None:
+    session = orm_execute_state.session
+    is_write = orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete
+    if is_write and SESSION_USER_KEY in session.info:
+        session.info[_WROTE_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _committed(session: Session) -> None:
+    if session.info.pop(_WROTE_KEY, False):
+        recent_writers.set(session.info[SESSION_USER_KEY], True)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _rolled_back(session: Session, previous_transaction) -> None:
+    session.info.pop(_WROTE_KEY, None)
@@ -0,0 +1,107 @@
+"""
+课前提醒与作业截止提醒
+
+定时任务每轮按时间窗口（courses.status + start_time、assignments.due_date 索引）找出即将开始的课程
+和即将截止的作业，为学生及家长账号生成通知：一条多行 INSERT，按 (type, related_id, user_id)
+部分唯一索引 ON CONFLICT DO NOTHING 去重；新生成的通知同时累加未读计数并写入微信推送发件箱。
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import dialect_insert
+from app.models.assignment import Assignment, AssignmentStudent
+from app.models.course import Course
+from app.models.notification import Notification, REMINDER_DEDUP_WHERE
+from app.models.student import Student
+from app.utils.events import emit_notifications_created
+from app.utils.notification_counter import increment_unread
+from app.utils.outbox import enqueue_wechat_notifications
+
+
+def _recipients(user_id: Optional[int], parent_user_id: Optional[int]) -> list[int]:
+    return [uid for uid in dict.fromkeys([user_id, parent_user_id]) if uid]
+
+
+async def generate_reminders(session: AsyncSession, now: Optional[datetime] = None) -> int:
+    """生成一轮提醒，返回新生成的通知数（不提交事务）"""
+    now = now or datetime.now()
+    course_until = now + timedelta(minutes=settings.COURSE_REMINDER_LEAD_MINUTES)
+    assignment_until = (now + timedelta(hours=settings.ASSIGNMENT_REMINDER_LEAD_HOURS)).date()
+
+    course_result = await session.execute(
+        select(
+            Course.id, Course.subject, Course.start_time, Course.location,
+            Student.name, Student.user_id, Student.parent_user_id,
+        )
+        .join(Student, Course.student_id == Student.id)
+        .where(
+            Course.status == "scheduled",
+            Course.start_time >= now,
+            Course.start_time <= course_until,
+            Student.is_active == True,
+        )
+    )
+    assignment_result = await session.execute(
+        select(
+            Assignment.id, Assignment.title, Assignment.due_date,
+            Student.name, Student.user_id, Student.parent_user_id,
+        )
+        .join(AssignmentStudent, AssignmentStudent.assignment_id == Assignment.id)
+        .join(Student, AssignmentStudent.student_id == Student.id)
+        .where(
+            Assignment.due_date >= now.date(),
+            Assignment.due_date <= assignment_until,
+            AssignmentStudent.status == "pending",
+            Student.is_active == True,
+        )
+    )
+
+    rows: dict[tuple[str, int, int], dict] = {}
+    for course_id, subject, start_time, location, name, user_id, parent_user_id in course_result.all():
+        content = f"{name}的{subject}课将于 {start_time:%m-%d %H:%M} 开始"
+        if location:
+            content += f"，地点：{location}"
+        for uid in _recipients(user_id, parent_user_id):
+            rows[("course_reminder", course_id, uid)] = {
+                "user_id": uid,
+                "title": "上课提醒",
+                "content": content,
+                "type": "course_reminder",
+                "related_type": "course",
+                "related_id": course_id,
+                "wx_push_status": "pending",
+            }
+    for assignment_id, title, due_date, name, user_id, parent_user_id in assignment_result.all():
+        for uid in _recipients(user_id, parent_user_id):
+            rows.setdefault(("assignment_reminder", assignment_id, uid), {
+                "user_id": uid,
+                "title": "作业截止提醒",
+                "content": f"{name}的作业「{title}」将于 {due_date:%m-%d} 截止，请按时提交",
+                "type": "assignment_reminder",
+                "related_type": "assignment",
+                "related_id": assignment_id,
+                "wx_push_status": "pending",
+            })
+    if not rows:
+        return 0
+
+    stmt = (
+        dialect_insert(session, Notification)
+        .values(list(rows.values()))
+        .on_conflict_do_nothing(
+            index_elements=["type", "related_id", "user_id"],
+            index_where=REMINDER_DEDUP_WHERE,
+        )
+        .returning(Notification)
+    )
+    created = list((await session.execute(stmt)).scalars().all())
+    if created:
+        await increment_unread(session, [n.user_id for n in created])
+        emit_notifications_created(session, created)
+        enqueue_wechat_notifications(session, created)
+        await session.flush()
+    return len(created)
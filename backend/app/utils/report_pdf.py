@@ -0,0 +1,244 @@
+"""
+学习报告 PDF 服务端渲染
+
+render_report_pdf 是纯函数（报告 JSON -> PDF 字节），在进程池中执行，避免阻塞事件循环；
+渲染结果按报告内容哈希缓存在上传目录的 reports/ 下，同一份快照只渲染一次。
+reportlab 在渲染函数内延迟导入，未安装时仅 PDF 接口不可用。
+"""
+import asyncio
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from xml.sax.saxutils import escape
+
+from loguru import logger
+
+from app.config import settings
+
+# reportlab 内置的 CID 中文字体，无需额外字体文件
+CJK_FONT = "STSong-Light"
+
+KNOWLEDGE_STATUS_LABELS = {"mastered": "已掌握", "learning": "学习中", "todo": "待学习"}
+
+_CHART_COLORS = ["#1677ff", "#52c41a", "#fa8c16", "#eb2f96", "#722ed1", "#13c2c2"]
+
+
+def report_pdf_dir() -> str:
+    return os.path.join(settings.upload_dir_abs, "reports")
+
+
+def report_pdf_path(content_hash: str) -> str:
+    return os.path.join(report_pdf_dir(), f"{content_hash}.pdf")
+
+
+def _grade_trend_chart(grade_trend: list[dict], width: float, height: float):
+    """各科得分率折线图（横轴为考试序号）"""
+    from reportlab.graphics.charts.legends import Legend
+    from reportlab.graphics.charts.lineplots import LinePlot
+    from reportlab.graphics.shapes import Drawing
+    from reportlab.lib import colors
+
+    series: dict[str, list[tuple[int, float]]] = {}
+    for index, item in enumerate(grade_trend, start=1):
+        series.setdefault(item["subject"], []).append((index, item["percentage"]))
+
+    drawing = Drawing(width, height)
+    plot = LinePlot()
+    plot.x, plot.y = 30, 30
+    plot.width, plot.height = width - 130, height - 50
+    plot.data = list(series.values())
+    plot.xValueAxis.valueMin = 1
+    plot.xValueAxis.valueMax = max(len(grade_trend), 2)
+    plot.xValueAxis.valueStep = 1
+    plot.yValueAxis.valueMin = 0
+    plot.yValueAxis.valueMax = 100
+    plot.yValueAxis.valueStep = 20
+    for i in range(len(series)):
+        color = colors.HexColor(_CHART_COLORS[i % len(_CHART_COLORS)])
+        plot.lines[i].strokeColor = color
+        plot.lines[i].strokeWidth = 1.5
+    drawing.add(plot)
+
+    legend = Legend()
+    legend.x, legend.y = width - 90, height - 20
+    legend.fontName = CJK_FONT
+    legend.fontSize = 9
+    legend.colorNamePairs = [
+        (colors.HexColor(_CHART_COLORS[i % len(_CHART_COLORS)]), subject)
+        for i, subject in enumerate(series)
+    ]
+    drawing.add(legend)
+    return drawing
+
+
+def _table(rows: list[list], col_widths: list[float]):
+    from reportlab.lib import colors
+    from reportlab.platypus import Table, TableStyle
+
+    table = Table(rows, colWidths=col_widths, repeatRows=1)
+    table.setStyle(TableStyle([
+        ("FONTNAME", (0, 0), (-1, -1), CJK_FONT),
+        ("FONTSIZE", (0, 0), (-1, -1), 9),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#f0f5ff")),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#d9d9d9")),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+    ]))
+    return table
+
+
+def render_report_pdf(payload: dict) -> bytes:
+    """
+    将学习报告 JSON（LearningReportResponse）渲染为 PDF
+    在进程池子进程中执行，只依赖参数，不访问数据库和全局状态。
+    """
+    from io import BytesIO
+
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.units import mm
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+    pdfmetrics.registerFont(UnicodeCIDFont(CJK_FONT))
+    title_style = ParagraphStyle("title", fontName=CJK_FONT, fontSize=18, leading=24, spaceAfter=6)
+    heading_style = ParagraphStyle("heading", fontName=CJK_FONT, fontSize=13, leading=18, spaceBefore=10, spaceAfter=6)
+    body_style = ParagraphStyle("body", fontName=CJK_FONT, fontSize=10, leading=15)
+
+    student = payload["student"]
+    period = payload["report_period"]
+    courses = payload["course_summary"]
+    assignments = payload["assignment_stats"]
+    knowledge = payload["knowledge_points"]
+    content_width = A4[0] - 36 * mm
+
+    story = [
+        # Paragraph 按 mini-XML 解析，用户输入的文本需转义
+        Paragraph(f"{escape(student['name'])} 学习报告", title_style),
+        Paragraph(
+            f"年级：{escape(student.get('grade') or '-')}　　"
+            f"报告周期：{escape(str(period['start']))} 至 {escape(str(period['end']))}",
+            body_style,
+        ),
+        Paragraph("课程与作业", heading_style),
+        _table(
+            [
+                ["课程总数", "已完成", "上课时长（小时）", "作业总数", "已提交", "作业平均分"],
+                [courses["total"], courses["completed"], courses["total_hours"],
+                 assignments["total"], assignments["submitted"], assignments["avg_score"]],
+            ],
+            [content_width / 6] * 6,
+        ),
+        Paragraph("成绩趋势", heading_style),
+    ]
+
+    grade_trend = payload.get("grade_trend") or []
+    if grade_trend:
+        story.append(_grade_trend_chart(grade_trend, content_width, 180))
+    else:
+        story.append(Paragraph("本周期暂无考试成绩", body_style))
+
+    grade_summary = payload.get("grade_summary") or []
+    if grade_summary:
+        story.append(Spacer(1, 6))
+        story.append(_table(
+            [["科目", "考试次数", "平均得分率", "最高", "最低"]] + [
+                [s["subject"], s["count"], f"{s['avg_percentage']}%",
+                 f"{s['max_percentage']}%", f"{s['min_percentage']}%"]
+                for s in grade_summary
+            ],
+            [content_width / 5] * 5,
+        ))
+
+    story.append(Paragraph(
+        f"知识点掌握（已掌握 {knowledge['mastered']}，学习中 {knowledge['learning']}，待学习 {knowledge['todo']}）",
+        heading_style,
+    ))
+    details = knowledge.get("details") or []
+    if details:
+        story.append(_table(
+            [["科目", "章节", "知识点", "状态"]] + [
+                [kp["subject"], kp.get("chapter") or "-", Paragraph(escape(kp["point_name"]), body_style),
+                 KNOWLEDGE_STATUS_LABELS.get(kp["status"], kp["status"])]
+                for kp in details
+            ],
+            [content_width * 0.15, content_width * 0.25, content_width * 0.45, content_width * 0.15],
+        ))
+    else:
+        story.append(Paragraph("暂无知识点记录", body_style))
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer, pagesize=A4,
+        leftMargin=18 * mm, rightMargin=18 * mm, topMargin=16 * mm, bottomMargin=16 * mm,
+        title=f"{student['name']} 学习报告",
+    )
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    """先写临时文件再原子替换，并发渲染同一份报告时不会读到半个文件"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class ReportPdfRenderer:
+    """
+    PDF 渲染进程池
+    由应用生命周期启动和关闭；未启动（如测试环境或 REPORT_PDF_WORKERS=0）时退化为线程执行。
+    """
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.cache_hits = 0  # render_cached 复用已有文件
+        self.cache_misses = 0
+
+    def start(self, workers: int) -> None:
+        if workers > 0 and self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+            logger.info(f"PDF 渲染进程池已启动: {workers} 个进程")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def _render(self, payload: dict) -> bytes:
+        if self._executor is None:
+            return await asyncio.to_thread(render_report_pdf, payload)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, render_report_pdf, payload)
+
+    async def render_cached(self, payload: dict, content_hash: str) -> str:
+        """返回报告 PDF 路径；缓存中已有同一哈希的文件时直接复用"""
+        path = report_pdf_path(content_hash)
+        if os.path.exists(path):
+            self.cache_hits += 1
+            return path
+        self.cache_misses += 1
+        data = await self._render(payload)
+        await asyncio.to_thread(_write_atomic, path, data)
+        return path
+
+    async def render_many(self, items: list[tuple[dict, str]]) -> int:
+        """并行渲染一批报告 [(payload, content_hash)]，返回新渲染的数量"""
+        pending = [
+            (payload, content_hash) for payload, content_hash in items
+            if not os.path.exists(report_pdf_path(content_hash))
+        ]
+        results = await asyncio.gather(
+            *(self.render_cached(payload, content_hash) for payload, content_hash in pending),
+            return_exceptions=True,
+        )
+        failed = [r for r in results if isinstance(r, Exception)]
+        for error in failed:
+            logger.error(f"学习报告 PDF 渲染失败: {error}")
+        return len(pending) - len(failed)
+
+
+report_pdf_renderer = ReportPdfRenderer()
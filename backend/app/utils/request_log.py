@@ -0,0 +1,131 @@
+"""
+结构化请求日志
+
+每个请求结束时写一行日志，字段包括 request_id、method、route（路由模板）、path、status、duration_ms、
+db_queries、db_ms；请求处理期间的其他日志通过 logger.contextualize 自动带上 request_id。
+- 2xx 请求按 LOG_SAMPLE_RATE_2XX 抽样，其余状态码全部记录；
+- 耗时超过 SLOW_REQUEST_MS 的请求总是记录（slow=true），并额外写入慢请求日志文件；
+- sink 使用 loguru 的 enqueue，格式化在请求协程中完成，写出由后台线程负责，不阻塞事件循环。
+"""
+import json
+import os
+import random
+import sys
+import time
+import traceback
+import uuid
+
+from loguru import logger
+
+from app.config import settings
+from app.utils.metrics import current_db_stats, route_template
+
+# 已作为顶层字段输出或仅供内部使用的 extra 键
+_RESERVED_EXTRA = {"json"}
+
+
+def _json_format(record) -> str:
+    entry = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "message": record["message"],
+        "logger": record["name"],
+    }
+    entry.update((key, value) for key, value in record["extra"].items() if key not in _RESERVED_EXTRA)
+    if record["exception"] is not None:
+        exc = record["exception"]
+        entry["exception"] = "".join(traceback.format_exception(exc.type, exc.value, exc.traceback))
+    record["extra"]["json"] = json.dumps(entry, ensure_ascii=False, default=str)
+    return "{extra[json]}\n"
+
+
+def _slow_only(record) -> bool:
+    return record["extra"].get("slow", False)
+
+
+def _abs_path(path: str) -> str:
+    if os.path.isabs(path):
+        return path
+    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return os.path.join(base_dir, path)
+
+
+def setup_logging() -> None:
+    """替换 loguru 默认 sink（由应用生命周期调用；测试中不启用）"""
+    logger.remove()
+    if settings.LOG_FORMAT == "json":
+        logger.add(sys.stderr, level=settings.LOG_LEVEL, format=_json_format, enqueue=True)
+    else:
+        logger.add(sys.stderr, level=settings.LOG_LEVEL, enqueue=True)
+    if settings.SLOW_REQUEST_LOG_FILE:
+        logger.add(
+            _abs_path(settings.SLOW_REQUEST_LOG_FILE),
+            level="INFO",
+            format=_json_format,
+            filter=_slow_only,
+            enqueue=True,
+            rotation=settings.SLOW_REQUEST_LOG_ROTATION,
+            retention=settings.SLOW_REQUEST_LOG_RETENTION,
+        )
+
+
+async def flush_logs() -> None:
+    """等待队列中的日志写出（应用关闭时调用）"""
+    await logger.complete()
+
+
+def should_log(status: int, duration_ms: float) -> bool:
+    if duration_ms >= settings.SLOW_REQUEST_MS or not 200 <= status < 300:
+        return True
+    rate = settings.LOG_SAMPLE_RATE_2XX
+    return rate >= 1 or random.random() < rate
+
+
+class RequestLogMiddleware:
+    """纯 ASGI 中间件：分配 request_id（回写 X-Request-Id 响应头），请求结束时写一行结构化日志"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = uuid.uuid4().hex[:8]
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-request-id", request_id.encode())]
+            await send(message)
+
+        with logger.contextualize(request_id=request_id):
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                duration_ms = (time.perf_counter() - start) * 1000
+                if should_log(status, duration_ms):
+                    self._log(scope, status, duration_ms)
+
+    @staticmethod
+    def _log(scope, status: int, duration_ms: float) -> None:
+        db_stats = current_db_stats()
+        slow = duration_ms >= settings.SLOW_REQUEST_MS
+        fields = {
+            "method": scope["method"],
+            "route": route_template(scope),
+            "path": scope["path"],
+            "status": status,
+            "duration_ms": round(duration_ms, 2),
+            "db_queries": db_stats.queries if db_stats else 0,
+            "db_ms": round(db_stats.seconds * 1000, 2) if db_stats else 0.0,
+            "slow": slow,
+        }
+        level = "ERROR" if status >= 500 else "WARNING" if slow else "INFO"
+        logger.bind(**fields).log(
+            level, f"{fields['method']} {fields['path']} {status} ({fields['duration_ms']}ms)"
+        )
@@ -0,0 +1,121 @@
+"""
+进程内定时任务调度
+
+每个任务按固定间隔在独立 Session 中执行；PostgreSQL 下执行前先获取事务级 advisory lock，
+多个 uvicorn worker 同时运行时同一任务每轮只有一个进程执行，其余进程直接跳过。
+"""
+import asyncio
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+JobFunc = Callable[[AsyncSession], Awaitable[int]]
+
+
+def advisory_lock_id(name: str) -> int:
+    """由任务名得到稳定的 advisory lock 键"""
+    return zlib.crc32(f"scheduler:{name}".encode())
+
+
+async def try_advisory_xact_lock(session: AsyncSession, lock_id: int) -> bool:
+    """尝试获取事务级 advisory lock（事务结束自动释放）；非 PostgreSQL 视为单进程，直接返回 True"""
+    if session.get_bind().dialect.name != "postgresql":
+        return True
+    result = await session.execute(text("SELECT pg_try_advisory_xact_lock(:lock_id)"), {"lock_id": lock_id})
+    return bool(result.scalar())
+
+
+@dataclass
+class ScheduledJob:
+    name: str
+    interval: float  # 秒
+    func: JobFunc
+    # 运行统计（供 /metrics 计算任务滞后）
+    runs: int = 0
+    failures: int = 0
+    skipped: int = 0  # 其他 worker 持有锁而跳过
+    last_success_at: Optional[float] = None  # time.time()
+    last_duration: float = 0.0
+
+
+async def run_job_once(job: ScheduledJob) -> Optional[int]:
+    """
+    执行一次任务：获取锁后在同一事务中运行并提交
+    返回任务处理数量；未抢到锁时返回 None
+    """
+    from app.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as session:
+        try:
+            if not await try_advisory_xact_lock(session, advisory_lock_id(job.name)):
+                await session.rollback()
+                return None
+            count = await job.func(session)
+            await session.commit()
+            return count
+        except Exception:
+            await session.rollback()
+            raise
+
+
+class Scheduler:
+    """由应用生命周期启动和停止的周期任务调度器"""
+
+    def __init__(self):
+        self._jobs: list[ScheduledJob] = []
+        self._tasks: list[asyncio.Task] = []
+        self.started_at: Optional[float] = None
+
+    @property
+    def jobs(self) -> list[ScheduledJob]:
+        return list(self._jobs)
+
+    def add_job(self, name: str, interval: float, func: JobFunc) -> None:
+        self._jobs.append(ScheduledJob(name=name, interval=interval, func=func))
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self.started_at = time.time()
+        for job in self._jobs:
+            self._tasks.append(asyncio.create_task(self._loop(job)))
+        if self._jobs:
+            logger.info(f"定时任务已启动: {', '.join(job.name for job in self._jobs)}")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    async def _loop(self, job: ScheduledJob) -> None:
+        while True:
+            start = time.perf_counter()
+            try:
+                count = await run_job_once(job)
+                if count is None:
+                    job.skipped += 1
+                else:
+                    job.runs += 1
+                    job.last_success_at = time.time()
+                    job.last_duration = time.perf_counter() - start
+                if count:
+                    logger.info(f"定时任务 {job.name} 完成: {count}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job.failures += 1
+                logger.error(f"定时任务 {job.name} 执行失败: {e}")
+            await asyncio.sleep(job.interval)
+
+
+scheduler = Scheduler()
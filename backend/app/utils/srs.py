@@ -0,0 +1,47 @@
+"""
+单词间隔重复调度（SM-2 算法）
+
+调度完全在服务端计算：客户端（小程序）离线记录每次复习的评分和时间，
+联网后整批上传，服务端按复习时间顺序逐条推演出最终的复习计划。
+"""
+from datetime import date, timedelta
+
+DEFAULT_EASE_FACTOR = 2.5
+MIN_EASE_FACTOR = 1.3
+# 评分 0-5：>= 3 视为记住
+PASSING_QUALITY = 3
+
+
+def schedule_review(
+    ease_factor: float,
+    interval_days: int,
+    repetitions: int,
+    lapses: int,
+    quality: int,
+    reviewed_on: date,
+) -> dict:
+    """根据一次复习评分计算新的复习状态"""
+    if quality >= PASSING_QUALITY:
+        if repetitions == 0:
+            interval_days = 1
+        elif repetitions == 1:
+            interval_days = 6
+        else:
+            interval_days = max(1, round(interval_days * ease_factor))
+        repetitions += 1
+    else:
+        # 遗忘：重新开始学习，次日复习
+        repetitions = 0
+        interval_days = 1
+        lapses += 1
+
+    ease_factor = ease_factor + (0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    ease_factor = max(MIN_EASE_FACTOR, round(ease_factor, 2))
+
+    return {
+        "ease_factor": ease_factor,
+        "interval_days": interval_days,
+        "repetitions": repetitions,
+        "lapses": lapses,
+        "due_date": reviewed_on + timedelta(days=interval_days),
+    }
@@ -0,0 +1,304 @@
+"""
+刷新 Token 轮换与会话吊销
+
+登录签发一对 Token：短期访问 Token（ACCESS_TOKEN_EXPIRE_MINUTES）和刷新 Token（REFRESH_TOKEN_EXPIRE_DAYS）。
+同一次登录轮换出的刷新 Token 属于同一会话族，族 id 以 sid 写入两种 Token。每次刷新以条件 UPDATE
+原子地作废旧刷新 Token 并签发新 Token；已轮换过的刷新 Token 再次出现说明被盗用，整个会话族立即吊销。
+
+吊销状态持久化在 refresh_tokens 表，校验访问 Token 时只查进程内按到期时间分桶的已吊销 sid 集合，不访问数据库：
+吊销记录只需保留到该会话最后一个访问 Token 过期，整桶到期后直接丢弃，集合大小只与访问 Token 有效期内的吊销次数相关。
+本进程的吊销在事务提交后立即生效，其他 worker 的吊销由后台任务每 TOKEN_REVOCATION_SYNC_SECONDS 增量同步。
+"""
+import asyncio
+import math
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import HTTPException, status
+from jose import JWTError, jwt
+from loguru import logger
+from sqlalchemy import delete, event, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.user import RefreshToken, User
+from app.utils.auth import create_access_token
+from app.utils.user_cache import get_active_user
+
+TOKEN_TYPE_REFRESH = "refresh"
+PURGE_JOB_NAME = "refresh_token_purge"
+
+_REVOKED_KEY = "token_store_revoked"
+# 增量同步的时间窗口向前多取一段，覆盖写入 revoked_at 到提交之间的延迟
+_SYNC_OVERLAP = timedelta(seconds=60)
+
+
+def _access_lifetime() -> timedelta:
+    return timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+
+
+class RevocationDenySet:
+    """按到期时间分桶的集合：成员到期后以桶为单位整体丢弃，无需逐个清理"""
+
+    def __init__(self, bucket_seconds: float):
+        self.bucket_seconds = bucket_seconds
+        self._buckets: dict[int, set[str]] = {}
+
+    def add(self, member: str, until: float) -> None:
+        """加入成员，至少保留到 until（Unix 时间戳）"""
+        bucket = math.ceil(until / self.bucket_seconds)
+        self._buckets.setdefault(bucket, set()).add(member)
+
+    def __contains__(self, member: str) -> bool:
+        self._expire()
+        return any(member in members for members in self._buckets.values())
+
+    def __len__(self) -> int:
+        self._expire()
+        return sum(len(members) for members in self._buckets.values())
+
+    def _expire(self) -> None:
+        now = time.time()
+        for bucket in [b for b in self._buckets if b * self.bucket_seconds <= now]:
+            del self._buckets[bucket]
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+
+class TokenRevocationStore:
+    """已吊销会话的进程内副本，由应用生命周期启动后台同步"""
+
+    def __init__(self):
+        self.revoked = RevocationDenySet(settings.TOKEN_DENYLIST_BUCKET_SECONDS)
+        self._synced_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def is_revoked(self, family_id: str) -> bool:
+        return family_id in self.revoked
+
+    def add(self, family_id: str, revoked_at: datetime) -> None:
+        """该会话签发的访问 Token 最晚在 revoked_at + 访问 Token 有效期后过期，之后不必再记录"""
+        until = revoked_at.replace(tzinfo=timezone.utc) + _access_lifetime()
+        self.revoked.add(family_id, until.timestamp())
+
+    async def sync(self, session: AsyncSession) -> int:
+        """加载上次同步以来（首次为访问 Token 有效期内）吊销的会话，返回条数"""
+        started = datetime.utcnow()
+        since = self._synced_at - _SYNC_OVERLAP if self._synced_at else started - _access_lifetime()
+        result = await session.execute(
+            select(RefreshToken.family_id, func.max(RefreshToken.revoked_at))
+            .where(RefreshToken.revoked_at >= since)
+            .group_by(RefreshToken.family_id)
+        )
+        rows = result.all()
+        for family_id, revoked_at in rows:
+            self.add(family_id, revoked_at)
+        self._synced_at = started
+        return len(rows)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def synced_at(self) -> Optional[datetime]:
+        """最近一次同步开始的时间（UTC naive）"""
+        return self._synced_at
+
+    def clear(self) -> None:
+        self.revoked.clear()
+        self._synced_at = None
+
+    def stats(self) -> dict:
+        return {
+            "revoked_sessions": len(self.revoked),
+            "synced_at": self._synced_at.isoformat() if self._synced_at else None,
+        }
+
+    async def _run(self) -> None:
+        from app.database import AsyncSessionLocal
+
+        while True:
+            try:
+                async with AsyncSessionLocal() as session:
+                    await self.sync(session)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"吊销会话同步失败: {e}")
+            await asyncio.sleep(settings.TOKEN_REVOCATION_SYNC_SECONDS)
+
+
+revocation_store = TokenRevocationStore()
+
+
+# -----------------------------------------------
+# 签发 / 轮换 / 吊销
+# -----------------------------------------------
+
+def _unauthorized(code: str, message: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail={"code": code, "message": message},
+    )
+
+
+def issue_token_pair(
+    db: AsyncSession, user: User, family_id: Optional[str] = None, jti: Optional[str] = None
+) -> dict:
+    """
+    签发访问 Token + 刷新 Token，并把刷新 Token 记录加入 Session（由调用方提交）
+    不传 family_id 时开启新会话
+    """
+    family_id = family_id or uuid.uuid4().hex
+    jti = jti or uuid.uuid4().hex
+    access_delta = _access_lifetime()
+    refresh_delta = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+
+    db.add(RefreshToken(
+        jti=jti,
+        user_id=user.id,
+        family_id=family_id,
+        expires_at=datetime.utcnow() + refresh_delta,
+    ))
+    access_token = create_access_token(
+        data={"sub": str(user.id), "role": user.role, "sid": family_id},
+        expires_delta=access_delta,
+    )
+    refresh_token = create_access_token(
+        data={"sub": str(user.id), "sid": family_id, "jti": jti, "typ": TOKEN_TYPE_REFRESH},
+        expires_delta=refresh_delta,
+    )
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "expires_in": int(access_delta.total_seconds()),
+    }
+
+
+def _decode_refresh_token(token: str, verify_exp: bool = True) -> dict:
+    try:
+        payload = jwt.decode(
+            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM],
+            options={"verify_exp": verify_exp},
+        )
+    except JWTError:
+        raise _unauthorized("REFRESH_TOKEN_INVALID", "刷新 Token 已过期或无效")
+    if payload.get("typ") != TOKEN_TYPE_REFRESH or not payload.get("jti") or not payload.get("sid"):
+        raise _unauthorized("REFRESH_TOKEN_INVALID", "刷新 Token 格式无效")
+    return payload
+
+
+async def revoke_family(db: AsyncSession, family_id: str) -> int:
+    """吊销整个会话族（由调用方提交，提交后本进程立即拒绝该会话的访问 Token）"""
+    now = datetime.utcnow()
+    result = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now)
+    )
+    db.sync_session.info.setdefault(_REVOKED_KEY, {})[family_id] = now
+    return result.rowcount
+
+
+async def _rotated_within_grace(db: AsyncSession, record: RefreshToken) -> bool:
+    """record 是否在 REFRESH_TOKEN_REUSE_GRACE_SECONDS 内刚被轮换（轮换时刻由后继 Token 的到期时间反推）"""
+    successor = await db.get(RefreshToken, record.replaced_by)
+    if successor is None:
+        return False
+    rotated_at = successor.expires_at - timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    return datetime.utcnow() - rotated_at <= timedelta(seconds=settings.REFRESH_TOKEN_REUSE_GRACE_SECONDS)
+
+
+async def rotate_refresh_token(db: AsyncSession, token: str) -> tuple[User, dict]:
+    """用刷新 Token 换一对新 Token（旧刷新 Token 作废），返回 (用户, Token 对)"""
+    payload = _decode_refresh_token(token)
+    new_jti = uuid.uuid4().hex
+    # 条件更新保证同一个刷新 Token 只能成功轮换一次，并发请求中只有一个拿到 rowcount = 1
+    result = await db.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.jti == payload["jti"],
+            RefreshToken.replaced_by.is_(None),
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > datetime.utcnow(),
+        )
+        .values(replaced_by=new_jti)
+    )
+    if result.rowcount != 1:
+        record = await db.get(RefreshToken, payload["jti"])
+        if record is None or record.family_id != payload["sid"]:
+            raise _unauthorized("REFRESH_TOKEN_INVALID", "刷新 Token 无效")
+        if record.replaced_by is not None and record.revoked_at is None:
+            if await _rotated_within_grace(db, record):
+                # 多个标签页共享同一个刷新 Token、同时刷新：不算重放，由客户端改用先完成者拿到的新 Token
+                raise _unauthorized("REFRESH_TOKEN_INVALID", "刷新 Token 已被使用")
+            # 已轮换的 Token 被再次使用：无法区分合法用户和盗用者，整个会话作废
+            await revoke_family(db, record.family_id)
+            await db.commit()
+            logger.warning(f"刷新 Token 重放，已吊销会话 user_id={record.user_id} sid={record.family_id}")
+            raise _unauthorized("REFRESH_TOKEN_REUSED", "登录状态异常，请重新登录")
+        if record.revoked_at is not None:
+            raise _unauthorized("REFRESH_TOKEN_REVOKED", "登录已失效，请重新登录")
+        raise _unauthorized("REFRESH_TOKEN_INVALID", "刷新 Token 已过期或无效")
+
+    user = await get_active_user(db, int(payload["sub"]))
+    if user is None or not user.is_active:
+        await revoke_family(db, payload["sid"])
+        await db.commit()
+        raise _unauthorized("USER_NOT_FOUND", "用户不存在或已被禁用")
+
+    pair = issue_token_pair(db, user, family_id=payload["sid"], jti=new_jti)
+    await db.commit()
+    return user, pair
+
+
+async def revoke_refresh_token(db: AsyncSession, token: str) -> None:
+    """退出登录：吊销刷新 Token 所在的会话（已过期的刷新 Token 也可用于退出）"""
+    payload = _decode_refresh_token(token, verify_exp=False)
+    record = await db.get(RefreshToken, payload["jti"])
+    if record is not None and record.family_id == payload["sid"]:
+        await revoke_family(db, record.family_id)
+        await db.commit()
+
+
+def is_access_token_revoked(payload: dict) -> bool:
+    """访问 Token 所属会话是否已吊销（只查内存）"""
+    family_id = payload.get("sid")
+    return family_id is not None and revocation_store.is_revoked(family_id)
+
+
+async def purge_refresh_tokens(session: AsyncSession) -> int:
+    """定时任务：删除已过期的刷新 Token 记录（过期的刷新 Token 在解码时即被拒绝，无需保留）"""
+    result = await session.execute(
+        delete(RefreshToken).where(RefreshToken.expires_at < datetime.utcnow())
+    )
+    return result.rowcount
+
+
+# -----------------------------------------------
+# Session 钩子：吊销随事务提交生效
+# -----------------------------------------------
+
+@event.listens_for(Session, "after_commit")
+def _apply_revocations(session: Session) -> None:
+    for family_id, revoked_at in session.info.pop(_REVOKED_KEY, {}).items():
+        revocation_store.add(family_id, revoked_at)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_revocations(session: Session, previous_transaction) -> None:
+    session.info.pop(_REVOKED_KEY, None)
@@ -0,0 +1,191 @@
+"""
+已认证用户缓存
+
+按 user_id 缓存已启用的 User 和学生 / 家长账号关联的 Student，TTL + LRU 有界，
+命中时把快照以 merge(load=False) 挂到当前 Session，不发任何查询，路由中对其修改仍会正常写库。
+
+失效：Session flush 到 User / Student 的变更（含停用、重新绑定账号）时立即失效相关 user_id，
+提交后再失效一次，防止并发请求在提交前读到旧数据回填；对 User / Student 的批量 UPDATE / DELETE 清空全部。
+缓存在进程内，多 worker 时其他进程最多在 TTL 内读到旧数据，TTL 不宜设得过长。
+"""
+import copy
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.config import settings
+from app.models.student import Student
+from app.models.user import User
+
+_INVALIDATE_KEY = "user_cache_invalidate"
+
+
+class TTLCache:
+    """有界 TTL 缓存（超出容量时淘汰最久未使用的条目），记录命中率"""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class UserCache:
+    def __init__(self, max_size: int, ttl: float):
+        self.users = TTLCache(max_size, ttl)
+        self.students = TTLCache(max_size, ttl)  # user_id -> 该账号关联的在读学生
+
+    def invalidate(self, user_id: Optional[int]) -> None:
+        if user_id is not None:
+            self.users.pop(user_id)
+            self.students.pop(user_id)
+
+    def clear(self) -> None:
+        self.users.clear()
+        self.students.clear()
+
+    def stats(self) -> dict:
+        return {"users": self.users.stats(), "students": self.students.stats()}
+
+
+user_cache = UserCache(settings.USER_CACHE_MAX_SIZE, settings.USER_CACHE_TTL_SECONDS)
+
+
+def _snapshot(instance):
+    """复制已加载的列值为一个 detached 对象，不与任何 Session 共享状态"""
+    mapper = inspect(type(instance))
+    values = {attr.key: copy.copy(getattr(instance, attr.key)) for attr in mapper.column_attrs}
+    snapshot = type(instance)(**values)
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+async def _attach(db: AsyncSession, snapshot):
+    """挂到当前 Session：已在 identity map 中则直接复用，否则 merge(load=False)，均不查询数据库"""
+    existing = db.sync_session.identity_map.get(inspect(snapshot).key)
+    if existing is not None:
+        return existing
+    return await db.merge(snapshot, load=False)
+
+
+async def get_active_user(db: AsyncSession, user_id: int) -> Optional[User]:
+    """按 id 取用户；只缓存已启用的用户"""
+    if settings.USER_CACHE_ENABLED:
+        cached = user_cache.users.get(user_id)
+        if cached is not None:
+            return await _attach(db, cached)
+
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalar_one_or_none()
+    if settings.USER_CACHE_ENABLED and user is not None and user.is_active:
+        user_cache.users.set(user_id, _snapshot(user))
+    return user
+
+
+async def get_linked_student(db: AsyncSession, user: User) -> Optional[Student]:
+    """学生 / 家长账号关联的在读学生档案"""
+    if settings.USER_CACHE_ENABLED:
+        cached = user_cache.students.get(user.id)
+        if cached is not None:
+            return await _attach(db, cached)
+
+    link = Student.user_id if user.role == "student" else Student.parent_user_id
+    result = await db.execute(
+        select(Student).where(link == user.id, Student.is_active == True)
+    )
+    student = result.scalar_one_or_none()
+    if settings.USER_CACHE_ENABLED and student is not None:
+        user_cache.students.set(user.id, _snapshot(student))
+    return student
+
+
+# -----------------------------------------------
+# Session 钩子：User / Student 变更时失效
+# -----------------------------------------------
+
+def _affected_user_ids(obj) -> set[int]:
+    if isinstance(obj, User):
+        return {obj.id}
+    if isinstance(obj, Student):
+        state = inspect(obj)
+        ids = {obj.user_id, obj.parent_user_id}
+        # 重新绑定账号时，旧账号的关联也要失效
+        for key in ("user_id", "parent_user_id"):
+            ids.update(state.attrs[key].history.deleted or ())
+        return ids
+    return set()
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_flushed(session: Session, flush_context) -> None:
+    user_ids: set[int] = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        user_ids |= _affected_user_ids(obj)
+    user_ids.discard(None)
+    if not user_ids:
+        return
+    for user_id in user_ids:
+        user_cache.invalidate(user_id)
+    session.info.setdefault(_INVALIDATE_KEY, set()).update(user_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    for user_id in session.info.pop(_INVALIDATE_KEY, ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session: Session, previous_transaction) -> None:
+    session.info.pop(_INVALIDATE_KEY, None)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_bulk(orm_execute_state) -> None:
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in (User, Student):
+        user_cache.clear()
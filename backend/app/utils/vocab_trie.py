@@ -0,0 +1,78 @@
+"""
+词汇自动补全的内存前缀树缓存
+
+热门词表（如中考/高考词汇）按 (subject, level) 整表加载成前缀树，
+自动补全直接在内存中按前缀查找，不访问数据库。词汇有写入时整科目失效，
+下次请求重新加载。缓存是进程内的，多 worker 部署时各自加载。
+"""
+from typing import Optional
+
+# 每个前缀节点最多保留的候选数（即自动补全 limit 的上限）
+MAX_SUGGESTIONS = 50
+
+
+class _TrieNode:
+    __slots__ = ("children", "entries")
+
+    def __init__(self):
+        self.children: dict[str, "_TrieNode"] = {}
+        self.entries: list[dict] = []
+
+
+class VocabularyTrie:
+    """按小写单词建立的前缀树，每个节点保存字典序最靠前的若干候选"""
+
+    def __init__(self, entries: list[dict]):
+        self.root = _TrieNode()
+        self.size = 0
+        for entry in sorted(entries, key=lambda e: e["word"].lower()):
+            self._insert(entry)
+
+    def _insert(self, entry: dict) -> None:
+        node = self.root
+        self._keep(node, entry)
+        for char in entry["word"].lower():
+            node = node.children.setdefault(char, _TrieNode())
+            self._keep(node, entry)
+        self.size += 1
+
+    @staticmethod
+    def _keep(node: _TrieNode, entry: dict) -> None:
+        if len(node.entries) < MAX_SUGGESTIONS:
+            node.entries.append(entry)
+
+    def search(self, prefix: str, limit: int) -> list[dict]:
+        node = self.root
+        for char in prefix.lower():
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.entries[:limit]
+
+
+class VocabularyTrieCache:
+    def __init__(self):
+        self._tries: dict[tuple[str, str], VocabularyTrie] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, subject: str, level: str) -> Optional[VocabularyTrie]:
+        trie = self._tries.get((subject, level))
+        if trie is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return trie
+
+    def set(self, subject: str, level: str, trie: VocabularyTrie) -> None:
+        self._tries[(subject, level)] = trie
+
+    def invalidate(self, subject: Optional[str] = None) -> None:
+        if subject is None:
+            self._tries.clear()
+            return
+        for key in [key for key in self._tries if key[0] == subject]:
+            del self._tries[key]
+
+
+vocab_trie_cache = VocabularyTrieCache()
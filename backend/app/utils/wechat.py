@@ -1,12 +1,112 @@
+import asyncio
+import time
 import httpx
-from typing import Optional
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
 from loguru import logger
 from app.config import settings
 
 
-WECHAT_CODE2SESSION_URL = "https://api.weixin.qq.com/sns/jscode2session"
-WECHAT_ACCESS_TOKEN_URL = "https://api.weixin.qq.com/cgi-bin/token"
-WECHAT_SEND_MSG_URL = "https://api.weixin.qq.com/cgi-bin/message/subscribe/send"
+WECHAT_CODE2SESSION_PATH = "/sns/jscode2session"
+WECHAT_ACCESS_TOKEN_PATH = "/cgi-bin/token"
+WECHAT_SEND_MSG_PATH = "/cgi-bin/message/subscribe/send"
+
+# 订阅消息中不可重试的错误码：用户拒收/未订阅、openid 无效、模板或参数错误
+WECHAT_PERMANENT_ERRCODES = {40003, 40037, 43101, 47003}
+# access_token 失效，刷新后重试
+WECHAT_TOKEN_ERRCODES = {40001, 42001}
+
+# access_token 在微信给出的 expires_in 之前提前刷新的秒数
+ACCESS_TOKEN_REFRESH_MARGIN = 300
+
+HTTP_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+HTTP_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0)
+
+
+def wechat_url(path: str) -> str:
+    """拼接微信 API 地址（基础地址可配置，测试时指向本地桩服务）"""
+    return settings.WECHAT_API_BASE_URL.rstrip("/") + path
+
+
+@dataclass
+class WechatPushResult:
+    status: str  # sent | retry | failed
+    message: str = ""
+    token_expired: bool = False
+
+
+# -----------------------------------------------
+# 共享 HTTP 客户端（连接池 + keep-alive，由应用生命周期创建和关闭）
+# -----------------------------------------------
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def start_http_client() -> None:
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS)
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+@asynccontextmanager
+async def _client() -> AsyncIterator[httpx.AsyncClient]:
+    """优先复用应用级客户端；未启动（脚本、测试）时使用临时客户端"""
+    if _http_client is not None:
+        yield _http_client
+        return
+    async with httpx.AsyncClient(timeout=HTTP_TIMEOUT) as client:
+        yield client
+
+
+# -----------------------------------------------
+# access_token 缓存（到期前提前刷新，并发请求共享同一次获取）
+# -----------------------------------------------
+
+class _AccessTokenCache:
+    def __init__(self):
+        self.token: Optional[str] = None
+        self.expires_at = 0.0  # time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def valid_token(self) -> Optional[str]:
+        if self.token and time.monotonic() < self.expires_at:
+            return self.token
+        return None
+
+    def lock(self) -> asyncio.Lock:
+        # asyncio.Lock 绑定创建时的事件循环，循环变化（如测试）时重建
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    def store(self, token: str, expires_in: int) -> None:
+        self.token = token
+        self.expires_at = time.monotonic() + max(expires_in - ACCESS_TOKEN_REFRESH_MARGIN, 0)
+
+    def invalidate(self, token: Optional[str] = None) -> None:
+        # 只作废指定的旧 token，避免覆盖其他请求刚刷新的新 token
+        if token is None or token == self.token:
+            self.token = None
+            self.expires_at = 0.0
+
+
+_token_cache = _AccessTokenCache()
+
+
+def invalidate_wechat_access_token(token: Optional[str] = None) -> None:
+    """微信返回 token 失效时调用，下次获取会重新请求"""
+    _token_cache.invalidate(token)
 
 
 async def get_wechat_openid(code: str) -> Optional[dict]:
@@ -19,9 +119,9 @@ async def get_wechat_openid(code: str) -> Optional[dict]:
         return None
 
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with _client() as client:
             resp = await client.get(
-                WECHAT_CODE2SESSION_URL,
+                wechat_url(WECHAT_CODE2SESSION_PATH),
                 params={
                     "appid": settings.WECHAT_APP_ID,
                     "secret": settings.WECHAT_APP_SECRET,
@@ -45,15 +145,11 @@ async def get_wechat_openid(code: str) -> Optional[dict]:
         return None
 
 
-async def get_wechat_access_token() -> Optional[str]:
-    """获取微信 access_token"""
-    if not settings.WECHAT_APP_ID or not settings.WECHAT_APP_SECRET:
-        return None
-
+async def _fetch_wechat_access_token() -> Optional[tuple[str, int]]:
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with _client() as client:
             resp = await client.get(
-                WECHAT_ACCESS_TOKEN_URL,
+                wechat_url(WECHAT_ACCESS_TOKEN_PATH),
                 params={
                     "grant_type": "client_credential",
                     "appid": settings.WECHAT_APP_ID,
@@ -63,7 +159,7 @@ async def get_wechat_access_token() -> Optional[str]:
             data = resp.json()
 
         if "access_token" in data:
-            return data["access_token"]
+            return data["access_token"], int(data.get("expires_in", 7200))
         logger.error(f"获取微信 access_token 失败: {data}")
         return None
     except Exception as e:
@@ -71,18 +167,39 @@ async def get_wechat_access_token() -> Optional[str]:
         return None
 
 
-async def send_wechat_subscribe_message(
+async def get_wechat_access_token() -> Optional[str]:
+    """获取微信 access_token（缓存至过期前，并发调用只触发一次请求）"""
+    if not settings.WECHAT_APP_ID or not settings.WECHAT_APP_SECRET:
+        return None
+
+    token = _token_cache.valid_token()
+    if token:
+        return token
+
+    async with _token_cache.lock():
+        # 等锁期间其他请求可能已经刷新
+        token = _token_cache.valid_token()
+        if token:
+            return token
+        fetched = await _fetch_wechat_access_token()
+        if not fetched:
+            return None
+        _token_cache.store(*fetched)
+        return fetched[0]
+
+
+async def push_subscribe_message(
+    access_token: str,
     openid: str,
     template_id: str,
     data: dict,
     page: Optional[str] = None,
-) -> bool:
-    """发送微信订阅消息"""
-    access_token = await get_wechat_access_token()
-    if not access_token:
-        logger.warning("无法获取 access_token，跳过微信推送")
-        return False
-
+) -> WechatPushResult:
+    """
+    发送一条订阅消息并区分结果：
+    sent 成功；failed 不可重试（用户拒收、参数错误等）；retry 网络异常、限流或 token 失效
+    token 失效时同时作废缓存，下次获取会重新请求
+    """
     payload = {
         "touser": openid,
         "template_id": template_id,
@@ -92,19 +209,50 @@ async def send_wechat_subscribe_message(
         payload["page"] = page
 
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with _client() as client:
             resp = await client.post(
-                f"{WECHAT_SEND_MSG_URL}?access_token={access_token}",
+                wechat_url(WECHAT_SEND_MSG_PATH),
+                params={"access_token": access_token},
                 json=payload,
             )
-            result = resp.json()
-
-        if result.get("errcode") == 0:
-            logger.info(f"微信消息推送成功: openid={openid}")
-            return True
-        else:
-            logger.warning(f"微信消息推送失败: {result}")
-            return False
+        if resp.status_code >= 500:
+            return WechatPushResult("retry", f"HTTP {resp.status_code}")
+        result = resp.json()
     except Exception as e:
-        logger.error(f"微信消息推送异常: {e}")
+        return WechatPushResult("retry", f"请求异常: {e}")
+
+    errcode = result.get("errcode", 0)
+    if errcode == 0:
+        return WechatPushResult("sent")
+    message = f"errcode={errcode} {result.get('errmsg', '')}".strip()
+    if errcode in WECHAT_PERMANENT_ERRCODES:
+        return WechatPushResult("failed", message)
+    token_expired = errcode in WECHAT_TOKEN_ERRCODES
+    if token_expired:
+        invalidate_wechat_access_token(access_token)
+    return WechatPushResult("retry", message, token_expired=token_expired)
+
+
+async def send_wechat_subscribe_message(
+    openid: str,
+    template_id: str,
+    data: dict,
+    page: Optional[str] = None,
+) -> bool:
+    """发送微信订阅消息"""
+    access_token = await get_wechat_access_token()
+    if not access_token:
+        logger.warning("无法获取 access_token，跳过微信推送")
         return False
+
+    result = await push_subscribe_message(access_token, openid, template_id, data, page)
+    if result.token_expired:
+        # token 被提前作废（如在其他环境重新获取），刷新后重试一次
+        access_token = await get_wechat_access_token()
+        if access_token:
+            result = await push_subscribe_message(access_token, openid, template_id, data, page)
+    if result.status == "sent":
+        logger.info(f"微信消息推送成功: openid={openid}")
+        return True
+    logger.warning(f"微信消息推送失败: {result.message}")
+    return False
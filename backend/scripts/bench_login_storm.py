@@ -0,0 +1,98 @@
+"""
+登录洪峰压测：持续并发登录的同时探测一个轻量接口，对比洪峰前后探测请求的延迟
+
+    uvicorn app.main:app --workers 1
+    python scripts/bench_login_storm.py --base-url http://localhost:8000 \
+        --username admin --password admin123 --concurrency 50 --duration 10
+
+bcrypt 在事件循环中同步执行时，探测延迟会随登录并发明显上升；
+放入线程池后，探测延迟应与空闲时基本持平（登录自身的吞吐受 PASSWORD_HASH_WORKERS 和 CPU 核数限制）。
+请以单 worker 启动服务，否则请求会被分散到多个进程，看不出事件循环被阻塞的影响。
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+PROBE_PATH = "/api/health"
+LOGIN_PATH = "/api/auth/login"
+PROBE_INTERVAL = 0.02
+
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event, samples: list[float]) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get(PROBE_PATH)
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(PROBE_INTERVAL)
+
+
+async def login_worker(
+    client: httpx.AsyncClient, payload: dict, stop: asyncio.Event, results: dict[str, int]
+) -> None:
+    while not stop.is_set():
+        resp = await client.post(LOGIN_PATH, json=payload)
+        key = "ok" if resp.status_code == 200 else f"http_{resp.status_code}"
+        results[key] = results.get(key, 0) + 1
+
+
+def summarize(name: str, samples: list[float]) -> str:
+    if not samples:
+        return f"{name}: 无样本"
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+    return (
+        f"{name}: n={len(ordered)} p50={statistics.median(ordered):.1f}ms "
+        f"p95={pct(0.95):.1f}ms p99={pct(0.99):.1f}ms max={ordered[-1]:.1f}ms"
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=args.concurrency + 10)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60, limits=limits) as client:
+        # 空闲基线
+        stop = asyncio.Event()
+        baseline: list[float] = []
+        task = asyncio.create_task(probe(client, stop, baseline))
+        await asyncio.sleep(args.warmup)
+        stop.set()
+        await task
+
+        # 登录洪峰
+        stop = asyncio.Event()
+        storm: list[float] = []
+        results: dict[str, int] = {}
+        payload = {"username": args.username, "password": args.password}
+        tasks = [asyncio.create_task(probe(client, stop, storm))]
+        tasks += [
+            asyncio.create_task(login_worker(client, payload, stop, results))
+            for _ in range(args.concurrency)
+        ]
+        await asyncio.sleep(args.duration)
+        stop.set()
+        await asyncio.gather(*tasks)
+
+    total_logins = sum(results.values())
+    print(summarize("空闲探测", baseline))
+    print(summarize("洪峰探测", storm))
+    print(f"登录: {total_logins} 次 ({total_logins / args.duration:.1f}/s) {results}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="登录洪峰下其他请求的延迟压测")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--concurrency", type=int, default=50, help="并发登录数")
+    parser.add_argument("--duration", type=float, default=10.0, help="洪峰持续秒数")
+    parser.add_argument("--warmup", type=float, default=3.0, help="空闲基线采样秒数")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -18,7 +18,7 @@ from typing import AsyncGenerator
 
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy import Text, TypeDecorator
+from sqlalchemy import Text, TypeDecorator, exists, func
 
 import sys
 import os
@@ -35,6 +35,12 @@ class JSONEncodedList(TypeDecorator):
     impl = Text
     cache_ok = True
 
+    class comparator_factory(TypeDecorator.Comparator):
+        def any(self, other):
+            """模拟 PostgreSQL 的 other = ANY(array)：用 json_each 展开后逐个比较"""
+            elements = func.json_each(self.expr).table_valued("value")
+            return exists().where(elements.c.value == other)
+
     def __init__(self, *args, **kwargs):
         super().__init__()
 
@@ -88,11 +94,14 @@ pg_dialect.JSONB = JSONEncodedDict   # type: ignore
 # -----------------------------------------------
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:?cache=shared"
 os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+# 测试中使用最低 bcrypt cost，避免每个用户 fixture 耗时数百毫秒
+os.environ["BCRYPT_ROUNDS"] = "4"
 
 # -----------------------------------------------
 # 第四步：现在可以安全导入 app（所有 model 会使用替代类型）
 # -----------------------------------------------
 from app.main import app
+from app.config import settings
 from app.database import Base, get_db
 import app.database as app_database
 from app.models.user import User
@@ -102,6 +111,12 @@ from app.models.assignment import Assignment, AssignmentStudent
 from app.models.billing import SubjectPrice, BillingRecord
 from app.models.resource import Resource, ResourceShare
 from app.utils.auth import get_password_hash
+from app.utils.grade_analytics import grade_analytics_cache
+from app.utils.metrics import registry as metrics_registry
+from app.utils.rate_limit import rate_limiter
+from app.utils.read_replica import replica_monitor
+from app.utils.token_store import revocation_store
+from app.utils.user_cache import user_cache
 
 # -----------------------------------------------
 # 第五步：替换 app.database 中的全局 engine 和 session_factory
@@ -145,6 +160,14 @@ async def create_test_tables():
     await test_engine.dispose()
 
 
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path, monkeypatch):
+    """每个测试的上传文件（资源、报告 PDF）写入临时目录，不在 backend/uploads/ 下留下文件"""
+    path = tmp_path / "uploads"
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(path))
+    return path
+
+
 @pytest_asyncio.fixture
 async def db() -> AsyncGenerator[AsyncSession, None]:
     """每个测试独立：测试完毕后清空所有表数据，保证测试间隔离"""
@@ -159,6 +182,12 @@ async def db() -> AsyncGenerator[AsyncSession, None]:
                 await session.execute(table.delete())
             await session.commit()
             await session.close()
+            grade_analytics_cache.invalidate()
+            user_cache.clear()
+            revocation_store.clear()
+            rate_limiter.reset()
+            replica_monitor.reset()
+            metrics_registry.reset()
 
 
 @pytest_asyncio.fixture
@@ -2,12 +2,19 @@
 认证模块测试
 覆盖用户故事 US-001（老师账号登录）
 """
+import asyncio
+import threading
+
 import pytest
 from httpx import AsyncClient
+from passlib.context import CryptContext
 
-from app.models.user import User
-from app.utils.auth import create_access_token, get_password_hash
-from datetime import timedelta
+from app.config import settings
+from app.models.user import RefreshToken, User
+from app.utils import auth as auth_utils, token_store
+from app.utils.auth import create_access_token, get_password_hash, hash_password, pwd_context
+from app.utils.token_store import RevocationDenySet, TokenRevocationStore, purge_refresh_tokens
+from datetime import datetime, timedelta
 
 
 class TestLogin:
@@ -79,6 +86,46 @@ class TestLogin:
         assert resp.status_code == 401
 
 
+class TestPasswordHashing:
+    """bcrypt 在线程池中执行，cost 可配置"""
+
+    async def test_hashing_runs_off_event_loop(self, monkeypatch):
+        threads = []
+        original = pwd_context.hash
+
+        def record(password):
+            threads.append(threading.current_thread().name)
+            return original(password)
+
+        monkeypatch.setattr(auth_utils.pwd_context, "hash", record)
+        hashes = await asyncio.gather(*(hash_password(f"pw{i}") for i in range(3)))
+        assert len(set(hashes)) == 3
+        assert all(name.startswith("password-hash") for name in threads)
+        assert threading.current_thread().name not in threads
+
+    async def test_login_upgrades_hash_cost(self, async_client: AsyncClient, db, monkeypatch):
+        """调高 cost 后，旧哈希在登录成功时按新 cost 重新哈希"""
+        legacy_hash = pwd_context.hash("password123", rounds=4)
+        upgraded = CryptContext(schemes=["bcrypt"], bcrypt__rounds=5, bcrypt__min_rounds=5)
+        monkeypatch.setattr(auth_utils, "pwd_context", upgraded)
+        user = User(
+            username="legacy_user", hashed_password=legacy_hash, role="admin",
+            display_name="旧账号", is_active=True,
+        )
+        db.add(user)
+        await db.commit()
+
+        resp = await async_client.post(
+            "/api/auth/login", json={"username": "legacy_user", "password": "password123"}
+        )
+        assert resp.status_code == 200
+        await db.refresh(user)
+        assert user.hashed_password != legacy_hash
+        assert user.hashed_password.startswith("$2b$05$")
+        assert not upgraded.needs_update(user.hashed_password)
+        assert upgraded.verify("password123", user.hashed_password)
+
+
 class TestAuthMe:
     """获取当前用户信息相关测试"""
 
@@ -114,32 +161,164 @@ class TestAuthMe:
 class TestTokenRefresh:
     """Token 刷新相关测试"""
 
-    async def test_refresh_token_success(
-        self, async_client: AsyncClient, auth_headers: dict
-    ):
-        """TC-AUTH-010: 使用有效 token 刷新，返回新 token（US-001 AC1）"""
-        resp = await async_client.post("/api/auth/refresh", headers=auth_headers)
+    async def _login(self, async_client: AsyncClient) -> dict:
+        resp = await async_client.post(
+            "/api/auth/login", json={"username": "admin", "password": "admin123"}
+        )
+        assert resp.status_code == 200
+        return resp.json()
+
+    async def test_refresh_token_success(self, async_client: AsyncClient, admin_user: User):
+        """TC-AUTH-010: 使用刷新 token 换取新 token，刷新 token 同时轮换（US-001 AC1）"""
+        tokens = await self._login(async_client)
+        resp = await async_client.post(
+            "/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+        )
         assert resp.status_code == 200
         data = resp.json()
-        assert "access_token" in data
-        assert data["expires_in"] > 0
+        assert data["expires_in"] == settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        assert data["refresh_token"] != tokens["refresh_token"]
+
+        headers = {"Authorization": f"Bearer {data['access_token']}"}
+        assert (await async_client.get("/api/auth/me", headers=headers)).status_code == 200
 
     async def test_refresh_without_token(self, async_client: AsyncClient):
-        """TC-AUTH-011: 无 token 刷新 → 401"""
+        """TC-AUTH-011: 无刷新 token → 422；访问 token 不能用于刷新 → 401"""
         resp = await async_client.post("/api/auth/refresh")
+        assert resp.status_code == 422
+
+        access_token = create_access_token(data={"sub": "1", "role": "admin"})
+        resp = await async_client.post("/api/auth/refresh", json={"refresh_token": access_token})
         assert resp.status_code == 401
+        assert resp.json()["detail"]["code"] == "REFRESH_TOKEN_INVALID"
 
     async def test_refresh_with_expired_token(self, async_client: AsyncClient, admin_user: User):
-        """TC-AUTH-012: 使用已过期 token 刷新 → 401（US-001 AC3）"""
-        # 创建一个已过期的 token（有效期为负数）
+        """TC-AUTH-012: 使用已过期刷新 token → 401（US-001 AC3）"""
         expired_token = create_access_token(
-            data={"sub": str(admin_user.id), "role": "admin"},
+            data={"sub": str(admin_user.id), "sid": "s", "jti": "j", "typ": "refresh"},
             expires_delta=timedelta(seconds=-1),
         )
-        headers = {"Authorization": f"Bearer {expired_token}"}
-        resp = await async_client.post("/api/auth/refresh", headers=headers)
+        resp = await async_client.post("/api/auth/refresh", json={"refresh_token": expired_token})
         assert resp.status_code == 401
 
+    async def test_refresh_token_not_accepted_as_access_token(
+        self, async_client: AsyncClient, admin_user: User
+    ):
+        tokens = await self._login(async_client)
+        headers = {"Authorization": f"Bearer {tokens['refresh_token']}"}
+        resp = await async_client.get("/api/auth/me", headers=headers)
+        assert resp.status_code == 401
+
+    async def test_concurrent_refresh_within_grace(self, async_client: AsyncClient, admin_user: User):
+        """两个标签页同时用同一个刷新 token 刷新：后到者 401 但会话不吊销"""
+        tokens = await self._login(async_client)
+        first = await async_client.post(
+            "/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+        )
+        rotated = first.json()
+
+        second = await async_client.post(
+            "/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+        )
+        assert second.status_code == 401
+        assert second.json()["detail"]["code"] == "REFRESH_TOKEN_INVALID"
+
+        headers = {"Authorization": f"Bearer {rotated['access_token']}"}
+        assert (await async_client.get("/api/auth/me", headers=headers)).status_code == 200
+        resp = await async_client.post(
+            "/api/auth/refresh", json={"refresh_token": rotated["refresh_token"]}
+        )
+        assert resp.status_code == 200
+
+    async def test_reuse_revokes_whole_session(
+        self, async_client: AsyncClient, admin_user: User, monkeypatch
+    ):
+        """宽限期后已轮换的刷新 token 被再次使用：整个会话吊销，包括新签发的访问 token"""
+        monkeypatch.setattr("app.config.settings.REFRESH_TOKEN_REUSE_GRACE_SECONDS", -1)
+        tokens = await self._login(async_client)
+        first = await async_client.post(
+            "/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+        )
+        rotated = first.json()
+
+        replay = await async_client.post(
+            "/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+        )
+        assert replay.status_code == 401
+        assert replay.json()["detail"]["code"] == "REFRESH_TOKEN_REUSED"
+
+        resp = await async_client.post(
+            "/api/auth/refresh", json={"refresh_token": rotated["refresh_token"]}
+        )
+        assert resp.json()["detail"]["code"] == "REFRESH_TOKEN_REVOKED"
+        headers = {"Authorization": f"Bearer {rotated['access_token']}"}
+        resp = await async_client.get("/api/auth/me", headers=headers)
+        assert resp.status_code == 401
+        assert resp.json()["detail"]["code"] == "TOKEN_REVOKED"
+
+    async def test_logout_revokes_session_only(self, async_client: AsyncClient, admin_user: User):
+        """退出登录只吊销当前会话，同一账号的其他登录不受影响"""
+        tokens = await self._login(async_client)
+        other = await self._login(async_client)
+
+        resp = await async_client.post("/api/auth/logout", json={"refresh_token": tokens["refresh_token"]})
+        assert resp.status_code == 204
+
+        headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+        assert (await async_client.get("/api/auth/me", headers=headers)).status_code == 401
+        resp = await async_client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+        assert resp.status_code == 401
+
+        headers = {"Authorization": f"Bearer {other['access_token']}"}
+        assert (await async_client.get("/api/auth/me", headers=headers)).status_code == 200
+
+
+class TestRevocationStore:
+    """吊销会话的进程内副本"""
+
+    def test_deny_set_drops_expired_buckets(self, monkeypatch):
+        deny_set = RevocationDenySet(bucket_seconds=60)
+        now = 1_000_000.0
+        monkeypatch.setattr(token_store.time, "time", lambda: now)
+        deny_set.add("a", now + 30)
+        deny_set.add("b", now + 600)
+        assert "a" in deny_set and "b" in deny_set
+
+        now += 120
+        assert "a" not in deny_set and "b" in deny_set
+        assert len(deny_set) == 1
+
+    async def test_sync_loads_revocations_from_other_workers(self, db, admin_user: User):
+        """其他 worker 写入的吊销记录经同步进入本进程"""
+        db.add(RefreshToken(
+            jti="j1", user_id=admin_user.id, family_id="other-worker",
+            expires_at=datetime.utcnow() + timedelta(days=1), revoked_at=datetime.utcnow(),
+        ))
+        db.add(RefreshToken(
+            jti="j2", user_id=admin_user.id, family_id="long-ago",
+            expires_at=datetime.utcnow() + timedelta(days=1),
+            revoked_at=datetime.utcnow() - timedelta(days=1),
+        ))
+        await db.commit()
+
+        store = TokenRevocationStore()
+        assert await store.sync(db) == 1
+        assert store.is_revoked("other-worker")
+        assert not store.is_revoked("long-ago")
+
+    async def test_purge_expired_refresh_tokens(self, db, admin_user: User):
+        db.add(RefreshToken(
+            jti="old", user_id=admin_user.id, family_id="f",
+            expires_at=datetime.utcnow() - timedelta(minutes=1),
+        ))
+        db.add(RefreshToken(
+            jti="new", user_id=admin_user.id, family_id="f",
+            expires_at=datetime.utcnow() + timedelta(days=1),
+        ))
+        await db.commit()
+        assert await purge_refresh_tokens(db) == 1
+        assert await db.get(RefreshToken, "new") is not None
+
 
 class TestProtectedRoutes:
     """受保护路由权限测试"""
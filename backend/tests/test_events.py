@@ -0,0 +1,141 @@
+"""
+实时事件推送测试
+覆盖事件随事务提交推送（回滚丢弃）、按用户 / 学生 / 管理员匹配连接，
+以及 SSE 流格式、心跳与积压溢出后的 resync
+"""
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.course import Course
+from app.models.student import Student
+from app.models.user import User
+from app.routers.events import next_event, sse_events
+from app.utils.events import (
+    EVENT_COURSE_STATUS_CHANGED, EVENT_NOTIFICATION_CREATED, EVENT_PAYMENT_ALERT, emit, event_hub,
+)
+
+
+@pytest.fixture
+def subscriptions():
+    created = []
+
+    def subscribe(user_id: int, is_admin: bool = False, student_ids=()):
+        subscription = event_hub.subscribe(user_id, is_admin, student_ids)
+        created.append(subscription)
+        return subscription
+
+    yield subscribe
+    for subscription in created:
+        event_hub.unsubscribe(subscription)
+
+
+def _drain(subscription) -> list[dict]:
+    items = []
+    while not subscription.queue.empty():
+        items.append(subscription.queue.get_nowait())
+    return items
+
+
+async def _linked_student(db: AsyncSession, student: Student) -> User:
+    user = User(username="stu_events", role="student", display_name="学生", is_active=True)
+    db.add(user)
+    await db.flush()
+    student.user_id = user.id
+    await db.commit()
+    return user
+
+
+class TestEventDelivery:
+    """事件随事务提交推送"""
+
+    async def test_delivered_after_commit_only(self, db: AsyncSession, subscriptions):
+        subscription = subscriptions(1)
+        emit(db, EVENT_NOTIFICATION_CREATED, {"title": "t"}, user_ids=[1])
+        assert _drain(subscription) == []
+        await db.commit()
+        assert _drain(subscription) == [{"type": EVENT_NOTIFICATION_CREATED, "data": {"title": "t"}}]
+
+        await db.execute(select(1))
+        emit(db, EVENT_NOTIFICATION_CREATED, {"title": "rolled back"}, user_ids=[1])
+        await db.rollback()
+        await db.commit()
+        assert _drain(subscription) == []
+
+    async def test_notification_send_reaches_recipients(
+        self, async_client: AsyncClient, auth_headers: dict, admin_user: User, subscriptions
+    ):
+        mine = subscriptions(admin_user.id, is_admin=True)
+        other = subscriptions(admin_user.id + 1000)
+        resp = await async_client.post(
+            "/api/notifications/send",
+            json={"user_ids": [admin_user.id], "title": "停课通知", "content": "周六停课"},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 200
+        [item] = _drain(mine)
+        assert item["type"] == EVENT_NOTIFICATION_CREATED
+        assert item["data"]["title"] == "停课通知"
+        assert _drain(other) == []
+
+    async def test_course_status_change_and_payment_alert(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession,
+        admin_user: User, test_student: Student, test_course: Course, subscriptions,
+    ):
+        student_user = await _linked_student(db, test_student)
+        admin = subscriptions(admin_user.id, is_admin=True)
+        student = subscriptions(student_user.id, student_ids=[test_student.id])
+        unrelated = subscriptions(student_user.id + 1000, student_ids=[test_student.id + 1000])
+
+        resp = await async_client.patch(
+            f"/api/courses/{test_course.id}/status", json={"status": "completed"}, headers=auth_headers
+        )
+        assert resp.status_code == 200
+
+        for subscription in (admin, student):
+            items = {item["type"]: item["data"] for item in _drain(subscription)}
+            assert items[EVENT_COURSE_STATUS_CHANGED]["status"] == "completed"
+            assert items[EVENT_COURSE_STATUS_CHANGED]["previous_status"] == "scheduled"
+            # 课时费 150 元，无充值，余额为负
+            assert items[EVENT_PAYMENT_ALERT]["balance"] == -150.0
+        assert _drain(unrelated) == []
+
+    async def test_stream_requires_token(self, async_client: AsyncClient):
+        resp = await async_client.get("/api/events/stream")
+        assert resp.status_code == 401
+        resp = await async_client.get("/api/events/stream?token=invalid")
+        assert resp.status_code == 401
+
+
+class TestSseStream:
+    """SSE 输出"""
+
+    async def test_ready_event_heartbeat(self, subscriptions):
+        subscription = subscriptions(1)
+        stream = sse_events(subscription, {"unread_count": 3}, heartbeat=0.05)
+
+        first = await stream.__anext__()
+        assert first.startswith("retry: ")
+        assert "event: ready\n" in first and '"unread_count": 3' in first
+
+        assert await stream.__anext__() == ": ping\n\n"
+
+        event_hub.deliver([{"type": EVENT_PAYMENT_ALERT, "data": {"balance": -1}, "user_ids": [1]}])
+        assert await stream.__anext__() == 'event: payment_alert\ndata: {"balance": -1}\n\n'
+
+        await stream.aclose()
+        assert event_hub.connection_count == 0
+
+    async def test_overflow_sends_resync(self, subscriptions, monkeypatch):
+        monkeypatch.setattr("app.config.settings.EVENTS_QUEUE_SIZE", 2)
+        subscription = subscriptions(1)
+        event_hub.deliver([
+            {"type": EVENT_NOTIFICATION_CREATED, "data": {"n": i}, "user_ids": [1]} for i in range(5)
+        ])
+        assert subscription.overflowed
+        assert (await next_event(subscription, 0.05))["type"] == "resync"
+        assert subscription.queue.empty()
+        assert await asyncio.wait_for(next_event(subscription, 0.01), timeout=1) is None
@@ -0,0 +1,681 @@
+"""
+考试辅导模块测试
+覆盖模拟考试作答提交、自动批改、人工批改队列与答案键修正后的批量重判，
+以及单词间隔重复复习
+"""
+from datetime import date, datetime, timedelta
+
+from httpx import AsyncClient
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.exam import ExamQuestion, MockExam, Vocabulary, VocabularyReview
+from app.models.student import Student
+from app.models.user import User
+from app.routers.exam import _load_review_states, _save_review_states
+from app.utils.auth import create_access_token
+from app.utils.exam_grading import grade_answers, normalize_choice, normalize_fill
+from app.utils.srs import schedule_review
+from app.utils.ability import update_rating, target_difficulty
+
+
+# -----------------------------------------------
+# 辅助函数
+# -----------------------------------------------
+
+async def _create_exam(db: AsyncSession, student: Student) -> tuple[MockExam, list[ExamQuestion]]:
+    """创建一套包含选择、填空、作文的模拟考试"""
+    questions = [
+        ExamQuestion(subject="英语", question_type="choice", content="选择题1", answer="B", difficulty=2, tags=["语法"]),
+        ExamQuestion(subject="英语", question_type="choice", content="多选题", answer="A,C", difficulty=3, tags=["语法"]),
+        ExamQuestion(subject="英语", question_type="fill", content="填空题", answer="went|had gone", difficulty=3, tags=["时态"]),
+        ExamQuestion(subject="英语", question_type="essay", content="作文题", answer="参考范文", difficulty=4, tags=["写作"]),
+    ]
+    db.add_all(questions)
+    await db.flush()
+
+    exam = MockExam(
+        student_id=student.id,
+        title="英语模拟卷",
+        subject="英语",
+        question_ids=[q.id for q in questions],
+        status="active",
+    )
+    db.add(exam)
+    await db.flush()
+    return exam, questions
+
+
+async def _student_headers(db: AsyncSession, student: Student) -> dict:
+    """为学生创建登录账号并返回 Bearer Token Headers"""
+    user = User(username=f"stu_{student.id}", role="student", display_name=student.name, is_active=True)
+    db.add(user)
+    await db.flush()
+    student.user_id = user.id
+    await db.flush()
+    token = create_access_token({"sub": str(user.id), "role": "student"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+class TestGradingFunctions:
+    """自动批改纯函数"""
+
+    def test_normalize_choice_is_order_and_width_insensitive(self):
+        assert normalize_choice("c, a") == normalize_choice("ＡＣ") == "AC"
+
+    def test_normalize_fill_ignores_case_and_trailing_punctuation(self):
+        assert normalize_fill("  Went. ") == "went"
+
+    def test_grade_answers_covers_every_question(self):
+        keys = {1: ("choice", "A"), 2: ("fill", "cat|kitten"), 3: ("essay", "范文"), 4: ("reading", "略")}
+        result = grade_answers(keys, {1: "a", 2: "Kitten", 3: "我的作文"})
+        assert result[1]["is_correct"] is True
+        assert result[2]["score"] == 100.0
+        assert result[3]["status"] == "pending"
+        # 主观题未作答直接记 0 分，不进入人工批改队列
+        assert result[4] == {"is_correct": False, "score": 0.0, "status": "graded"}
+
+
+class TestSubmitMockExam:
+    """模拟考试提交与批改"""
+
+    async def test_submit_auto_grades_and_queues_essay(
+        self,
+        async_client: AsyncClient,
+        auth_headers: dict,
+        db: AsyncSession,
+        test_student: Student,
+    ):
+        exam, questions = await _create_exam(db, test_student)
+
+        resp = await async_client.post(
+            f"/api/exam/mock-exams/{exam.id}/submit",
+            json={"answers": [
+                {"question_id": questions[0].id, "answer": "b"},
+                {"question_id": questions[1].id, "answer": "CA"},
+                {"question_id": questions[2].id, "answer": "go"},
+                {"question_id": questions[3].id, "answer": "My essay"},
+            ]},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["status"] == "grading"
+        assert data["total"] == 4
+        assert data["correct_count"] == 2
+        assert data["pending_count"] == 1
+        assert data["score"] == 50.0
+        assert [a["question_id"] for a in data["answers"]] == [q.id for q in questions]
+
+        # 重复提交被拒绝
+        resp = await async_client.post(
+            f"/api/exam/mock-exams/{exam.id}/submit",
+            json={"answers": []},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 400
+        assert resp.json()["detail"]["code"] == "EXAM_NOT_ACTIVE"
+
+    async def test_submit_rejects_foreign_question(
+        self,
+        async_client: AsyncClient,
+        auth_headers: dict,
+        db: AsyncSession,
+        test_student: Student,
+    ):
+        exam, _ = await _create_exam(db, test_student)
+        resp = await async_client.post(
+            f"/api/exam/mock-exams/{exam.id}/submit",
+            json={"answers": [{"question_id": 999999, "answer": "A"}]},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 400
+        assert resp.json()["detail"]["code"] == "QUESTION_NOT_IN_EXAM"
+
+    async def test_manual_grading_completes_exam(
+        self,
+        async_client: AsyncClient,
+        auth_headers: dict,
+        db: AsyncSession,
+        test_student: Student,
+    ):
+        exam, questions = await _create_exam(db, test_student)
+        await async_client.post(
+            f"/api/exam/mock-exams/{exam.id}/submit",
+            json={"answers": [
+                {"question_id": questions[0].id, "answer": "B"},
+                {"question_id": questions[3].id, "answer": "My essay"},
+            ]},
+            headers=auth_headers,
+        )
+
+        queue = await async_client.get("/api/exam/grading-queue", headers=auth_headers)
+        assert queue.status_code == 200
+        items = queue.json()["items"]
+        assert len(items) == 1
+        assert items[0]["student_name"] == test_student.name
+        assert items[0]["reference_answer"] == "参考范文"
+
+        resp = await async_client.patch(
+            f"/api/exam/answers/{items[0]['answer_id']}/grade",
+            json={"score": 80, "comment": "结构清晰"},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 200
+        assert resp.json()["status"] == "graded"
+
+        result = await async_client.get(f"/api/exam/mock-exams/{exam.id}/result", headers=auth_headers)
+        data = result.json()
+        assert data["status"] == "completed"
+        assert data["pending_count"] == 0
+        assert data["score"] == 45.0
+
+        queue = await async_client.get("/api/exam/grading-queue", headers=auth_headers)
+        assert queue.json()["total"] == 0
+
+    async def test_manual_grade_rejects_invalid_score(
+        self,
+        async_client: AsyncClient,
+        auth_headers: dict,
+    ):
+        resp = await async_client.patch(
+            "/api/exam/answers/1/grade",
+            json={"score": 120},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 400
+        assert resp.json()["detail"]["code"] == "INVALID_SCORE"
+
+
+class TestRegradeQuestion:
+    """答案键修正后批量重判"""
+
+    async def test_answer_key_fix_regrades_all_attempts(
+        self,
+        async_client: AsyncClient,
+        auth_headers: dict,
+        db: AsyncSession,
+        test_student: Student,
+        test_student_2: Student,
+    ):
+        exam_a, questions = await _create_exam(db, test_student)
+        exam_b = MockExam(
+            student_id=test_student_2.id,
+            title="英语模拟卷",
+            subject="英语",
+            question_ids=[questions[0].id],
+            status="active",
+        )
+        db.add(exam_b)
+        await db.flush()
+
+        for exam in (exam_a, exam_b):
+            await async_client.post(
+                f"/api/exam/mock-exams/{exam.id}/submit",
+                json={"answers": [{"question_id": questions[0].id, "answer": "C"}]},
+                headers=auth_headers,
+            )
+
+        resp = await async_client.put(
+            f"/api/exam/questions/{questions[0].id}",
+            json={"answer": "C"},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 200
+
+        result_b = await async_client.get(f"/api/exam/mock-exams/{exam_b.id}/result", headers=auth_headers)
+        assert result_b.json()["score"] == 100.0
+        assert result_b.json()["answers"][0]["is_correct"] is True
+
+        result_a = await async_client.get(f"/api/exam/mock-exams/{exam_a.id}/result", headers=auth_headers)
+        assert result_a.json()["score"] == 25.0
+
+        resp = await async_client.post(
+            f"/api/exam/questions/{questions[0].id}/regrade",
+            headers=auth_headers,
+        )
+        assert resp.status_code == 200
+        assert resp.json() == {"question_id": questions[0].id, "regraded": 2, "affected_exams": 2}
+
+    async def test_change_to_essay_requeues_answers(
+        self,
+        async_client: AsyncClient,
+        auth_headers: dict,
+        db: AsyncSession,
+        test_student: Student,
+    ):
+        """自动批改题改为主观题后，已有作答重置为待人工批改并进入批改队列"""
+        exam, questions = await _create_exam(db, test_student)
+        await async_client.post(
+            f"/api/exam/mock-exams/{exam.id}/submit",
+            json={"answers": [{"question_id": questions[0].id, "answer": "B"}]},
+            headers=auth_headers,
+        )
+
+        resp = await async_client.put(
+            f"/api/exam/questions/{questions[0].id}",
+            json={"question_type": "essay"},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 200
+
+        result = (await async_client.get(f"/api/exam/mock-exams/{exam.id}/result", headers=auth_headers)).json()
+        answer = next(a for a in result["answers"] if a["question_id"] == questions[0].id)
+        assert answer["status"] == "pending" and answer["score"] is None
+        assert result["status"] == "grading"
+        assert result["score"] == 0.0
+
+        queue = (await async_client.get("/api/exam/grading-queue", headers=auth_headers)).json()
+        assert [item["question_id"] for item in queue["items"]] == [questions[0].id]
+
+        # 主观题之间的重判不覆盖人工批改结果
+        await async_client.patch(
+            f"/api/exam/answers/{queue['items'][0]['answer_id']}/grade",
+            json={"score": 60},
+            headers=auth_headers,
+        )
+        resp = await async_client.post(f"/api/exam/questions/{questions[0].id}/regrade", headers=auth_headers)
+        assert resp.json()["regraded"] == 0
+
+
+class TestVocabularyReview:
+    """单词间隔重复复习"""
+
+    def test_schedule_review_follows_sm2_intervals(self):
+        today = date(2026, 5, 1)
+        first = schedule_review(2.5, 0, 0, 0, 5, today)
+        assert first["interval_days"] == 1
+        second = schedule_review(first["ease_factor"], 1, 1, 0, 4, today)
+        assert second["interval_days"] == 6
+        lapse = schedule_review(second["ease_factor"], 6, 2, 0, 1, today)
+        assert lapse["repetitions"] == 0
+        assert lapse["lapses"] == 1
+        assert lapse["due_date"] == today + timedelta(days=1)
+        assert lapse["ease_factor"] >= 1.3
+
+    async def test_assign_due_queue_and_batch_review(
+        self,
+        async_client: AsyncClient,
+        auth_headers: dict,
+        db: AsyncSession,
+        test_student: Student,
+    ):
+        words = [
+            Vocabulary(subject="english", word="apple", meaning="苹果", level="中考"),
+            Vocabulary(subject="english", word="banana", meaning="香蕉", level="中考"),
+            Vocabulary(subject="english", word="cherry", meaning="樱桃", level="高考"),
+        ]
+        db.add_all(words)
+        await db.flush()
+
+        resp = await async_client.post(
+            "/api/exam/vocabulary/assign",
+            json={"student_ids": [test_student.id], "level": "中考"},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 200
+        assert resp.json()["assigned"] == 2
+
+        # 重复加入不会重置进度
+        resp = await async_client.post(
+            "/api/exam/vocabulary/assign",
+            json={"student_ids": [test_student.id], "level": "中考"},
+            headers=auth_headers,
+        )
+        assert resp.json()["assigned"] == 0
+
+        student_headers = await _student_headers(db, test_student)
+        due = await async_client.get("/api/exam/vocabulary/my/due?limit=10", headers=student_headers)
+        assert due.status_code == 200
+        assert [card["word"] for card in due.json()["items"]] == ["apple", "banana"]
+
+        reviewed_at = datetime.now().replace(microsecond=0)
+        batch = {"reviews": [
+            {"vocabulary_id": words[0].id, "quality": 5, "reviewed_at": reviewed_at.isoformat()},
+            {"vocabulary_id": words[1].id, "quality": 1, "reviewed_at": reviewed_at.isoformat()},
+            {"vocabulary_id": words[2].id, "quality": 4, "reviewed_at": reviewed_at.isoformat()},
+        ]}
+        resp = await async_client.post(
+            "/api/exam/vocabulary/my/reviews", json=batch, headers=student_headers
+        )
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["applied"] == 3
+        assert all(item["due_date"] == str(reviewed_at.date() + timedelta(days=1)) for item in data["items"])
+
+        # 离线重传同一批结果是幂等的
+        resp = await async_client.post(
+            "/api/exam/vocabulary/my/reviews", json=batch, headers=student_headers
+        )
+        assert resp.json()["applied"] == 0
+        assert resp.json()["skipped"] == 3
+
+        result = await db.execute(
+            select(VocabularyReview).where(VocabularyReview.student_id == test_student.id)
+        )
+        assert len(result.scalars().all()) == 3
+
+        due = await async_client.get("/api/exam/vocabulary/my/due", headers=student_headers)
+        assert due.json()["items"] == []
+
+    async def test_review_rejects_invalid_quality(
+        self,
+        async_client: AsyncClient,
+        db: AsyncSession,
+        test_student: Student,
+    ):
+        student_headers = await _student_headers(db, test_student)
+        resp = await async_client.post(
+            "/api/exam/vocabulary/my/reviews",
+            json={"reviews": [{"vocabulary_id": 1, "quality": 9, "reviewed_at": "2026-05-01T08:00:00"}]},
+            headers=student_headers,
+        )
+        assert resp.status_code == 400
+        assert resp.json()["detail"]["code"] == "INVALID_QUALITY"
+
+
+    async def test_concurrent_first_review_does_not_conflict(
+        self,
+        db: AsyncSession,
+        test_student: Student,
+    ):
+        """两次同步同时把同一张卡片判定为新增：后写入的一方不报唯一约束错误，保留复习时间更晚的状态"""
+        words = [
+            Vocabulary(subject="english", word="apple", meaning="苹果"),
+            Vocabulary(subject="english", word="banana", meaning="香蕉"),
+        ]
+        db.add_all(words)
+        await db.flush()
+        newer_id, older_id = words[0].id, words[1].id
+        reviewed_at = datetime.now().replace(microsecond=0)
+
+        # 本次同步读到的状态：两张卡片都还不在复习计划中
+        states = await _load_review_states(db, test_student.id, {newer_id, older_id})
+        assert all(state["id"] is None for state in states.values())
+        for state in states.values():
+            state.update(schedule_review(2.5, 0, 0, 0, 1, reviewed_at.date()))
+            state["last_quality"] = 1
+            state["last_reviewed_at"] = reviewed_at
+
+        # 读取之后、写入之前，另一路同步已插入这两张卡片（一张复习时间更晚，一张更早）
+        for vocab_id, offset in ((newer_id, timedelta(hours=1)), (older_id, -timedelta(hours=1))):
+            db.add(VocabularyReview(
+                student_id=test_student.id, vocabulary_id=vocab_id, interval_days=9,
+                due_date=date.today(), last_quality=5, last_reviewed_at=reviewed_at + offset,
+            ))
+        await db.flush()
+
+        await _save_review_states(db, test_student.id, states, {newer_id, older_id})
+        await db.commit()
+
+        result = await db.execute(
+            select(VocabularyReview.vocabulary_id, VocabularyReview.interval_days)
+            .where(VocabularyReview.student_id == test_student.id)
+        )
+        assert dict(result.all()) == {newer_id: 9, older_id: 1}
+
+
+class TestVocabularyImport:
+    """词表批量导入与前缀自动补全"""
+
+    async def test_create_duplicate_word_returns_conflict(
+        self,
+        async_client: AsyncClient,
+        auth_headers: dict,
+    ):
+        payload = {"word": "apple", "meaning": "苹果"}
+        resp = await async_client.post("/api/exam/vocabulary", json=payload, headers=auth_headers)
+        assert resp.status_code == 201
+        resp = await async_client.post("/api/exam/vocabulary", json=payload, headers=auth_headers)
+        assert resp.status_code == 409
+        assert resp.json()["detail"]["code"] == "DUPLICATE_WORD"
+
+    async def test_bulk_import_upserts_word_list(
+        self,
+        async_client: AsyncClient,
+        auth_headers: dict,
+        db: AsyncSession,
+    ):
+        db.add(Vocabulary(subject="english", word="able", meaning="旧释义", phonetic="/ˈeɪbl/"))
+        await db.flush()
+
+        words = [{"word": f"word{i:04d}", "meaning": f"释义{i}"} for i in range(1200)]
+        words += [
+            {"word": "able", "meaning": "能够的"},
+            {"word": "about", "meaning": "关于"},
+            {"word": "about", "meaning": "大约"},
+        ]
+        resp = await async_client.post(
+            "/api/exam/vocabulary/bulk",
+            json={"subject": "english", "level": "中考", "words": words},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 200
+        assert resp.json() == {
+            "total": 1203,
+            "inserted": 1201,
+            "updated": 1,
+            "skipped": 0,
+            "duplicates_in_payload": 1,
+        }
+
+        result = await db.execute(
+            select(Vocabulary).where(Vocabulary.word.in_(["able", "about"])).order_by(Vocabulary.word)
+        )
+        able, about = result.scalars().all()
+        await db.refresh(able)
+        await db.refresh(about)
+        assert able.meaning == "能够的"
+        # 导入数据未提供的字段保留原值
+        assert able.phonetic == "/ˈeɪbl/"
+        assert about.meaning == "大约"
+        assert about.level == "中考"
+
+        resp = await async_client.post(
+            "/api/exam/vocabulary/bulk",
+            json={"overwrite": False, "words": [{"word": "able", "meaning": "不应覆盖"}]},
+            headers=auth_headers,
+        )
+        assert resp.json()["skipped"] == 1
+
+    async def test_autocomplete_uses_prefix_index_and_trie_cache(
+        self,
+        async_client: AsyncClient,
+        auth_headers: dict,
+    ):
+        words = [
+            {"word": "apple", "meaning": "苹果", "level": "中考"},
+            {"word": "apply", "meaning": "申请", "level": "中考"},
+            {"word": "banana", "meaning": "香蕉", "level": "中考"},
+            {"word": "appetite", "meaning": "胃口", "level": "四级"},
+            {"word": "100%_sure", "meaning": "确定", "level": "四级"},
+        ]
+        await async_client.post(
+            "/api/exam/vocabulary/bulk", json={"words": words}, headers=auth_headers
+        )
+
+        resp = await async_client.get(
+            "/api/exam/vocabulary/autocomplete?prefix=App", headers=auth_headers
+        )
+        assert resp.status_code == 200
+        assert [s["word"] for s in resp.json()] == ["appetite", "apple", "apply"]
+
+        # LIKE 通配符按字面匹配
+        resp = await async_client.get(
+            "/api/exam/vocabulary/autocomplete?prefix=100%25_", headers=auth_headers
+        )
+        assert [s["word"] for s in resp.json()] == ["100%_sure"]
+
+        # 热门等级走内存前缀树
+        resp = await async_client.get(
+            "/api/exam/vocabulary/autocomplete?prefix=app&level=中考&limit=1", headers=auth_headers
+        )
+        assert [s["word"] for s in resp.json()] == ["apple"]
+
+        # 新增词汇后缓存失效
+        await async_client.post(
+            "/api/exam/vocabulary",
+            json={"word": "appear", "meaning": "出现", "level": "中考"},
+            headers=auth_headers,
+        )
+        resp = await async_client.get(
+            "/api/exam/vocabulary/autocomplete?prefix=app&level=中考", headers=auth_headers
+        )
+        assert [s["word"] for s in resp.json()] == ["appear", "apple", "apply"]
+
+    async def test_autocomplete_case_insensitive_on_both_paths(
+        self,
+        async_client: AsyncClient,
+        auth_headers: dict,
+        db: AsyncSession,
+    ):
+        """大写开头的单词：内存前缀树与数据库前缀索引的匹配结果一致"""
+        words = [
+            {"word": "Monday", "meaning": "星期一", "level": "中考"},
+            {"word": "Monday", "meaning": "星期一", "level": "四级", "subject": "english_cet"},
+        ]
+        for word in words:
+            await async_client.post("/api/exam/vocabulary", json=word, headers=auth_headers)
+
+        # SQLite 的 LIKE 默认忽略 ASCII 大小写，切换为与 PostgreSQL 相同的区分大小写
+        await db.execute(text("PRAGMA case_sensitive_like = ON"))
+        try:
+            for query in (
+                "prefix=mon&level=中考",
+                "prefix=mon&level=四级&subject=english_cet",
+                "prefix=MON&subject=english_cet",
+            ):
+                resp = await async_client.get(f"/api/exam/vocabulary/autocomplete?{query}", headers=auth_headers)
+                assert [s["word"] for s in resp.json()] == ["Monday"], query
+        finally:
+            await db.execute(text("PRAGMA case_sensitive_like = OFF"))
+
+    async def test_list_search_is_case_insensitive_substring(
+        self,
+        async_client: AsyncClient,
+        auth_headers: dict,
+    ):
+        words = [{"word": "apple", "meaning": "苹果"}, {"word": "people", "meaning": "人们"}]
+        await async_client.post("/api/exam/vocabulary/bulk", json={"words": words}, headers=auth_headers)
+
+        for search, expected in (("APP", ["apple"]), ("ple", ["apple", "people"])):
+            resp = await async_client.get(
+                "/api/exam/vocabulary", params={"search": search}, headers=auth_headers
+            )
+            assert [item["word"] for item in resp.json()["items"]] == expected
+
+
+class TestAdaptiveSelection:
+    """能力估计与自适应组卷"""
+
+    def test_rating_moves_toward_outcome(self):
+        assert update_rating(1000, 0, 3, 1.0) > 1000
+        assert update_rating(1000, 0, 3, 0.0) < 1000
+        # 能力越强，目标难度越高
+        assert target_difficulty(1400, {}) > target_difficulty(900, {})
+
+    async def test_grading_updates_abilities_and_adaptive_exam_targets_difficulty(
+        self,
+        async_client: AsyncClient,
+        auth_headers: dict,
+        db: AsyncSession,
+        test_student: Student,
+    ):
+        exam, questions = await _create_exam(db, test_student)
+        await async_client.post(
+            f"/api/exam/mock-exams/{exam.id}/submit",
+            json={"answers": [
+                {"question_id": questions[0].id, "answer": "B"},
+                {"question_id": questions[1].id, "answer": "AC"},
+                {"question_id": questions[2].id, "answer": "went"},
+            ]},
+            headers=auth_headers,
+        )
+
+        resp = await async_client.get(
+            f"/api/exam/students/{test_student.id}/abilities?subject=英语",
+            headers=auth_headers,
+        )
+        assert resp.status_code == 200
+        data = resp.json()
+        items = {(i["dimension"], i["dimension_key"]): i for i in data["items"]}
+        # 作文未作答记 0 分，也计入能力估计
+        assert items[("overall", "")]["attempts"] == 4
+        assert items[("overall", "")]["correct"] == 3
+        assert items[("tag", "语法")]["attempts"] == 2
+        assert items[("tag", "语法")]["rating"] > 1000
+        assert items[("tag", "写作")]["rating"] < 1000
+        assert ("difficulty", "3") in items
+
+        bank = [
+            ExamQuestion(subject="英语", question_type="choice", content=f"难度{d}", answer="A", difficulty=d, tags=[])
+            for d in (1, 2, 3, 4, 5)
+        ]
+        db.add_all(bank)
+        await db.flush()
+
+        resp = await async_client.post(
+            "/api/exam/mock-exams",
+            json={
+                "student_id": test_student.id,
+                "title": "自适应练习",
+                "subject": "英语",
+                "question_count": 2,
+                "adaptive": True,
+            },
+            headers=auth_headers,
+        )
+        assert resp.status_code == 201
+        picked = resp.json()["questions"]
+        answered_ids = {q.id for q in questions}
+        assert all(q["id"] not in answered_ids for q in picked)
+        target = data["target_difficulty"]
+        assert picked[0]["difficulty"] == target
+
+    async def test_requeued_answer_counted_once(
+        self,
+        async_client: AsyncClient,
+        auth_headers: dict,
+        db: AsyncSession,
+        test_student: Student,
+    ):
+        """已自动批改并计入能力的作答因题型改为主观题重新人工批改时，不再重复计入"""
+        exam, questions = await _create_exam(db, test_student)
+        await async_client.post(
+            f"/api/exam/mock-exams/{exam.id}/submit",
+            json={"answers": [{"question_id": questions[0].id, "answer": "B"}]},
+            headers=auth_headers,
+        )
+        url = f"/api/exam/students/{test_student.id}/abilities?subject=英语"
+        before = (await async_client.get(url, headers=auth_headers)).json()["items"]
+
+        await async_client.put(
+            f"/api/exam/questions/{questions[0].id}", json={"question_type": "essay"}, headers=auth_headers
+        )
+        queue = (await async_client.get("/api/exam/grading-queue", headers=auth_headers)).json()
+        resp = await async_client.patch(
+            f"/api/exam/answers/{queue['items'][0]['answer_id']}/grade",
+            json={"score": 20},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 200
+
+        after = (await async_client.get(url, headers=auth_headers)).json()["items"]
+        assert after == before
+
+    async def test_target_success_rate_must_be_open_interval(
+        self, async_client: AsyncClient, auth_headers: dict, test_student: Student
+    ):
+        for rate in (0, 1, 1.5):
+            resp = await async_client.post(
+                "/api/exam/mock-exams",
+                json={
+                    "student_id": test_student.id,
+                    "title": "自适应练习",
+                    "subject": "英语",
+                    "adaptive": True,
+                    "target_success_rate": rate,
+                },
+                headers=auth_headers,
+            )
+            assert resp.status_code == 422
@@ -0,0 +1,125 @@
+"""
+Prometheus 指标测试
+覆盖按路由模板的请求统计、请求内 SQL 统计、抓取 Token、缓存命中和定时任务运行统计
+"""
+import asyncio
+import re
+
+from httpx import AsyncClient
+
+from app.models.student import Student
+from app.utils.metrics import Counter, HistogramMetric
+from app.utils.scheduler import Scheduler
+
+
+async def _scrape(async_client: AsyncClient, **kwargs) -> str:
+    resp = await async_client.get("/metrics", **kwargs)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    return resp.text
+
+
+def _value(text: str, sample: str) -> float:
+    """取一条样本的值，如 'http_requests_total{method="GET",...}'"""
+    match = re.search(rf"^{re.escape(sample)} (\S+)$", text, re.MULTILINE)
+    assert match, f"缺少样本 {sample}"
+    return float(match.group(1))
+
+
+class TestRequestMetrics:
+    """请求指标"""
+
+    async def test_labels_use_route_template(
+        self, async_client: AsyncClient, auth_headers: dict, test_student: Student, test_student_2: Student
+    ):
+        for student in (test_student, test_student_2):
+            resp = await async_client.get(f"/api/students/{student.id}", headers=auth_headers)
+            assert resp.status_code == 200
+        assert (await async_client.get("/api/no-such-path/123")).status_code == 404
+
+        text = await _scrape(async_client)
+        route = "/api/students/{student_id}"
+        assert _value(text, f'http_requests_total{{method="GET",route="{route}",status="200"}}') == 2
+        assert _value(text, f'http_request_duration_seconds_count{{method="GET",route="{route}"}}') == 2
+        assert _value(text, f'http_request_duration_seconds_bucket{{method="GET",route="{route}",le="+Inf"}}') == 2
+        assert _value(text, 'http_requests_total{method="GET",route="unmatched",status="404"}') == 1
+        assert f"/api/students/{test_student.id}" not in text
+        # 抓取请求本身仍在进行中
+        assert _value(text, 'http_requests_in_progress{method="GET"}') == 1
+
+    async def test_db_queries_per_route(
+        self, async_client: AsyncClient, auth_headers: dict, test_student: Student
+    ):
+        resp = await async_client.get("/api/students", headers=auth_headers)
+        assert resp.status_code == 200
+
+        text = await _scrape(async_client)
+        assert _value(text, 'db_queries_total{route="/api/students"}') >= 1
+        assert _value(text, 'db_query_seconds_total{route="/api/students"}') > 0
+
+    async def test_pool_cache_and_job_sections(self, async_client: AsyncClient, auth_headers: dict):
+        resp = await async_client.get("/api/progress/grades/analytics", headers=auth_headers)
+        assert resp.status_code == 200
+
+        text = await _scrape(async_client)
+        assert "# TYPE db_pool_checkout_wait_seconds histogram" in text
+        assert _value(text, 'cache_misses_total{cache="grade_analytics"}') >= 1
+        assert "# TYPE background_job_lag_seconds gauge" in text
+
+
+class TestMetricsAccess:
+    """抓取访问控制"""
+
+    async def test_token_required_when_configured(self, async_client: AsyncClient, monkeypatch):
+        monkeypatch.setattr("app.config.settings.METRICS_TOKEN", "scrape-secret")
+        resp = await async_client.get("/metrics")
+        assert resp.status_code == 401
+        assert resp.json()["detail"]["code"] == "TOKEN_INVALID"
+        await _scrape(async_client, headers={"Authorization": "Bearer scrape-secret"})
+
+    async def test_disabled(self, async_client: AsyncClient, monkeypatch):
+        monkeypatch.setattr("app.config.settings.METRICS_ENABLED", False)
+        assert (await async_client.get("/metrics")).status_code == 404
+
+
+class TestMetricPrimitives:
+    """指标类型与文本格式"""
+
+    def test_label_escaping(self):
+        counter = Counter("demo_total", "示例", ("path",))
+        counter.inc(('a"b\\c',), 2)
+        assert counter.render()[-1] == 'demo_total{path="a\\"b\\\\c"} 2'
+
+    def test_histogram_is_cumulative(self):
+        histogram = HistogramMetric("demo_seconds", "示例", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5):
+            histogram.observe(("/x",), value)
+        lines = histogram.render()
+        assert 'demo_seconds_bucket{route="/x",le="0.1"} 1' in lines
+        assert 'demo_seconds_bucket{route="/x",le="1.0"} 2' in lines
+        assert 'demo_seconds_bucket{route="/x",le="+Inf"} 3' in lines
+        assert 'demo_seconds_count{route="/x"} 3' in lines
+
+
+class TestSchedulerStats:
+    """定时任务运行统计"""
+
+    async def test_success_and_failure_recorded(self, db):
+        async def ok(session):
+            return 1
+
+        async def broken(session):
+            raise RuntimeError("boom")
+
+        scheduler = Scheduler()
+        scheduler.add_job("ok", 3600, ok)
+        scheduler.add_job("broken", 3600, broken)
+        scheduler.start()
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+
+        jobs = {job.name: job for job in scheduler.jobs}
+        assert jobs["ok"].runs == 1
+        assert jobs["ok"].last_success_at is not None
+        assert jobs["broken"].failures == 1
+        assert jobs["broken"].last_success_at is None
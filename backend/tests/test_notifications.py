@@ -0,0 +1,644 @@
+"""
+通知模块测试
+覆盖微信推送发件箱：接口只写发件箱不等待外部调用，投递器按批发送、失败退避重试、
+租约到期后重新投递；微信接口由本地桩服务代替；课前 / 作业截止提醒定时任务；未读计数；按受众广播；键集分页与过期通知归档
+"""
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.assignment import Assignment, AssignmentStudent
+from app.models.course import Course
+from app.models.feedback import Feedback
+from app.models.notification import Notification, NotificationArchive
+from app.models.outbox import OutboxMessage
+from app.models.student import Student
+from app.models.user import User
+from app.utils.notification_archive import archive_notifications
+from app.utils.notification_counter import get_unread_count, rebuild_unread_counters
+from app.utils.outbox import AsyncTokenBucket, dispatch_outbox_batch
+from app.utils.reminders import generate_reminders
+from app.utils.scheduler import ScheduledJob, run_job_once
+from app.utils.wechat import (
+    close_http_client, get_wechat_access_token, invalidate_wechat_access_token, start_http_client,
+)
+
+
+# -----------------------------------------------
+# 本地微信桩服务
+# -----------------------------------------------
+
+class WechatStub:
+    """记录收到的订阅消息，并按预设脚本返回结果（脚本用完后一律成功）"""
+
+    def __init__(self):
+        self.sent: list[dict] = []
+        self.token_requests = 0
+        self.token_delay = 0.0
+        self.responses: list[tuple[int, dict]] = []
+        self.lock = threading.Lock()
+
+    def next_response(self) -> tuple[int, dict]:
+        with self.lock:
+            return self.responses.pop(0) if self.responses else (200, {"errcode": 0, "errmsg": "ok"})
+
+
+def _make_handler(stub: WechatStub):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status_code: int, body: dict) -> None:
+            data = json.dumps(body).encode()
+            self.send_response(status_code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if urlparse(self.path).path == "/cgi-bin/token":
+                with stub.lock:
+                    stub.token_requests += 1
+                    token = f"stub-token-{stub.token_requests}"
+                time.sleep(stub.token_delay)
+                self._reply(200, {"access_token": token, "expires_in": 7200})
+            else:
+                self._reply(404, {})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            status_code, response = stub.next_response()
+            if status_code == 200 and response.get("errcode") == 0:
+                stub.sent.append({"query": parse_qs(url.query), "body": body})
+            self._reply(status_code, response)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+@pytest.fixture
+def wechat_stub(monkeypatch):
+    stub = WechatStub()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(stub))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(settings, "WECHAT_API_BASE_URL", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(settings, "WECHAT_APP_ID", "wx-test")
+    monkeypatch.setattr(settings, "WECHAT_APP_SECRET", "secret")
+    monkeypatch.setattr(settings, "WECHAT_NOTIFY_TEMPLATE_ID", "tpl-notify")
+    invalidate_wechat_access_token()
+    yield stub
+    invalidate_wechat_access_token()
+    server.shutdown()
+    server.server_close()
+
+
+async def _wechat_user(db: AsyncSession, username: str, openid: str | None) -> User:
+    user = User(username=username, role="student", display_name=username, openid=openid, is_active=True)
+    db.add(user)
+    await db.flush()
+    return user
+
+
+async def _send(async_client: AsyncClient, auth_headers: dict, user_ids: list[int]) -> dict:
+    resp = await async_client.post(
+        "/api/notifications/send",
+        json={"user_ids": user_ids, "title": "明天上课提醒", "content": "明天 10:00 数学课", "send_wechat": True},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 200
+    return resp.json()
+
+
+async def _notifications(db: AsyncSession) -> list[Notification]:
+    result = await db.execute(
+        select(Notification).order_by(Notification.id).execution_options(populate_existing=True)
+    )
+    return list(result.scalars().all())
+
+
+async def _outbox(db: AsyncSession) -> list[OutboxMessage]:
+    result = await db.execute(
+        select(OutboxMessage).order_by(OutboxMessage.id).execution_options(populate_existing=True)
+    )
+    return list(result.scalars().all())
+
+
+class TestWechatOutbox:
+    """微信推送发件箱"""
+
+    async def test_send_enqueues_without_calling_wechat(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession, wechat_stub: WechatStub
+    ):
+        user = await _wechat_user(db, "stu_wx", "openid-1")
+        data = await _send(async_client, auth_headers, [user.id])
+        assert data["wechat_queued"] == 1
+
+        # 接口返回时尚未调用微信
+        assert wechat_stub.sent == []
+        [notification] = await _notifications(db)
+        assert notification.wx_push_status == "pending"
+        [message] = await _outbox(db)
+        assert message.notification_id == notification.id
+        assert message.status == "pending"
+
+        assert await dispatch_outbox_batch(db) == 1
+        assert len(wechat_stub.sent) == 1
+        sent = wechat_stub.sent[0]
+        assert sent["query"]["access_token"] == ["stub-token-1"]
+        assert sent["body"]["touser"] == "openid-1"
+        assert sent["body"]["template_id"] == "tpl-notify"
+        assert sent["body"]["data"]["thing1"]["value"] == "明天上课提醒"
+
+        [notification] = await _notifications(db)
+        assert notification.wx_push_status == "sent"
+        assert notification.wx_push_at is not None
+        [message] = await _outbox(db)
+        assert (message.status, message.attempts, message.locked_until) == ("sent", 1, None)
+
+        # 已投递的消息不会重复发送
+        assert await dispatch_outbox_batch(db) == 0
+
+    async def test_retry_with_backoff_then_permanent_failure(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession, wechat_stub: WechatStub
+    ):
+        ok_user = await _wechat_user(db, "stu_ok", "openid-ok")
+        refused_user = await _wechat_user(db, "stu_refused", "openid-refused")
+        await _send(async_client, auth_headers, [ok_user.id, refused_user.id])
+
+        wechat_stub.responses = [(503, {}), (503, {})]
+        assert await dispatch_outbox_batch(db) == 2
+        messages = await _outbox(db)
+        assert all(m.status == "pending" and m.attempts == 1 for m in messages)
+        assert all(m.next_attempt_at > datetime.utcnow() for m in messages)
+        assert all("503" in m.last_error for m in messages)
+        # 退避期内不会再次领取
+        assert await dispatch_outbox_batch(db) == 0
+
+        for m in messages:
+            m.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        await db.commit()
+        wechat_stub.responses = [(200, {"errcode": 0}), (200, {"errcode": 43101, "errmsg": "user refuse"})]
+        assert await dispatch_outbox_batch(db) == 2
+
+        statuses = sorted((m.status, m.attempts) for m in await _outbox(db))
+        assert statuses == [("failed", 2), ("sent", 2)]
+        assert sorted(n.wx_push_status for n in await _notifications(db)) == ["failed", "sent"]
+
+    async def test_max_attempts_marks_failed(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession,
+        wechat_stub: WechatStub, monkeypatch,
+    ):
+        monkeypatch.setattr(settings, "OUTBOX_MAX_ATTEMPTS", 1)
+        user = await _wechat_user(db, "stu_wx", "openid-1")
+        await _send(async_client, auth_headers, [user.id])
+
+        wechat_stub.responses = [(200, {"errcode": -1, "errmsg": "system busy"})]
+        await dispatch_outbox_batch(db)
+        [message] = await _outbox(db)
+        assert message.status == "failed"
+        [notification] = await _notifications(db)
+        assert notification.wx_push_status == "failed"
+
+    async def test_user_without_openid_skipped(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession, wechat_stub: WechatStub
+    ):
+        user = await _wechat_user(db, "web_only", None)
+        await _send(async_client, auth_headers, [user.id])
+        await dispatch_outbox_batch(db)
+
+        assert wechat_stub.sent == []
+        [notification] = await _notifications(db)
+        assert notification.wx_push_status == "skipped"
+
+    async def test_expired_lease_is_redelivered(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession, wechat_stub: WechatStub
+    ):
+        """投递进程在领取后崩溃：租约未到期不重复领取，到期后由新进程接管"""
+        user = await _wechat_user(db, "stu_wx", "openid-1")
+        await _send(async_client, auth_headers, [user.id])
+        [message] = await _outbox(db)
+        message.locked_until = datetime.utcnow() + timedelta(minutes=1)
+        await db.commit()
+        assert await dispatch_outbox_batch(db) == 0
+
+        message.locked_until = datetime.utcnow() - timedelta(seconds=1)
+        await db.commit()
+        assert await dispatch_outbox_batch(db) == 1
+        assert len(wechat_stub.sent) == 1
+
+    async def test_push_feedback_enqueues_for_student_and_parent(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession,
+        test_student: Student, wechat_stub: WechatStub,
+    ):
+        student_user = await _wechat_user(db, "stu_wx", "openid-student")
+        parent_user = await _wechat_user(db, "parent_wx", "openid-parent")
+        test_student.user_id = student_user.id
+        test_student.parent_user_id = parent_user.id
+        feedback = Feedback(student_id=test_student.id, performance="课堂专注，函数题掌握较好")
+        db.add(feedback)
+        await db.flush()
+
+        resp = await async_client.post(f"/api/feedback/{feedback.id}/push", headers=auth_headers)
+        assert resp.status_code == 200
+        assert wechat_stub.sent == []
+
+        notifications = await _notifications(db)
+        assert sorted(n.user_id for n in notifications) == sorted([student_user.id, parent_user.id])
+        assert all(n.type == "feedback_push" and n.related_id == feedback.id for n in notifications)
+
+        # 重复推送（双击、客户端重试）不再发送
+        again = await async_client.post(f"/api/feedback/{feedback.id}/push", headers=auth_headers)
+        assert again.status_code == 200
+        assert again.json()["pushed_at"] == resp.json()["pushed_at"]
+        assert len(await _notifications(db)) == 2
+
+        assert await dispatch_outbox_batch(db) == 2
+        assert sorted(s["body"]["touser"] for s in wechat_stub.sent) == ["openid-parent", "openid-student"]
+        assert all(
+            s["body"]["page"] == f"pages/feedback-detail/feedback-detail?id={feedback.id}"
+            for s in wechat_stub.sent
+        )
+
+
+class TestWechatClient:
+    """共享 HTTP 客户端与 access_token 缓存"""
+
+    async def test_token_cached_across_batches(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession, wechat_stub: WechatStub
+    ):
+        user = await _wechat_user(db, "stu_wx", "openid-1")
+        await _send(async_client, auth_headers, [user.id])
+        await dispatch_outbox_batch(db)
+        await _send(async_client, auth_headers, [user.id])
+        await dispatch_outbox_batch(db)
+
+        assert len(wechat_stub.sent) == 2
+        assert wechat_stub.token_requests == 1
+
+    async def test_concurrent_refresh_is_single_flight(self, wechat_stub: WechatStub):
+        wechat_stub.token_delay = 0.1
+        start_http_client()
+        try:
+            tokens = await asyncio.gather(*(get_wechat_access_token() for _ in range(10)))
+        finally:
+            await close_http_client()
+        assert set(tokens) == {"stub-token-1"}
+        assert wechat_stub.token_requests == 1
+
+    async def test_expired_token_refreshed_on_retry(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession, wechat_stub: WechatStub
+    ):
+        user = await _wechat_user(db, "stu_wx", "openid-1")
+        await _send(async_client, auth_headers, [user.id])
+
+        wechat_stub.responses = [(200, {"errcode": 42001, "errmsg": "access_token expired"})]
+        await dispatch_outbox_batch(db)
+        [message] = await _outbox(db)
+        assert message.status == "pending"
+
+        message.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        await db.commit()
+        await dispatch_outbox_batch(db)
+        assert wechat_stub.token_requests == 2
+        assert wechat_stub.sent[0]["query"]["access_token"] == ["stub-token-2"]
+
+
+class TestTokenBucket:
+    """令牌桶限流"""
+
+    async def test_rate_limited(self):
+        bucket = AsyncTokenBucket(rate=50, capacity=1)
+        start = time.monotonic()
+        for _ in range(6):
+            await bucket.acquire()
+        # 首个令牌立即可用，其余 5 个按 50/s 补充
+        assert time.monotonic() - start >= 0.09
+
+
+class TestReminders:
+    """课前 / 作业截止提醒"""
+
+    NOW = datetime(2026, 3, 2, 9, 0)
+
+    async def _setup(self, db: AsyncSession, test_student: Student) -> tuple[User, User]:
+        student_user = await _wechat_user(db, "stu_remind", "openid-s")
+        parent_user = await _wechat_user(db, "parent_remind", None)
+        test_student.user_id = student_user.id
+        test_student.parent_user_id = parent_user.id
+        await db.flush()
+        return student_user, parent_user
+
+    def _course(self, student: Student, start: datetime, status: str = "scheduled") -> Course:
+        return Course(
+            student_id=student.id, subject="数学", start_time=start,
+            end_time=start + timedelta(hours=1), duration=60, status=status, location="线上",
+        )
+
+    async def test_course_reminder_within_window(self, db: AsyncSession, test_student: Student):
+        student_user, parent_user = await self._setup(db, test_student)
+        db.add_all([
+            self._course(test_student, self.NOW + timedelta(hours=1)),
+            self._course(test_student, self.NOW + timedelta(hours=5)),
+            self._course(test_student, self.NOW + timedelta(minutes=30), status="cancelled"),
+            self._course(test_student, self.NOW - timedelta(minutes=10)),
+        ])
+        await db.flush()
+
+        assert await generate_reminders(db, now=self.NOW) == 2
+        notifications = await _notifications(db)
+        assert {n.user_id for n in notifications} == {student_user.id, parent_user.id}
+        assert all(n.type == "course_reminder" and n.related_type == "course" for n in notifications)
+        assert "03-02 10:00" in notifications[0].content
+        assert len(await _outbox(db)) == 2
+
+    async def test_rerun_does_not_duplicate(self, db: AsyncSession, test_student: Student):
+        await self._setup(db, test_student)
+        db.add(self._course(test_student, self.NOW + timedelta(hours=1)))
+        await db.flush()
+
+        assert await generate_reminders(db, now=self.NOW) == 2
+        assert await generate_reminders(db, now=self.NOW + timedelta(minutes=1)) == 0
+        assert len(await _notifications(db)) == 2
+        assert len(await _outbox(db)) == 2
+
+    async def test_assignment_reminder_pending_only(
+        self, db: AsyncSession, test_student: Student, test_student_2: Student
+    ):
+        student_user, parent_user = await self._setup(db, test_student)
+        other_user = await _wechat_user(db, "stu_remind_2", None)
+        test_student_2.user_id = other_user.id
+        today = self.NOW.date()
+        due_soon = Assignment(title="练习册第三章", content="完成习题", subject="数学", due_date=today + timedelta(days=1))
+        due_later = Assignment(title="作文", content="写一篇作文", subject="语文", due_date=today + timedelta(days=5))
+        db.add_all([due_soon, due_later])
+        await db.flush()
+        db.add_all([
+            AssignmentStudent(assignment_id=due_soon.id, student_id=test_student.id, status="pending"),
+            AssignmentStudent(assignment_id=due_soon.id, student_id=test_student_2.id, status="submitted"),
+            AssignmentStudent(assignment_id=due_later.id, student_id=test_student.id, status="pending"),
+        ])
+        await db.flush()
+
+        assert await generate_reminders(db, now=self.NOW) == 2
+        notifications = await _notifications(db)
+        assert {n.user_id for n in notifications} == {student_user.id, parent_user.id}
+        assert all(n.type == "assignment_reminder" and n.related_id == due_soon.id for n in notifications)
+
+    async def test_manual_notification_not_deduplicated(self, db: AsyncSession, test_student: Student):
+        """去重索引只约束提醒类通知"""
+        student_user, _ = await self._setup(db, test_student)
+        db.add_all([
+            Notification(user_id=student_user.id, title="公告", content="放假", type="system", related_id=1),
+            Notification(user_id=student_user.id, title="公告", content="放假", type="system", related_id=1),
+        ])
+        await db.flush()
+        assert len(await _notifications(db)) == 2
+
+    async def test_run_job_once_commits(self, db: AsyncSession, test_student: Student):
+        await self._setup(db, test_student)
+        db.add(self._course(test_student, self.NOW + timedelta(hours=1)))
+        await db.commit()
+
+        job = ScheduledJob(name="reminders", interval=60, func=lambda s: generate_reminders(s, now=self.NOW))
+        assert await run_job_once(job) == 2
+        assert len(await _notifications(db)) == 2
+
+
+class TestUnreadCounter:
+    """未读通知计数"""
+
+    async def _unread(self, async_client: AsyncClient, auth_headers: dict) -> int:
+        resp = await async_client.get("/api/notifications/unread-count", headers=auth_headers)
+        assert resp.status_code == 200
+        return resp.json()["count"]
+
+    async def test_counter_follows_create_and_read(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession, admin_user: User
+    ):
+        other = await _wechat_user(db, "stu_other", None)
+        await _send(async_client, auth_headers, [admin_user.id, other.id])
+        await _send(async_client, auth_headers, [admin_user.id])
+        assert await self._unread(async_client, auth_headers) == 2
+        assert await get_unread_count(db, other.id) == 1
+
+        first = (await _notifications(db))[0]
+        for _ in range(2):
+            resp = await async_client.patch(f"/api/notifications/{first.id}/read", headers=auth_headers)
+            assert resp.status_code == 200
+        assert await self._unread(async_client, auth_headers) == 1
+
+        resp = await async_client.patch("/api/notifications/read-all", headers=auth_headers)
+        assert resp.status_code == 200
+        assert await self._unread(async_client, auth_headers) == 0
+        assert await get_unread_count(db, other.id) == 1
+
+        resp = await async_client.get("/api/dashboard/overview", headers=auth_headers)
+        assert resp.json()["stats"]["unread_notifications"] == 0
+
+    async def test_rebuild_repairs_drift(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession, admin_user: User
+    ):
+        await _send(async_client, auth_headers, [admin_user.id])
+        # 绕过接口直接写入的通知不会累加计数
+        db.add_all([
+            Notification(user_id=admin_user.id, title="历史", content="历史通知", type="manual"),
+            Notification(user_id=admin_user.id, title="历史", content="已读", type="manual", is_read=True),
+        ])
+        await db.commit()
+        assert await self._unread(async_client, auth_headers) == 1
+
+        resp = await async_client.post("/api/notifications/unread-count/rebuild", headers=auth_headers)
+        assert resp.status_code == 200
+        assert resp.json()["users"] == 1
+        assert await self._unread(async_client, auth_headers) == 2
+
+    async def test_rebuild_zeroes_stale_counter(self, db: AsyncSession, admin_user: User):
+        notification = Notification(user_id=admin_user.id, title="t", content="c", type="manual")
+        db.add(notification)
+        await db.flush()
+        await rebuild_unread_counters(db)
+        assert await get_unread_count(db, admin_user.id) == 1
+
+        notification.is_read = True
+        await db.flush()
+        assert await rebuild_unread_counters(db, [admin_user.id]) == 0
+        assert await get_unread_count(db, admin_user.id) == 0
+
+
+class TestBroadcast:
+    """批量创建与按受众广播"""
+
+    async def _students_with_accounts(self, db: AsyncSession, count: int, grade: str) -> list[Student]:
+        students = []
+        for i in range(count):
+            student_user = await _wechat_user(db, f"stu_{grade}_{i}", None)
+            parent_user = User(username=f"par_{grade}_{i}", role="parent", display_name="家长", is_active=True)
+            db.add(parent_user)
+            await db.flush()
+            student = Student(
+                name=f"学生{grade}{i}", grade=grade, subjects=["数学"], is_active=True,
+                user_id=student_user.id, parent_user_id=parent_user.id,
+            )
+            db.add(student)
+            students.append(student)
+        await db.flush()
+        return students
+
+    async def _post(self, async_client: AsyncClient, auth_headers: dict, body: dict, path: str = ""):
+        payload = {"title": "停课通知", "content": "周六停课一天", **body}
+        return await async_client.post(f"/api/notifications{path}", json=payload, headers=auth_headers)
+
+    async def test_create_returns_rows_from_single_insert(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession, admin_user: User
+    ):
+        other = await _wechat_user(db, "stu_other", None)
+        await db.commit()
+
+        inserts = []
+
+        def count_inserts(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("INSERT INTO NOTIFICATIONS"):
+                inserts.append(statement)
+
+        sync_engine = db.get_bind()
+        event.listen(sync_engine, "before_cursor_execute", count_inserts)
+        try:
+            resp = await self._post(async_client, auth_headers, {"user_ids": [admin_user.id, other.id, other.id, 99999]})
+        finally:
+            event.remove(sync_engine, "before_cursor_execute", count_inserts)
+
+        assert resp.status_code == 201
+        items = resp.json()
+        assert len(inserts) == 1
+        assert sorted(n["user_id"] for n in items) == sorted([admin_user.id, other.id])
+        assert all(n["created_at"] and n["is_read"] is False for n in items)
+        assert items[0]["wx_push_status"] == "skipped"
+
+    async def test_audience_by_grade_and_target(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession
+    ):
+        seniors = await self._students_with_accounts(db, 3, "高一")
+        juniors = await self._students_with_accounts(db, 2, "初二")
+        seniors[0].is_active = False
+        await db.commit()
+
+        resp = await self._post(
+            async_client, auth_headers, {"audience": {"target": "parents", "grade": "高一"}}, "/send"
+        )
+        assert resp.status_code == 200
+        assert resp.json()["sent_count"] == 2
+        assert {n.user_id for n in await _notifications(db)} == {s.parent_user_id for s in seniors[1:]}
+
+        resp = await self._post(
+            async_client, auth_headers,
+            {"audience": {"target": "all"}, "user_ids": [juniors[0].user_id], "send_wechat": True}, "/send",
+        )
+        data = resp.json()
+        assert data["sent_count"] == 8
+        assert data["wechat_queued"] == 8
+        assert len(await _outbox(db)) == 8
+        assert await get_unread_count(db, juniors[0].user_id) == 1
+
+    async def test_audience_by_subject(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession
+    ):
+        """按科目筛选受众（Student.subjects 为数组，任一科目匹配即可）"""
+        students = await self._students_with_accounts(db, 3, "高二")
+        students[0].subjects = ["物理", "数学"]
+        students[1].subjects = ["英语"]
+        await db.commit()
+
+        resp = await self._post(
+            async_client, auth_headers, {"audience": {"target": "students", "subject": "数学"}}, "/send"
+        )
+        assert resp.status_code == 200
+        assert resp.json()["sent_count"] == 2
+        assert {n.user_id for n in await _notifications(db)} == {students[0].user_id, students[2].user_id}
+
+    async def test_invalid_requests(self, async_client: AsyncClient, auth_headers: dict):
+        resp = await self._post(async_client, auth_headers, {})
+        assert resp.status_code == 400
+        assert resp.json()["detail"]["code"] == "NO_RECIPIENTS"
+
+        resp = await self._post(async_client, auth_headers, {"audience": {"target": "teachers"}})
+        assert resp.status_code == 400
+        assert resp.json()["detail"]["code"] == "INVALID_AUDIENCE"
+
+
+class TestNotificationListAndArchive:
+    """键集分页与过期通知归档"""
+
+    NOW = datetime(2026, 6, 1, 12, 0)
+
+    async def _seed(self, db: AsyncSession, user: User, specs: list[tuple[int, bool]]) -> list[Notification]:
+        """specs: (距 NOW 的天数, 是否已读)"""
+        notifications = [
+            Notification(
+                user_id=user.id, title=f"通知{i}", content="内容", type="manual", is_read=is_read,
+                wx_push_status="skipped", created_at=self.NOW - timedelta(days=days),
+            )
+            for i, (days, is_read) in enumerate(specs)
+        ]
+        db.add_all(notifications)
+        await db.commit()
+        await rebuild_unread_counters(db)
+        await db.commit()
+        return notifications
+
+    async def test_keyset_pagination_walks_all_rows(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession, admin_user: User
+    ):
+        # 两条创建时间相同，按 id 区分先后
+        seeded = await self._seed(db, admin_user, [(5, False), (3, False), (3, True), (1, False), (0, True)])
+        expected = [n.id for n in sorted(seeded, key=lambda n: (n.created_at, n.id), reverse=True)]
+
+        resp = await async_client.get("/api/notifications?page_size=2", headers=auth_headers)
+        data = resp.json()
+        assert data["total"] == 5
+        seen = [item["id"] for item in data["items"]]
+        cursor = data["next_cursor"]
+        while cursor:
+            resp = await async_client.get(f"/api/notifications?page_size=2&cursor={cursor}", headers=auth_headers)
+            assert resp.status_code == 200
+            data = resp.json()
+            assert data["total"] is None
+            seen += [item["id"] for item in data["items"]]
+            cursor = data["next_cursor"]
+        assert seen == expected
+
+        resp = await async_client.get("/api/notifications?cursor=bad-cursor", headers=auth_headers)
+        assert resp.status_code == 400
+        assert resp.json()["detail"]["code"] == "INVALID_CURSOR"
+
+    async def test_archive_moves_expired_read_notifications_in_batches(
+        self, db: AsyncSession, admin_user: User, monkeypatch
+    ):
+        monkeypatch.setattr(settings, "NOTIFICATION_RETENTION_DAYS", 180)
+        monkeypatch.setattr(settings, "NOTIFICATION_ARCHIVE_BATCH_SIZE", 2)
+        monkeypatch.setattr(settings, "NOTIFICATION_ARCHIVE_UNREAD", False)
+        seeded = await self._seed(db, admin_user, [(400, True), (300, True), (200, True), (365, False), (10, True)])
+
+        assert await archive_notifications(db, now=self.NOW) == 3
+        remaining = {n.id for n in await _notifications(db)}
+        assert remaining == {seeded[3].id, seeded[4].id}
+        archived = (await db.execute(select(NotificationArchive).order_by(NotificationArchive.id))).scalars().all()
+        assert [a.id for a in archived] == [n.id for n in seeded[:3]]
+        assert archived[0].title == "通知0" and archived[0].archived_at is not None
+        assert await get_unread_count(db, admin_user.id) == 1
+
+        monkeypatch.setattr(settings, "NOTIFICATION_ARCHIVE_UNREAD", True)
+        assert await archive_notifications(db, now=self.NOW) == 1
+        assert await get_unread_count(db, admin_user.id) == 0
+        assert await archive_notifications(db, now=self.NOW) == 0
@@ -0,0 +1,745 @@
+"""
+学习进度模块测试
+覆盖学习报告的日期区间统计、已结束周期的报告快照与批量预生成，PDF 服务端渲染、群体成绩分析课程知识树与掌握热力图，以及成绩批量导入
+"""
+import base64
+import io
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional
+
+import numpy as np
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.assignment import Assignment, AssignmentStudent
+from app.models.course import Course
+from app.models.progress import Grade, KnowledgePoint, LearningReportSnapshot, StudentKnowledgeMastery
+from app.models.student import Student
+from app.utils.grade_analytics import GradeAnalyticsCache, cohort_grade_analytics, grade_analytics_cache
+from app.utils.mastery_heatmap import build_mastery_matrix, mastery_rates
+from app.utils.report_pdf import render_report_pdf
+
+
+# -----------------------------------------------
+# 辅助函数
+# -----------------------------------------------
+
+async def _seed_learning_data(db: AsyncSession, student: Student) -> None:
+    """为学生写入跨越 2026 年 1 月、2 月的课程、成绩、知识点与作业数据"""
+    db.add_all([
+        Course(
+            student_id=student.id, subject="数学", status="completed", duration=90,
+            start_time=datetime(2026, 1, 10, 10), end_time=datetime(2026, 1, 10, 11, 30),
+        ),
+        Course(
+            student_id=student.id, subject="数学", status="scheduled", duration=60,
+            start_time=datetime(2026, 1, 31, 23), end_time=datetime(2026, 2, 1, 0),
+        ),
+        Course(
+            student_id=student.id, subject="英语", status="completed", duration=120,
+            start_time=datetime(2026, 2, 5, 10), end_time=datetime(2026, 2, 5, 12),
+        ),
+        Grade(
+            student_id=student.id, subject="数学", exam_type="月考", exam_date=date(2026, 1, 15),
+            score=Decimal("90"), full_score=Decimal("100"),
+        ),
+        Grade(
+            student_id=student.id, subject="数学", exam_type="周测", exam_date=date(2026, 1, 25),
+            score=Decimal("60"), full_score=Decimal("75"),
+        ),
+        Grade(
+            student_id=student.id, subject="英语", exam_type="月考", exam_date=date(2026, 2, 15),
+            score=Decimal("120"), full_score=Decimal("150"),
+        ),
+        KnowledgePoint(student_id=student.id, subject="数学", point_name="一元二次方程", status="mastered"),
+        KnowledgePoint(student_id=student.id, subject="数学", point_name="二次函数", status="learning"),
+    ])
+    jan = Assignment(title="一月作业", content="练习", subject="数学", due_date=date(2026, 1, 20))
+    feb = Assignment(title="二月作业", content="练习", subject="数学", due_date=date(2026, 2, 20))
+    db.add_all([jan, feb])
+    await db.flush()
+    db.add_all([
+        AssignmentStudent(assignment_id=jan.id, student_id=student.id, status="graded", score=80),
+        AssignmentStudent(assignment_id=feb.id, student_id=student.id, status="pending"),
+    ])
+    await db.flush()
+
+
+class TestLearningReport:
+    """学习报告统计"""
+
+    async def test_report_honors_date_range(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession, test_student: Student
+    ):
+        """只统计区间内的课程、成绩和作业"""
+        await _seed_learning_data(db, test_student)
+
+        resp = await async_client.get(
+            f"/api/progress/report/{test_student.id}",
+            params={"start_date": "2026-01-01", "end_date": "2026-01-31"},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["report_period"] == {"start": "2026-01-01", "end": "2026-01-31"}
+        assert data["course_summary"] == {"total": 2, "completed": 1, "total_hours": 1.5}
+        assert [g["exam_date"] for g in data["grade_trend"]] == ["2026-01-15", "2026-01-25"]
+        assert data["grade_summary"] == [{
+            "subject": "数学", "count": 2,
+            "avg_percentage": 85.0, "max_percentage": 90.0, "min_percentage": 80.0,
+        }]
+        assert data["knowledge_points"]["mastered"] == 1
+        assert data["knowledge_points"]["learning"] == 1
+        assert data["assignment_stats"] == {"total": 1, "submitted": 1, "avg_score": 80.0}
+
+    async def test_report_without_range_covers_all(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession, test_student: Student
+    ):
+        """不传日期时统计全部数据，起始日期取最早一节课"""
+        await _seed_learning_data(db, test_student)
+
+        resp = await async_client.get(f"/api/progress/report/{test_student.id}", headers=auth_headers)
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["report_period"]["start"] == "2026-01-10"
+        assert data["course_summary"]["total"] == 3
+        assert data["course_summary"]["total_hours"] == 3.5
+        assert len(data["grade_trend"]) == 3
+        assert data["assignment_stats"]["total"] == 2
+        assert data["snapshot_id"] is None
+
+    async def test_invalid_range_rejected(
+        self, async_client: AsyncClient, auth_headers: dict, test_student: Student
+    ):
+        resp = await async_client.get(
+            f"/api/progress/report/{test_student.id}",
+            params={"start_date": "2026-02-01", "end_date": "2026-01-01"},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 400
+        assert resp.json()["detail"]["code"] == "INVALID_DATE_RANGE"
+
+
+class TestReportSnapshots:
+    """已结束周期的报告快照"""
+
+    async def test_closed_period_served_from_snapshot(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession, test_student: Student
+    ):
+        """首次生成后保存快照，之后底层数据变化也返回同一份报告"""
+        await _seed_learning_data(db, test_student)
+        params = {"start_date": "2026-01-01", "end_date": "2026-01-31"}
+
+        first = await async_client.get(
+            f"/api/progress/report/{test_student.id}", params=params, headers=auth_headers
+        )
+        assert first.status_code == 200
+        assert first.json()["snapshot_id"] is not None
+
+        db.add(Grade(
+            student_id=test_student.id, subject="数学", exam_type="补考", exam_date=date(2026, 1, 28),
+            score=Decimal("10"), full_score=Decimal("100"),
+        ))
+        await db.flush()
+
+        second = await async_client.get(
+            f"/api/progress/report/{test_student.id}", params=params, headers=auth_headers
+        )
+        assert second.status_code == 200
+        assert second.json() == first.json()
+        assert len(second.json()["grade_trend"]) == 2
+
+        count = (await db.execute(select(func.count(LearningReportSnapshot.id)))).scalar()
+        assert count == 1
+
+    async def test_batch_inline_covers_roster(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession,
+        test_student: Student, test_student_2: Student,
+    ):
+        """同步批量生成覆盖全部在读学生，重复执行不会重复生成"""
+        await _seed_learning_data(db, test_student)
+        body = {"period_start": "2026-01-01", "period_end": "2026-01-31", "background": False}
+
+        resp = await async_client.post("/api/progress/reports/snapshots", json=body, headers=auth_headers)
+        assert resp.status_code == 200
+        assert resp.json()["students"] == 2
+        assert resp.json()["created"] == 2
+        assert resp.json()["scheduled"] is False
+
+        again = await async_client.post("/api/progress/reports/snapshots", json=body, headers=auth_headers)
+        assert again.json()["created"] == 0
+
+        snapshots = (await db.execute(
+            select(LearningReportSnapshot).order_by(LearningReportSnapshot.student_id)
+        )).scalars().all()
+        assert [s.student_id for s in snapshots] == [test_student.id, test_student_2.id]
+        assert snapshots[0].payload["course_summary"]["total"] == 2
+        assert snapshots[1].payload["course_summary"]["total"] == 0
+        assert all(len(s.content_hash) == 64 for s in snapshots)
+
+    async def test_batch_force_regenerates_changed_snapshots(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession,
+        test_student: Student, test_student_2: Student,
+    ):
+        """周期结束后补录成绩：force 重新生成，只覆盖内容有变化的快照"""
+        other_id = test_student_2.id
+        body = {"period_start": "2026-01-01", "period_end": "2026-01-31", "background": False}
+        resp = await async_client.post("/api/progress/reports/snapshots", json=body, headers=auth_headers)
+        assert resp.json()["created"] == 2
+        unchanged = (await db.execute(
+            select(LearningReportSnapshot).where(LearningReportSnapshot.student_id == other_id)
+        )).scalar_one()
+        unchanged_hash = unchanged.content_hash
+
+        db.add(Grade(
+            student_id=test_student.id, subject="数学", exam_type="月考", exam_date=date(2026, 1, 20),
+            score=Decimal("88"), full_score=Decimal("100"),
+        ))
+        await db.commit()
+
+        again = await async_client.post("/api/progress/reports/snapshots", json=body, headers=auth_headers)
+        assert again.json()["created"] == 0
+
+        forced = await async_client.post(
+            "/api/progress/reports/snapshots", json={**body, "force": True}, headers=auth_headers
+        )
+        assert forced.json()["created"] == 1
+
+        report = await async_client.get(
+            f"/api/progress/report/{test_student.id}",
+            params={"start_date": "2026-01-01", "end_date": "2026-01-31"},
+            headers=auth_headers,
+        )
+        assert [point["score"] for point in report.json()["grade_trend"]] == [88.0]
+        db.expire_all()
+        snapshots = (await db.execute(select(LearningReportSnapshot))).scalars().all()
+        assert len(snapshots) == 2
+        assert next(s for s in snapshots if s.student_id == other_id).content_hash == unchanged_hash
+
+    async def test_batch_rejects_open_period(
+        self, async_client: AsyncClient, auth_headers: dict, test_student: Student
+    ):
+        today = datetime.today().date()
+        resp = await async_client.post(
+            "/api/progress/reports/snapshots",
+            json={"period_start": str(today.replace(day=1)), "period_end": str(today)},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 400
+        assert resp.json()["detail"]["code"] == "PERIOD_NOT_CLOSED"
+
+    async def test_batch_background_scheduled(
+        self, async_client: AsyncClient, auth_headers: dict, test_student: Student
+    ):
+        """默认后台执行上个自然月"""
+        resp = await async_client.post("/api/progress/reports/snapshots", json={}, headers=auth_headers)
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["scheduled"] is True
+        assert data["period_start"].endswith("-01")
+
+
+class TestReportPdf:
+    """学习报告 PDF 服务端渲染"""
+
+    async def test_render_pdf_bytes(self):
+        """纯函数渲染：包含成绩趋势图与知识点表"""
+        payload = {
+            "student": {"name": "张小明", "grade": "初二"},
+            "report_period": {"start": "2026-01-01", "end": "2026-01-31"},
+            "course_summary": {"total": 2, "completed": 1, "total_hours": 1.5},
+            "grade_trend": [
+                {"subject": "数学", "exam_date": "2026-01-15", "percentage": 90.0},
+                {"subject": "英语", "exam_date": "2026-01-20", "percentage": 75.0},
+            ],
+            "grade_summary": [],
+            "knowledge_points": {
+                "mastered": 1, "learning": 0, "todo": 0,
+                "details": [{"id": 1, "subject": "数学", "chapter": None, "point_name": "勾股定理", "status": "mastered"}],
+            },
+            "assignment_stats": {"total": 0, "submitted": 0, "avg_score": 0},
+        }
+        data = render_report_pdf(payload)
+        assert data.startswith(b"%PDF")
+
+    async def test_render_pdf_escapes_markup(self):
+        """学生姓名、知识点名中的 < & 按文本渲染，不被当作标签解析"""
+        payload = {
+            "student": {"name": "<张&小明>", "grade": "初二<A班>"},
+            "report_period": {"start": "2026-01-01", "end": "2026-01-31"},
+            "course_summary": {"total": 0, "completed": 0, "total_hours": 0},
+            "grade_trend": [],
+            "grade_summary": [],
+            "knowledge_points": {
+                "mastered": 0, "learning": 1, "todo": 0,
+                "details": [{"id": 1, "subject": "数学", "chapter": "不等式", "point_name": "不等式 a<b 的性质 & 应用", "status": "learning"}],
+            },
+            "assignment_stats": {"total": 0, "submitted": 0, "avg_score": 0},
+        }
+        assert render_report_pdf(payload).startswith(b"%PDF")
+
+    async def test_pdf_endpoint_cached_by_snapshot_hash(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession,
+        test_student: Student, upload_dir, monkeypatch,
+    ):
+        """已结束周期的 PDF 按快照哈希缓存到磁盘，重复下载不重新渲染"""
+        await _seed_learning_data(db, test_student)
+        params = {"start_date": "2026-01-01", "end_date": "2026-01-31"}
+
+        resp = await async_client.get(
+            f"/api/progress/report/{test_student.id}/pdf", params=params, headers=auth_headers
+        )
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "application/pdf"
+        assert resp.content.startswith(b"%PDF")
+
+        snapshot = (await db.execute(select(LearningReportSnapshot))).scalar_one()
+        cached = upload_dir / "reports" / f"{snapshot.content_hash}.pdf"
+        assert cached.exists()
+
+        calls = []
+        monkeypatch.setattr(
+            "app.utils.report_pdf.render_report_pdf", lambda payload: calls.append(payload) or b""
+        )
+        again = await async_client.get(
+            f"/api/progress/report/{test_student.id}/pdf", params=params, headers=auth_headers
+        )
+        assert again.status_code == 200
+        assert again.content == resp.content
+        assert calls == []
+
+    async def test_batch_renders_roster_pdfs(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession,
+        test_student: Student, test_student_2: Student, upload_dir,
+    ):
+        body = {
+            "period_start": "2026-01-01", "period_end": "2026-01-31",
+            "background": False, "render_pdf": True,
+        }
+        resp = await async_client.post("/api/progress/reports/snapshots", json=body, headers=auth_headers)
+        assert resp.status_code == 200
+        assert resp.json()["rendered"] == 2
+        assert len(list((upload_dir / "reports").glob("*.pdf"))) == 2
+
+        again = await async_client.post("/api/progress/reports/snapshots", json=body, headers=auth_headers)
+        assert again.json()["rendered"] == 0
+
+
+def _columns(rows: list[tuple]) -> dict[str, list]:
+    """(student_id, grade_level, subject, exam_date, score, full_score) -> 列数据"""
+    return {
+        "student_id": [r[0] for r in rows],
+        "student_name": [f"学生{r[0]}" for r in rows],
+        "grade_level": [r[1] for r in rows],
+        "subject": [r[2] for r in rows],
+        "exam_date": [r[3] for r in rows],
+        "score": [r[4] for r in rows],
+        "full_score": [r[5] for r in rows],
+    }
+
+
+class TestGradeAnalyticsFunctions:
+    """群体成绩分析纯函数"""
+
+    def test_moving_average_slope_and_drop(self):
+        rows = [
+            (1, "初二", "数学", date(2026, 1, d), score, 100)
+            for d, score in [(1, 80), (8, 85), (15, 90), (22, 60)]
+        ] + [(1, "初二", "英语", date(2026, 1, 5), 120, 150)]
+        items = cohort_grade_analytics(_columns(rows), window=3, drop_threshold=15, include_points=True)
+
+        math, english = items
+        assert (math["subject"], english["subject"]) == ("数学", "英语")
+        assert math["exam_count"] == 4
+        assert math["moving_average"] == round((85 + 90 + 60) / 3, 1)
+        assert math["slope"] == -5.5
+        assert math["drop_alert"] is True
+        assert math["drop_dates"] == [date(2026, 1, 22)]
+        assert [p["drop"] for p in math["points"]] == [False, False, False, True]
+        # 窗口不跨科目
+        assert english["moving_average"] == 80.0
+        assert english["slope"] is None
+        assert english["drop_dates"] == []
+
+    def test_percentile_within_grade_level(self):
+        rows = [
+            (1, "初二", "数学", date(2026, 1, 1), 60, 100),
+            (2, "初二", "数学", date(2026, 1, 1), 80, 100),
+            (3, "初二", "数学", date(2026, 1, 1), 80, 100),
+            (4, "初二", "数学", date(2026, 1, 1), 95, 100),
+            (5, "高一", "数学", date(2026, 1, 1), 10, 100),
+        ]
+        items = cohort_grade_analytics(_columns(rows))
+        ranks = {item["student_id"]: item["percentile_rank"] for item in items}
+        assert ranks == {1: 12.5, 2: 50.0, 3: 50.0, 4: 87.5, 5: 50.0}
+
+    def test_empty(self):
+        assert cohort_grade_analytics(_columns([])) == []
+
+
+class TestGradeAnalyticsEndpoint:
+    """群体成绩分析接口与缓存"""
+
+    async def test_analytics_cached_until_grade_write(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession,
+        test_student: Student, test_student_2: Student,
+    ):
+        await _seed_learning_data(db, test_student)
+
+        resp = await async_client.get("/api/progress/grades/analytics", headers=auth_headers)
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["total"] == 2
+        assert {(i["student_name"], i["subject"]) for i in data["items"]} == {("张小明", "数学"), ("张小明", "英语")}
+
+        # 绕过接口直接写入的成绩不会出现在缓存结果中
+        db.add(Grade(
+            student_id=test_student_2.id, subject="数学", exam_type="月考", exam_date=date(2026, 1, 15),
+            score=Decimal("70"), full_score=Decimal("100"),
+        ))
+        await db.flush()
+        cached = await async_client.get("/api/progress/grades/analytics", headers=auth_headers)
+        assert cached.json()["total"] == 2
+
+        # 通过接口记录成绩后缓存失效
+        create = await async_client.post(
+            "/api/progress/grades",
+            json={
+                "student_id": test_student_2.id, "subject": "物理", "exam_type": "quiz",
+                "score": 88, "exam_date": "2026-01-20",
+            },
+            headers=auth_headers,
+        )
+        assert create.status_code == 201
+        fresh = await async_client.get(
+            "/api/progress/grades/analytics", params={"subject": "数学"}, headers=auth_headers
+        )
+        items = fresh.json()["items"]
+        assert [i["student_name"] for i in items] == ["张小明", "李小红"]
+        # 两名学生年级不同，各自是所在年级唯一的样本
+        assert all(i["percentile_rank"] == 50.0 for i in items)
+
+    async def test_threshold_quantized_in_cache_key(
+        self, async_client: AsyncClient, auth_headers: dict, test_student: Student
+    ):
+        for threshold in (15.01, 15.04, 14.96):
+            resp = await async_client.get(
+                "/api/progress/grades/analytics", params={"drop_threshold": threshold}, headers=auth_headers
+            )
+            assert resp.status_code == 200
+        assert grade_analytics_cache._results.stats()["size"] == 1
+
+    def test_cache_bounded_with_ttl(self, monkeypatch):
+        cache = GradeAnalyticsCache(max_size=2, ttl=60)
+        for key in ("a", "b", "c"):
+            cache.set((key,), [])
+        assert cache.get(("a",)) is None
+        assert cache.get(("c",)) == []
+
+        now = time.monotonic()
+        monkeypatch.setattr("app.utils.user_cache.time.monotonic", lambda: now + 61)
+        assert cache.get(("c",)) is None
+        assert (cache.hits, cache.misses) == (1, 2)
+
+
+async def _create_syllabus(async_client: AsyncClient, auth_headers: dict) -> dict:
+    """创建 数学 -> {函数: 一次函数/二次函数, 几何: 勾股定理} 的知识树，返回 名称 -> 节点"""
+    nodes = {}
+
+    async def create(name: str, parent: Optional[str] = None) -> None:
+        body = {"name": name}
+        if parent:
+            body["parent_id"] = nodes[parent]["id"]
+        else:
+            body["subject"] = name
+        resp = await async_client.post("/api/progress/curriculum/nodes", json=body, headers=auth_headers)
+        assert resp.status_code == 201, resp.text
+        nodes[name] = resp.json()
+
+    await create("数学")
+    await create("函数", "数学")
+    await create("一次函数", "函数")
+    await create("二次函数", "函数")
+    await create("几何", "数学")
+    await create("勾股定理", "几何")
+    return nodes
+
+
+class TestCurriculum:
+    """课程知识树、批量分配与章节汇总"""
+
+    async def test_tree_paths(self, async_client: AsyncClient, auth_headers: dict):
+        nodes = await _create_syllabus(async_client, auth_headers)
+        math, chapter, point = nodes["数学"], nodes["函数"], nodes["一次函数"]
+        assert math["node_type"] == "subject" and math["path"] == f"/{math['id']}/"
+        assert chapter["node_type"] == "chapter" and chapter["path"] == f"/{math['id']}/{chapter['id']}/"
+        assert point["node_type"] == "point" and point["subject"] == "数学"
+
+        resp = await async_client.post(
+            "/api/progress/curriculum/nodes",
+            json={"name": "子节点", "parent_id": point["id"]},
+            headers=auth_headers,
+        )
+        assert resp.json()["detail"]["code"] == "PARENT_IS_POINT"
+
+        tree = await async_client.get("/api/progress/curriculum/tree", headers=auth_headers)
+        roots = tree.json()["items"]
+        assert [r["name"] for r in roots] == ["数学"]
+        assert [c["name"] for c in roots[0]["children"]] == ["函数", "几何"]
+        assert [p["name"] for p in roots[0]["children"][0]["children"]] == ["一次函数", "二次函数"]
+
+    async def test_bulk_assign_status_and_rollup(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession,
+        test_student: Student, test_student_2: Student,
+    ):
+        nodes = await _create_syllabus(async_client, auth_headers)
+        student_ids = [test_student.id, test_student_2.id]
+
+        # 先分配一个章节，再分配整套大纲：已分配的知识点不重复
+        resp = await async_client.post(
+            "/api/progress/curriculum/assign",
+            json={"node_id": nodes["函数"]["id"], "student_ids": student_ids},
+            headers=auth_headers,
+        )
+        assert resp.json()["assigned"] == 4
+        resp = await async_client.post(
+            "/api/progress/curriculum/assign",
+            json={"node_id": nodes["数学"]["id"], "student_ids": student_ids},
+            headers=auth_headers,
+        )
+        assert resp.json()["assigned"] == 2
+        count = (await db.execute(select(func.count(StudentKnowledgeMastery.id)))).scalar()
+        assert count == 6
+
+        resp = await async_client.post(
+            "/api/progress/curriculum/mastery",
+            json={"items": [
+                {"student_id": test_student.id, "node_id": nodes["一次函数"]["id"], "status": "mastered"},
+                {"student_id": test_student.id, "node_id": nodes["二次函数"]["id"], "status": "learning"},
+                {"student_id": test_student_2.id, "node_id": nodes["勾股定理"]["id"], "status": "mastered"},
+            ]},
+            headers=auth_headers,
+        )
+        assert resp.json()["updated"] == 3
+
+        rollup = await async_client.get(
+            "/api/progress/curriculum/rollup", params={"student_id": test_student.id}, headers=auth_headers
+        )
+        items = {i["name"]: i for i in rollup.json()["items"]}
+        assert items["函数"] == {
+            "node_id": nodes["函数"]["id"], "name": "函数", "path": nodes["函数"]["path"],
+            "total": 2, "mastered": 1, "learning": 1, "todo": 0, "mastery_rate": 50.0,
+        }
+        assert items["几何"]["todo"] == 1
+
+        subtree = await async_client.get(
+            "/api/progress/curriculum/rollup",
+            params={"student_id": test_student_2.id, "node_id": nodes["几何"]["id"]},
+            headers=auth_headers,
+        )
+        assert [(i["name"], i["mastered"]) for i in subtree.json()["items"]] == [("几何", 1)]
+
+    async def test_bulk_mastery_validation(
+        self, async_client: AsyncClient, auth_headers: dict, test_student: Student
+    ):
+        nodes = await _create_syllabus(async_client, auth_headers)
+        resp = await async_client.post(
+            "/api/progress/curriculum/mastery",
+            json={"items": [{"student_id": test_student.id, "node_id": nodes["一次函数"]["id"], "status": "done"}]},
+            headers=auth_headers,
+        )
+        assert resp.json()["detail"]["code"] == "INVALID_STATUS"
+
+        resp = await async_client.post(
+            "/api/progress/curriculum/mastery",
+            json={"items": [{"student_id": test_student.id, "node_id": nodes["函数"]["id"], "status": "mastered"}]},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 404
+        assert resp.json()["detail"]["code"] == "NODE_NOT_FOUND"
+
+    async def test_mastery_heatmap(
+        self, async_client: AsyncClient, auth_headers: dict,
+        test_student: Student, test_student_2: Student,
+    ):
+        nodes = await _create_syllabus(async_client, auth_headers)
+        await async_client.post(
+            "/api/progress/curriculum/assign",
+            json={"node_id": nodes["数学"]["id"], "student_ids": [test_student.id]},
+            headers=auth_headers,
+        )
+        await async_client.post(
+            "/api/progress/curriculum/assign",
+            json={"node_id": nodes["函数"]["id"], "student_ids": [test_student_2.id]},
+            headers=auth_headers,
+        )
+        await async_client.post(
+            "/api/progress/curriculum/mastery",
+            json={"items": [
+                {"student_id": test_student.id, "node_id": nodes["一次函数"]["id"], "status": "mastered"},
+                {"student_id": test_student_2.id, "node_id": nodes["一次函数"]["id"], "status": "mastered"},
+                {"student_id": test_student_2.id, "node_id": nodes["二次函数"]["id"], "status": "learning"},
+            ]},
+            headers=auth_headers,
+        )
+
+        resp = await async_client.get(
+            "/api/progress/curriculum/heatmap", params={"subject": "数学"}, headers=auth_headers
+        )
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["student_ids"] == [test_student.id, test_student_2.id]
+        assert data["point_names"] == ["一次函数", "二次函数", "勾股定理"]
+        assert data["shape"] == [2, 3]
+        assert data["matrix"] == [2, 0, 0, 2, 1, -1]
+        assert data["point_assigned"] == [2, 2, 1]
+        assert data["point_mastery_rate"] == [100.0, 0.0, 0.0]
+        assert data["student_mastery_rate"] == [33.3, 50.0]
+
+        encoded = await async_client.get(
+            "/api/progress/curriculum/heatmap",
+            params={"subject": "数学", "encoding": "base64"},
+            headers=auth_headers,
+        )
+        raw = np.frombuffer(base64.b64decode(encoded.json()["matrix"]), dtype=np.int8)
+        assert raw.tolist() == data["matrix"]
+
+
+class TestMasteryHeatmapFunctions:
+    """热力图矩阵装配纯函数"""
+
+    def test_build_matrix_and_rates(self):
+        matrix = build_mastery_matrix(
+            [30, 10], [7, 5],
+            [(10, 5, "mastered"), (30, 7, "learning"), (10, 7, "todo"), (99, 5, "mastered")],
+        )
+        assert matrix.dtype == np.int8
+        assert matrix.tolist() == [[1, -1], [0, 2]]
+        assert mastery_rates(matrix, axis=0) == ([2, 1], [0.0, 100.0])
+        assert mastery_rates(np.full((1, 2), -1, dtype=np.int8), axis=1) == ([0], [None])
+
+
+class TestGradeImport:
+    """CSV / XLSX 成绩批量导入"""
+
+    async def test_csv_dry_run_then_import(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession,
+        test_student: Student, test_student_2: Student,
+    ):
+        content = (
+            "学生姓名,学生ID,分数,满分,备注\n"
+            f"张小明,,92,100,\n"
+            f",{test_student_2.id},118,150,进步明显\n"
+            "\n"
+        ).encode("utf-8-sig")
+        form = {"subject": "数学", "exam_type": "midterm", "exam_date": "2026-04-20", "dry_run": "true"}
+
+        resp = await async_client.post(
+            "/api/progress/grades/import",
+            files={"file": ("grades.csv", content, "text/csv")},
+            data=form,
+            headers=auth_headers,
+        )
+        assert resp.status_code == 200
+        assert resp.json() == {"dry_run": True, "total_rows": 2, "valid_rows": 2, "imported": 0, "errors": []}
+        assert (await db.execute(select(func.count(Grade.id)))).scalar() == 0
+
+        form["dry_run"] = "false"
+        resp = await async_client.post(
+            "/api/progress/grades/import",
+            files={"file": ("grades.csv", content, "text/csv")},
+            data=form,
+            headers=auth_headers,
+        )
+        assert resp.json()["imported"] == 2
+        grades = (await db.execute(select(Grade).order_by(Grade.student_id))).scalars().all()
+        assert [(g.student_id, float(g.score), float(g.full_score)) for g in grades] == [
+            (test_student.id, 92.0, 100.0), (test_student_2.id, 118.0, 150.0),
+        ]
+        assert grades[1].notes == "进步明显"
+        assert all(g.exam_date == date(2026, 4, 20) and g.subject == "数学" for g in grades)
+
+    async def test_row_errors_block_import(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession, test_student: Student
+    ):
+        content = (
+            "姓名,科目,考试类型,分数,考试日期\n"
+            "张小明,数学,quiz,88,2026/04/01\n"
+            "王五,数学,quiz,70,2026-04-01\n"
+            "张小明,数学,quiz,120,2026-04-01\n"
+            "张小明,数学,quiz,abc,昨天\n"
+        ).encode("gbk")
+        resp = await async_client.post(
+            "/api/progress/grades/import",
+            files={"file": ("grades.csv", content, "text/csv")},
+            headers=auth_headers,
+        )
+        data = resp.json()
+        assert data["imported"] == 0
+        assert data["valid_rows"] == 1
+        assert [e["row"] for e in data["errors"]] == [3, 4, 5]
+        assert "未找到学生" in data["errors"][0]["message"]
+        assert "超出" in data["errors"][1]["message"]
+        assert "分数无效" in data["errors"][2]["message"] and "考试日期无效" in data["errors"][2]["message"]
+        assert (await db.execute(select(func.count(Grade.id)))).scalar() == 0
+
+    async def test_invalid_numbers_and_long_text_are_row_errors(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession, test_student: Student
+    ):
+        """NaN 分数 / 满分、非整数学生ID、超长科目与考试名称按行报错，不导致整批 500"""
+        long_name = "期" * 201
+        content = (
+            "学生ID,科目,考试类型,考试名称,分数,满分,考试日期\n"
+            f"{test_student.id},数学,quiz,,NaN,100,2026-04-01\n"
+            f"{test_student.id},数学,quiz,,90,sNaN,2026-04-01\n"
+            f"{test_student.id}.5,数学,quiz,,90,100,2026-04-01\n"
+            f"{test_student.id},{'数' * 51},quiz,{long_name},90,100,2026-04-01\n"
+            f"{test_student.id}.0,数学,quiz,,90,Infinity,2026-04-01\n"
+        ).encode("utf-8")
+        resp = await async_client.post(
+            "/api/progress/grades/import",
+            files={"file": ("grades.csv", content, "text/csv")},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 200
+        errors = resp.json()["errors"]
+        assert [e["row"] for e in errors] == [2, 3, 4, 5, 6]
+        assert "分数无效" in errors[0]["message"]
+        assert "满分无效" in errors[1]["message"]
+        assert "学生ID无效" in errors[2]["message"]
+        assert "科目超过 50" in errors[3]["message"] and "考试名称超过 200" in errors[3]["message"]
+        assert "满分无效" in errors[4]["message"]
+        assert (await db.execute(select(func.count(Grade.id)))).scalar() == 0
+
+    async def test_xlsx_import(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession, test_student: Student
+    ):
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(["student_id", "subject", "exam_type", "exam_name", "score", "exam_date"])
+        sheet.append([test_student.id, "英语", "final", "期末考试", 95.5, datetime(2026, 6, 30)])
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+
+        resp = await async_client.post(
+            "/api/progress/grades/import",
+            files={"file": ("grades.xlsx", buffer.getvalue(), "application/octet-stream")},
+            headers=auth_headers,
+        )
+        assert resp.json()["imported"] == 1
+        grade = (await db.execute(select(Grade))).scalar_one()
+        assert (grade.exam_name, float(grade.score), grade.exam_date) == ("期末考试", 95.5, date(2026, 6, 30))
+
+    async def test_missing_columns_rejected(self, async_client: AsyncClient, auth_headers: dict):
+        resp = await async_client.post(
+            "/api/progress/grades/import",
+            files={"file": ("grades.csv", "姓名,分数\n张小明,90\n".encode(), "text/csv")},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 400
+        assert resp.json()["detail"]["code"] == "INVALID_SHEET"
@@ -0,0 +1,102 @@
+"""
+接口限流测试
+覆盖登录按 IP 限流、重接口按用户独立配额、429 / Retry-After 响应，以及令牌补充与后端故障放行
+"""
+import pytest
+from httpx import AsyncClient
+
+from app.models.user import User
+from app.utils import rate_limit
+from app.utils.auth import create_access_token
+from app.utils.rate_limit import MemoryRateLimitBackend, RateLimitRule, rate_limiter
+
+
+def _bearer(user_id: int, role: str = "admin") -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id), 'role': role})}"}
+
+
+class TestRateLimitMiddleware:
+    """中间件"""
+
+    async def test_login_limited_per_ip(self, async_client: AsyncClient, admin_user: User):
+        """登录按 IP 限流：超出突发配额后 429，附带 Retry-After，且在校验密码之前拒绝"""
+        rule = rate_limiter.match("POST", "/api/auth/login")
+        for _ in range(rule.burst):
+            resp = await async_client.post(
+                "/api/auth/login", json={"username": "admin", "password": "wrong"}
+            )
+            assert resp.status_code == 401
+
+        resp = await async_client.post(
+            "/api/auth/login", json={"username": "admin", "password": "admin123"}
+        )
+        assert resp.status_code == 429
+        assert resp.json()["detail"]["code"] == "RATE_LIMITED"
+        assert int(resp.headers["Retry-After"]) >= 1
+        assert rate_limiter.stats()["rejected"] == {"auth_login": 1}
+
+    async def test_budget_is_per_user(self, async_client: AsyncClient, admin_user: User, monkeypatch):
+        monkeypatch.setattr(rate_limiter, "rules", [
+            RateLimitRule("billing_summary", ("GET",), "/billing/summary", per_minute=1, burst=2),
+        ])
+        first, second = _bearer(admin_user.id), _bearer(admin_user.id + 1000)
+
+        for _ in range(2):
+            assert (await async_client.get("/api/billing/summary", headers=first)).status_code != 429
+        assert (await async_client.get("/api/billing/summary", headers=first)).status_code == 429
+        # 其他用户不受影响；未匹配规则的接口不限流
+        assert (await async_client.get("/api/billing/summary", headers=second)).status_code != 429
+        assert (await async_client.get("/api/auth/me", headers=first)).status_code == 200
+
+    async def test_disabled(self, async_client: AsyncClient, admin_user: User, monkeypatch):
+        monkeypatch.setattr("app.config.settings.RATE_LIMIT_ENABLED", False)
+        rule = rate_limiter.match("POST", "/api/auth/login")
+        for _ in range(rule.burst + 1):
+            resp = await async_client.post(
+                "/api/auth/login", json={"username": "admin", "password": "wrong"}
+            )
+            assert resp.status_code == 401
+
+    async def test_backend_failure_fails_open(
+        self, async_client: AsyncClient, auth_headers: dict, monkeypatch
+    ):
+        class BrokenBackend:
+            async def take(self, key, rate, capacity):
+                raise ConnectionError("redis down")
+
+            async def close(self):
+                pass
+
+        monkeypatch.setattr(rate_limiter, "backend", BrokenBackend())
+        resp = await async_client.get("/api/auth/me", headers=auth_headers)
+        assert resp.status_code == 200
+        assert rate_limiter.stats()["backend_errors"] == 1
+
+
+class TestTokenBucket:
+    """memory 后端"""
+
+    async def test_refill_and_retry_after(self, monkeypatch):
+        now = 1000.0
+        monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now)
+        backend = MemoryRateLimitBackend(max_keys=10)
+
+        assert await backend.take("k", rate=0.5, capacity=2) == 0
+        assert await backend.take("k", rate=0.5, capacity=2) == 0
+        assert await backend.take("k", rate=0.5, capacity=2) == pytest.approx(2.0)
+
+        now += 2
+        assert await backend.take("k", rate=0.5, capacity=2) == 0
+        assert await backend.take("k", rate=0.5, capacity=2) > 0
+
+    async def test_bounded_keys(self):
+        backend = MemoryRateLimitBackend(max_keys=2)
+        for key in ("a", "b", "c"):
+            await backend.take(key, rate=1, capacity=1)
+        assert list(backend._buckets) == ["b", "c"]
+
+    def test_route_templates(self):
+        assert rate_limiter.match("GET", "/api/progress/report/3/pdf").name == "report_pdf"
+        assert rate_limiter.match("GET", "/api/progress/report/3").name == "report"
+        assert rate_limiter.match("GET", "/api/students/3/billing-summary").name == "student_billing_summary"
+        assert rate_limiter.match("GET", "/api/students").name == "default"
@@ -0,0 +1,112 @@
+"""
+只读副本路由测试
+用第二个 SQLite 内存库充当副本：只读接口走副本，延迟超限回退主库，
+用户写入后短时间内固定读主库，以及只读接口中的快照写入仍落主库
+"""
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app import database
+from app.database import Base
+from app.models.progress import LearningReportSnapshot
+from app.models.student import Student
+from app.models.user import User
+from app.utils.auth import create_access_token, get_password_hash
+from app.utils.read_replica import replica_monitor, replica_stats
+
+
+@pytest_asyncio.fixture
+async def replica(monkeypatch):
+    """副本库的 Session 工厂（表结构与主库相同，数据独立）"""
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(database, "ReplicaSessionLocal", session_factory)
+    assert await replica_monitor.check()
+    yield session_factory
+    await engine.dispose()
+
+
+async def _replica_student(replica, **values) -> None:
+    async with replica() as session:
+        session.add(Student(grade="初三", subjects=["数学"], is_active=True, **values))
+        await session.commit()
+
+
+async def _student_names(async_client: AsyncClient, headers: dict) -> list[str]:
+    resp = await async_client.get("/api/students", headers=headers)
+    assert resp.status_code == 200
+    return [item["name"] for item in resp.json()["items"]]
+
+
+class TestReadReplicaRouting:
+    """get_read_db 路由"""
+
+    async def test_reads_served_by_replica(
+        self, async_client: AsyncClient, auth_headers: dict, test_student: Student, replica
+    ):
+        await _replica_student(replica, name="副本学生")
+        assert await _student_names(async_client, auth_headers) == ["副本学生"]
+
+    async def test_read_your_writes(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession, replica
+    ):
+        """写入后该用户读主库，其他用户仍读副本"""
+        await _replica_student(replica, name="副本学生")
+        resp = await async_client.post(
+            "/api/students", json={"name": "新学生", "grade": "初一", "subjects": ["英语"]},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 201
+        assert await _student_names(async_client, auth_headers) == ["新学生"]
+
+        other = User(
+            username="admin2", hashed_password=get_password_hash("x"), role="admin",
+            display_name="管理员2", is_active=True,
+        )
+        db.add(other)
+        await db.commit()
+        other_headers = {"Authorization": f"Bearer {create_access_token({'sub': str(other.id), 'role': 'admin'})}"}
+        assert await _student_names(async_client, other_headers) == ["副本学生"]
+        assert replica_stats()["sticky_users"] == 1
+
+    async def test_lagging_replica_falls_back_to_primary(
+        self, async_client: AsyncClient, auth_headers: dict, test_student: Student, replica, monkeypatch
+    ):
+        await _replica_student(replica, name="副本学生")
+        monkeypatch.setattr("app.config.settings.REPLICA_MAX_LAG_SECONDS", -1)
+        assert not await replica_monitor.check()
+
+        assert await _student_names(async_client, auth_headers) == ["张小明"]
+        assert replica_stats()["fallbacks"] == 1
+
+    async def test_report_snapshot_written_to_primary(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession,
+        test_student: Student, replica,
+    ):
+        """已结束周期的报告从主库生成（副本可能滞后），快照写入主库，且不把查看者标记为刚写入"""
+        await db.commit()
+        await _replica_student(replica, id=test_student.id, name="副本旧名")
+
+        resp = await async_client.get(
+            f"/api/progress/report/{test_student.id}",
+            params={"start_date": "2024-01-01", "end_date": "2024-01-31"},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 200
+        assert resp.json()["snapshot_id"] is not None
+        assert resp.json()["student"]["name"] == test_student.name
+
+        count = select(func.count()).select_from(LearningReportSnapshot)
+        assert (await db.execute(count)).scalar() == 1
+        async with replica() as session:
+            assert (await session.execute(count)).scalar() == 0
+        assert replica_stats()["sticky_users"] == 0
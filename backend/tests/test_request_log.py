@@ -0,0 +1,85 @@
+"""
+结构化请求日志测试
+覆盖 JSON 字段（request_id、路由模板、SQL 统计）、2xx 抽样、慢请求必记及单独写入慢请求日志文件
+"""
+import json
+import sys
+
+import pytest
+from httpx import AsyncClient
+from loguru import logger
+
+from app.models.student import Student
+from app.utils.request_log import _json_format, flush_logs, setup_logging
+
+
+@pytest.fixture
+def request_logs():
+    """捕获请求日志（JSON 行）"""
+    lines: list[str] = []
+    handler_id = logger.add(lines.append, format=_json_format, filter=lambda r: "route" in r["extra"])
+    yield lambda: [json.loads(line) for line in lines]
+    logger.remove(handler_id)
+
+
+class TestRequestLog:
+    """请求日志"""
+
+    async def test_structured_fields(
+        self, async_client: AsyncClient, auth_headers: dict, test_student: Student, request_logs
+    ):
+        resp = await async_client.get(f"/api/students/{test_student.id}", headers=auth_headers)
+        assert resp.status_code == 200
+
+        entry = request_logs()[-1]
+        assert entry["request_id"] == resp.headers["X-Request-Id"]
+        assert entry["route"] == "/api/students/{student_id}"
+        assert entry["path"] == f"/api/students/{test_student.id}"
+        assert entry["status"] == 200
+        assert entry["level"] == "INFO"
+        assert entry["db_queries"] >= 1
+        assert entry["db_ms"] >= 0
+        assert entry["slow"] is False
+
+    async def test_2xx_sampled_errors_always_logged(
+        self, async_client: AsyncClient, auth_headers: dict, request_logs, monkeypatch
+    ):
+        monkeypatch.setattr("app.config.settings.LOG_SAMPLE_RATE_2XX", 0.0)
+        assert (await async_client.get("/api/students", headers=auth_headers)).status_code == 200
+        assert (await async_client.get("/api/students/999999", headers=auth_headers)).status_code == 404
+
+        assert [entry["status"] for entry in request_logs()] == [404]
+
+    async def test_slow_requests_always_logged(
+        self, async_client: AsyncClient, auth_headers: dict, request_logs, monkeypatch
+    ):
+        monkeypatch.setattr("app.config.settings.LOG_SAMPLE_RATE_2XX", 0.0)
+        monkeypatch.setattr("app.config.settings.SLOW_REQUEST_MS", 0.0)
+        assert (await async_client.get("/api/students", headers=auth_headers)).status_code == 200
+
+        entry = request_logs()[-1]
+        assert entry["slow"] is True
+        assert entry["level"] == "WARNING"
+
+
+class TestLoggingSetup:
+    """sink 配置"""
+
+    async def test_slow_request_file(
+        self, async_client: AsyncClient, auth_headers: dict, tmp_path, monkeypatch
+    ):
+        log_file = tmp_path / "slow.log"
+        monkeypatch.setattr("app.config.settings.SLOW_REQUEST_LOG_FILE", str(log_file))
+        monkeypatch.setattr("app.config.settings.LOG_LEVEL", "ERROR")
+        setup_logging()
+        try:
+            assert (await async_client.get("/api/students", headers=auth_headers)).status_code == 200
+            monkeypatch.setattr("app.config.settings.SLOW_REQUEST_MS", 0.0)
+            assert (await async_client.get("/api/auth/me", headers=auth_headers)).status_code == 200
+            await flush_logs()
+        finally:
+            logger.remove()
+            logger.add(sys.stderr)
+
+        entries = [json.loads(line) for line in log_file.read_text(encoding="utf-8").splitlines()]
+        assert [entry["route"] for entry in entries] == ["/api/auth/me"]
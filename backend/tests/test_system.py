@@ -0,0 +1,197 @@
+"""
+系统模块测试
+覆盖已认证用户缓存：命中时不查询 users / students，用户或学生变更后失效，
+连接池配置与取连接等待统计、启动预热，以及 /system/stats
+"""
+import time
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app import database
+from app.models.student import Student
+from app.models.user import User
+from app.utils.auth import create_access_token
+from app.utils.db_pool import InstrumentedQueuePool, pool_stats, reset_pool_metrics
+from app.utils.user_cache import TTLCache, get_active_user, user_cache
+
+
+@pytest.fixture
+def statements(db: AsyncSession):
+    """记录测试期间执行的 SQL"""
+    executed: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    sync_engine = db.get_bind()
+    event.listen(sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(sync_engine, "before_cursor_execute", record)
+
+
+async def _student_account(db: AsyncSession, student: Student) -> dict:
+    user = User(username="stu_cache", role="student", display_name=student.name, is_active=True)
+    db.add(user)
+    await db.flush()
+    student.user_id = user.id
+    await db.commit()
+    # 模拟其他请求：清掉测试 Session 中的对象，保证缓存命中时也不依赖 identity map
+    db.expunge_all()
+    token = create_access_token({"sub": str(user.id), "role": "student"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _queried(statements: list[str], table: str) -> int:
+    return sum(1 for s in statements if f"FROM {table}" in s)
+
+
+class TestUserCache:
+    """已认证用户缓存"""
+
+    async def test_repeat_requests_skip_user_and_student_lookup(
+        self, async_client: AsyncClient, db: AsyncSession, test_student: Student, statements: list[str]
+    ):
+        headers = await _student_account(db, test_student)
+
+        resp = await async_client.get("/api/courses/my", headers=headers)
+        assert resp.status_code == 200
+        assert _queried(statements, "users") == 1
+        first_student_lookups = _queried(statements, "students")
+
+        statements.clear()
+        db.expunge_all()
+        resp = await async_client.get("/api/courses/my", headers=headers)
+        assert resp.status_code == 200
+        assert _queried(statements, "users") == 0
+        assert _queried(statements, "students") == first_student_lookups - 1
+
+        stats = user_cache.stats()
+        assert stats["users"]["hits"] >= 1 and stats["students"]["hits"] >= 1
+
+    async def test_deactivated_student_invalidated(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession, test_student: Student
+    ):
+        headers = await _student_account(db, test_student)
+        assert (await async_client.get("/api/courses/my", headers=headers)).status_code == 200
+
+        resp = await async_client.delete(f"/api/students/{test_student.id}", headers=auth_headers)
+        assert resp.status_code == 204
+        resp = await async_client.get("/api/courses/my", headers=headers)
+        assert resp.status_code == 404
+
+    async def test_disabled_user_rejected(
+        self, async_client: AsyncClient, db: AsyncSession, test_student: Student
+    ):
+        headers = await _student_account(db, test_student)
+        assert (await async_client.get("/api/auth/me", headers=headers)).status_code == 200
+
+        user = await db.get(User, test_student.user_id)
+        user.is_active = False
+        await db.commit()
+        resp = await async_client.get("/api/auth/me", headers=headers)
+        assert resp.status_code == 401
+
+    async def test_cached_user_changes_persist(
+        self, async_client: AsyncClient, db: AsyncSession, test_student: Student
+    ):
+        """命中缓存返回的对象仍挂在当前 Session 上，修改会正常写库"""
+        headers = await _student_account(db, test_student)
+        await async_client.get("/api/auth/me", headers=headers)
+        db.expunge_all()
+
+        user = await get_active_user(db, test_student.user_id)
+        user.display_name = "新名字"
+        await db.commit()
+        db.expunge_all()
+        resp = await async_client.get("/api/auth/me", headers=headers)
+        assert resp.json()["display_name"] == "新名字"
+
+
+class TestTTLCache:
+    """TTL + LRU"""
+
+    def test_lru_eviction_and_expiry(self):
+        cache = TTLCache(max_size=2, ttl=60)
+        cache.set(1, "a")
+        cache.set(2, "b")
+        assert cache.get(1) == "a"
+        cache.set(3, "c")  # 淘汰最久未使用的 2
+        assert cache.get(2) is None
+        assert cache.stats()["evictions"] == 1
+
+        cache.ttl = 0.01
+        cache.set(4, "d")
+        time.sleep(0.02)
+        assert cache.get(4) is None
+        assert cache.stats()["hit_rate"] == round(1 / 3, 4)
+
+
+class TestSystemStats:
+    """/system/stats"""
+
+    async def test_admin_only(
+        self, async_client: AsyncClient, auth_headers: dict, db: AsyncSession, test_student: Student
+    ):
+        resp = await async_client.get("/api/system/stats", headers=auth_headers)
+        assert resp.status_code == 200
+        data = resp.json()
+        assert set(data["user_cache"]) == {"users", "students"}
+        assert data["events"]["backend"] == "memory"
+        assert data["db_pool"]["pool_class"] == "StaticPool"
+
+        headers = await _student_account(db, test_student)
+        resp = await async_client.get("/api/system/stats", headers=headers)
+        assert resp.status_code == 403
+
+
+@pytest.fixture
+async def file_engine(tmp_path):
+    """使用 InstrumentedQueuePool 的 SQLite 文件库（内存库只能用 StaticPool）"""
+    reset_pool_metrics()
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool, pool_size=2, max_overflow=0, pool_timeout=0.05,
+    )
+    yield engine
+    await engine.dispose()
+    reset_pool_metrics()
+
+
+class TestDbPool:
+    """连接池配置与监控"""
+
+    def test_engine_options_from_settings(self, monkeypatch):
+        monkeypatch.setattr("app.config.settings.DB_POOL_SIZE", 20)
+        monkeypatch.setattr("app.config.settings.DB_STATEMENT_CACHE_SIZE", 0)
+        options = database.engine_options("postgresql+asyncpg://u:p@db/app", "replica")
+        assert options["poolclass"] is InstrumentedQueuePool
+        assert options["pool_logging_name"] == "replica"
+        assert options["pool_size"] == 20
+        assert options["echo"] is False
+        assert options["connect_args"] == {"prepared_statement_cache_size": 0, "statement_cache_size": 0}
+        assert "pool_size" not in database.engine_options("sqlite+aiosqlite:///:memory:", "primary")
+
+    async def test_checkout_wait_and_timeout_recorded(self, file_engine):
+        async with file_engine.connect() as first, file_engine.connect() as second:
+            stats = pool_stats(file_engine.pool)
+            assert stats["checked_out"] == 2 and stats["overflow"] == 0
+            with pytest.raises(exc.TimeoutError):
+                async with file_engine.connect():
+                    pass
+
+        stats = pool_stats(file_engine.pool)
+        assert stats["checked_out"] == 0 and stats["checked_in"] == 2
+        assert stats["timeouts"] == 1
+        assert stats["wait_seconds"]["count"] == 3
+        # 超时的那次至少等待了 pool_timeout
+        assert stats["wait_seconds"]["sum"] >= 0.05
+        assert stats["wait_seconds"]["buckets"]["0.025"] <= 2
+        assert stats["wait_seconds"]["buckets"]["+Inf"] == 3
+
+    async def test_warm_up_opens_pool_size_connections(self, file_engine, monkeypatch):
+        monkeypatch.setattr(database, "engine", file_engine)
+        assert await database.warm_up_pool(2) == 2
+        assert file_engine.pool.checkedin() == 2
@@ -5,10 +5,71 @@ const app = getApp()
  * 封装 wx.request，功能：
  * 1. 统一 baseURL
  * 2. 自动加 Authorization header（从 storage 读 token）
- * 3. 统一错误处理（401 跳登录，显示 toast）
+ * 3. 统一错误处理（401 先用刷新 token 续期并重试一次，失败再跳登录，显示 toast）
  * 4. Promise 化
  */
 
+// 进行中的刷新请求：并发的 401 共用同一次刷新，
+// 刷新 token 每次使用后即轮换，重复使用旧 token 会导致整个登录会话被吊销
+let refreshPromise = null
+
+function refreshAccessToken() {
+  const refreshToken = wx.getStorageSync('refreshToken')
+  if (!refreshToken) {
+    return Promise.resolve(null)
+  }
+  if (!refreshPromise) {
+    const baseUrl = app.globalData.apiBaseUrl || 'http://localhost:8000'
+    refreshPromise = new Promise(resolve => {
+      wx.request({
+        url: `${baseUrl}/api/auth/refresh`,
+        method: 'POST',
+        data: { refresh_token: refreshToken },
+        header: { 'Content-Type': 'application/json' },
+        success(res) {
+          if (res.statusCode === 200) {
+            wx.setStorageSync('token', res.data.access_token)
+            wx.setStorageSync('refreshToken', res.data.refresh_token)
+            app.globalData.token = res.data.access_token
+            resolve(res.data.access_token)
+          } else {
+            resolve(null)
+          }
+        },
+        fail() {
+          resolve(null)
+        }
+      })
+    }).then(token => {
+      refreshPromise = null
+      return token
+    })
+  }
+  return refreshPromise
+}
+
+// 登录已失效：清空本地登录态并跳转登录页
+function handleLoginExpired(reject) {
+  wx.removeStorageSync('token')
+  wx.removeStorageSync('refreshToken')
+  wx.removeStorageSync('userInfo')
+  wx.removeStorageSync('studentId')
+
+  wx.showToast({
+    title: '登录已过期，请重新登录',
+    icon: 'none',
+    duration: 2000
+  })
+
+  setTimeout(() => {
+    wx.redirectTo({
+      url: '/pages/login/login'
+    })
+  }, 1500)
+
+  reject({ code: 'TOKEN_EXPIRED', message: '登录已过期' })
+}
+
 function request(options) {
   const { url, method = 'GET', data = {}, showLoading = true, loadingText = '加载中...' } = options
 
@@ -46,25 +107,19 @@ function request(options) {
           return
         }
 
-        // 401 未授权 - 跳转登录
+        // 401 未授权 - 续期后重试一次，仍失败则跳转登录
         if (statusCode === 401) {
-          wx.removeStorageSync('token')
-          wx.removeStorageSync('userInfo')
-          wx.removeStorageSync('studentId')
-
-          wx.showToast({
-            title: '登录已过期，请重新登录',
-            icon: 'none',
-            duration: 2000
+          if (options._retry) {
+            handleLoginExpired(reject)
+            return
+          }
+          refreshAccessToken().then(newToken => {
+            if (newToken) {
+              request({ ...options, _retry: true }).then(resolve, reject)
+            } else {
+              handleLoginExpired(reject)
+            }
           })
-
-          setTimeout(() => {
-            wx.redirectTo({
-              url: '/pages/login/login'
-            })
-          }, 1500)
-
-          reject({ code: 'TOKEN_EXPIRED', message: '登录已过期' })
           return
         }
 
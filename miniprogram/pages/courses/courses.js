@@ -1,5 +1,6 @@
 // pages/courses/courses.js
 const { get } = require('../../api/request')
+const { subscribeEvents } = require('../../utils/events')
 const { formatDate, formatTime, formatDuration, getCourseStatusInfo, isToday, formatMonth } = require('../../utils/format')
 
 Page({
@@ -31,6 +32,29 @@ Page({
   onShow() {
     // 从后台切回时刷新
     this.loadMonthCourses()
+    // 页面显示期间订阅课程状态变化，有变化（或需要 resync）时再刷新，不轮询
+    if (!this.unsubscribeEvents) {
+      this.unsubscribeEvents = subscribeEvents(type => {
+        if (type === 'course_status_changed' || type === 'resync') {
+          this.loadMonthCourses()
+        }
+      })
+    }
+  },
+
+  onHide() {
+    this.stopEvents()
+  },
+
+  onUnload() {
+    this.stopEvents()
+  },
+
+  stopEvents() {
+    if (this.unsubscribeEvents) {
+      this.unsubscribeEvents()
+      this.unsubscribeEvents = null
+    }
   },
 
   onPullDownRefresh() {
@@ -23,9 +23,10 @@ function login() {
           code: code
         }, { showLoading: false })
           .then(data => {
-            // 保存 token
+            // 保存 token（访问 token 短期有效，过期后由请求封装用刷新 token 续期）
             const token = data.access_token
             wx.setStorageSync('token', token)
+            wx.setStorageSync('refreshToken', data.refresh_token)
 
             // 保存用户信息
             const userInfo = data.user
@@ -73,7 +74,14 @@ function getToken() {
  * 退出登录
  */
 function logout() {
+  // 吊销服务端登录会话（失败不影响本地退出）
+  const refreshToken = wx.getStorageSync('refreshToken')
+  if (refreshToken) {
+    post('/api/auth/logout', { refresh_token: refreshToken }, { showLoading: false }).catch(() => {})
+  }
+
   wx.removeStorageSync('token')
+  wx.removeStorageSync('refreshToken')
   wx.removeStorageSync('userInfo')
   wx.removeStorageSync('studentId')
 
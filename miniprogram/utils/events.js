@@ -0,0 +1,111 @@
+// utils/events.js - 实时事件订阅
+const { get } = require('../api/request')
+
+// 连接断开后的重连间隔，连续失败时逐步拉长
+const RECONNECT_MIN_MS = 3000
+const RECONNECT_MAX_MS = 60000
+
+// 所有页面共用一个 WebSocket 连接；最后一个订阅者退出时断开
+const listeners = []
+let socket = null
+let reconnectTimer = null
+let reconnectDelay = RECONNECT_MIN_MS
+let connectedBefore = false
+
+function dispatch(type, data) {
+  listeners.slice().forEach(listener => listener(type, data))
+}
+
+function disconnect() {
+  clearTimeout(reconnectTimer)
+  reconnectTimer = null
+  if (socket) {
+    const current = socket
+    socket = null
+    current.close({})
+  }
+}
+
+function scheduleReconnect() {
+  disconnect()
+  reconnectTimer = setTimeout(() => {
+    reconnectTimer = null
+    // 走普通请求校验登录态：访问 token 过期时由请求封装续期，续期失败则跳转登录
+    get('/api/auth/me', {}, { showLoading: false })
+      .then(() => {
+        reconnectDelay = RECONNECT_MIN_MS
+      })
+      .catch(() => {
+        reconnectDelay = Math.min(reconnectDelay * 2, RECONNECT_MAX_MS)
+      })
+      .then(connect)
+  }, reconnectDelay)
+}
+
+function connect() {
+  const token = wx.getStorageSync('token')
+  if (!token || !listeners.length || socket || reconnectTimer) {
+    return
+  }
+  const baseUrl = getApp().globalData.apiBaseUrl || 'http://localhost:8000'
+  const current = wx.connectSocket({
+    url: `${baseUrl.replace(/^http/, 'ws')}/api/events/ws?token=${encodeURIComponent(token)}`
+  })
+  socket = current
+
+  current.onMessage(res => {
+    let message
+    try {
+      message = JSON.parse(res.data)
+    } catch (e) {
+      return
+    }
+    if (message.type === 'ping') {
+      return
+    }
+    dispatch(message.type, message.data || {})
+    // 断线重连后，断开期间的事件已丢失：通知订阅方按 resync 重新拉取
+    if (message.type === 'ready') {
+      if (connectedBefore) {
+        dispatch('resync', {})
+      }
+      connectedBefore = true
+    }
+  })
+  // 服务端关闭（Token 失效、重启）或网络中断：仍有订阅者时重连
+  current.onClose(() => {
+    if (socket === current) {
+      socket = null
+      scheduleReconnect()
+    }
+  })
+  current.onError(() => {
+    if (socket === current) {
+      socket = null
+      scheduleReconnect()
+    }
+  })
+}
+
+/**
+ * 订阅实时事件（ready / notification_created / course_status_changed / payment_alert / resync），
+ * 返回取消订阅函数。页面只在收到相关事件或 resync 时重新拉取数据，不再轮询。
+ */
+function subscribeEvents(listener) {
+  listeners.push(listener)
+  connect()
+  return function unsubscribe() {
+    const index = listeners.indexOf(listener)
+    if (index >= 0) {
+      listeners.splice(index, 1)
+    }
+    if (!listeners.length) {
+      disconnect()
+      connectedBefore = false
+    }
+  }
+}
+
+module.exports = {
+  subscribeEvents
+}
@@ -0,0 +1,106 @@
+import client, { getToken } from './client'
+
+const BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000'
+
+// 连接被关闭（Token 过期、服务端重启等）后的重连间隔，连续失败时逐步拉长
+const RECONNECT_MIN_MS = 3000
+const RECONNECT_MAX_MS = 60000
+
+export type ServerEventType =
+  | 'ready'
+  | 'notification_created'
+  | 'course_status_changed'
+  | 'payment_alert'
+  | 'resync'
+
+export type ServerEventListener = (type: ServerEventType, data: Record<string, unknown>) => void
+
+const EVENT_TYPES: ServerEventType[] = [
+  'ready',
+  'notification_created',
+  'course_status_changed',
+  'payment_alert',
+  'resync',
+]
+
+// 所有订阅者共用一个 SSE 连接；最后一个订阅者退出时断开
+const listeners = new Set<ServerEventListener>()
+let source: EventSource | null = null
+let reconnectTimer: ReturnType<typeof setTimeout> | undefined
+let reconnectDelay = RECONNECT_MIN_MS
+let connectedBefore = false
+
+const dispatch = (type: ServerEventType, data: Record<string, unknown>) => {
+  listeners.forEach((listener) => listener(type, data))
+}
+
+const disconnect = () => {
+  clearTimeout(reconnectTimer)
+  reconnectTimer = undefined
+  source?.close()
+  source = null
+}
+
+const scheduleReconnect = () => {
+  disconnect()
+  reconnectTimer = setTimeout(async () => {
+    reconnectTimer = undefined
+    try {
+      // 走普通请求校验登录态：访问 Token 过期时由响应拦截器刷新，刷新失败则跳转登录
+      await client.get('/api/auth/me')
+      reconnectDelay = RECONNECT_MIN_MS
+    } catch {
+      reconnectDelay = Math.min(reconnectDelay * 2, RECONNECT_MAX_MS)
+    }
+    connect()
+  }, reconnectDelay)
+}
+
+const connect = () => {
+  const token = getToken()
+  if (!token || !listeners.size || source || reconnectTimer) {
+    return
+  }
+  const eventSource = new EventSource(`${BASE_URL}/api/events/stream?token=${encodeURIComponent(token)}`)
+  EVENT_TYPES.forEach((type) => {
+    eventSource.addEventListener(type, (event) => {
+      let data: Record<string, unknown> = {}
+      try {
+        data = JSON.parse((event as MessageEvent).data)
+      } catch {
+        // 忽略无法解析的负载
+      }
+      dispatch(type, data)
+      // 断线重连后，断开期间的事件已丢失：通知订阅方按 resync 重新拉取
+      if (type === 'ready' && connectedBefore) {
+        dispatch('resync', {})
+      }
+      if (type === 'ready') {
+        connectedBefore = true
+      }
+    })
+  })
+  eventSource.onerror = () => {
+    // 网络中断时 EventSource 按服务端的 retry 自动重连；非 200 响应（如 Token 过期的 401）会直接关闭，需手动重连
+    if (eventSource.readyState === EventSource.CLOSED) {
+      scheduleReconnect()
+    }
+  }
+  source = eventSource
+}
+
+/**
+ * 订阅实时事件（未读数、课程状态、缴费预警），返回取消订阅函数。
+ * 订阅方只在收到相关事件或 resync 时重新拉取数据，不再轮询。
+ */
+export const subscribeEvents = (listener: ServerEventListener): (() => void) => {
+  listeners.add(listener)
+  connect()
+  return () => {
+    listeners.delete(listener)
+    if (!listeners.size) {
+      disconnect()
+      connectedBefore = false
+    }
+  }
+}
@@ -3,6 +3,7 @@ import { Button } from 'antd'
 import { LeftOutlined, RightOutlined } from '@ant-design/icons'
 import dayjs from 'dayjs'
 import { coursesApi } from '../../api/courses'
+import { subscribeEvents } from '../../api/events'
 import type { Course } from '../../types/models'
 import CourseCalendar from './CourseCalendar'
 import CourseCard from './CourseCard'
@@ -16,8 +17,10 @@ const CoursesPage: React.FC = () => {
   const [loading, setLoading] = useState(false)
   const [selectedDate, setSelectedDate] = useState<string | null>(dayjs().format('YYYY-MM-DD'))
 
-  const fetchCourses = useCallback(async () => {
-    setLoading(true)
+  const fetchCourses = useCallback(async (showLoading = true) => {
+    if (showLoading) {
+      setLoading(true)
+    }
     try {
       const startDate = `${year}-${String(month).padStart(2, '0')}-01`
       const lastDay = dayjs(startDate).daysInMonth()
@@ -39,6 +42,15 @@ const CoursesPage: React.FC = () => {
     fetchCourses()
   }, [fetchCourses])
 
+  // 课程状态变化（上课、取消等）或需要 resync 时后台刷新当月课程
+  useEffect(() => {
+    return subscribeEvents((type) => {
+      if (type === 'course_status_changed' || type === 'resync') {
+        fetchCourses(false)
+      }
+    })
+  }, [fetchCourses])
+
   const handlePrevMonth = () => {
     if (month === 1) {
       setYear(year - 1)
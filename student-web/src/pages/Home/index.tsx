@@ -11,6 +11,7 @@ import dayjs from 'dayjs'
 import { useNavigate } from 'react-router-dom'
 import { billingApi, type StudentAccount } from '../../api/billing'
 import { coursesApi } from '../../api/courses'
+import { subscribeEvents } from '../../api/events'
 import { assignmentsApi } from '../../api/assignments'
 import { feedbackApi } from '../../api/feedback'
 import type { Course, MyAssignment, MyFeedback } from '../../types/models'
@@ -18,6 +19,8 @@ import LoadingSpinner from '../../components/LoadingSpinner'
 import EmptyState from '../../components/EmptyState'
 import { formatCurrency, formatTime, formatDuration, getCourseStatusLabel } from '../../utils/format'
 
+const HOME_REFRESH_DEBOUNCE_MS = 500
+
 const sectionTitleStyle: React.CSSProperties = {
   display: 'flex',
   alignItems: 'center',
@@ -43,8 +46,10 @@ const HomePage: React.FC = () => {
   const [loading, setLoading] = useState(true)
 
   useEffect(() => {
-    const fetchHome = async () => {
-      setLoading(true)
+    const fetchHome = async (showLoading = true) => {
+      if (showLoading) {
+        setLoading(true)
+      }
       try {
         const today = dayjs().format('YYYY-MM-DD')
         const monthLater = dayjs().add(30, 'day').format('YYYY-MM-DD')
@@ -76,6 +81,19 @@ const HomePage: React.FC = () => {
     }
 
     fetchHome()
+
+    // 课程状态、余额预警、新反馈通知或 resync 时后台刷新首页（同一批事件合并为一次请求）
+    let timer: ReturnType<typeof setTimeout> | undefined
+    const unsubscribe = subscribeEvents((type) => {
+      if (type !== 'ready') {
+        clearTimeout(timer)
+        timer = setTimeout(() => fetchHome(false), HOME_REFRESH_DEBOUNCE_MS)
+      }
+    })
+    return () => {
+      clearTimeout(timer)
+      unsubscribe()
+    }
   }, [])
 
   const nextCourses = useMemo(
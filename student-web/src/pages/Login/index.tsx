@@ -14,7 +14,7 @@ const LoginPage: React.FC = () => {
     setLoading(true)
     try {
       const result = await authApi.login(values)
-      login(result.access_token, {
+      login(result.access_token, result.refresh_token, {
         id: result.user.id,
         username: result.user.username,
         role: result.user.role,
@@ -1,6 +1,6 @@
 import { create } from 'zustand'
 import { persist, createJSONStorage } from 'zustand/middleware'
-import { getToken, setToken, removeToken } from '../api/client'
+import { getToken, setToken, setRefreshToken, removeToken, revokeSession } from '../api/client'
 
 export interface AuthUser {
   id: number
@@ -13,7 +13,7 @@ export interface AuthUser {
 interface AuthState {
   user: AuthUser | null
   isAuthenticated: boolean
-  login: (token: string, user: AuthUser) => void
+  login: (token: string, refreshToken: string, user: AuthUser) => void
   logout: () => void
 }
 
@@ -23,12 +23,14 @@ export const useAuthStore = create<AuthState>()(
       user: null,
       isAuthenticated: !!getToken(),
 
-      login: (token: string, user: AuthUser) => {
+      login: (token: string, refreshToken: string, user: AuthUser) => {
         setToken(token)
+        setRefreshToken(refreshToken)
         set({ user, isAuthenticated: true })
       },
 
       logout: () => {
+        revokeSession()
         removeToken()
         set({ user: null, isAuthenticated: false })
       },